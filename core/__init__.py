@@ -1,2 +1,18 @@
 from .config import PAPER_SIZES, PDF_SETTINGS, IMAGE_DEVICES, DPI_OPTIONS
+from .result import JobResult
 from .ghostscript import GhostscriptWrapper
+from .async_ghostscript import AsyncGhostscriptWrapper, ProgressStream
+from .history import JobHistory
+from .linearization import check_linearization, LinearizationReport
+from .profiles import CompressionProfile, ProfileError, load_profiles
+from .dedup import dedupe_pdf, DedupReport
+from .page_cost import analyze_pages, balance_shards, PageCost
+from .selective import selective_compress, SelectiveReport
+from .incremental import page_fingerprints, IncrementalPlan
+from .raster import RasterStream, RasterError
+from .blank_pages import detect_blank_pages, BlankReport
+from .size_split import SizeIndex
+from .page_color import classify_pages, ColorReport
+from .bilevel import prepare_bilevel, BilevelReport
+from .image_optimize import optimize_images, ImageOptimizeReport
+from .journal import JobJournal
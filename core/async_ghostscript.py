@@ -0,0 +1,764 @@
+# -*- coding: utf-8 -*-
+"""
+Ghostscript 非同步指令包裝器
+以 asyncio.create_subprocess_exec 執行各種 Ghostscript 操作，
+支援逾時、取消，以及以 async iterator 串流進度
+"""
+
+import asyncio
+import functools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Union
+
+from .config import IMAGE_DEVICES, PARALLEL_MAX_JOBS, SIZE_SPLIT
+from .ghostscript import GhostscriptWrapper
+from .journal import JobJournal, PageCollector, partial_path
+from .page_ranges import format_page_ranges, pages_to_ranges
+from .pdf_reader import PdfError
+from .profiles import CompressionProfile
+from .result import JobResult
+from . import metrics
+
+
+# 進度回調 (current_page, status_text)
+PageCallback = Callable[[int, str], None]
+# 進度回調 (current, total, status)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+class ProgressStream:
+    """
+    以 async iterator 逐筆取得進度的操作
+
+    用法:
+        stream = wrapper.stream("compress_pdf", input_file=..., output_file=...)
+        async for current, total, status in stream:
+            ...
+        result = stream.result  # JobResult
+
+    迭代時才會啟動 Ghostscript；迭代中途離開或被取消時會終止 Ghostscript 程序。
+    """
+
+    def __init__(self, start: Callable[[ProgressCallback], Awaitable[JobResult]]):
+        self._start = start
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Future] = None
+        self.result: Optional[JobResult] = None
+
+    def __aiter__(self) -> "ProgressStream":
+        return self
+
+    async def __anext__(self) -> tuple[int, int, str]:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.ensure_future(
+                self._start(lambda c, t, s: self._queue.put_nowait((c, t, s)))
+            )
+
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+
+        if self._task.done():
+            self.result = self._task.result()
+            raise StopAsyncIteration
+
+        getter = asyncio.ensure_future(self._queue.get())
+        try:
+            done, _ = await asyncio.wait(
+                {getter, self._task},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            getter.cancel()
+            self._task.cancel()
+            raise
+
+        if getter in done:
+            return getter.result()
+
+        getter.cancel()
+        # 程序已結束，先送出剩餘的進度再結束迭代
+        return await self.__anext__()
+
+    async def aclose(self):
+        """中止操作 (終止 Ghostscript 程序)"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def cancel(self):
+        """要求取消操作"""
+        if self._task is not None:
+            self._task.cancel()
+
+
+class AsyncGhostscriptWrapper:
+    """
+    Ghostscript 非同步指令包裝器
+
+    與 GhostscriptWrapper 有相同的操作與回傳值 (JobResult)，
+    但所有操作都是 coroutine，不會阻塞 event loop。
+    CPU 時間與最大記憶體無法由 asyncio 取得，結果中為 None。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        wrapper: Optional[GhostscriptWrapper] = None
+    ):
+        """
+        Args:
+            max_concurrency: 同時執行的 Ghostscript 程序上限 (None=不限制)
+            timeout: 預設逾時秒數 (None=不限制)
+            wrapper: 用來建立命令參數的同步包裝器 (None=自動建立)
+        """
+        self._sync = wrapper or GhostscriptWrapper()
+        self.gs_path = self._sync.gs_path
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def _exec(
+        self,
+        cmd: List[str],
+        on_line: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """
+        執行命令並收集輸出
+
+        逾時會終止程序並回傳失敗；被取消時終止程序後重新拋出 CancelledError。
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        if self._semaphore is not None:
+            async with self._semaphore:
+                return await self._exec_unlimited(cmd, on_line, timeout)
+        return await self._exec_unlimited(cmd, on_line, timeout)
+
+    async def _exec_unlimited(
+        self,
+        cmd: List[str],
+        on_line: Optional[Callable[[str], None]],
+        timeout: Optional[float]
+    ) -> JobResult:
+        """執行命令 (不經過並行數限制)"""
+        result = JobResult()
+        start = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT
+            )
+        except Exception as e:
+            result.message = str(e)
+            return result
+        result.spawn_time = time.perf_counter() - start
+        metrics.record_spawn(result.spawn_time)
+
+        page_lines = 0
+
+        async def collect():
+            nonlocal page_lines
+            while True:
+                raw = await process.stdout.readline()
+                if not raw:
+                    break
+                line = raw.decode(errors="replace")
+                result.append_log(line)
+                if line.startswith("Page "):
+                    page_lines += 1
+                if on_line:
+                    on_line(line)
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(collect(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            result.message = f"Ghostscript 執行逾時 ({timeout} 秒)"
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+        except Exception as e:
+            await self._kill(process)
+            result.message = str(e)
+        else:
+            result.exit_code = process.returncode
+            result.success = process.returncode == 0
+
+        result.wall_time = time.perf_counter() - start
+        if page_lines:
+            result.pages = page_lines
+        return result
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process):
+        """終止程序並回收"""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    async def _run_command_fast(self, args: List[str], timeout: Optional[float] = None) -> JobResult:
+        """快速執行 Ghostscript 指令（無進度追蹤，-q 靜默模式）"""
+        return await self._exec([self.gs_path, "-q"] + args, timeout=timeout)
+
+    async def _run_command(
+        self,
+        args: List[str],
+        progress_callback: Optional[PageCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """執行 Ghostscript 指令（含進度追蹤）"""
+        current_page = 0
+
+        def on_line(line: str):
+            nonlocal current_page
+            current_page, status = self._sync._parse_progress_line(line, current_page)
+            if progress_callback and status:
+                progress_callback(current_page, status)
+
+        return await self._exec([self.gs_path] + args, on_line, timeout)
+
+    async def _run_command_with_progress(
+        self,
+        args: List[str],
+        input_file: str,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """有進度回調時追蹤頁面進度，否則使用快速模式"""
+        if progress_callback is None:
+            return await self._run_command_fast(args, timeout)
+
+        total_pages = await self.get_pdf_page_count(input_file)
+
+        def internal_callback(current_page: int, status: str):
+            if total_pages > 0:
+                progress_callback(current_page, total_pages, status)
+
+        return await self._run_command(args, internal_callback, timeout)
+
+    async def _finish_result(self, result: JobResult, operation: str, *args, **kwargs) -> JobResult:
+        """
+        在執行緒中整理結果 (參數同 GhostscriptWrapper._finish_result)
+
+        統計輸出檔、檢查線性化與寫入工作記錄 (可能需要查詢頁數) 都是同步的，不在事件迴圈上執行
+        """
+        finish = functools.partial(self._sync._finish_result, result, operation, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(None, finish)
+
+    async def resize_pdf(
+        self,
+        input_file: str,
+        output_file: str,
+        paper_size: str = "A4",
+        custom_width: Optional[int] = None,
+        custom_height: Optional[int] = None,
+        fit_page: bool = True,
+        dpi: Optional[int] = None,
+        pdf_settings: Optional[str] = None,
+        linearize: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """調整 PDF 頁面大小 (參數同 GhostscriptWrapper.resize_pdf)"""
+        args = self._sync._build_resize_args(
+            input_file, output_file, paper_size, custom_width, custom_height,
+            fit_page, dpi, pdf_settings, linearize
+        )
+        result = await self._run_command_with_progress(args, input_file, progress_callback, timeout)
+        return await self._finish_result(
+            result, "resize_pdf", [input_file], [output_file],
+            options={
+                "paper_size": paper_size, "custom_width": custom_width,
+                "custom_height": custom_height, "fit_page": fit_page,
+                "dpi": dpi, "pdf_settings": pdf_settings, "linearize": linearize,
+            }
+        )
+
+    async def pdf_to_image(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str = "PNG",
+        dpi: int = 150,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        pages: Optional[str] = None,
+        jobs: int = 1,
+        render_preset: Optional[str] = None,
+        incremental: bool = False,
+        resume: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """PDF 轉圖片 (參數同 GhostscriptWrapper.pdf_to_image)"""
+        started_at = time.time()
+        jobs = max(1, min(jobs, PARALLEL_MAX_JOBS))
+        loop = asyncio.get_running_loop()
+        if incremental and resume:
+            raise ValueError("增量轉換與續傳不能同時使用")
+        plan = journal = None
+        if incremental:
+            plan = await loop.run_in_executor(
+                None, self._sync._plan_incremental,
+                input_file, output_pattern, device, dpi, first_page, last_page, pages, render_preset
+            )
+            pages = format_page_ranges(pages_to_ranges(plan.render)) if plan.render else None
+        if resume:
+            journal, remaining = await loop.run_in_executor(
+                None, self._sync._plan_resume,
+                input_file, output_pattern, device, dpi, first_page, last_page, pages, render_preset
+            )
+            pages = format_page_ranges(pages_to_ranges(remaining)) if remaining else None
+        if (plan is not None and not plan.render) or (journal is not None and not pages):
+            result = JobResult(success=True)
+        elif IMAGE_DEVICES.get(device) == "auto":
+            result = await self._pdf_to_image_auto(
+                input_file, output_pattern, dpi, first_page, last_page, pages, jobs, render_preset,
+                progress_callback, timeout, journal
+            )
+        elif pages:
+            result = await self._pdf_to_image_pages(
+                input_file, output_pattern, device, dpi, pages, jobs, render_preset, progress_callback, timeout,
+                journal
+            )
+        elif jobs > 1 and "%" in output_pattern:
+            result = await self._pdf_to_image_parallel(
+                input_file, output_pattern, device, dpi, first_page, last_page, jobs, render_preset,
+                progress_callback, timeout
+            )
+        else:
+            args = self._sync._build_pdf_to_image_args(
+                input_file, output_pattern, device, dpi, first_page, last_page, render_preset
+            )
+            result = await self._run_command_with_progress(args, input_file, progress_callback, timeout)
+        if plan is not None:
+            await loop.run_in_executor(None, self._sync._finish_incremental, result, plan, started_at)
+        if journal is not None:
+            await loop.run_in_executor(None, self._sync._finish_resume, result, journal)
+        return await self._finish_result(
+            result, "pdf_to_image", [input_file],
+            output_pattern=output_pattern, started_at=started_at,
+            options={"device": device, "dpi": dpi, "first_page": first_page, "last_page": last_page,
+                     "pages": pages, "render_preset": render_preset, "incremental": incremental,
+                     "resume": resume}
+        )
+
+    async def _pdf_to_image_auto(
+        self,
+        input_file: str,
+        output_pattern: str,
+        dpi: int,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        pages: Optional[str],
+        jobs: int,
+        render_preset: Optional[str],
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+        journal: Optional[JobJournal] = None
+    ) -> JobResult:
+        """自動圖片格式 (同 GhostscriptWrapper._pdf_to_image_auto；分類與抽樣估計在執行緒中執行)"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        result = JobResult(success=True)
+        report = await loop.run_in_executor(
+            None, self._sync._classify_for_auto,
+            input_file, output_pattern, first_page, last_page, pages, jobs, result
+        )
+        done = 0
+        for page_class, device, group_pages in self._sync._auto_groups(report):
+            callback = None
+            if progress_callback:
+                def callback(current: int, total: int, status: str, offset: int = done):
+                    progress_callback(offset + current, len(report.classes), status)
+            result.add(await self._pdf_to_image_pages(
+                input_file, output_pattern, device, dpi, group_pages, jobs, render_preset, callback, timeout,
+                journal
+            ))
+            done += len(report.pages_of(page_class))
+        await loop.run_in_executor(
+            None, self._sync._finish_auto, input_file, output_pattern, dpi, render_preset, report, result
+        )
+        result.wall_time = time.perf_counter() - started
+        return result
+
+    async def _pdf_to_image_pages(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        pages: str,
+        jobs: int,
+        render_preset: Optional[str],
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+        journal: Optional[JobJournal] = None
+    ) -> JobResult:
+        """轉換頁碼運算式指定的頁面 (見 GhostscriptWrapper._pdf_to_image_pages)"""
+        loop = asyncio.get_running_loop()
+        selected, use_page_list, groups = await loop.run_in_executor(
+            None, self._sync._plan_page_groups, input_file, pages, jobs
+        )
+        if "%" not in output_pattern:
+            if len(selected) > 1 and not use_page_list:
+                raise ValueError("此 Ghostscript 版本不支援 -sPageList，轉換多個不連續頁碼時輸出檔名需要包含 %d")
+            args = self._sync._page_group_args(
+                input_file, output_pattern, device, dpi, selected, use_page_list, render_preset
+            )
+            return await self._run_command_with_progress(args, input_file, progress_callback, timeout)
+
+        work_dir = tempfile.mkdtemp(prefix="gsgui-pages-", dir=os.path.dirname(os.path.abspath(output_pattern)))
+        workers = len(groups) if use_page_list else min(len(groups), PARALLEL_MAX_JOBS)
+        semaphore = asyncio.Semaphore(max(1, workers))
+        # 收集輸出 (改名、SHA-256、fsync) 不在事件迴圈中執行；單一執行緒依序處理，保持各組的收集順序
+        collect_pool = ThreadPoolExecutor(max_workers=1)
+        done = 0
+
+        async def run_group(index: int, group: List[int]) -> JobResult:
+            pattern = self._sync._shard_pattern(work_dir, index, output_pattern)
+            collector = PageCollector(pattern, output_pattern, group, journal)
+            collecting: List[asyncio.Future] = []
+
+            last_page_seen = 0
+
+            def on_page(current_page: int, status: str):
+                nonlocal done, last_page_seen
+                if current_page == last_page_seen:
+                    return
+                last_page_seen = current_page
+                collecting.append(loop.run_in_executor(collect_pool, collector.page_started))
+                if progress_callback:
+                    done += 1
+                    progress_callback(done, len(selected), status)
+
+            args = self._sync._page_group_args(input_file, pattern, device, dpi, group, use_page_list, render_preset)
+            async with semaphore:
+                group_result = await self._run_command(args, on_page, timeout)
+            await asyncio.gather(*collecting)
+            await loop.run_in_executor(collect_pool, collector.finish, group_result.success)
+            return group_result
+
+        started = time.perf_counter()
+        result = JobResult(success=True)
+        try:
+            for group_result in await asyncio.gather(*(run_group(i, g) for i, g in enumerate(groups))):
+                result.add(group_result)
+        finally:
+            # 取消時等待已排入的收集完成，才刪除暫存資料夾
+            collect_pool.shutdown(wait=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+        result.wall_time = time.perf_counter() - started
+        result.append_log(self._sync._page_groups_log(use_page_list, groups))
+        return result
+
+    async def _pdf_to_image_parallel(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        jobs: int,
+        render_preset: Optional[str],
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """依頁面成本分段平行轉換 (見 GhostscriptWrapper._pdf_to_image_parallel)"""
+        loop = asyncio.get_running_loop()
+        first, count, shards = await loop.run_in_executor(
+            None, self._sync._plan_image_shards, input_file, first_page, last_page, jobs
+        )
+        if len(shards) <= 1:
+            args = self._sync._build_pdf_to_image_args(
+                input_file, output_pattern, device, dpi, first_page, last_page, render_preset
+            )
+            return await self._run_command_with_progress(args, input_file, progress_callback, timeout)
+
+        work_dir = tempfile.mkdtemp(prefix="gsgui-shards-", dir=os.path.dirname(os.path.abspath(output_pattern)))
+        done = 0
+
+        async def run_shard(index: int, shard: tuple) -> JobResult:
+            pattern = self._sync._shard_pattern(work_dir, index, output_pattern)
+
+            last_page_seen = 0
+
+            def on_page(current_page: int, status: str):
+                nonlocal done, last_page_seen
+                # 只在頁碼改變時計數 (其他輸出行的頁碼不變)
+                if current_page != last_page_seen and progress_callback:
+                    last_page_seen = current_page
+                    done += 1
+                    progress_callback(done, count, status)
+
+            args = self._sync._build_pdf_to_image_args(
+                input_file, pattern, device, dpi, shard[0], shard[1], render_preset
+            )
+            shard_result = await self._run_command(args, on_page, timeout)
+            self._sync._collect_shard_outputs(pattern, output_pattern, first, shard)
+            return shard_result
+
+        started = time.perf_counter()
+        result = JobResult(success=True)
+        try:
+            for shard_result in await asyncio.gather(*(run_shard(i, s) for i, s in enumerate(shards))):
+                result.add(shard_result)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        result.wall_time = time.perf_counter() - started
+        result.append_log(self._sync._shards_log(shards))
+        return result
+
+    async def merge_pdfs(
+        self,
+        input_files: List[str],
+        output_file: str,
+        linearize: bool = False,
+        dedupe: bool = False,
+        remove_blank: bool = False,
+        blank_threshold: Optional[float] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """合併多個 PDF (參數同 GhostscriptWrapper.merge_pdfs)"""
+        counts = await asyncio.gather(*(self.get_pdf_page_count(f) for f in input_files))
+        total_pages = sum(counts)
+
+        pre = JobResult(success=True)
+        sources, temp_files = input_files, []
+        if remove_blank:
+            # 偵測與去除空白頁會同步等待 Ghostscript，放到執行緒中
+            sources, temp_files = await asyncio.get_running_loop().run_in_executor(
+                None, self._sync._remove_blank_inputs, input_files, output_file, blank_threshold, pre
+            )
+            total_pages -= self._sync._blank_removed_count(pre)
+
+        merged_file = output_file + ".merge.tmp" if dedupe else output_file
+        args = self._sync._build_merge_args(sources, merged_file, linearize and not dedupe, dedupe)
+
+        def internal_callback(current_page: int, status: str):
+            if progress_callback and total_pages > 0:
+                progress_callback(current_page, total_pages, status)
+
+        try:
+            result = await self._run_command(args, internal_callback, timeout)
+        finally:
+            for path in temp_files:
+                if os.path.exists(path):
+                    os.remove(path)
+        result.add(pre)
+        if dedupe:
+            # 解析與改寫 PDF 是同步的檔案操作，放到執行緒中避免阻塞事件迴圈
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._sync._dedupe_merged, result, merged_file, output_file, linearize
+            )
+        return await self._finish_result(
+            result, "merge_pdfs", input_files, [output_file], pages=total_pages or None,
+            options={"linearize": linearize, "dedupe": dedupe, "remove_blank": remove_blank}
+        )
+
+    async def split_pdf(
+        self,
+        input_file: str,
+        output_file: str,
+        first_page: int,
+        last_page: int,
+        linearize: bool = False,
+        remove_blank: bool = False,
+        blank_threshold: Optional[float] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """分割 PDF (參數同 GhostscriptWrapper.split_pdf)"""
+        total_pages = last_page - first_page + 1
+
+        pre = JobResult(success=True)
+        page_list = None
+        if remove_blank:
+            page_list = await asyncio.get_running_loop().run_in_executor(
+                None, self._sync._blank_page_list, input_file, first_page, last_page, blank_threshold, pre
+            )
+            total_pages -= self._sync._blank_removed_count(pre)
+        part_file = partial_path(output_file)
+        args = self._sync._build_split_args(input_file, part_file, first_page, last_page, linearize, page_list)
+
+        def internal_callback(current_page: int, status: str):
+            if progress_callback and total_pages > 0:
+                relative_page = current_page - first_page + 1
+                progress_callback(relative_page, total_pages, status)
+
+        result = await self._run_command(args, internal_callback, timeout)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._sync._commit_partial, result, part_file, output_file
+        )
+        result.add(pre)
+        return await self._finish_result(
+            result, "split_pdf", [input_file], [output_file], pages=total_pages,
+            options={"first_page": first_page, "last_page": last_page, "linearize": linearize,
+                     "remove_blank": remove_blank}
+        )
+
+    async def split_pdf_by_size(
+        self,
+        input_file: str,
+        output_file: str,
+        max_bytes: int,
+        linearize: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """依檔案大小分割 PDF (參數同 GhostscriptWrapper.split_pdf_by_size；timeout 為每次執行 Ghostscript)"""
+        options = {"max_bytes": max_bytes, "linearize": linearize}
+        loop = asyncio.get_running_loop()
+        result = JobResult(success=True)
+        try:
+            index = await loop.run_in_executor(None, self._sync._size_index, input_file)
+        except (PdfError, OSError) as e:
+            result.success = False
+            result.message = f"無法分析 PDF 結構: {e}"
+            return await self._finish_result(result, "split_pdf", [input_file], [], options=options)
+
+        pending = index.plan(int(max_bytes * SIZE_SPLIT["margin"]))
+        done: List[tuple] = []
+        passes = 0
+        work_dir = tempfile.mkdtemp(prefix=".split-", dir=os.path.dirname(os.path.abspath(output_file)))
+        try:
+            while pending and result.success:
+                passes += 1
+                retry: List[tuple] = []
+                for i, part in enumerate(pending):
+                    if progress_callback:
+                        total = len(done) + len(retry) + len(pending) - i
+                        progress_callback(len(done) + 1, total, f"輸出第 {part[0]}-{part[1]} 頁...")
+                    path = os.path.join(work_dir, f"{part[0]:06d}-{part[1]:06d}.pdf")
+                    args = self._sync._build_split_args(input_file, path, part[0], part[1], linearize)
+                    run = await self._run_command_fast(args, timeout)
+                    result.add(run)
+                    if not run.success:
+                        break
+                    await loop.run_in_executor(
+                        None, self._sync._check_size_part, index, part, path, max_bytes, passes, done, retry
+                    )
+                pending = retry
+            if result.success:
+                await loop.run_in_executor(
+                    None, self._sync._finish_size_split, result, done, output_file, max_bytes, passes
+                )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return await self._finish_result(
+            result, "split_pdf", [input_file], result.output_files, pages=result.pages, options=options
+        )
+
+    async def compress_pdf(
+        self,
+        input_file: str,
+        output_file: str,
+        pdf_settings: str = "ebook",
+        linearize: bool = False,
+        profile: Union[str, CompressionProfile, None] = None,
+        selective: bool = False,
+        compare_full: bool = False,
+        remove_blank: bool = False,
+        blank_threshold: Optional[float] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None
+    ) -> JobResult:
+        """壓縮 PDF (參數同 GhostscriptWrapper.compress_pdf)"""
+        profile = self._sync._resolve_profile(profile)
+        loop = asyncio.get_running_loop()
+        if selective:
+            # 選擇性壓縮是同步的檔案操作，放到執行緒中避免阻塞事件迴圈；進度回到事件迴圈回報
+            callback = None
+            if progress_callback:
+                def callback(current: int, total: int, status: str):
+                    loop.call_soon_threadsafe(progress_callback, current, total, status)
+            result = await loop.run_in_executor(
+                None, self._sync._compress_selective,
+                input_file, output_file, pdf_settings, linearize, profile, compare_full, callback
+            )
+            if remove_blank:
+                result.warnings.append("選擇性壓縮不會移除空白頁")
+            return result
+        pre = JobResult(success=True)
+        page_list = None
+        if remove_blank:
+            if progress_callback:
+                progress_callback(0, 1, "偵測空白頁...")
+            page_list = await loop.run_in_executor(
+                None, self._sync._blank_page_list, input_file, None, None, blank_threshold, pre
+            )
+        args = self._sync._build_compress_args(input_file, output_file, pdf_settings, linearize, profile, page_list)
+        result = await self._run_command_with_progress(args, input_file, progress_callback, timeout)
+        result.add(pre)
+        options = self._sync._compress_options(pdf_settings, linearize, profile)
+        options["remove_blank"] = remove_blank
+        return await self._finish_result(result, "compress_pdf", [input_file], [output_file], options=options)
+
+    async def get_pdf_page_count(self, input_file: str, timeout: Optional[float] = None) -> int:
+        """取得 PDF 頁數 (與同步包裝器共用快取)"""
+        cached = self._sync._cached_page_count(input_file)
+        if cached is not None:
+            return cached
+        result = await self._run_command_fast(
+            self._sync._build_page_count_args(input_file), timeout
+        )
+        count = self._sync._parse_page_count(result.success, result.output)
+        self._sync._store_page_count(input_file, count)
+        return count
+
+    async def get_pdf_page_boxes(self, input_file: str, timeout: Optional[float] = None) -> List[tuple]:
+        """取得各頁大小 (與同步包裝器共用快取)"""
+        cached = self._sync._cached_page_boxes(input_file)
+        if cached is not None:
+            return cached
+        result = await self._run_command_fast(
+            self._sync._build_page_boxes_args(input_file), timeout
+        )
+        boxes = self._sync._parse_page_boxes(result.success, result.output)
+        self._sync._store_page_boxes(input_file, boxes)
+        return boxes
+
+    def stream(self, operation: str, **kwargs) -> ProgressStream:
+        """
+        以 async iterator 串流操作進度
+
+        Args:
+            operation: 操作名稱 (resize_pdf, pdf_to_image, merge_pdfs, split_pdf, compress_pdf)
+            **kwargs: 傳給該操作的參數 (progress_callback 除外)
+
+        Returns:
+            ProgressStream，迭代得到 (current, total, status)，結束後由 result 取得結果
+        """
+        if operation not in ("resize_pdf", "pdf_to_image", "merge_pdfs", "split_pdf", "compress_pdf"):
+            raise ValueError(f"不支援的操作: {operation}")
+        method = getattr(self, operation)
+
+        def start(callback: ProgressCallback):
+            return method(progress_callback=callback, **kwargs)
+
+        return ProgressStream(start)
+
+    async def iter_page_counts(self, input_files: List[str]) -> AsyncIterator[tuple[str, int]]:
+        """依完成順序逐一產生 (檔案, 頁數)"""
+        async def probe(path: str) -> tuple[str, int]:
+            return path, await self.get_pdf_page_count(path)
+
+        for future in asyncio.as_completed([probe(f) for f in input_files]):
+            yield await future
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+壓縮基準測試
+以同一批 PDF (基準語料) 比較各壓縮設定檔與 PDFSETTINGS 預設值的輸出大小與耗時，
+以及轉圖片各繪製預設值的每秒頁數
+"""
+
+import json
+import os
+import statistics
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .config import PDF_SETTINGS, RENDER_PRESETS
+from .ghostscript import GhostscriptWrapper
+from .profiles import load_profiles
+
+
+# 預設的比較基準
+BENCHMARK_BASELINE = "preset:ebook"
+
+
+def find_corpus(path: str) -> List[str]:
+    """列出基準語料 (資料夾中所有 PDF，含子資料夾；也可以直接指定單一檔案)"""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(".pdf"))
+    return files
+
+
+def benchmark_variants(
+    presets: Optional[Sequence[str]] = None,
+    profiles: Optional[Sequence[str]] = None,
+    selective: bool = False
+) -> List[str]:
+    """
+    要比較的設定 ("preset:ebook"、"profile:web"、"selective:web" 形式)
+
+    Args:
+        presets: PDFSETTINGS 名稱 (None=全部)
+        profiles: 設定檔名稱 (None=全部內建與自訂設定檔)
+        selective: 每個設定檔再加上一個選擇性壓縮 (只重新壓縮過大圖片) 的版本
+    """
+    presets = list(PDF_SETTINGS) if presets is None else list(presets)
+    profiles = list(load_profiles()) if profiles is None else list(profiles)
+    variants = [f"preset:{p}" for p in presets] + [f"profile:{p}" for p in profiles]
+    if selective:
+        variants += [f"selective:{p}" for p in profiles]
+    return variants
+
+
+def run_benchmark(
+    files: Sequence[str],
+    variants: Sequence[str],
+    wrapper: Optional[GhostscriptWrapper] = None,
+    repeat: int = 1,
+    progress: Optional[Callable[[int, int, str], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    對每個檔案執行每個設定
+
+    Args:
+        files: 輸入 PDF
+        variants: 設定 (見 benchmark_variants)
+        wrapper: GhostscriptWrapper (預設建立不寫入工作記錄的包裝器)
+        repeat: 每個組合執行次數，耗時取中位數
+        progress: 進度回調 (目前, 總數, 說明)
+
+    Returns:
+        每個 (檔案, 設定) 一筆：file, variant, success, input_bytes, output_bytes, seconds, error
+    """
+    wrapper = wrapper or GhostscriptWrapper()
+    total = len(files) * len(variants)
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="gsgui-bench-") as work_dir:
+        output_file = os.path.join(work_dir, "output.pdf")
+        for file_index, input_file in enumerate(files):
+            for variant_index, variant in enumerate(variants):
+                kind, _, name = variant.partition(":")
+                if progress:
+                    progress(file_index * len(variants) + variant_index + 1, total,
+                             f"{os.path.basename(input_file)} [{variant}]")
+                if kind == "preset":
+                    kwargs = {"pdf_settings": name}
+                else:
+                    kwargs = {"profile": name, "selective": kind == "selective"}
+
+                row = {"file": input_file, "variant": variant, "success": False,
+                       "input_bytes": os.path.getsize(input_file), "output_bytes": None,
+                       "seconds": None, "error": None}
+                times = []
+                try:
+                    for _ in range(max(1, repeat)):
+                        result = wrapper.compress_pdf(input_file, output_file, **kwargs)
+                        if not result.success:
+                            row["error"] = (result.message or result.output)[-200:]
+                            break
+                        times.append(result.wall_time)
+                        row["output_bytes"] = result.output_bytes
+                except ValueError as e:
+                    row["error"] = str(e)
+                if times and row["error"] is None:
+                    row["success"] = True
+                    row["seconds"] = statistics.median(times)
+                rows.append(row)
+    return rows
+
+
+def summarize(rows: List[Dict[str, Any]], baseline: str = BENCHMARK_BASELINE) -> List[Dict[str, Any]]:
+    """
+    依設定彙總，並與基準設定比較
+
+    相對大小與相對耗時只計算兩個設定都成功的檔案，比值小於 1 表示比基準小 (快)。
+    """
+    by_variant: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_variant.setdefault(row["variant"], []).append(row)
+    base_rows = {row["file"]: row for row in by_variant.get(baseline, []) if row["success"]}
+
+    summary = []
+    for variant, variant_rows in by_variant.items():
+        ok = [row for row in variant_rows if row["success"]]
+        paired = [row for row in ok if row["file"] in base_rows]
+        input_bytes = sum(row["input_bytes"] for row in ok)
+        output_bytes = sum(row["output_bytes"] for row in ok)
+        item = {
+            "variant": variant,
+            "files": len(variant_rows),
+            "failed": len(variant_rows) - len(ok),
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes,
+            "ratio": output_bytes / input_bytes if input_bytes else None,
+            "seconds": sum(row["seconds"] for row in ok),
+            "size_vs_baseline": None,
+            "time_vs_baseline": None,
+        }
+        base_bytes = sum(base_rows[row["file"]]["output_bytes"] for row in paired)
+        base_seconds = sum(base_rows[row["file"]]["seconds"] for row in paired)
+        if paired and base_bytes:
+            item["size_vs_baseline"] = sum(row["output_bytes"] for row in paired) / base_bytes
+        if paired and base_seconds:
+            item["time_vs_baseline"] = sum(row["seconds"] for row in paired) / base_seconds
+        summary.append(item)
+    return summary
+
+
+def format_summary(summary: List[Dict[str, Any]], baseline: str = BENCHMARK_BASELINE) -> str:
+    """彙總表格 (文字)"""
+    def ratio(value: Optional[float]) -> str:
+        return f"{value:.2f}" if value is not None else "-"
+
+    lines = [
+        f"{'設定':<22}{'檔案':>6}{'失敗':>6}{'輸入 MB':>10}{'輸出 MB':>10}{'輸出/輸入':>10}"
+        f"{'耗時 s':>10}{'相對大小':>10}{'相對耗時':>10}"
+    ]
+    for item in summary:
+        lines.append(
+            f"{item['variant']:<22}{item['files']:>6}{item['failed']:>6}"
+            f"{item['input_bytes'] / 1048576:>10.2f}{item['output_bytes'] / 1048576:>10.2f}"
+            f"{ratio(item['ratio']):>10}{item['seconds']:>10.2f}"
+            f"{ratio(item['size_vs_baseline']):>10}{ratio(item['time_vs_baseline']):>10}"
+        )
+    lines.append(f"(相對大小、相對耗時以 {baseline} 為 1.00)")
+    return "\n".join(lines)
+
+
+def run_render_benchmark(
+    files: Sequence[str],
+    presets: Optional[Sequence[str]] = None,
+    dpi: int = 150,
+    device: str = "PNG",
+    wrapper: Optional[GhostscriptWrapper] = None,
+    repeat: int = 1,
+    progress: Optional[Callable[[int, int, str], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    以每個繪製預設值將每個檔案轉為圖片
+
+    Args:
+        files: 輸入 PDF
+        presets: 繪製預設值名稱 (None=全部)
+        dpi: 解析度
+        device: 輸出格式 (config.IMAGE_DEVICES 的名稱)
+        wrapper: GhostscriptWrapper (預設建立不寫入工作記錄的包裝器)
+        repeat: 每個組合執行次數，耗時取中位數
+        progress: 進度回調 (目前, 總數, 說明)
+
+    Returns:
+        每個 (檔案, 預設值) 一筆：file, variant, success, pages, seconds, error
+    """
+    wrapper = wrapper or GhostscriptWrapper()
+    presets = list(RENDER_PRESETS) if presets is None else list(presets)
+    total = len(files) * len(presets)
+    rows = []
+    for file_index, input_file in enumerate(files):
+        for preset_index, preset in enumerate(presets):
+            if progress:
+                progress(file_index * len(presets) + preset_index + 1, total,
+                         f"{os.path.basename(input_file)} [render:{preset}]")
+            row = {"file": input_file, "variant": f"render:{preset}", "success": False,
+                   "pages": None, "seconds": None, "error": None}
+            times = []
+            try:
+                for _ in range(max(1, repeat)):
+                    # 每次用新的暫存資料夾，避免覆寫上一次的圖片影響耗時
+                    with tempfile.TemporaryDirectory(prefix="gsgui-bench-") as work_dir:
+                        result = wrapper.pdf_to_image(
+                            input_file, os.path.join(work_dir, "page_%04d"), device=device, dpi=dpi,
+                            render_preset=preset
+                        )
+                    if not result.success:
+                        row["error"] = (result.message or result.output)[-200:]
+                        break
+                    times.append(result.wall_time)
+                    row["pages"] = result.pages
+            except ValueError as e:
+                row["error"] = str(e)
+            if times and row["error"] is None:
+                row["success"] = True
+                row["seconds"] = statistics.median(times)
+            rows.append(row)
+    return rows
+
+
+def summarize_render(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """依繪製預設值彙總總頁數、耗時與每秒頁數"""
+    by_variant: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_variant.setdefault(row["variant"], []).append(row)
+
+    summary = []
+    for variant, variant_rows in by_variant.items():
+        ok = [row for row in variant_rows if row["success"] and row["pages"]]
+        pages = sum(row["pages"] for row in ok)
+        seconds = sum(row["seconds"] for row in ok)
+        summary.append({
+            "variant": variant,
+            "files": len(variant_rows),
+            "failed": len(variant_rows) - len(ok),
+            "pages": pages,
+            "seconds": seconds,
+            "pages_per_second": pages / seconds if seconds else None,
+        })
+    return summary
+
+
+def format_render_summary(summary: List[Dict[str, Any]]) -> str:
+    """繪製預設值彙總表格 (文字)"""
+    lines = [f"{'預設值':<22}{'檔案':>6}{'失敗':>6}{'頁數':>8}{'耗時 s':>10}{'頁/秒':>10}"]
+    for item in summary:
+        speed = item["pages_per_second"]
+        lines.append(
+            f"{item['variant']:<22}{item['files']:>6}{item['failed']:>6}{item['pages']:>8}"
+            f"{item['seconds']:>10.2f}{(f'{speed:.2f}' if speed is not None else '-'):>10}"
+        )
+    return "\n".join(lines)
+
+
+def save_results(path: str, rows: List[Dict[str, Any]], summary: List[Dict[str, Any]], baseline: Optional[str]):
+    """將結果寫入 JSON 檔案"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"baseline": baseline, "summary": summary, "rows": rows}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+黑白圖片的 CCITT G4 壓縮 (圖片轉 PDF)
+找出黑白與接近黑白的掃描圖片，轉為以 CCITT Group 4 壓縮的 1 位元 TIFF，
+img2pdf 直接把 G4 資料嵌入 PDF (不重新編碼)；其他圖片照原樣交給 img2pdf
+
+- 黑白: 1 位元圖片，或灰階值只有兩種的圖片，轉換不失真
+- 接近黑白: 非彩色，中間調像素比例不超過 near_ratio (例如以灰階掃描的文件)，
+  開啟二值化時以 Otsu 法決定門檻後轉換
+- G4 沒有比原檔小 min_saving 時保留原檔 (例如已經壓得很好的 PNG)
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .config import BILEVEL_IMAGES
+
+
+class BilevelReport:
+    """黑白圖片轉換的結果"""
+
+    def __init__(self, paths: List[str]):
+        self.sources: List[str] = list(paths)  # 交給 img2pdf 的檔案 (已轉換的圖片換成 G4 TIFF)
+        self.kinds: List[str] = ["color"] * len(paths)  # 各圖片的判斷: bilevel/near/gray/color
+        self.converted: List[int] = []  # 採用 G4 的圖片索引
+        self.bytes_before = 0  # 採用 G4 的圖片原檔大小
+        self.bytes_after = 0  # 採用 G4 後的大小
+        self.seconds = 0.0
+        self.plain_pdf_bytes: Optional[int] = None  # 不轉換時 img2pdf 的輸出大小
+        self.pdf_bytes: Optional[int] = None  # 實際輸出大小
+
+    def count(self, kind: str) -> int:
+        return self.kinds.count(kind)
+
+    def summary(self) -> str:
+        text = (
+            f"G4 壓縮: {len(self.converted)}/{len(self.sources)} 張圖片 "
+            f"(黑白 {self.count('bilevel')}、接近黑白 {self.count('near')})，"
+            f"{self.bytes_before / 1048576:.2f} MB → {self.bytes_after / 1048576:.2f} MB，"
+            f"分析耗時 {self.seconds:.1f} 秒"
+        )
+        if self.plain_pdf_bytes and self.pdf_bytes is not None:
+            text += (
+                f"\nPDF: {self.pdf_bytes / 1048576:.2f} MB，直接以 img2pdf 轉換為 "
+                f"{self.plain_pdf_bytes / 1048576:.2f} MB ({self.pdf_bytes / self.plain_pdf_bytes:.0%})"
+            )
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "images": len(self.sources),
+            "kinds": list(self.kinds),
+            "converted": list(self.converted),
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "plain_pdf_bytes": self.plain_pdf_bytes,
+            "pdf_bytes": self.pdf_bytes,
+            "seconds": self.seconds,
+        }
+
+
+def _otsu_threshold(histogram: List[int]) -> int:
+    """以 Otsu 法從 256 階灰階直方圖決定二值化門檻 (大於等於門檻為白)"""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    best, threshold = -1.0, 128
+    background = weighted = 0
+    for level, count in enumerate(histogram[:255]):
+        background += count
+        weighted += level * count
+        foreground = total - background
+        if background == 0 or foreground == 0:
+            continue
+        mean_back = weighted / background
+        mean_fore = (weighted_total - weighted) / foreground
+        variance = background * foreground * (mean_back - mean_fore) ** 2
+        if variance > best:
+            best, threshold = variance, level + 1
+    return threshold
+
+
+def _is_color(image, settings: Dict[str, Any]) -> bool:
+    """縮小後以飽和度判斷是否為彩色圖片"""
+    from PIL import ImageChops
+
+    if image.mode in ("1", "L", "LA", "I", "I;16", "F"):
+        return False
+    sample = image.convert("RGB")
+    sample.thumbnail((settings["color_sample"], settings["color_sample"]))
+    _, saturation, value = sample.convert("HSV").split()
+    # 很暗的像素飽和度不可靠，不計入
+    saturated = saturation.point(lambda v: 255 if v > settings["saturation"] else 0)
+    bright = value.point(lambda v: 255 if v > 48 else 0)
+    colored = ImageChops.multiply(saturated, bright).histogram()[255]
+    return colored > settings["color_ratio"] * sample.width * sample.height
+
+
+def _has_alpha(image) -> bool:
+    """圖片是否有透明度 (轉為 1 位元會失去透明的部分)"""
+    return image.mode in ("RGBA", "RGBa", "LA", "La", "PA") or "transparency" in image.info
+
+
+def analyze_image(path: str, settings: Dict[str, Any] = BILEVEL_IMAGES) -> Dict[str, Any]:
+    """
+    判斷圖片是否為黑白 (有透明度的圖片一律視為彩色，照原樣交給 img2pdf)
+
+    Returns:
+        {"kind": bilevel/near/gray/color, "threshold": 二值化門檻 (bilevel 與 near 才有)}
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        if getattr(image, "n_frames", 1) > 1:
+            # 多頁 TIFF 由 img2pdf 處理
+            return {"kind": "color"}
+        if _has_alpha(image):
+            return {"kind": "color"}
+        if image.mode == "1":
+            return {"kind": "bilevel", "threshold": 128}
+        if _is_color(image, settings):
+            return {"kind": "color"}
+        histogram = image.convert("L").histogram()
+
+    levels = [level for level, count in enumerate(histogram) if count]
+    if len(levels) <= 2:
+        threshold = (levels[0] + levels[-1]) // 2 + 1 if len(levels) == 2 else 128
+        return {"kind": "bilevel", "threshold": threshold}
+    low, high = settings["midtones"]
+    midtones = sum(histogram[low + 1:high])
+    if midtones <= settings["near_ratio"] * sum(histogram):
+        return {"kind": "near", "threshold": _otsu_threshold(histogram)}
+    return {"kind": "gray"}
+
+
+def encode_g4(path: str, output_path: str, threshold: int):
+    """以門檻將圖片轉為 1 位元，存成 CCITT G4 壓縮的單一條帶 TIFF (依 EXIF 方向轉正，保留解析度)"""
+    from PIL import Image, ImageOps, TiffImagePlugin
+
+    with Image.open(path) as image:
+        dpi = image.info.get("dpi")
+        size = image.size
+        # TIFF 不保留 EXIF 方向，先轉正 (寬高互換時解析度也互換)
+        image = ImageOps.exif_transpose(image)
+        if dpi and image.size != size:
+            dpi = (dpi[1], dpi[0])
+        if image.mode == "1":
+            bilevel = image.copy()
+        else:
+            bilevel = image.convert("L").point(lambda v: 255 if v >= threshold else 0).convert("1")
+    options = {"compression": "group4", "tiffinfo": {TiffImagePlugin.ROWSPERSTRIP: bilevel.height}}
+    if dpi:
+        options["dpi"] = tuple(round(float(v)) for v in dpi)
+    bilevel.save(output_path, **options)
+
+
+def prepare_bilevel(
+    paths: List[str],
+    work_dir: str,
+    threshold: bool = False,
+    jobs: int = 1,
+    settings: Dict[str, Any] = BILEVEL_IMAGES
+) -> BilevelReport:
+    """
+    將黑白圖片轉為 G4 TIFF (存放在 work_dir)，回傳交給 img2pdf 的檔案列表
+
+    Args:
+        paths: 圖片檔案 (依順序)
+        work_dir: 存放 G4 TIFF 的資料夾 (由呼叫端刪除)
+        threshold: 接近黑白的圖片也二值化後轉換 (會失去灰階細節)
+        jobs: 同時分析與轉換的圖片數
+
+    Raises:
+        ImportError: 沒有安裝 Pillow
+    """
+    import PIL  # noqa: F401 (提早回報缺少 Pillow)
+
+    start = time.perf_counter()
+    report = BilevelReport(paths)
+
+    def process(index: int) -> Optional[tuple]:
+        path = paths[index]
+        try:
+            info = analyze_image(path, settings)
+        except (OSError, ValueError):
+            return None
+        report.kinds[index] = info["kind"]
+        if info["kind"] != "bilevel" and not (threshold and info["kind"] == "near"):
+            return None
+        output_path = os.path.join(work_dir, f"{index:05d}.tif")
+        try:
+            encode_g4(path, output_path, info["threshold"])
+        except (OSError, ValueError):
+            return None
+        before, after = os.path.getsize(path), os.path.getsize(output_path)
+        if after > before * (1 - settings["min_saving"]):
+            return None
+        return index, output_path, before, after
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for outcome in pool.map(process, range(len(paths))):
+            if outcome is None:
+                continue
+            index, output_path, before, after = outcome
+            report.sources[index] = output_path
+            report.converted.append(index)
+            report.bytes_before += before
+            report.bytes_after += after
+    report.seconds = time.perf_counter() - start
+    return report
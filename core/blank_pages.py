@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+空白頁偵測
+以極低解析度將頁面轉為灰階 NumPy 陣列，計算墨水覆蓋率 (比 ink_level 暗的像素比例)，
+低於門檻的頁面視為空白 (例如雙面掃描的空白背面)
+
+覆蓋率依 (檔案, 大小, 修改時間, 解析度, 墨水門檻, 邊界) 記錄在 BLANK_SCORES_FILE，
+以不同的空白門檻再次執行時不必重新轉換。
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .config import BLANK_PAGES, BLANK_SCORES_CACHE_SIZE, BLANK_SCORES_FILE
+from .page_cost import balance_shards
+
+
+_cache_lock = threading.Lock()
+
+
+def ink_coverage(array, ink_level: int = BLANK_PAGES["ink_level"], margin: float = BLANK_PAGES["margin"]) -> float:
+    """
+    墨水覆蓋率 (0~1)
+
+    Args:
+        array: (高, 寬, 1) 的灰階 uint8 陣列
+        ink_level: 灰階值低於此值的像素算作墨水
+        margin: 四周忽略的比例 (掃描器邊緣的陰影與打孔)
+    """
+    height, width = array.shape[:2]
+    dy, dx = int(height * margin), int(width * margin)
+    area = array[dy:height - dy or None, dx:width - dx or None, 0]
+    if area.size == 0:
+        return 0.0
+    return float((area < ink_level).sum()) / area.size
+
+
+class BlankReport:
+    """空白頁偵測的結果"""
+
+    def __init__(self, scores: List[float], threshold: float, cached: bool = False):
+        self.scores = scores  # 各頁墨水覆蓋率 (依頁面順序)
+        self.threshold = threshold
+        self.cached = cached  # 覆蓋率是否取自記錄 (沒有重新轉換)
+        self.blank_pages = [i + 1 for i, score in enumerate(scores) if score < threshold]
+
+    def summary(self) -> str:
+        source = "，使用先前記錄的覆蓋率" if self.cached else ""
+        return f"空白頁: {len(self.blank_pages)}/{len(self.scores)} 頁 (門檻 {self.threshold:.2%}{source})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": len(self.scores),
+            "blank_pages": list(self.blank_pages),
+            "threshold": self.threshold,
+            "cached": self.cached,
+            "scores": [round(score, 6) for score in self.scores],
+        }
+
+
+def _cache_key(input_file: str, dpi: int, ink_level: int, margin: float) -> Optional[str]:
+    try:
+        stat = os.stat(input_file)
+    except OSError:
+        return None
+    return f"{os.path.abspath(input_file)}|{stat.st_size}|{stat.st_mtime_ns}|{dpi}|{ink_level}|{margin}"
+
+
+def _load_cache() -> Dict[str, List[float]]:
+    try:
+        with open(BLANK_SCORES_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def cached_scores(input_file: str, dpi: int, ink_level: int, margin: float) -> Optional[List[float]]:
+    """先前記錄的覆蓋率 (檔案改變或沒有記錄時為 None)"""
+    key = _cache_key(input_file, dpi, ink_level, margin)
+    if key is None:
+        return None
+    with _cache_lock:
+        scores = _load_cache().get(key)
+    return scores if isinstance(scores, list) else None
+
+
+def store_scores(input_file: str, dpi: int, ink_level: int, margin: float, scores: List[float]):
+    """記錄覆蓋率 (超過 BLANK_SCORES_CACHE_SIZE 個檔案時移除最早的記錄)"""
+    key = _cache_key(input_file, dpi, ink_level, margin)
+    if key is None:
+        return
+    with _cache_lock:
+        cache = _load_cache()
+        cache.pop(key, None)
+        cache[key] = scores
+        while len(cache) > BLANK_SCORES_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        os.makedirs(os.path.dirname(BLANK_SCORES_FILE), exist_ok=True)
+        temp_file = BLANK_SCORES_FILE + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(temp_file, BLANK_SCORES_FILE)
+
+
+def score_pages(wrapper, input_file: str, dpi: int, ink_level: int, margin: float, jobs: int = 1) -> List[float]:
+    """
+    轉換全部頁面並計算墨水覆蓋率
+
+    頁面切成最多 jobs 個連續分段，各由一個 Ghostscript 同時轉換。
+
+    Args:
+        wrapper: GhostscriptWrapper
+        jobs: 同時執行的 Ghostscript 數
+
+    Raises:
+        ImportError: 沒有安裝 numpy
+        RuntimeError: Ghostscript 轉換失敗
+    """
+    total = wrapper.get_pdf_page_count(input_file)
+    if total <= 0:
+        raise RuntimeError("無法取得頁數")
+    shards = [(start + 1, end + 1) for start, end in balance_shards([1.0] * total, max(1, jobs))]
+
+    def run_shard(shard: tuple) -> List[float]:
+        stream = wrapper.render_arrays(
+            input_file, dpi=dpi, color="GRAY", first_page=shard[0], last_page=shard[1], render_preset="draft"
+        )
+        scores = [ink_coverage(array, ink_level, margin) for array in stream]
+        if not stream.result.success or len(scores) != shard[1] - shard[0] + 1:
+            raise RuntimeError(f"第 {shard[0]}-{shard[1]} 頁轉換失敗: {stream.result.output[-200:]}")
+        return scores
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        return [score for scores in pool.map(run_shard, shards) for score in scores]
+
+
+def detect_blank_pages(
+    wrapper,
+    input_file: str,
+    threshold: Optional[float] = None,
+    dpi: int = BLANK_PAGES["dpi"],
+    ink_level: int = BLANK_PAGES["ink_level"],
+    margin: float = BLANK_PAGES["margin"],
+    jobs: int = 1
+) -> BlankReport:
+    """
+    偵測空白頁 (覆蓋率已有記錄時不重新轉換)
+
+    Args:
+        wrapper: GhostscriptWrapper
+        input_file: 輸入 PDF
+        threshold: 覆蓋率低於此值的頁面為空白 (None=BLANK_PAGES["threshold"])
+        dpi: 轉換解析度
+        ink_level: 灰階值低於此值的像素算作墨水
+        margin: 四周忽略的比例
+        jobs: 同時執行的 Ghostscript 數
+    """
+    threshold = BLANK_PAGES["threshold"] if threshold is None else threshold
+    scores = cached_scores(input_file, dpi, ink_level, margin)
+    if scores is not None:
+        return BlankReport(scores, threshold, cached=True)
+    scores = score_pages(wrapper, input_file, dpi, ink_level, margin, jobs)
+    try:
+        store_scores(input_file, dpi, ink_level, margin, scores)
+    except OSError:
+        pass
+    return BlankReport(scores, threshold)
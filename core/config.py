@@ -4,6 +4,8 @@ Ghostscript GUI 設定檔
 定義紙張大小、PDF 設定、輸出格式等常數
 """
 
+import os
+
 # 紙張大小 (單位: points, 1 inch = 72 points)
 PAPER_SIZES = {
     "A4": (595, 842),
@@ -22,10 +24,50 @@ PDF_SETTINGS = {
     "prepress": "300 dpi, 最高品質",
 }
 
+# 內建壓縮設定檔 (欄位說明見 core/profiles.py)，可在 PROFILES_DIR 以同名檔案覆蓋
+COMPRESSION_PROFILES = {
+    "web": {
+        "description": "網頁瀏覽：110 dpi、JPEG 品質 60、物件串流",
+        "compatibility_level": "1.5",
+        "object_streams": True,
+        "color_images": {"downsample": True, "resolution": 110, "threshold": 1.5,
+                         "method": "bicubic", "jpeg_quality": 60},
+        "gray_images": {"downsample": True, "resolution": 110, "threshold": 1.5,
+                        "method": "bicubic", "jpeg_quality": 60},
+        "mono_images": {"downsample": True, "resolution": 300, "threshold": 1.5, "method": "subsample"},
+        "fonts": {"subset": True, "embed_all": False, "compress": True},
+    },
+    "office": {
+        "description": "文件交換：150 dpi、JPEG 品質 80、嵌入所有字型、物件串流",
+        "compatibility_level": "1.5",
+        "object_streams": True,
+        "color_images": {"downsample": True, "resolution": 150, "threshold": 1.5,
+                         "method": "bicubic", "jpeg_quality": 80},
+        "gray_images": {"downsample": True, "resolution": 150, "threshold": 1.5,
+                        "method": "bicubic", "jpeg_quality": 80},
+        "mono_images": {"downsample": True, "resolution": 600, "threshold": 1.5, "method": "subsample"},
+        "fonts": {"subset": True, "embed_all": True, "compress": True},
+    },
+    "lossless": {
+        "description": "不降低圖片品質，只以物件串流與字型子集縮小檔案",
+        "compatibility_level": "1.5",
+        "object_streams": True,
+        "color_images": {"downsample": False},
+        "gray_images": {"downsample": False},
+        "mono_images": {"downsample": False},
+        "fonts": {"subset": True, "embed_all": True, "compress": True},
+    },
+}
+
+# 使用者自訂壓縮設定檔資料夾 (每個 .json 檔案一個設定檔，檔名即名稱)
+PROFILES_DIR = os.path.join(os.path.expanduser("~"), ".gsgui", "profiles")
+
 # 圖片輸出裝置
 IMAGE_DEVICES = {
     "PNG": "png16m",
     "PNG (灰階)": "pnggray",
+    "PNG (黑白)": "pngmono",
+    "PNG (自動)": "auto",  # 依每頁內容選擇黑白、灰階或彩色 (見 core/page_color.py)
     "JPEG": "jpeg",
     "JPEG (灰階)": "jpeggray",
     "TIFF": "tiff24nc",
@@ -37,3 +79,138 @@ DPI_OPTIONS = [72, 96, 150, 300, 600]
 # 預設 Ghostscript 執行檔名稱
 GS_EXECUTABLE = "gs"  # Linux/macOS
 # GS_EXECUTABLE = "gswin64c"  # Windows 64-bit
+
+# 本機 HTTP 工作服務
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_WORKERS = 2  # 同時執行的工作數
+SERVER_MAX_QUEUE = 16  # 等待中工作上限，超過時回應 429
+SERVER_MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+SERVER_INPUT_DIRS = ()  # JSON 工作可使用的本機輸入資料夾 (空=只能上傳檔案)
+
+# 熱資料夾監看
+WATCH_INTERVAL = 2.0  # 輪詢間隔 (秒)
+WATCH_STABLE_SECONDS = 5.0  # 檔案停止變動多久後才處理 (秒)
+WATCH_WORKERS = 2
+WATCH_INDEX_FILE = "watch-index.jsonl"  # 已處理檔案索引 (JSON Lines)
+WATCH_INDEX_COMPACT_SLACK = 1000  # 索引檔重寫 (移除已刪除的檔案) 前至少附加的行數
+WATCH_STATUS_FILE = "watch-status.json"  # 吞吐量與佇列深度
+
+# 資源控管 (限制 Ghostscript 子程序合計用量)
+GOVERNOR_MAX_MEMORY_MB = 2048
+GOVERNOR_MAX_CPU = None  # 核心數，None=CPU 核心數
+GOVERNOR_SAMPLE_INTERVAL = 1.0  # 取樣間隔 (秒)
+
+# 效能指標
+METRICS_TEXTFILE_INTERVAL = 15.0  # 寫入指標檔案的間隔 (秒)
+
+# 工作記錄 (預估耗時用)
+HISTORY_DB = os.path.join(os.path.expanduser("~"), ".gsgui", "history.db")
+HISTORY_SAMPLE_SIZE = 200  # 預估時使用最近幾筆記錄
+QUEUE_AGING_FACTOR = 1.0  # 最短工作優先時，工作最多被較晚加入的工作超越 (預估耗時 × 此倍數) 秒
+
+# 圖形介面
+GUI_PROBE_WORKERS = 2  # 背景讀取檔案資訊 (頁數、大小、頁面框) 的執行緒數
+GUI_METADATA_WORKERS = 4  # 檔案列表背景讀取每個檔案資訊的執行緒數
+
+# 頁面成本估計 (平行處理時依成本分配頁面；單位是相對成本，不是秒數)
+PAGE_COST_WEIGHTS = {
+    "page": 1.0,  # 每頁固定成本
+    "content_kb": 0.02,  # 每 KB 內容串流 (解壓縮後)
+    "megapixels": 4.0,  # 每百萬圖片像素
+    "fonts": 0.5,  # 每個字型
+    "kilo_operators": 1.0,  # 每千個繪圖運算子 (路徑、文字、漸層)
+}
+PARALLEL_MAX_JOBS = os.cpu_count() or 1  # 平行處理時同時執行的 Ghostscript 數上限
+
+# 選擇性壓縮 (只重新壓縮過大的圖片，其他內容照原樣複製)
+SELECTIVE_COMPRESS = {
+    "resolution": 150,  # 降採樣目標 dpi
+    "threshold": 1.5,  # 有效解析度超過目標 dpi 多少倍才降採樣
+    "jpeg_quality": 75,  # 重新壓縮的 JPEG 品質 (1-100)
+    "min_bytes": 256 * 1024,  # 解析度未超過門檻但串流大於此大小的照片也重新壓縮
+}
+
+# 轉圖片的繪製預設值 (速度與品質的取捨；None=Ghostscript 預設值)
+RENDER_PRESETS = {
+    "draft": {
+        "description": "草稿 - 最快，無反鋸齒、無圖片內插、簡化色彩轉換、不處理透明度",
+        "args": ["-dTextAlphaBits=1", "-dGraphicsAlphaBits=1", "-dNOINTERPOLATE",
+                 "-dUseFastColor=true", "-dNOTRANSPARENCY"],
+    },
+    "ocr": {
+        "description": "OCR - 文字邊緣銳利 (無反鋸齒)，無圖片內插、簡化色彩轉換",
+        "args": ["-dTextAlphaBits=1", "-dGraphicsAlphaBits=1", "-dNOINTERPOLATE", "-dUseFastColor=true"],
+    },
+    "standard": {
+        "description": "標準 - 文字與圖形反鋸齒，適合預覽",
+        "args": ["-dTextAlphaBits=4", "-dGraphicsAlphaBits=4"],
+    },
+    "print": {
+        "description": "列印 - 反鋸齒並內插所有圖片，最慢",
+        "args": ["-dTextAlphaBits=4", "-dGraphicsAlphaBits=4", "-dDOINTERPOLATE"],
+    },
+}
+
+# 支援 -sPageList (單次執行轉換不連續頁碼) 的最低 Ghostscript 版本
+PAGE_LIST_MIN_VERSION = (9, 20)
+
+# 轉為 NumPy 陣列的色彩模式 → Ghostscript 裝置 (寫到標準輸出的無壓縮光柵)
+RASTER_DEVICES = {
+    "RGB": "ppmraw",
+    "GRAY": "pgmraw",
+}
+RASTER_PREFETCH = 2  # 預先讀取的頁數 (每頁記憶體約為 寬 × 高 × 色版數 bytes)
+
+# 空白頁偵測 (掃描文件的空白背面)
+BLANK_PAGES = {
+    "dpi": 24,  # 偵測用的轉換解析度
+    "ink_level": 160,  # 灰階值 (0-255) 低於此值的像素算作墨水
+    "margin": 0.05,  # 四周忽略的比例 (掃描器邊緣的陰影與打孔)
+    "threshold": 0.002,  # 墨水覆蓋率低於此值的頁面視為空白
+}
+BLANK_SCORES_FILE = os.path.join(os.path.expanduser("~"), ".gsgui", "blank-scores.json")  # 各頁覆蓋率記錄
+BLANK_SCORES_CACHE_SIZE = 256  # 最多記錄幾個檔案
+
+# 依檔案大小分割 (見 core/size_split.py)
+SIZE_SPLIT = {
+    "margin": 0.9,  # 規劃時以上限的這個比例為目標，保留估計誤差的空間
+    "part_overhead": 4096,  # 每份的固定大小估計 (目錄、頁面樹、資訊字典、交互參照表)
+    "object_overhead": 20,  # 物件串流中的物件另加的大小 (交互參照項目)
+    "max_passes": 3,  # 實際大小超過上限時，最多重新分割幾次
+}
+
+# 自動圖片格式：先以低解析度轉換判斷每頁為黑白、灰階或彩色，再以對應的格式輸出
+AUTO_IMAGE = {
+    "dpi": 36,  # 判斷用的轉換解析度 (草稿繪製，無反鋸齒)
+    "chroma": 32,  # 色版間最大差異超過此值的像素算作彩色
+    "color_ratio": 0.001,  # 彩色像素比例超過此值的頁面為彩色
+    "midtones": (48, 208),  # 灰階值在此範圍內 (不含) 的像素算作中間調
+    "midtone_ratio": 0.01,  # 中間調像素比例不超過此值的非彩色頁面為黑白
+    "sample_pages": 2,  # 估計節省大小時，每種格式另以 PNG 輸出幾頁比較 (0=不估計)
+}
+AUTO_IMAGE_DEVICES = {  # 頁面類別 → IMAGE_DEVICES 的名稱
+    "bilevel": "PNG (黑白)",
+    "gray": "PNG (灰階)",
+    "color": "PNG",
+}
+
+# 圖片轉 PDF 的黑白圖片 CCITT G4 壓縮 (見 core/bilevel.py)
+BILEVEL_IMAGES = {
+    "midtones": (48, 208),  # 灰階值在此範圍內 (不含) 的像素算作中間調
+    "near_ratio": 0.1,  # 中間調比例不超過此值的圖片視為接近黑白 (開啟二值化時才轉換)
+    "saturation": 48,  # 飽和度 (0-255) 超過此值的像素算作彩色
+    "color_ratio": 0.001,  # 彩色像素比例超過此值的圖片不轉換
+    "color_sample": 512,  # 判斷彩色時縮小到的長邊像素數
+    "min_saving": 0.1,  # G4 至少要比原檔小這個比例才採用
+}
+
+# 圖片轉 PDF 的大小最佳化 (見 core/image_optimize.py)
+IMAGE_OPTIMIZE = {
+    "paper_size": "A4",  # 頁面大小 (PAPER_SIZES 的名稱)，圖片縮放到頁面內
+    "dpi": 150,  # 圖片在頁面上的目標解析度，超過時降採樣
+    "jpeg_quality": 80,  # 照片重新編碼的 JPEG 品質 (1-95)
+    "photo_colors": 1024,  # 縮圖顏色數超過此值的無損圖片視為照片，改以 JPEG 儲存
+    "photo_gray_levels": 200,  # 縮圖灰階值種類超過此值的無損圖片也視為照片 (灰階照片)
+    "min_saving": 0.1,  # 重新編碼後至少要小這個比例才採用
+}
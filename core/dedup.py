@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+去除重複資源
+合併多個 PDF 後，同一張圖片、同一個字型或 ICC 色彩描述檔常會各自保留一份；
+這裡以串流資料的雜湊找出內容相同的物件，只保留一份並改寫參照
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from .pdf_reader import PdfReader, Stream
+from .pdf_writer import COPY_CHUNK_SIZE, reachable_objects, rewrite_pdf, serialize
+
+
+# 不合併的物件類型 (頁面樹與互動結構，即使內容相同也代表不同的東西)
+_STRUCTURAL_TYPES = {
+    "Catalog", "Pages", "Page", "Annot", "Outlines", "StructTreeRoot", "StructElem",
+    "Sig", "ObjStm", "XRef", "Action",
+}
+# 含有這些鍵的字典指向文件中的特定位置 (父節點、所屬頁面、表單欄位)，不合併
+_STRUCTURAL_KEYS = {"Parent", "P", "FT", "Kids"}
+_FONT_STREAM_SUBTYPES = {"Type1C", "CIDFontType0C", "OpenType"}
+
+
+def resource_kind(value: Any) -> str:
+    """物件的資源類型: image / font / icc / form / other"""
+    dictionary = value.dict if isinstance(value, Stream) else value
+    if not isinstance(dictionary, dict):
+        return "other"
+    subtype = dictionary.get("Subtype")
+    if subtype == "Image":
+        return "image"
+    if subtype == "Form":
+        return "form"
+    if dictionary.get("Type") in ("Font", "FontDescriptor") or subtype in _FONT_STREAM_SUBTYPES:
+        return "font"
+    if isinstance(value, Stream):
+        if any(key in dictionary for key in ("Length1", "Length2", "Length3")):
+            return "font"
+        if dictionary.get("N") in (1, 3, 4) and "Type" not in dictionary and "Subtype" not in dictionary:
+            return "icc"
+    return "other"
+
+
+def _mergeable(value: Any) -> bool:
+    dictionary = value.dict if isinstance(value, Stream) else value
+    if isinstance(dictionary, dict):
+        if dictionary.get("Type") in _STRUCTURAL_TYPES:
+            return False
+        if _STRUCTURAL_KEYS & set(dictionary):
+            return False
+    return True
+
+
+def stream_digest(reader: PdfReader, stream: Stream) -> bytes:
+    """串流原始資料的 SHA-256 (直接從 mmap 分段讀取)"""
+    digest = hashlib.sha256()
+    end = stream.start + stream.length
+    with memoryview(reader.data) as view:
+        for start in range(stream.start, end, COPY_CHUNK_SIZE):
+            digest.update(view[start:min(start + COPY_CHUNK_SIZE, end)])
+    return digest.digest()
+
+
+class DedupReport:
+    """去除重複資源的結果"""
+
+    def __init__(self):
+        self.removed: Dict[str, int] = {"image": 0, "font": 0, "icc": 0, "form": 0, "other": 0}
+        self.stream_bytes_removed = 0  # 移除的重複串流資料量
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    @property
+    def objects_removed(self) -> int:
+        return sum(self.removed.values())
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def summary(self) -> str:
+        if not self.objects_removed:
+            return "去除重複資源: 沒有重複的物件"
+        names = {"image": "圖片", "font": "字型", "icc": "色彩描述檔", "form": "表單物件", "other": "其他"}
+        parts = [f"{names[kind]} {count}" for kind, count in self.removed.items() if count]
+        return (
+            f"去除重複資源: 移除 {self.objects_removed} 個物件 ({', '.join(parts)})，"
+            f"節省 {self.bytes_saved / 1024:.1f} KB"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "removed": dict(self.removed),
+            "objects_removed": self.objects_removed,
+            "stream_bytes_removed": self.stream_bytes_removed,
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+def find_duplicates(reader: PdfReader) -> Dict[int, int]:
+    """
+    找出內容相同的物件
+
+    物件的比對鍵是「把參照換成代表物件後的字典內容 + 串流資料雜湊」，
+    重複執行直到沒有新的合併 (字型檔合併後，引用它的字型描述與字型字典才會相同)。
+
+    Returns:
+        {重複物件編號: 保留的物件編號}
+    """
+    candidates = {}
+    digests: Dict[int, Optional[bytes]] = {}
+    for num in reachable_objects(reader):
+        value = reader.get_object(num)
+        if value is None or not _mergeable(value):
+            continue
+        candidates[num] = value
+        digests[num] = stream_digest(reader, value) if isinstance(value, Stream) else None
+
+    mapping: Dict[int, int] = {}
+
+    def canonical(num: int) -> int:
+        return mapping.get(num, num)
+
+    while True:
+        groups: Dict[tuple, int] = {}
+        merged = False
+        for num, value in candidates.items():
+            if num in mapping:
+                continue
+            if isinstance(value, Stream):
+                dictionary = {k: v for k, v in value.dict.items() if k != "Length"}
+                key = (serialize(dictionary, canonical), value.length, digests[num])
+            else:
+                key = (serialize(value, canonical), None, None)
+            keep = groups.setdefault(key, num)
+            if keep != num:
+                mapping[num] = keep
+                merged = True
+        if not merged:
+            break
+        # 保留的物件本身也可能在之後的回合被合併，壓平對應鏈
+        for num in list(mapping):
+            target = mapping[num]
+            while target in mapping:
+                target = mapping[target]
+            mapping[num] = target
+    return mapping
+
+
+def dedupe_pdf(input_file: str, output_file: str) -> DedupReport:
+    """
+    去除 PDF 中重複的圖片、字型、ICC 色彩描述檔與表單物件
+
+    Args:
+        input_file: 輸入 PDF
+        output_file: 輸出 PDF (不可與輸入相同)
+
+    Returns:
+        DedupReport
+
+    Raises:
+        PdfError: 無法解析或加密的 PDF
+    """
+    report = DedupReport()
+    report.bytes_before = os.path.getsize(input_file)
+    with PdfReader(input_file) as reader:
+        mapping = find_duplicates(reader)
+        for num in mapping:
+            value = reader.get_object(num)
+            report.removed[resource_kind(value)] += 1
+            if isinstance(value, Stream):
+                report.stream_bytes_removed += value.length
+        report.bytes_after = rewrite_pdf(reader, output_file, lambda n: mapping.get(n, n))
+    return report
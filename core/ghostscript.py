@@ -7,16 +7,147 @@ Ghostscript 指令包裝器
 import subprocess
 import shutil
 import os
-from typing import List, Optional, Callable
+import re
+import collections
+import threading
+import sys
+import glob
+import time
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Callable, Union
 
-from .config import PAPER_SIZES, IMAGE_DEVICES
+from .config import (
+    PAPER_SIZES, IMAGE_DEVICES, PAGE_LIST_MIN_VERSION, PARALLEL_MAX_JOBS, RASTER_DEVICES, RASTER_PREFETCH,
+    RENDER_PRESETS, SELECTIVE_COMPRESS, SIZE_SPLIT, AUTO_IMAGE, AUTO_IMAGE_DEVICES
+)
+from .result import JobResult
+from .linearization import check_linearization
+from .dedup import dedupe_pdf
+from .selective import selective_compress
+from .page_cost import analyze_pages, balance_shards
+from .page_ranges import format_page_ranges, pages_to_ranges, parse_page_ranges
+from .incremental import IncrementalPlan, page_fingerprints
+from .journal import JobJournal, PageCollector, partial_path
+from .raster import RasterStream
+from .blank_pages import BlankReport, detect_blank_pages
+from .size_split import SizeIndex
+from .page_color import PAGE_CLASSES, ColorReport, classify_pages
+from .pdf_reader import PdfError
+from .profiles import CompressionProfile, get_profile
+from . import metrics
+
+
+def image_extension(device: str) -> str:
+    """依輸出格式 (IMAGE_DEVICES 的鍵) 取得圖片副檔名"""
+    device_name = IMAGE_DEVICES.get(device, "png16m")
+    if device_name.startswith("jpeg"):
+        return ".jpg"
+    if device_name.startswith("tiff"):
+        return ".tiff"
+    return ".png"
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _find_pattern_outputs(output_pattern: str, started_at: Optional[float]) -> List[str]:
+    """找出符合輸出模式 (例如 page_%03d.png) 且在 started_at 之後寫入的檔案"""
+    pattern = glob.escape(output_pattern)
+    pattern = re.sub(r"%0?\d*d", "*", pattern)
+    files = sorted(glob.glob(pattern))
+    if started_at is not None:
+        # 檔案系統時間精度可能只到秒
+        files = [f for f in files if os.path.getmtime(f) >= started_at - 1]
+    return files
+
+
+def _fast_web_view_args(linearize: bool) -> List[str]:
+    """線性化 (快速網頁檢視) 輸出的參數"""
+    return ["-dFastWebView=true"] if linearize else []
+
+
+def _render_preset_args(render_preset: Optional[str]) -> List[str]:
+    """繪製預設值的參數 (None=Ghostscript 預設值)"""
+    if not render_preset:
+        return []
+    if render_preset not in RENDER_PRESETS:
+        raise ValueError(f"未知的繪製預設值: {render_preset} (可用: {', '.join(RENDER_PRESETS)})")
+    return list(RENDER_PRESETS[render_preset]["args"])
+
+
+def _expand_pages(pages: str, total: int) -> List[int]:
+    """展開頁碼運算式為不重複的遞增頁碼 (total=0 表示總頁數未知)"""
+    return sorted({
+        page for first, last in parse_page_ranges(pages, total or None) for page in range(first, last + 1)
+    })
+
+
+def _remove_files(paths: List[str]):
+    """刪除暫存檔 (不存在時略過)"""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# -c 的 PostScript 程式碼中代表輸入檔路徑的名稱 (以 -s 參數定義)
+_POSTSCRIPT_INPUT = "GSGUIInputFile"
+
+
+def _postscript_input_arg(input_file: str) -> str:
+    """
+    以 -s 參數傳入 -c 程式碼要開啟的檔案路徑
+
+    路徑不放進 PostScript 程式碼，檔名中的括號、反斜線等字元不會被當成程式碼執行；
+    轉為絕對路徑 (分隔字元統一為 /)，避免以 % 開頭的檔名被當成 %pipe% 等特殊裝置開啟。
+    """
+    return f"-s{_POSTSCRIPT_INPUT}={os.path.abspath(input_file).replace(os.sep, '/')}"
+
+
+def _wait_process(process: subprocess.Popen) -> tuple[int, Optional[float], Optional[int]]:
+    """
+    等待程序結束
+
+    Returns:
+        (結束碼, CPU 秒數, 最大記憶體 bytes)；平台不支援時後兩者為 None
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            pass
+        else:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # Linux 的 ru_maxrss 單位為 KB，macOS 為 bytes
+            scale = 1 if sys.platform == "darwin" else 1024
+            return process.returncode, usage.ru_utime + usage.ru_stime, usage.ru_maxrss * scale
+    return process.wait(), None, None
 
 
 class GhostscriptWrapper:
     """Ghostscript 指令包裝器"""
 
-    def __init__(self):
+    # 頁數快取上限
+    PAGE_COUNT_CACHE_SIZE = 256
+
+    def __init__(self, history=None):
+        """
+        Args:
+            history: 工作記錄 (core.history.JobHistory)，設定時記錄每個完成的工作
+        """
         self.gs_path = self._find_ghostscript()
+        self.history = history
+        # (路徑, 大小, 修改時間) → 頁數
+        self._page_count_cache: "collections.OrderedDict[tuple, int]" = collections.OrderedDict()
+        # (路徑, 大小, 修改時間) → 各頁 (寬, 高)
+        self._page_box_cache: "collections.OrderedDict[tuple, List[tuple]]" = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._version: Union[tuple, None, bool] = False  # False=尚未查詢
 
     def _find_ghostscript(self) -> str:
         """尋找 Ghostscript 執行檔"""
@@ -57,28 +188,19 @@ class GhostscriptWrapper:
             "下載 'Ghostscript X.XX.X for Windows (64 bit)' 並安裝"
         )
 
-    def _run_command_fast(self, args: List[str]) -> tuple[bool, str]:
+    def _run_command_fast(self, args: List[str]) -> JobResult:
         """
         快速執行 Ghostscript 指令（無進度追蹤）
         使用 -q 靜默模式，速度最快
         """
-        cmd = [self.gs_path, "-q"] + args
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True
-            )
-            return result.returncode == 0, result.stdout + result.stderr
-        except Exception as e:
-            return False, str(e)
+        return self._execute([self.gs_path, "-q"] + args)
 
     def _run_command(
         self,
         args: List[str],
         progress_callback: Optional[Callable[[int, str], None]] = None,
         total_pages: int = 0
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         執行 Ghostscript 指令（含進度追蹤）
 
@@ -87,45 +209,151 @@ class GhostscriptWrapper:
             progress_callback: 進度回調函數 (current_page, status_text)
             total_pages: 總頁數（用於計算進度）
         """
-        cmd = [self.gs_path] + args
+        current_page = 0
+
+        def on_line(line: str):
+            nonlocal current_page
+            current_page, status = self._parse_progress_line(line, current_page)
+            if progress_callback and status:
+                progress_callback(current_page, status)
+
+        return self._execute([self.gs_path] + args, on_line)
+
+    def _execute(self, cmd: List[str], on_line: Optional[Callable[[str], None]] = None) -> JobResult:
+        """
+        執行命令，記錄結束碼、耗時、CPU 時間、最大記憶體與輸出的最後幾行
+
+        Args:
+            cmd: 完整命令
+            on_line: 每讀到一行輸出時的回調
+        """
+        result = JobResult()
+        page_lines = 0
+        start = time.perf_counter()
         try:
             process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True
+                universal_newlines=True,
+                errors="replace"
             )
-            output_lines = []
-            current_page = 0
+            result.spawn_time = time.perf_counter() - start
+            metrics.record_spawn(result.spawn_time)
 
             for line in process.stdout:
-                output_lines.append(line)
-                line_stripped = line.strip()
-
-                # 解析頁面處理進度 (Ghostscript 輸出格式: "Page X")
-                if line_stripped.startswith("Page "):
-                    try:
-                        current_page = int(line_stripped.split()[1])
-                        if progress_callback:
-                            progress_callback(current_page, f"處理第 {current_page} 頁...")
-                    except (ValueError, IndexError):
-                        pass
-                elif progress_callback and line_stripped:
-                    # 其他輸出也回報
-                    progress_callback(current_page, line_stripped[:50])
-
-            process.wait()
-            output = "".join(output_lines)
-            return process.returncode == 0, output
+                result.append_log(line)
+                if line.startswith("Page "):
+                    page_lines += 1
+                if on_line:
+                    on_line(line)
+
+            result.exit_code, result.cpu_time, result.peak_rss = _wait_process(process)
+            result.success = result.exit_code == 0
         except Exception as e:
-            return False, str(e)
+            result.success = False
+            result.message = str(e)
+
+        result.wall_time = time.perf_counter() - start
+        if page_lines:
+            result.pages = page_lines
+        return result
+
+    def _finish_result(
+        self,
+        result: JobResult,
+        operation: str,
+        input_files: List[str],
+        output_files: Optional[List[str]] = None,
+        output_pattern: Optional[str] = None,
+        started_at: Optional[float] = None,
+        pages: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> JobResult:
+        """
+        補上操作名稱、頁數與輸入輸出位元組數，並寫入工作記錄
+
+        Args:
+            result: 執行結果
+            operation: 操作名稱
+            input_files: 輸入檔案
+            output_files: 輸出檔案
+            output_pattern: 輸出檔案模式 (pdf_to_image)，依修改時間找出本次產生的檔案
+            started_at: 操作開始的時間 (time.time())，搭配 output_pattern 使用
+            pages: 已知的頁數 (Ghostscript 輸出沒有頁數資訊時使用)
+            options: 操作參數 (不含檔案路徑)，寫入工作記錄
+        """
+        result.operation = operation
+        result.input_bytes = sum(_file_size(f) for f in input_files)
+
+        if output_pattern is not None:
+            output_files = _find_pattern_outputs(output_pattern, started_at)
+        result.output_files = [f for f in (output_files or []) if os.path.exists(f)]
+        result.output_bytes = sum(_file_size(f) for f in result.output_files)
+
+        if result.pages is None:
+            if pages is not None:
+                result.pages = pages
+            elif output_pattern is not None and result.success:
+                result.pages = len(result.output_files)
+
+        if result.success and (options or {}).get("linearize"):
+            self._check_linearization(result)
+
+        metrics.record_job(result)
+        if self.history is not None:
+            self._record_history(result, input_files, options or {})
+        return result
+
+    @staticmethod
+    def _check_linearization(result: JobResult):
+        """檢查線性化輸出的提示表，未通過時加入警告 (輸出檔案仍可使用)"""
+        checks = result.checks.setdefault("linearization", {})
+        for path in result.output_files:
+            report = check_linearization(path)
+            checks[path] = report.to_dict()
+            metrics.record_check("linearization", report.valid)
+            if not report.valid:
+                result.warnings.append(f"{os.path.basename(path)}: {report.summary()}")
+
+    def _record_history(self, result: JobResult, input_files: List[str], options: Dict[str, Any]):
+        """寫入工作記錄 (快速模式沒有頁數資訊時以頁數快取補上)"""
+        page_count = result.pages
+        if page_count is None and result.success:
+            page_count = sum(self.get_pdf_page_count(f) for f in input_files)
+        try:
+            self.history.record(result, options, page_count=page_count, dpi=options.get("dpi"))
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _parse_progress_line(line: str, current_page: int) -> tuple[int, Optional[str]]:
+        """
+        解析一行 Ghostscript 輸出
+
+        Returns:
+            (目前頁碼, 狀態文字)，空白行的狀態文字為 None
+        """
+        line_stripped = line.strip()
+
+        # 解析頁面處理進度 (Ghostscript 輸出格式: "Page X")
+        if line_stripped.startswith("Page "):
+            try:
+                current_page = int(line_stripped.split()[1])
+                return current_page, f"處理第 {current_page} 頁..."
+            except (ValueError, IndexError):
+                return current_page, None
+        if line_stripped:
+            # 其他輸出也回報
+            return current_page, line_stripped[:50]
+        return current_page, None
 
     def _run_command_with_progress(
         self,
         args: List[str],
         input_file: str,
         progress_callback: Optional[Callable[[int, int, str], None]] = None
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         執行 Ghostscript 指令
         - 有進度回調時：追蹤頁面進度
@@ -154,8 +382,9 @@ class GhostscriptWrapper:
         fit_page: bool = True,
         dpi: Optional[int] = None,
         pdf_settings: Optional[str] = None,
+        linearize: bool = False,
         progress_callback: Optional[Callable[[int, int, str], None]] = None
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         調整 PDF 頁面大小
 
@@ -168,8 +397,36 @@ class GhostscriptWrapper:
             fit_page: 是否適應頁面
             dpi: 解析度 (None=不設定，速度最快)
             pdf_settings: PDF 品質設定 (None=不重新壓縮，速度最快)
+            linearize: 輸出線性化 PDF (快速網頁檢視)，完成後檢查提示表
             progress_callback: 進度回調 (current, total, status)
         """
+        args = self._build_resize_args(
+            input_file, output_file, paper_size, custom_width, custom_height,
+            fit_page, dpi, pdf_settings, linearize
+        )
+        result = self._run_command_with_progress(args, input_file, progress_callback)
+        return self._finish_result(
+            result, "resize_pdf", [input_file], [output_file],
+            options={
+                "paper_size": paper_size, "custom_width": custom_width,
+                "custom_height": custom_height, "fit_page": fit_page,
+                "dpi": dpi, "pdf_settings": pdf_settings, "linearize": linearize,
+            }
+        )
+
+    def _build_resize_args(
+        self,
+        input_file: str,
+        output_file: str,
+        paper_size: str = "A4",
+        custom_width: Optional[int] = None,
+        custom_height: Optional[int] = None,
+        fit_page: bool = True,
+        dpi: Optional[int] = None,
+        pdf_settings: Optional[str] = None,
+        linearize: bool = False
+    ) -> List[str]:
+        """建立頁面調整的命令參數"""
         if custom_width and custom_height:
             width, height = custom_width, custom_height
         else:
@@ -190,9 +447,9 @@ class GhostscriptWrapper:
             args.append(f"-dPDFSETTINGS=/{pdf_settings}")
         if fit_page:
             args.append("-dPDFFitPage")
+        args.extend(_fast_web_view_args(linearize))
         args.extend([f"-sOutputFile={output_file}", input_file])
-
-        return self._run_command_with_progress(args, input_file, progress_callback)
+        return args
 
     def pdf_to_image(
         self,
@@ -202,64 +459,855 @@ class GhostscriptWrapper:
         dpi: int = 150,
         first_page: Optional[int] = None,
         last_page: Optional[int] = None,
+        pages: Optional[str] = None,
+        jobs: int = 1,
+        render_preset: Optional[str] = None,
+        incremental: bool = False,
+        resume: bool = False,
         progress_callback: Optional[Callable[[int, int, str], None]] = None
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         PDF 轉圖片
 
         Args:
             input_file: 輸入 PDF 檔案路徑
             output_pattern: 輸出檔案模式 (例如: output_%03d.png)
-            device: 輸出裝置 (PNG, JPEG, TIFF)
+            device: 輸出裝置 (IMAGE_DEVICES 的名稱)；"PNG (自動)" 依每頁內容以黑白、灰階或彩色 PNG 輸出，
+                    輸出檔名以原始頁碼編號，各頁類別與節省的大小記錄在 details["auto_device"]
             dpi: 解析度
             first_page: 起始頁碼
             last_page: 結束頁碼
+            pages: 頁碼運算式 (例如 "1,5,9-12,40"，語法見 core.page_ranges)，指定時取代 first_page/last_page，
+                   輸出檔名以原始頁碼編號
+            jobs: 同時執行的 Ghostscript 數，大於 1 時依頁面成本分段平行轉換
+            render_preset: 繪製預設值 (draft/ocr/standard/print，見 config.RENDER_PRESETS)，None=Ghostscript 預設值
+            incremental: 只轉換內容指紋改變或圖片不存在的頁面 (見 core.incremental)，
+                         輸出檔名以原始頁碼編號，略過的頁數記錄在 details["incremental"]
+            resume: 每完成一頁就記錄在工作日誌 (見 core.journal)，中斷後以相同參數重新執行時
+                    只轉換還沒完成的頁面；輸出檔名以原始頁碼編號，續傳的頁數記錄在 details["resume"]
             progress_callback: 進度回調 (current, total, status)
+
+        Raises:
+            ValueError: 未知的繪製預設值、同時指定增量轉換與續傳，
+                        或增量轉換、自動格式、續傳的輸出檔名沒有 %d
+            PageRangeError: 頁碼運算式錯誤或超出總頁數
+            PdfError: 增量轉換時無法解析 PDF，或解析到的頁數與 Ghostscript 不符
+            RuntimeError: 續傳時無法讀取 PDF 頁數
+        """
+        started_at = time.time()
+        jobs = max(1, min(jobs, PARALLEL_MAX_JOBS))
+        if incremental and resume:
+            raise ValueError("增量轉換與續傳不能同時使用")
+        plan = journal = None
+        if incremental:
+            plan = self._plan_incremental(
+                input_file, output_pattern, device, dpi, first_page, last_page, pages, render_preset
+            )
+            pages = format_page_ranges(pages_to_ranges(plan.render)) if plan.render else None
+        if resume:
+            journal, remaining = self._plan_resume(
+                input_file, output_pattern, device, dpi, first_page, last_page, pages, render_preset
+            )
+            pages = format_page_ranges(pages_to_ranges(remaining)) if remaining else None
+        if (plan is not None and not plan.render) or (journal is not None and not pages):
+            result = JobResult(success=True)
+        elif IMAGE_DEVICES.get(device) == "auto":
+            result = self._pdf_to_image_auto(
+                input_file, output_pattern, dpi, first_page, last_page, pages, jobs, render_preset,
+                progress_callback, journal
+            )
+        elif pages:
+            result = self._pdf_to_image_pages(
+                input_file, output_pattern, device, dpi, pages, jobs, render_preset, progress_callback, journal
+            )
+        elif jobs > 1 and "%" in output_pattern:
+            result = self._pdf_to_image_parallel(
+                input_file, output_pattern, device, dpi, first_page, last_page, jobs, render_preset,
+                progress_callback
+            )
+        else:
+            args = self._build_pdf_to_image_args(
+                input_file, output_pattern, device, dpi, first_page, last_page, render_preset
+            )
+            result = self._run_command_with_progress(args, input_file, progress_callback)
+        if plan is not None:
+            self._finish_incremental(result, plan, started_at)
+        if journal is not None:
+            self._finish_resume(result, journal)
+        return self._finish_result(
+            result, "pdf_to_image", [input_file],
+            output_pattern=output_pattern, started_at=started_at,
+            options={"device": device, "dpi": dpi, "first_page": first_page, "last_page": last_page,
+                     "pages": pages, "render_preset": render_preset, "incremental": incremental,
+                     "resume": resume}
+        )
+
+    def _pdf_to_image_auto(
+        self,
+        input_file: str,
+        output_pattern: str,
+        dpi: int,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        pages: Optional[str],
+        jobs: int,
+        render_preset: Optional[str],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        journal: Optional[JobJournal] = None
+    ) -> JobResult:
+        """自動圖片格式：各頁依類別分組，每組以對應的格式轉換"""
+        started = time.perf_counter()
+        result = JobResult(success=True)
+        report = self._classify_for_auto(
+            input_file, output_pattern, first_page, last_page, pages, jobs, result, progress_callback
+        )
+        done = 0
+        for page_class, device, group_pages in self._auto_groups(report):
+            callback = None
+            if progress_callback:
+                def callback(current: int, total: int, status: str, offset: int = done):
+                    progress_callback(offset + current, len(report.classes), status)
+            result.add(self._pdf_to_image_pages(
+                input_file, output_pattern, device, dpi, group_pages, jobs, render_preset, callback, journal
+            ))
+            done += len(report.pages_of(page_class))
+        self._finish_auto(input_file, output_pattern, dpi, render_preset, report, result)
+        result.wall_time = time.perf_counter() - started
+        return result
+
+    def _classify_for_auto(
+        self,
+        input_file: str,
+        output_pattern: str,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        pages: Optional[str],
+        jobs: int,
+        result: JobResult,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> ColorReport:
+        """
+        判斷要轉換的每頁類別
+
+        無法判斷 (沒有 numpy 或轉換失敗) 時全部視為彩色，並在 result 加入警告；
+        無法取得頁數時 result 為失敗。
+
+        Raises:
+            ValueError: 輸出檔名沒有 %d
+        """
+        if "%" not in output_pattern:
+            raise ValueError("自動格式的輸出檔名需要包含 %d (每頁一個檔案)")
+        total = self.get_pdf_page_count(input_file)
+        if pages:
+            selected = _expand_pages(pages, total)
+        else:
+            selected = list(range(max(first_page or 1, 1), min(last_page or total, total) + 1))
+        if not selected:
+            result.success = False
+            result.message = "沒有要轉換的頁面 (無法取得頁數？)"
+            return ColorReport({})
+        if progress_callback:
+            progress_callback(0, len(selected), "分析頁面色彩...")
+        try:
+            return classify_pages(self, input_file, selected, jobs=jobs)
+        except (ImportError, RuntimeError) as e:
+            result.warnings.append(f"無法分析頁面色彩，全部以 PNG 輸出: {e}")
+            return ColorReport({page: "color" for page in selected})
+
+    @staticmethod
+    def _auto_groups(report: ColorReport) -> List[tuple]:
+        """[(類別, IMAGE_DEVICES 的名稱, 頁碼運算式)]"""
+        groups = []
+        for page_class in PAGE_CLASSES:
+            class_pages = report.pages_of(page_class)
+            if class_pages:
+                expression = format_page_ranges(pages_to_ranges(class_pages))
+                groups.append((page_class, AUTO_IMAGE_DEVICES[page_class], expression))
+        return groups
+
+    def _finish_auto(
+        self,
+        input_file: str,
+        output_pattern: str,
+        dpi: int,
+        render_preset: Optional[str],
+        report: ColorReport,
+        result: JobResult
+    ):
+        """記錄各類別的輸出大小，抽樣估計節省的大小，並將報告寫入結果"""
+        for page_class in PAGE_CLASSES:
+            class_pages = report.pages_of(page_class)
+            if class_pages:
+                report.output_bytes[page_class] = sum(_file_size(output_pattern % page) for page in class_pages)
+        if result.success:
+            self._estimate_auto_savings(input_file, output_pattern, dpi, render_preset, report)
+        result.details["auto_device"] = report.to_dict()
+        result.append_log(report.summary() + "\n")
+
+    def _estimate_auto_savings(
+        self,
+        input_file: str,
+        output_pattern: str,
+        dpi: int,
+        render_preset: Optional[str],
+        report: ColorReport
+    ):
+        """
+        估計全部以 PNG 輸出的大小
+
+        黑白與灰階各取最多 AUTO_IMAGE["sample_pages"] 頁另以 PNG 輸出到暫存資料夾，
+        依同一批頁面 PNG 與實際輸出的大小比例推算整個類別；彩色頁面本來就是 PNG。
+        """
+        samples = {c: report.pages_of(c)[:AUTO_IMAGE["sample_pages"]] for c in ("bilevel", "gray")}
+        sampled = sorted(page for class_pages in samples.values() for page in class_pages)
+        if not sampled:
+            return
+        work_dir = tempfile.mkdtemp(prefix="gsgui-auto-", dir=os.path.dirname(os.path.abspath(output_pattern)))
+        try:
+            pattern = os.path.join(work_dir, "sample_%d.png")
+            expression = format_page_ranges(pages_to_ranges(sampled))
+            if not self._pdf_to_image_pages(input_file, pattern, "PNG", dpi, expression, 1, render_preset).success:
+                return
+            for page_class, class_pages in samples.items():
+                png = sum(_file_size(pattern % page) for page in class_pages)
+                actual = sum(_file_size(output_pattern % page) for page in class_pages)
+                if png and actual:
+                    report.estimated_bytes[page_class] = int(report.output_bytes[page_class] * png / actual)
+            report.sampled_pages = sampled
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _plan_incremental(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        pages: Optional[str],
+        render_preset: Optional[str]
+    ) -> IncrementalPlan:
+        """比對指紋記錄，決定增量轉換要重新轉換的頁面"""
+        if "%" not in output_pattern:
+            raise ValueError("增量轉換的輸出檔名需要包含 %d (每頁一個檔案)")
+        fingerprints = page_fingerprints(input_file)
+        total = len(fingerprints)
+        # 頁面樹讀錯時頁碼對不上，寧可失敗也不要略過或漏掉頁面
+        count = self.get_pdf_page_count(input_file)
+        if count != total:
+            raise PdfError(f"解析到的頁數 ({total}) 與 Ghostscript 讀到的頁數 ({count}) 不符，無法增量轉換")
+        if pages:
+            selected = _expand_pages(pages, total)
+        else:
+            selected = list(range(max(first_page or 1, 1), min(last_page or total, total) + 1))
+        options = {"device": device, "dpi": dpi, "render_preset": render_preset}
+        return IncrementalPlan(output_pattern, options, selected, fingerprints)
+
+    @staticmethod
+    def _finish_incremental(result: JobResult, plan: IncrementalPlan, started_at: float):
+        """記錄這次確實輸出的頁面指紋，並將略過的頁數寫入結果"""
+        rendered = []
+        for page in plan.render:
+            path = plan.output_pattern % page
+            try:
+                if os.path.getmtime(path) >= started_at - 1:
+                    rendered.append(page)
+            except OSError:
+                pass
+        try:
+            plan.save(rendered)
+        except OSError as e:
+            result.warnings.append(f"無法寫入指紋記錄 {plan.manifest_file}: {e}")
+        result.details["incremental"] = plan.to_dict()
+        result.append_log(plan.summary() + "\n")
+
+    def _plan_resume(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        pages: Optional[str],
+        render_preset: Optional[str]
+    ) -> tuple[JobJournal, List[int]]:
+        """
+        讀取工作日誌，決定續傳要轉換的頁面
+
+        Returns:
+            (工作日誌, 還沒完成的頁碼)
+        """
+        if "%" not in output_pattern:
+            raise ValueError("續傳的輸出檔名需要包含 %d (每頁一個檔案)")
+        total = self.get_pdf_page_count(input_file)
+        if total == 0:
+            raise RuntimeError(f"無法讀取 PDF 頁數: {input_file}")
+        if pages:
+            selected = _expand_pages(pages, total)
+        else:
+            selected = list(range(max(first_page or 1, 1), min(last_page or total, total) + 1))
+        options = {"device": device, "dpi": dpi, "render_preset": render_preset}
+        journal = JobJournal(output_pattern, input_file, options)
+        done = set(journal.completed({page: output_pattern % page for page in selected}))
+        return journal, [page for page in selected if page not in done]
+
+    @staticmethod
+    def _finish_resume(result: JobResult, journal: JobJournal):
+        """將續傳的頁數寫入結果"""
+        result.details["resume"] = journal.to_dict()
+        result.append_log(journal.summary() + "\n")
+
+    def get_version(self) -> Optional[tuple]:
+        """Ghostscript 版本 (例如 (10, 2, 1))；無法取得時為 None"""
+        if self._version is False:
+            try:
+                output = subprocess.run(
+                    [self.gs_path, "--version"], capture_output=True, text=True, timeout=10
+                ).stdout.strip()
+                self._version = tuple(int(part) for part in output.split("."))
+            except (OSError, subprocess.SubprocessError, ValueError):
+                self._version = None
+        return self._version
+
+    def supports_page_list(self) -> bool:
+        """是否支援 -sPageList (版本未知時視為不支援)"""
+        version = self.get_version()
+        return version is not None and version >= PAGE_LIST_MIN_VERSION
+
+    def _plan_page_groups(
+        self,
+        input_file: str,
+        pages: str,
+        jobs: int
+    ) -> tuple[List[int], bool, List[List[int]]]:
+        """
+        將頁碼運算式展開並分組，每組由一個 Ghostscript 轉換
+
+        支援 -sPageList 時切成最多 jobs 個成本相近的組 (jobs=1 時只有一組，單次執行轉換全部頁面)；
+        不支援時每段連續頁碼一組 (以 -dFirstPage/-dLastPage 轉換)。
+
+        Returns:
+            (要轉換的頁碼, 是否使用 -sPageList, [[組內頁碼]])
         """
+        selected = _expand_pages(pages, self.get_pdf_page_count(input_file))
+        if not self.supports_page_list():
+            return selected, False, [list(range(first, last + 1)) for first, last in pages_to_ranges(selected)]
+
+        try:
+            costs = analyze_pages(input_file)
+            costs = [costs[page - 1].cost for page in selected]
+        except (PdfError, OSError, IndexError):
+            costs = [1.0] * len(selected)
+        groups = [selected[start:end + 1] for start, end in balance_shards(costs, jobs)]
+        return selected, True, groups
+
+    def _page_group_args(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        group: List[int],
+        use_page_list: bool,
+        render_preset: Optional[str]
+    ) -> List[str]:
+        """轉換一組頁碼的命令參數"""
+        if use_page_list:
+            page_list = format_page_ranges(pages_to_ranges(group))
+            return self._build_pdf_to_image_args(
+                input_file, output_pattern, device, dpi, render_preset=render_preset, page_list=page_list
+            )
+        return self._build_pdf_to_image_args(
+            input_file, output_pattern, device, dpi, group[0], group[-1], render_preset
+        )
+
+    @staticmethod
+    def _page_groups_log(use_page_list: bool, groups: List[List[int]]) -> str:
+        method = "-sPageList" if use_page_list else "連續頁碼分段"
+        ranges = "; ".join(format_page_ranges(pages_to_ranges(group)) for group in groups)
+        return f"指定頁碼: {len(groups)} 次 Ghostscript ({method}: {ranges})\n"
+
+    def _pdf_to_image_pages(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        pages: str,
+        jobs: int,
+        render_preset: Optional[str],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        journal: Optional[JobJournal] = None
+    ) -> JobResult:
+        """
+        轉換頁碼運算式指定的頁面，輸出檔名以原始頁碼編號
+
+        各組先輸出到暫存資料夾，每頁寫完後依原始頁碼改名為 output_pattern (見 core.journal.PageCollector)，
+        有工作日誌時同時記錄；不支援 -sPageList 時各段連續頁碼同時轉換 (最多 PARALLEL_MAX_JOBS 個)。
+        """
+        selected, use_page_list, groups = self._plan_page_groups(input_file, pages, jobs)
+        if "%" not in output_pattern:
+            if len(selected) > 1 and not use_page_list:
+                raise ValueError("此 Ghostscript 版本不支援 -sPageList，轉換多個不連續頁碼時輸出檔名需要包含 %d")
+            args = self._page_group_args(
+                input_file, output_pattern, device, dpi, selected, use_page_list, render_preset
+            )
+            return self._run_command_with_progress(args, input_file, progress_callback)
+
+        work_dir = tempfile.mkdtemp(prefix="gsgui-pages-", dir=os.path.dirname(os.path.abspath(output_pattern)))
+        lock = threading.Lock()
+        done = 0
+
+        def run_group(index: int, group: List[int]) -> JobResult:
+            pattern = self._shard_pattern(work_dir, index, output_pattern)
+            collector = PageCollector(pattern, output_pattern, group, journal)
+
+            def on_line(line: str):
+                nonlocal done
+                if not line.startswith("Page "):
+                    return
+                collector.page_started()
+                if progress_callback:
+                    _, status = self._parse_progress_line(line, 0)
+                    with lock:
+                        done += 1
+                        current = done
+                    progress_callback(current, len(selected), status or "")
+
+            args = self._page_group_args(input_file, pattern, device, dpi, group, use_page_list, render_preset)
+            group_result = self._execute([self.gs_path] + args, on_line)
+            collector.finish(group_result.success)
+            return group_result
+
+        started = time.perf_counter()
+        result = JobResult(success=True)
+        workers = len(groups) if use_page_list else min(len(groups), PARALLEL_MAX_JOBS)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = [pool.submit(run_group, i, group) for i, group in enumerate(groups)]
+                for future in futures:
+                    result.add(future.result())
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        result.wall_time = time.perf_counter() - started
+        result.append_log(self._page_groups_log(use_page_list, groups))
+        return result
+
+    def _plan_image_shards(
+        self,
+        input_file: str,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        jobs: int
+    ) -> tuple[int, int, List[tuple]]:
+        """
+        依頁面成本將要轉換的頁面切成最多 jobs 個連續分段
+
+        Returns:
+            (起始頁, 頁數, [(分段起始頁, 分段結束頁)])
+        """
+        total = self.get_pdf_page_count(input_file)
+        first = max(first_page or 1, 1)
+        last = min(last_page or total, total) if total else (last_page or first)
+        count = max(last - first + 1, 0)
+        try:
+            costs = [c.cost for c in analyze_pages(input_file)][first - 1:last]
+        except (PdfError, OSError):
+            costs = []
+        if len(costs) != count:
+            # 無法估計時每頁成本視為相同
+            costs = [1.0] * count
+        shards = [(first + start, first + end) for start, end in balance_shards(costs, jobs)]
+        return first, count, shards
+
+    @staticmethod
+    def _shard_pattern(work_dir: str, index: int, output_pattern: str) -> str:
+        """分段在暫存資料夾中的輸出檔案模式"""
+        return os.path.join(work_dir, f"{index:03d}_%06d{os.path.splitext(output_pattern)[1]}")
+
+    @staticmethod
+    def _collect_shard_outputs(pattern: str, output_pattern: str, first: int, shard: tuple):
+        """將分段的輸出依頁碼改名為 output_pattern (編號與單一 Ghostscript 轉換相同，從 first 起算 1)"""
+        shard_first, shard_last = shard
+        for offset in range(shard_last - shard_first + 1):
+            path = pattern % (offset + 1)
+            if os.path.exists(path):
+                os.replace(path, output_pattern % (shard_first - first + offset + 1))
+
+    def _pdf_to_image_parallel(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str,
+        dpi: int,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        jobs: int,
+        render_preset: Optional[str],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> JobResult:
+        """
+        依頁面成本將頁面切成連續分段，每段由一個 Ghostscript 同時轉換
+
+        各分段先輸出到暫存資料夾，完成後依頁碼改名為 output_pattern。
+        """
+        first, count, shards = self._plan_image_shards(input_file, first_page, last_page, jobs)
+        if len(shards) <= 1:
+            args = self._build_pdf_to_image_args(
+                input_file, output_pattern, device, dpi, first_page, last_page, render_preset
+            )
+            return self._run_command_with_progress(args, input_file, progress_callback)
+
+        work_dir = tempfile.mkdtemp(prefix="gsgui-shards-", dir=os.path.dirname(os.path.abspath(output_pattern)))
+        lock = threading.Lock()
+        done = 0
+
+        def run_shard(index: int, shard: tuple) -> JobResult:
+            pattern = self._shard_pattern(work_dir, index, output_pattern)
+
+            def on_line(line: str):
+                nonlocal done
+                if line.startswith("Page ") and progress_callback:
+                    _, status = self._parse_progress_line(line, 0)
+                    with lock:
+                        done += 1
+                        current = done
+                    progress_callback(current, count, status or "")
+
+            args = self._build_pdf_to_image_args(
+                input_file, pattern, device, dpi, shard[0], shard[1], render_preset
+            )
+            shard_result = self._execute([self.gs_path] + args, on_line)
+            self._collect_shard_outputs(pattern, output_pattern, first, shard)
+            return shard_result
+
+        started = time.perf_counter()
+        result = JobResult(success=True)
+        try:
+            with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+                futures = [pool.submit(run_shard, i, shard) for i, shard in enumerate(shards)]
+                for future in futures:
+                    result.add(future.result())
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        # 各分段同時執行，耗時是整體經過時間而不是各段相加
+        result.wall_time = time.perf_counter() - started
+        result.append_log(self._shards_log(shards))
+        return result
+
+    @staticmethod
+    def _shards_log(shards: List[tuple]) -> str:
+        return f"平行轉換: {len(shards)} 段 ({', '.join(f'{a}-{b}' for a, b in shards)})\n"
+
+    def _build_pdf_to_image_args(
+        self,
+        input_file: str,
+        output_pattern: str,
+        device: str = "PNG",
+        dpi: int = 150,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        render_preset: Optional[str] = None,
+        page_list: Optional[str] = None
+    ) -> List[str]:
+        """建立 PDF 轉圖片的命令參數 (page_list: -sPageList 的頁碼，例如 "1,5,9-12")"""
         device_name = IMAGE_DEVICES.get(device, "png16m")
         args = [
             "-dBATCH",
             "-dNOPAUSE",
             f"-sDEVICE={device_name}",
             f"-r{dpi}",
-        ]
+        ] + _render_preset_args(render_preset)
         if first_page:
             args.append(f"-dFirstPage={first_page}")
         if last_page:
             args.append(f"-dLastPage={last_page}")
+        if page_list:
+            args.append(f"-sPageList={page_list}")
         args.extend([f"-sOutputFile={output_pattern}", input_file])
+        return args
 
-        return self._run_command_with_progress(args, input_file, progress_callback)
+    def render_arrays(
+        self,
+        input_file: str,
+        dpi: int = 150,
+        color: str = "RGB",
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        pages: Optional[str] = None,
+        render_preset: Optional[str] = None,
+        prefetch: int = RASTER_PREFETCH
+    ) -> RasterStream:
+        """
+        將頁面轉為 NumPy 陣列 (需要 numpy)
+
+        Ghostscript 以無壓縮光柵寫到管線，不產生任何檔案；迭代回傳的 RasterStream 依頁面順序
+        取得 (高, 寬, 色版) 的 uint8 陣列，RGB 為 3 個色版、GRAY 為 1 個。
+
+        Args:
+            input_file: 輸入 PDF 檔案路徑
+            dpi: 解析度
+            color: 色彩模式 (RGB/GRAY，見 config.RASTER_DEVICES)
+            first_page: 起始頁碼
+            last_page: 結束頁碼
+            pages: 頁碼運算式 (取代 first_page/last_page，不支援 -sPageList 時依序轉換各段連續頁碼)
+            render_preset: 繪製預設值 (見 pdf_to_image)
+            prefetch: 預先讀取的頁數上限
+
+        Raises:
+            ValueError: 未知的色彩模式或繪製預設值
+            PageRangeError: 頁碼運算式錯誤
+            ImportError: 沒有安裝 numpy
+        """
+        import numpy  # noqa: F401 (提早回報缺少 numpy)
+
+        if color not in RASTER_DEVICES:
+            raise ValueError(f"未知的色彩模式: {color} (可用: {', '.join(RASTER_DEVICES)})")
+        if pages:
+            selected = _expand_pages(pages, self.get_pdf_page_count(input_file))
+            if self.supports_page_list():
+                selections = [(None, None, format_page_ranges(pages_to_ranges(selected)))]
+            else:
+                selections = [(first, last, None) for first, last in pages_to_ranges(selected)]
+        else:
+            selections = [(first_page, last_page, None)]
+        commands = [
+            [self.gs_path] + self._build_raster_args(input_file, color, dpi, first, last, render_preset, page_list)
+            for first, last, page_list in selections
+        ]
+        options = {"dpi": dpi, "color": color, "first_page": first_page, "last_page": last_page,
+                   "pages": pages, "render_preset": render_preset}
+
+        def finish(result: JobResult):
+            self._finish_result(result, "render_arrays", [input_file], options=options)
+
+        return RasterStream(commands, prefetch, on_finish=finish)
+
+    def _build_raster_args(
+        self,
+        input_file: str,
+        color: str,
+        dpi: int,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        render_preset: Optional[str] = None,
+        page_list: Optional[str] = None
+    ) -> List[str]:
+        """建立轉為光柵管線的命令參數 (影像寫到標準輸出，訊息改寫到標準錯誤)"""
+        args = [
+            "-q",
+            "-dBATCH",
+            "-dNOPAUSE",
+            f"-sDEVICE={RASTER_DEVICES[color]}",
+            f"-r{dpi}",
+        ] + _render_preset_args(render_preset)
+        if first_page:
+            args.append(f"-dFirstPage={first_page}")
+        if last_page:
+            args.append(f"-dLastPage={last_page}")
+        if page_list:
+            args.append(f"-sPageList={page_list}")
+        args.extend(["-sstdout=%stderr", "-sOutputFile=-", input_file])
+        return args
 
     def merge_pdfs(
         self,
         input_files: List[str],
         output_file: str,
+        linearize: bool = False,
+        dedupe: bool = False,
+        remove_blank: bool = False,
+        blank_threshold: Optional[float] = None,
         progress_callback: Optional[Callable[[int, int, str], None]] = None
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         合併多個 PDF
 
         Args:
             input_files: 輸入 PDF 檔案列表
             output_file: 輸出 PDF 檔案路徑
+            linearize: 輸出線性化 PDF (快速網頁檢視)，完成後檢查提示表
+            dedupe: 去除各檔案間重複的圖片、字型與色彩描述檔 (結果見 result.details["dedup"])
+            remove_blank: 移除空白頁 (見 core/blank_pages.py，結果見 result.details["blank_pages"])
+            blank_threshold: 空白頁的墨水覆蓋率門檻 (None=config.BLANK_PAGES["threshold"])
             progress_callback: 進度回調 (current, total, status)
         """
         # 計算總頁數
         total_pages = sum(self.get_pdf_page_count(f) for f in input_files)
 
+        pre = JobResult(success=True)
+        sources, temp_files = input_files, []
+        if remove_blank:
+            sources, temp_files = self._remove_blank_inputs(input_files, output_file, blank_threshold, pre)
+            total_pages -= self._blank_removed_count(pre)
+
+        # 去除重複資源時先輸出到暫存檔，線性化留到最後一步
+        merged_file = output_file + ".merge.tmp" if dedupe else output_file
+        args = self._build_merge_args(sources, merged_file, linearize and not dedupe, dedupe)
+
+        def internal_callback(current_page: int, status: str):
+            if progress_callback and total_pages > 0:
+                progress_callback(current_page, total_pages, status)
+
+        try:
+            result = self._run_command(args, internal_callback, total_pages)
+        finally:
+            _remove_files(temp_files)
+        result.add(pre)
+        if dedupe:
+            self._dedupe_merged(result, merged_file, output_file, linearize)
+        return self._finish_result(
+            result, "merge_pdfs", input_files, [output_file], pages=total_pages or None,
+            options={"linearize": linearize, "dedupe": dedupe, "remove_blank": remove_blank}
+        )
+
+    def detect_blank_pages(
+        self,
+        input_file: str,
+        threshold: Optional[float] = None,
+        jobs: int = PARALLEL_MAX_JOBS
+    ) -> BlankReport:
+        """
+        偵測空白頁 (以極低解析度平行轉換並計算墨水覆蓋率，見 core/blank_pages.py)
+
+        Args:
+            input_file: 輸入 PDF
+            threshold: 墨水覆蓋率門檻 (None=config.BLANK_PAGES["threshold"])
+            jobs: 同時執行的 Ghostscript 數
+
+        Raises:
+            ImportError: 沒有安裝 numpy
+            RuntimeError: 轉換失敗
+        """
+        return detect_blank_pages(self, input_file, threshold, jobs=max(1, min(jobs, PARALLEL_MAX_JOBS)))
+
+    def _blank_page_list(
+        self,
+        input_file: str,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        threshold: Optional[float],
+        pre: JobResult
+    ) -> Optional[str]:
+        """
+        偵測 first_page~last_page 中的空白頁，回傳保留頁面的 -sPageList
+
+        不需要或無法移除時為 None (原因加入 pre.warnings)；偵測結果與耗時記錄在 pre。
+        """
+        if not self.supports_page_list():
+            pre.warnings.append("移除空白頁需要支援 -sPageList 的 Ghostscript (9.20 以上)，未移除空白頁")
+            return None
+        started = time.perf_counter()
+        try:
+            report = self.detect_blank_pages(input_file, threshold)
+        except (ImportError, RuntimeError, OSError) as e:
+            pre.warnings.append(f"{os.path.basename(input_file)}: 無法偵測空白頁: {e}")
+            return None
+        finally:
+            pre.wall_time += time.perf_counter() - started
+
+        pages = range(max(first_page or 1, 1), min(last_page or len(report.scores), len(report.scores)) + 1)
+        blank = set(report.blank_pages)
+        removed = [page for page in pages if page in blank]
+        keep = [page for page in pages if page not in blank]
+        details = report.to_dict()
+        details["removed"] = removed if keep else []
+        pre.details.setdefault("blank_pages", {})[input_file] = details
+        pre.append_log(f"{os.path.basename(input_file)}: {report.summary()}\n")
+        if not keep:
+            pre.warnings.append(f"{os.path.basename(input_file)}: 所有頁面都是空白，未移除")
+            return None
+        return format_page_ranges(pages_to_ranges(keep)) if removed else None
+
+    @staticmethod
+    def _blank_removed_count(pre: JobResult) -> int:
+        return sum(len(d["removed"]) for d in pre.details.get("blank_pages", {}).values())
+
+    def _remove_blank_inputs(
+        self,
+        input_files: List[str],
+        output_file: str,
+        threshold: Optional[float],
+        pre: JobResult
+    ) -> tuple[List[str], List[str]]:
+        """
+        將有空白頁的輸入檔案去除空白頁後寫到暫存檔
+
+        Returns:
+            (合併用的輸入檔案, 要刪除的暫存檔)
+        """
+        sources, temp_files = [], []
+        for index, input_file in enumerate(input_files):
+            page_list = self._blank_page_list(input_file, None, None, threshold, pre)
+            if page_list is None:
+                sources.append(input_file)
+                continue
+            temp_file = f"{output_file}.blank{index}.tmp"
+            temp_files.append(temp_file)
+            filtered = self._run_command_fast(
+                self._build_split_args(input_file, temp_file, page_list=page_list)
+            )
+            pre.wall_time += filtered.wall_time
+            if filtered.success:
+                sources.append(temp_file)
+            else:
+                pre.details["blank_pages"][input_file]["removed"] = []
+                pre.warnings.append(f"{os.path.basename(input_file)}: 無法移除空白頁，保留原檔案")
+                sources.append(input_file)
+        return sources, temp_files
+
+    def _build_merge_args(
+        self,
+        input_files: List[str],
+        output_file: str,
+        linearize: bool = False,
+        dedupe: bool = False
+    ) -> List[str]:
+        """建立合併 PDF 的命令參數"""
         args = [
             "-dBATCH",
             "-dNOPAUSE",
             "-sDEVICE=pdfwrite",
+        ]
+        if dedupe:
+            args.append("-dDetectDuplicateImages=true")
+        return args + _fast_web_view_args(linearize) + [
             f"-sOutputFile={output_file}",
         ] + input_files
 
-        def internal_callback(current_page: int, status: str):
-            if progress_callback and total_pages > 0:
-                progress_callback(current_page, total_pages, status)
+    def _dedupe_merged(self, result: JobResult, merged_file: str, output_file: str, linearize: bool):
+        """
+        去除合併結果中重複的資源並移到輸出位置，需要線性化時再以 Ghostscript 輸出一次
 
-        return self._run_command(args, internal_callback, total_pages)
+        無法解析合併結果或沒有節省空間時保留 Ghostscript 的輸出。
+        """
+        deduped_file = output_file + ".dedup.tmp"
+        try:
+            if not result.success:
+                return
+            source = merged_file
+            started = time.perf_counter()
+            try:
+                report = dedupe_pdf(merged_file, deduped_file)
+            except (PdfError, OSError) as e:
+                result.warnings.append(f"無法去除重複資源: {e}")
+            else:
+                metrics.record_dedup(report)
+                result.details["dedup"] = report.to_dict()
+                if report.bytes_saved > 0:
+                    source = deduped_file
+            result.wall_time += time.perf_counter() - started
+
+            if linearize:
+                result.add(self._run_command_fast(self._build_merge_args([source], output_file, True)))
+            else:
+                os.replace(source, output_file)
+        finally:
+            for path in (merged_file, deduped_file):
+                if os.path.exists(path):
+                    os.remove(path)
 
     def split_pdf(
         self,
@@ -267,8 +1315,11 @@ class GhostscriptWrapper:
         output_file: str,
         first_page: int,
         last_page: int,
+        linearize: bool = False,
+        remove_blank: bool = False,
+        blank_threshold: Optional[float] = None,
         progress_callback: Optional[Callable[[int, int, str], None]] = None
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         分割 PDF (擷取指定頁面)
 
@@ -277,73 +1328,480 @@ class GhostscriptWrapper:
             output_file: 輸出 PDF 檔案路徑
             first_page: 起始頁碼
             last_page: 結束頁碼
+            linearize: 輸出線性化 PDF (快速網頁檢視)，完成後檢查提示表
+            remove_blank: 移除範圍內的空白頁 (結果見 result.details["blank_pages"])
+            blank_threshold: 空白頁的墨水覆蓋率門檻 (None=config.BLANK_PAGES["threshold"])
             progress_callback: 進度回調 (current, total, status)
         """
         total_pages = last_page - first_page + 1
 
-        args = [
+        pre = JobResult(success=True)
+        page_list = None
+        if remove_blank:
+            page_list = self._blank_page_list(input_file, first_page, last_page, blank_threshold, pre)
+            total_pages -= self._blank_removed_count(pre)
+        # 先寫到暫存檔，成功才改為正式檔名 (中斷時不會留下不完整的輸出)
+        part_file = partial_path(output_file)
+        args = self._build_split_args(input_file, part_file, first_page, last_page, linearize, page_list)
+
+        def internal_callback(current_page: int, status: str):
+            if progress_callback and total_pages > 0:
+                # 調整頁碼顯示 (相對於選取範圍)
+                relative_page = current_page - first_page + 1
+                progress_callback(relative_page, total_pages, status)
+
+        result = self._run_command(args, internal_callback, total_pages)
+        self._commit_partial(result, part_file, output_file)
+        result.add(pre)
+        return self._finish_result(
+            result, "split_pdf", [input_file], [output_file], pages=total_pages,
+            options={"first_page": first_page, "last_page": last_page, "linearize": linearize,
+                     "remove_blank": remove_blank}
+        )
+
+    @staticmethod
+    def _commit_partial(result: JobResult, part_file: str, output_file: str):
+        """成功時將暫存檔改為正式檔名，失敗時刪除暫存檔"""
+        if result.success and os.path.exists(part_file):
+            os.replace(part_file, output_file)
+        else:
+            _remove_files([part_file])
+
+    def _build_split_args(
+        self,
+        input_file: str,
+        output_file: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        linearize: bool = False,
+        page_list: Optional[str] = None
+    ) -> List[str]:
+        """建立分割 PDF 的命令參數 (指定 page_list 時以 -sPageList 取代起訖頁碼)"""
+        if page_list:
+            pages = [f"-sPageList={page_list}"]
+        else:
+            pages = [f"-dFirstPage={first_page}", f"-dLastPage={last_page}"]
+        return [
             "-dBATCH",
             "-dNOPAUSE",
             "-sDEVICE=pdfwrite",
-            f"-dFirstPage={first_page}",
-            f"-dLastPage={last_page}",
+        ] + pages + _fast_web_view_args(linearize) + [
             f"-sOutputFile={output_file}",
             input_file,
         ]
 
-        def internal_callback(current_page: int, status: str):
-            if progress_callback and total_pages > 0:
-                # 調整頁碼顯示 (相對於選取範圍)
-                relative_page = current_page - first_page + 1
-                progress_callback(relative_page, total_pages, status)
+    def split_pdf_by_size(
+        self,
+        input_file: str,
+        output_file: str,
+        max_bytes: int,
+        linearize: bool = False,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> JobResult:
+        """
+        依檔案大小分割 PDF (連續頁面的多個檔案，每個不超過 max_bytes)
 
-        return self._run_command(args, internal_callback, total_pages)
+        各份的頁面依 PDF 結構估計 (見 core/size_split.py)，不必反覆試跑 Ghostscript；
+        輸出後檢查實際大小，超過上限的部分依實際與估計大小的比例重新分割
+        (最多 SIZE_SPLIT["max_passes"] 次)。單頁就超過上限時照樣輸出並加入警告。
+
+        輸出檔名為 output_001.pdf、output_002.pdf ... (只有一份時為 output_file)；
+        各份的頁碼、估計與實際大小見 result.details["size_split"]。
+
+        Args:
+            input_file: 輸入 PDF 檔案路徑
+            output_file: 輸出 PDF 檔案路徑 (多份時加上編號)
+            max_bytes: 每個檔案的大小上限 (bytes)
+            linearize: 輸出線性化 PDF (快速網頁檢視)，完成後檢查提示表
+            progress_callback: 進度回調 (current, total, status)
+        """
+        options = {"max_bytes": max_bytes, "linearize": linearize}
+        result = JobResult(success=True)
+        try:
+            index = self._size_index(input_file)
+        except (PdfError, OSError) as e:
+            result.success = False
+            result.message = f"無法分析 PDF 結構: {e}"
+            return self._finish_result(result, "split_pdf", [input_file], [], options=options)
+
+        pending = index.plan(int(max_bytes * SIZE_SPLIT["margin"]))
+        done: List[tuple] = []  # (起始頁, 結束頁, 估計大小, 暫存檔, 實際大小)
+        passes = 0
+        work_dir = tempfile.mkdtemp(prefix=".split-", dir=os.path.dirname(os.path.abspath(output_file)))
+        try:
+            while pending and result.success:
+                passes += 1
+                retry = []
+                for i, part in enumerate(pending):
+                    if progress_callback:
+                        total = len(done) + len(retry) + len(pending) - i
+                        progress_callback(len(done) + 1, total, f"輸出第 {part[0]}-{part[1]} 頁...")
+                    path = os.path.join(work_dir, f"{part[0]:06d}-{part[1]:06d}.pdf")
+                    run = self._run_command_fast(self._build_split_args(input_file, path, part[0], part[1], linearize))
+                    result.add(run)
+                    if not run.success:
+                        break
+                    self._check_size_part(index, part, path, max_bytes, passes, done, retry)
+                pending = retry
+            if result.success:
+                self._finish_size_split(result, done, output_file, max_bytes, passes)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return self._finish_result(
+            result, "split_pdf", [input_file], result.output_files, pages=result.pages, options=options
+        )
+
+    def _size_index(self, input_file: str) -> SizeIndex:
+        """
+        分析依大小分割用的 PDF 結構，並確認頁數與 Ghostscript 讀到的相同
+
+        Raises:
+            PdfError: 無法解析的 PDF、沒有頁面或頁數不符 (頁面樹讀錯時分割結果會漏頁)
+        """
+        index = SizeIndex(input_file)
+        count = self.get_pdf_page_count(input_file)
+        if index.page_count == 0:
+            raise PdfError("找不到任何頁面")
+        if index.page_count != count:
+            raise PdfError(f"解析到的頁數 ({index.page_count}) 與 Ghostscript 讀到的頁數 ({count}) 不符")
+        return index
+
+    @staticmethod
+    def _check_size_part(
+        index: SizeIndex, part: tuple, path: str, max_bytes: int, passes: int, done: List[tuple], retry: List[tuple]
+    ):
+        """
+        檢查一份輸出的實際大小
+
+        未超過上限 (或無法再分割) 時加入 done；
+        超過時刪除輸出，依這一份實際與估計大小的比例縮小目標，重新規劃的範圍加入 retry。
+        """
+        first, last, estimated = part
+        size = _file_size(path)
+        if size > max_bytes and last > first and passes <= SIZE_SPLIT["max_passes"]:
+            ratio = size / max(estimated, 1)
+            retry.extend(index.plan(int(max_bytes * SIZE_SPLIT["margin"] / ratio), first, last))
+            os.remove(path)
+        else:
+            done.append((first, last, estimated, path, size))
+
+    @staticmethod
+    def _finish_size_split(result: JobResult, done: List[tuple], output_file: str, max_bytes: int, passes: int):
+        """依頁碼順序把暫存檔移到輸出檔名，記錄各份大小，單頁超過上限時加入警告"""
+        done.sort()
+        if len(done) == 1:
+            outputs = [output_file]
+        else:
+            base, ext = os.path.splitext(output_file)
+            outputs = [f"{base}_{i + 1:03d}{ext}" for i in range(len(done))]
+        parts = []
+        for (first, last, estimated, path, size), output in zip(done, outputs):
+            os.replace(path, output)
+            if size > max_bytes:
+                result.warnings.append(
+                    f"{os.path.basename(output)} (第 {first} 頁) 單頁就有 {size / 1048576:.2f} MB，超過上限"
+                )
+            parts.append({"file": output, "first_page": first, "last_page": last,
+                          "estimated_bytes": estimated, "bytes": size})
+        result.details["size_split"] = {"max_bytes": max_bytes, "passes": passes, "parts": parts}
+        result.output_files = outputs
+        result.pages = sum(last - first + 1 for first, last, *_ in done)
 
     def compress_pdf(
         self,
         input_file: str,
         output_file: str,
         pdf_settings: str = "ebook",
+        linearize: bool = False,
+        profile: Union[str, CompressionProfile, None] = None,
+        selective: bool = False,
+        compare_full: bool = False,
+        remove_blank: bool = False,
+        blank_threshold: Optional[float] = None,
         progress_callback: Optional[Callable[[int, int, str], None]] = None
-    ) -> tuple[bool, str]:
+    ) -> JobResult:
         """
         壓縮 PDF
 
         Args:
             input_file: 輸入 PDF 檔案路徑
             output_file: 輸出 PDF 檔案路徑
-            pdf_settings: PDF 品質設定 (screen/ebook/printer/prepress)
+            pdf_settings: PDF 品質設定 (screen/ebook/printer/prepress)，指定 profile 時不使用
+            linearize: 輸出線性化 PDF (快速網頁檢視)，完成後檢查提示表
+            profile: 壓縮設定檔 (名稱或 CompressionProfile，見 core/profiles.py)
+            selective: 只重新壓縮過大的圖片，其他內容照原樣複製 (見 core/selective.py)
+            compare_full: 選擇性壓縮時另外執行一次完整壓縮，比較耗時與大小
+                (結果見 result.details["selective"]["full"])
+            remove_blank: 移除空白頁 (結果見 result.details["blank_pages"]；選擇性壓縮不支援)
+            blank_threshold: 空白頁的墨水覆蓋率門檻 (None=config.BLANK_PAGES["threshold"])
             progress_callback: 進度回調 (current, total, status)
+
+        Raises:
+            ProfileError: 設定檔不存在或格式錯誤
         """
-        args = [
+        profile = self._resolve_profile(profile)
+        if selective:
+            result = self._compress_selective(
+                input_file, output_file, pdf_settings, linearize, profile, compare_full, progress_callback
+            )
+            if remove_blank:
+                result.warnings.append("選擇性壓縮不會移除空白頁")
+            return result
+        pre = JobResult(success=True)
+        page_list = None
+        if remove_blank:
+            if progress_callback:
+                progress_callback(0, 1, "偵測空白頁...")
+            page_list = self._blank_page_list(input_file, None, None, blank_threshold, pre)
+        args = self._build_compress_args(input_file, output_file, pdf_settings, linearize, profile, page_list)
+        result = self._run_command_with_progress(args, input_file, progress_callback)
+        result.add(pre)
+        options = self._compress_options(pdf_settings, linearize, profile)
+        options["remove_blank"] = remove_blank
+        return self._finish_result(result, "compress_pdf", [input_file], [output_file], options=options)
+
+    @staticmethod
+    def _selective_settings(profile: Optional[CompressionProfile]) -> Dict[str, Any]:
+        """選擇性壓縮的門檻 (設定檔的彩色圖片設定優先於預設值)"""
+        settings = dict(SELECTIVE_COMPRESS)
+        if profile is not None:
+            images = profile.settings.get("color_images") or {}
+            settings.update({k: images[k] for k in ("resolution", "threshold", "jpeg_quality") if k in images})
+        return settings
+
+    def _compress_selective(
+        self,
+        input_file: str,
+        output_file: str,
+        pdf_settings: str,
+        linearize: bool,
+        profile: Optional[CompressionProfile],
+        compare_full: bool,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> JobResult:
+        """選擇性壓縮，不經過 Ghostscript"""
+        settings = self._selective_settings(profile)
+        result = JobResult()
+        if progress_callback:
+            progress_callback(0, 1, "分析圖片...")
+        try:
+            # 以 Ghostscript 讀到的頁數檢查輸出 (讀取失敗時改用 PdfReader 讀到的頁數)
+            expected_pages = self.get_pdf_page_count(input_file) or None
+            report = selective_compress(input_file, output_file, expected_pages=expected_pages, **settings)
+        except (PdfError, OSError, ImportError) as e:
+            result.message = f"選擇性壓縮失敗: {e}"
+        else:
+            result.success = True
+            result.wall_time = report.seconds
+            result.pages = report.pages_total
+            result.details["selective"] = report.to_dict()
+            result.append_log(report.summary() + "\n")
+            if linearize:
+                result.warnings.append("選擇性壓縮不會線性化輸出 (快速網頁檢視需要完整改寫)")
+
+        if result.success and compare_full:
+            if progress_callback:
+                progress_callback(0, 1, "執行完整壓縮以比較...")
+            full_file = output_file + ".full.tmp"
+            try:
+                args = self._build_compress_args(input_file, full_file, pdf_settings, False, profile)
+                full = self._run_command_fast(args)
+                result.details["selective"]["full"] = {
+                    "success": full.success,
+                    "seconds": full.wall_time,
+                    "output_bytes": _file_size(full_file) if full.success else None,
+                }
+            finally:
+                if os.path.exists(full_file):
+                    os.remove(full_file)
+
+        # 輸出沒有線性化，不執行線性化檢查
+        options = self._compress_options(pdf_settings, False, profile)
+        options["selective"] = True
+        return self._finish_result(result, "compress_pdf", [input_file], [output_file], options=options)
+
+    @staticmethod
+    def _resolve_profile(profile: Union[str, CompressionProfile, None]) -> Optional[CompressionProfile]:
+        """將設定檔名稱轉為 CompressionProfile"""
+        if isinstance(profile, str):
+            return get_profile(profile)
+        return profile
+
+    @staticmethod
+    def _compress_options(
+        pdf_settings: str,
+        linearize: bool,
+        profile: Optional[CompressionProfile]
+    ) -> Dict[str, Any]:
+        """壓縮操作寫入工作記錄的參數"""
+        if profile is not None:
+            return {"profile": profile.name, "linearize": linearize}
+        return {"pdf_settings": pdf_settings, "linearize": linearize}
+
+    def _build_compress_args(
+        self,
+        input_file: str,
+        output_file: str,
+        pdf_settings: str = "ebook",
+        linearize: bool = False,
+        profile: Optional[CompressionProfile] = None,
+        page_list: Optional[str] = None
+    ) -> List[str]:
+        """建立壓縮 PDF 的命令參數 (page_list: 只輸出這些頁面，用於移除空白頁)"""
+        pages = [f"-sPageList={page_list}"] if page_list else []
+        if profile is not None:
+            args = ["-dBATCH", "-dNOPAUSE", "-sDEVICE=pdfwrite"] + profile.to_args() + pages
+            args += _fast_web_view_args(linearize) + [f"-sOutputFile={output_file}"]
+            postscript = profile.distiller_params()
+            if postscript:
+                args += ["-c", postscript, "-f"]
+            return args + [input_file]
+
+        return [
             "-dBATCH",
             "-dNOPAUSE",
             "-sDEVICE=pdfwrite",
             "-dCompatibilityLevel=1.4",
             "-dPDFFitPage",
             f"-dPDFSETTINGS=/{pdf_settings}",
+        ] + pages + _fast_web_view_args(linearize) + [
             f"-sOutputFile={output_file}",
             input_file,
         ]
 
-        return self._run_command_with_progress(args, input_file, progress_callback)
-
     def get_pdf_page_count(self, input_file: str) -> int:
-        """取得 PDF 頁數"""
-        # 將路徑轉換為 PostScript 格式（處理反斜線和特殊字元）
-        ps_path = input_file.replace("\\", "/")
+        """取得 PDF 頁數 (依路徑、大小與修改時間快取)"""
+        cached = self._cached_page_count(input_file)
+        if cached is not None:
+            return cached
+        result = self._run_command_fast(self._build_page_count_args(input_file))
+        count = self._parse_page_count(result.success, result.output)
+        self._store_page_count(input_file, count)
+        return count
+
+    @staticmethod
+    def _page_count_key(input_file: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(input_file)
+        except OSError:
+            return None
+        return os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns
+
+    def _cached_page_count(self, input_file: str) -> Optional[int]:
+        """查詢頁數快取，沒有時回傳 None"""
+        key = self._page_count_key(input_file)
+        count = None
+        if key is not None:
+            with self._cache_lock:
+                count = self._page_count_cache.get(key)
+                if count is not None:
+                    self._page_count_cache.move_to_end(key)
+        metrics.record_cache("page_count", count is not None)
+        return count
 
+    def _store_page_count(self, input_file: str, count: int):
+        """寫入頁數快取 (讀取失敗的結果不快取)"""
+        key = self._page_count_key(input_file)
+        if key is None or count <= 0:
+            return
+        with self._cache_lock:
+            self._page_count_cache[key] = count
+            while len(self._page_count_cache) > self.PAGE_COUNT_CACHE_SIZE:
+                self._page_count_cache.popitem(last=False)
+
+    def _build_page_count_args(self, input_file: str) -> List[str]:
+        """建立取得頁數的命令參數"""
         # 注意：_run_command_fast 會自動加 -q，所以這裡不需要再加
-        args = [
+        return [
             "-dNODISPLAY",
             "-dNOSAFER",
+            _postscript_input_arg(input_file),
             "-c",
-            f"({ps_path}) (r) file runpdfbegin pdfpagecount = quit"
+            f"{_POSTSCRIPT_INPUT} (r) file runpdfbegin pdfpagecount = quit"
         ]
-        success, output = self._run_command_fast(args)
-        if success:
+
+    def get_pdf_page_boxes(self, input_file: str) -> List[tuple]:
+        """
+        取得各頁的大小 (依路徑、大小與修改時間快取)
+
+        Returns:
+            [(寬, 高), ...] 單位 points，已依 /Rotate 旋轉；讀取失敗時為空列表
+        """
+        cached = self._cached_page_boxes(input_file)
+        if cached is not None:
+            return cached
+        result = self._run_command_fast(self._build_page_boxes_args(input_file))
+        boxes = self._parse_page_boxes(result.success, result.output)
+        self._store_page_boxes(input_file, boxes)
+        return boxes
+
+    def _cached_page_boxes(self, input_file: str) -> Optional[List[tuple]]:
+        """查詢頁面大小快取，沒有時回傳 None"""
+        key = self._page_count_key(input_file)
+        boxes = None
+        if key is not None:
+            with self._cache_lock:
+                boxes = self._page_box_cache.get(key)
+                if boxes is not None:
+                    self._page_box_cache.move_to_end(key)
+        metrics.record_cache("page_boxes", boxes is not None)
+        return boxes
+
+    def _store_page_boxes(self, input_file: str, boxes: List[tuple]):
+        """寫入頁面大小快取，並一併更新頁數快取"""
+        key = self._page_count_key(input_file)
+        if key is None or not boxes:
+            return
+        with self._cache_lock:
+            self._page_box_cache[key] = boxes
+            while len(self._page_box_cache) > self.PAGE_COUNT_CACHE_SIZE:
+                self._page_box_cache.popitem(last=False)
+        self._store_page_count(input_file, len(boxes))
+
+    def _build_page_boxes_args(self, input_file: str) -> List[str]:
+        """建立取得各頁 MediaBox 與 Rotate 的命令參數"""
+        return [
+            "-dNODISPLAY",
+            "-dNOSAFER",
+            _postscript_input_arg(input_file),
+            "-c",
+            # 新版 PDF 直譯器的 pdfgetpage 已解析繼承的屬性，沒有 pget 時以 get 代替
+            "/pget where { pop } { /pget { 2 copy known { get true } { pop pop false } ifelse } bind def } ifelse "
+            f"{_POSTSCRIPT_INPUT} (r) file runpdfbegin "
+            "1 1 pdfpagecount { "
+            "pdfgetpage dup "
+            "/MediaBox pget { aload pop 3 -1 roll sub 3 1 roll exch sub exch } { 0 0 } ifelse "
+            "3 -1 roll /Rotate pget not { 0 } if "
+            "3 1 roll exch (PAGE ) print =only ( ) print =only ( ) print = "
+            "} for quit"
+        ]
+
+    @staticmethod
+    def _parse_page_boxes(success: bool, output: str) -> List[tuple]:
+        """解析「PAGE 寬 高 旋轉」行"""
+        boxes = []
+        if not success:
+            return boxes
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) != 4 or parts[0] != "PAGE":
+                continue
             try:
-                return int(output.strip())
+                width, height, rotate = float(parts[1]), float(parts[2]), int(float(parts[3]))
             except ValueError:
-                return 0
+                continue
+            if rotate % 180:
+                width, height = height, width
+            boxes.append((abs(width), abs(height)))
+        return boxes
+
+    @staticmethod
+    def _parse_page_count(success: bool, output: str) -> int:
+        """解析頁數查詢的輸出 (取最後一個整數行，略過前面的警告訊息)"""
+        if success:
+            for line in reversed(output.strip().splitlines()):
+                try:
+                    return int(line.strip())
+                except ValueError:
+                    continue
         return 0
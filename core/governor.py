@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+資源控管
+由 /proc 取樣子 Ghostscript 程序的記憶體 (RSS) 與 CPU 使用量，
+依頁面大小、解析度與輸出裝置估計每個工作的用量，
+只有在不超過上限時才允許新工作開始
+
+沒有 /proc 的平台 (Windows、macOS) 只依估計值控管。
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import (
+    PAPER_SIZES, IMAGE_DEVICES,
+    GOVERNOR_MAX_MEMORY_MB, GOVERNOR_MAX_CPU, GOVERNOR_SAMPLE_INTERVAL, PARALLEL_MAX_JOBS
+)
+
+
+# Ghostscript 執行檔名稱 (/proc/<pid>/comm)
+GS_PROCESS_NAMES = ("gs", "gswin64c", "gswin32c", "ghostscript")
+
+# 各點陣裝置每像素的位元組數
+DEVICE_BYTES_PER_PIXEL = {
+    "png16m": 3,
+    "pnggray": 1,
+    "pngmono": 0.125,
+    "jpeg": 3,
+    "jpeggray": 1,
+    "tiff24nc": 3,
+    "ppmraw": 3,
+    "pgmraw": 1,
+}
+
+# Ghostscript 直譯器本身的基本用量
+GS_BASE_MEMORY = 40 * 1024 * 1024
+# pdfwrite 每 1 byte 輸入約使用的記憶體
+PDFWRITE_MEMORY_PER_INPUT_BYTE = 0.5
+PDFWRITE_MIN_MEMORY = 80 * 1024 * 1024
+
+MB = 1024 * 1024
+
+
+def _clock_ticks() -> int:
+    try:
+        return os.sysconf("SC_CLK_TCK")
+    except (AttributeError, ValueError, OSError):
+        return 100
+
+
+class ProcessSampler:
+    """由 /proc 取樣本程序的 Ghostscript 子程序"""
+
+    def __init__(self, parent_pid: Optional[int] = None):
+        self.parent_pid = parent_pid or os.getpid()
+        self.available = os.path.isdir("/proc")
+        self._ticks = _clock_ticks()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        # pid → (取樣時間, 累計 CPU 秒數)
+        self._last_cpu: Dict[int, Tuple[float, float]] = {}
+
+    def _read_stat(self, pid: int) -> Optional[Tuple[str, int, float, int]]:
+        """讀取 /proc/<pid>/stat，回傳 (名稱, ppid, CPU 秒數, RSS bytes)"""
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                data = f.read().decode(errors="replace")
+        except OSError:
+            return None
+        # comm 以括號包住且可能含空白，取最後一個右括號之後的欄位
+        start, end = data.find("("), data.rfind(")")
+        name = data[start + 1:end]
+        fields = data[end + 2:].split()
+        try:
+            ppid = int(fields[1])
+            cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+            rss = int(fields[21]) * self._page_size
+        except (IndexError, ValueError):
+            return None
+        return name, ppid, cpu, rss
+
+    @staticmethod
+    def _is_gs_cmdline(pid: int) -> bool:
+        """以命令列第一個參數判斷 (程序名稱可能是包裝腳本的直譯器)"""
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv = f.read().split(b"\0")
+        except OSError:
+            return False
+        names = {os.path.basename(a.decode(errors="replace")) for a in argv[:2]}
+        return any(
+            n == gs or n.startswith(gs + ".") for n in names for gs in GS_PROCESS_NAMES
+        )
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """
+        取樣所有 Ghostscript 子程序
+
+        Returns:
+            [{"pid", "rss", "cpu_percent", "cpu_seconds"}, ...]
+        """
+        if not self.available:
+            return []
+
+        now = time.monotonic()
+        processes = []
+        try:
+            pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+        except OSError:
+            return []
+
+        for pid in pids:
+            stat = self._read_stat(pid)
+            if stat is None:
+                continue
+            name, ppid, cpu, rss = stat
+            if ppid != self.parent_pid:
+                continue
+            if name not in GS_PROCESS_NAMES and not self._is_gs_cmdline(pid):
+                continue
+
+            last = self._last_cpu.get(pid)
+            cpu_percent = 0.0
+            if last is not None and now > last[0]:
+                cpu_percent = (cpu - last[1]) / (now - last[0]) * 100
+            self._last_cpu[pid] = (now, cpu)
+            processes.append({
+                "pid": pid,
+                "rss": rss,
+                "cpu_percent": cpu_percent,
+                "cpu_seconds": cpu,
+            })
+
+        alive = {p["pid"] for p in processes}
+        for pid in list(self._last_cpu):
+            if pid not in alive:
+                del self._last_cpu[pid]
+        return processes
+
+
+def estimate_job(
+    operation: str,
+    params: Dict[str, Any],
+    page_size: Optional[Tuple[float, float]] = None
+) -> Dict[str, float]:
+    """
+    估計工作的記憶體與 CPU 用量
+
+    點陣輸出 (pdf_to_image) 依頁面像素數與裝置每像素位元組數估計整頁緩衝區；
+    pdfwrite 輸出依輸入檔案大小估計。Ghostscript 為單執行緒，CPU 以 1 核計
+    (平行轉換時乘上同時執行的 Ghostscript 數)。
+
+    Args:
+        operation: 操作名稱
+        params: 操作參數
+        page_size: 頁面大小 (points)，None 時使用 A4 或操作指定的紙張
+
+    Returns:
+        {"memory": bytes, "cpu": 核心數}
+    """
+    if page_size is None:
+        if operation == "resize_pdf" and params.get("custom_width") and params.get("custom_height"):
+            page_size = (params["custom_width"], params["custom_height"])
+        else:
+            page_size = PAPER_SIZES.get(params.get("paper_size", "A4"), PAPER_SIZES["A4"])
+    width_in, height_in = page_size[0] / 72, page_size[1] / 72
+
+    if operation == "pdf_to_image":
+        dpi = params.get("dpi") or 150
+        device = IMAGE_DEVICES.get(params.get("device", "PNG"), "png16m")
+        bytes_per_pixel = DEVICE_BYTES_PER_PIXEL.get(device, 3)
+        buffer = width_in * dpi * height_in * dpi * bytes_per_pixel
+        memory = GS_BASE_MEMORY + buffer
+    else:
+        inputs = params.get("input_files") or [params.get("input_file")]
+        input_bytes = 0
+        for path in inputs:
+            try:
+                input_bytes += os.path.getsize(path)
+            except (OSError, TypeError):
+                pass
+        memory = max(PDFWRITE_MIN_MEMORY, GS_BASE_MEMORY + input_bytes * PDFWRITE_MEMORY_PER_INPUT_BYTE)
+        if params.get("dpi"):
+            # 指定解析度時 pdfwrite 會以該解析度轉換部分內容
+            dpi = params["dpi"]
+            memory += width_in * dpi * height_in * dpi * 3
+
+    # 平行轉換同時執行多個 Ghostscript
+    jobs = max(1, min(int(params.get("jobs") or 1), PARALLEL_MAX_JOBS)) if operation == "pdf_to_image" else 1
+    return {"memory": memory * jobs, "cpu": float(jobs)}
+
+
+class ResourceGovernor:
+    """依實測與估計的資源用量決定是否允許新工作開始"""
+
+    def __init__(
+        self,
+        max_memory_mb: float = GOVERNOR_MAX_MEMORY_MB,
+        max_cpu: Optional[float] = GOVERNOR_MAX_CPU,
+        sample_interval: float = GOVERNOR_SAMPLE_INTERVAL,
+        sampler: Optional[ProcessSampler] = None
+    ):
+        """
+        Args:
+            max_memory_mb: Ghostscript 子程序合計記憶體上限 (MB)
+            max_cpu: Ghostscript 子程序合計 CPU 上限 (核心數，None=CPU 核心數)
+            sample_interval: 取樣間隔 (秒)
+            sampler: 程序取樣器 (None=取樣本程序的子程序)
+        """
+        self.max_memory = max_memory_mb * MB
+        self.max_cpu = max_cpu or float(os.cpu_count() or 1)
+        self.sample_interval = sample_interval
+        self.sampler = sampler or ProcessSampler()
+
+        self._cond = threading.Condition()
+        self._next_id = 0
+        # 已允許的工作: id → {"name", "memory", "cpu", "admitted_at"}
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._waiting = 0
+        self._processes: List[Dict[str, Any]] = []
+        self._sampled_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """啟動背景取樣"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample_loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.sample_interval)
+
+    def sample(self):
+        """取樣一次並喚醒等待中的工作"""
+        processes = self.sampler.sample()
+        with self._cond:
+            self._processes = processes
+            self._sampled_at = time.time()
+            self._cond.notify_all()
+
+    def _usage(self) -> Tuple[float, float]:
+        """
+        目前用量 (呼叫前需持有 _cond)
+
+        實測值有延遲 (剛開始的程序尚未長大)，因此取實測值與已允許工作估計值的較大者。
+        """
+        measured_memory = sum(p["rss"] for p in self._processes)
+        measured_cpu = sum(p["cpu_percent"] for p in self._processes) / 100
+        reserved_memory = sum(job["memory"] for job in self._active.values())
+        reserved_cpu = sum(job["cpu"] for job in self._active.values())
+        return max(measured_memory, reserved_memory), max(measured_cpu, reserved_cpu)
+
+    def _fits(self, estimate: Dict[str, float]) -> bool:
+        # 沒有工作執行時一律允許，避免單一超大工作永遠無法開始
+        if not self._active:
+            return True
+        memory, cpu = self._usage()
+        return (
+            memory + estimate["memory"] <= self.max_memory
+            and cpu + estimate["cpu"] <= self.max_cpu
+        )
+
+    def admit(self, estimate: Dict[str, float], name: str = "", timeout: Optional[float] = None) -> Optional[int]:
+        """
+        等待資源足夠後允許工作開始
+
+        Args:
+            estimate: estimate_job() 的結果
+            name: 顯示用的工作名稱
+            timeout: 最長等待秒數 (None=不限)
+
+        Returns:
+            允許編號 (結束時傳給 release)，逾時則為 None
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._fits(estimate):
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    wait = self.sample_interval if remaining is None else min(remaining, self.sample_interval)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting -= 1
+
+            self._next_id += 1
+            self._active[self._next_id] = {
+                "name": name,
+                "memory": estimate["memory"],
+                "cpu": estimate["cpu"],
+                "admitted_at": time.time(),
+            }
+            return self._next_id
+
+    def release(self, admission_id: Optional[int]):
+        """工作結束，釋放保留的資源"""
+        with self._cond:
+            self._active.pop(admission_id, None)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """目前的限制、實測值與保留值 (供操作人員檢視)"""
+        with self._cond:
+            memory, cpu = self._usage()
+            return {
+                "limits": {"memory_mb": self.max_memory / MB, "cpu": self.max_cpu},
+                "usage": {"memory_mb": memory / MB, "cpu": cpu},
+                "measured": {
+                    "available": self.sampler.available,
+                    "sampled_at": self._sampled_at,
+                    "memory_mb": sum(p["rss"] for p in self._processes) / MB,
+                    "cpu": sum(p["cpu_percent"] for p in self._processes) / 100,
+                    "processes": [
+                        {
+                            "pid": p["pid"],
+                            "rss_mb": p["rss"] / MB,
+                            "cpu_percent": p["cpu_percent"],
+                        }
+                        for p in self._processes
+                    ],
+                },
+                "reserved": [
+                    {
+                        "name": job["name"],
+                        "memory_mb": job["memory"] / MB,
+                        "cpu": job["cpu"],
+                        "admitted_at": job["admitted_at"],
+                    }
+                    for job in self._active.values()
+                ],
+                "waiting": self._waiting,
+            }
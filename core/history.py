@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+工作記錄
+以 SQLite 保存已完成工作的操作、參數、頁數、輸入大小、解析度、耗時與最大記憶體，
+並依過去的記錄預估新工作的耗時
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import HISTORY_DB, HISTORY_SAMPLE_SIZE
+from .page_ranges import PageRangeError, parse_page_ranges
+from .result import JobResult
+
+
+# 點陣輸出的基準解析度，其他解析度依像素數換算為等效頁數
+BASE_DPI = 150
+
+# 至少要有幾筆記錄才使用迴歸
+MIN_REGRESSION_ROWS = 5
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    """以高斯消去法解線性方程組，奇異時回傳 None"""
+    n = len(vector)
+    a = [row[:] + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        if abs(a[pivot][col]) < 1e-12:
+            return None
+        a[col], a[pivot] = a[pivot], a[col]
+        for r in range(n):
+            if r != col:
+                factor = a[r][col] / a[col][col]
+                for c in range(col, n + 1):
+                    a[r][c] -= factor * a[col][c]
+    return [a[i][n] / a[i][i] for i in range(n)]
+
+
+def effective_pages(page_count: int, dpi: Optional[int]) -> float:
+    """依解析度換算等效頁數 (點陣輸出的耗時約與像素數成正比)"""
+    if not dpi:
+        return float(page_count)
+    return page_count * (dpi / BASE_DPI) ** 2
+
+
+class JobHistory:
+    """已完成工作的記錄與耗時預估"""
+
+    def __init__(self, path: str = HISTORY_DB):
+        """
+        Args:
+            path: SQLite 資料庫路徑 (":memory:" 為不保存)
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    finished_at REAL NOT NULL,
+                    operation TEXT NOT NULL,
+                    args TEXT,
+                    page_count INTEGER,
+                    input_bytes INTEGER,
+                    dpi INTEGER,
+                    duration REAL NOT NULL,
+                    peak_rss INTEGER,
+                    success INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_operation ON jobs (operation, success, finished_at)"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(
+        self,
+        result: JobResult,
+        args: Optional[Dict[str, Any]] = None,
+        page_count: Optional[int] = None,
+        dpi: Optional[int] = None
+    ):
+        """
+        記錄一個已完成的工作
+
+        Args:
+            result: 工作結果
+            args: 操作參數 (不含檔案路徑)
+            page_count: 頁數 (None=使用 result.pages)
+            dpi: 解析度
+        """
+        pages = page_count if page_count is not None else result.pages
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (finished_at, operation, args, page_count, input_bytes, dpi,"
+                " duration, peak_rss, success) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    result.operation,
+                    json.dumps(args or {}, ensure_ascii=False, sort_keys=True),
+                    pages,
+                    result.input_bytes,
+                    dpi,
+                    result.wall_time,
+                    result.peak_rss,
+                    1 if result.success else 0,
+                )
+            )
+
+    def _recent(self, operation: str) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT page_count, input_bytes, dpi, duration FROM jobs"
+                " WHERE operation = ? AND success = 1 AND page_count > 0"
+                " ORDER BY finished_at DESC LIMIT ?",
+                (operation, HISTORY_SAMPLE_SIZE)
+            ).fetchall()
+
+    def predict(
+        self,
+        operation: str,
+        page_count: int,
+        input_bytes: int,
+        dpi: Optional[int] = None
+    ) -> Optional[float]:
+        """
+        預估工作耗時 (秒)
+
+        記錄足夠時以最小平方法擬合 耗時 = a + b × 等效頁數 + c × MB；
+        記錄不足或無法擬合時使用每頁耗時的中位數。沒有任何記錄時回傳 None。
+        只有點陣輸出 (pdf_to_image) 依解析度換算等效頁數。
+        """
+        rows = self._recent(operation)
+        if not rows or page_count <= 0:
+            return None
+
+        raster = operation == "pdf_to_image"
+        samples = [
+            (effective_pages(pages, row_dpi if raster else None), (size or 0) / 1e6, duration)
+            for pages, size, row_dpi, duration in rows
+        ]
+        target_pages = effective_pages(page_count, dpi if raster else None)
+        target_mb = input_bytes / 1e6
+
+        if len(samples) >= MIN_REGRESSION_ROWS:
+            # 正規方程式 XᵀX β = Xᵀy
+            xtx = [[0.0] * 3 for _ in range(3)]
+            xty = [0.0] * 3
+            for pages, mb, duration in samples:
+                x = (1.0, pages, mb)
+                for i in range(3):
+                    xty[i] += x[i] * duration
+                    for j in range(3):
+                        xtx[i][j] += x[i] * x[j]
+            beta = _solve(xtx, xty)
+            if beta is not None and beta[1] >= 0 and beta[2] >= 0:
+                estimate = beta[0] + beta[1] * target_pages + beta[2] * target_mb
+                if estimate > 0:
+                    return estimate
+
+        per_page = statistics.median(duration / pages for pages, _, duration in samples)
+        return per_page * target_pages
+
+    def estimate(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        page_count: Callable[[str], int]
+    ) -> Optional[float]:
+        """
+        依操作參數預估耗時 (秒)
+
+        Args:
+            operation: 操作名稱
+            params: 操作參數 (與 JobQueue.submit 相同)
+            page_count: 取得 PDF 頁數的函式 (例如 GhostscriptWrapper.get_pdf_page_count)
+        """
+        inputs = params.get("input_files") or [params.get("input_file")]
+        inputs = [f for f in inputs if f]
+        input_bytes = 0
+        for path in inputs:
+            try:
+                input_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+
+        first, last = params.get("first_page"), params.get("last_page")
+        if operation == "split_pdf" and first and last:
+            pages = last - first + 1
+        elif params.get("pages"):
+            total = sum(page_count(f) for f in inputs)
+            try:
+                ranges = parse_page_ranges(params["pages"], total or None)
+            except PageRangeError:
+                return None
+            pages = len({page for a, b in ranges for page in range(a, b + 1)})
+        else:
+            pages = sum(page_count(f) for f in inputs)
+            if pages and (first or last):
+                pages = min(last or pages, pages) - (first or 1) + 1
+
+        return self.predict(operation, pages, input_bytes, params.get("dpi"))
+
+    def stats(self, operation: Optional[str] = None) -> Dict[str, Any]:
+        """記錄筆數與平均耗時"""
+        query = "SELECT operation, COUNT(*), AVG(duration), MAX(peak_rss) FROM jobs WHERE success = 1"
+        params: tuple = ()
+        if operation:
+            query += " AND operation = ?"
+            params = (operation,)
+        query += " GROUP BY operation"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {
+            op: {"count": count, "avg_duration": avg, "max_peak_rss": peak}
+            for op, count, avg, peak in rows
+        }
+
+
+_default_history: Optional[JobHistory] = None
+_default_lock = threading.Lock()
+
+
+def get_default_history() -> Optional[JobHistory]:
+    """取得預設的工作記錄 (無法開啟資料庫時回傳 None)"""
+    global _default_history
+    with _default_lock:
+        if _default_history is None:
+            try:
+                _default_history = JobHistory()
+            except (OSError, sqlite3.Error):
+                return None
+        return _default_history
+
+
+def format_duration(seconds: float) -> str:
+    """格式化耗時，例如「約 2 分 5 秒」"""
+    seconds = max(0, int(round(seconds)))
+    if seconds < 1:
+        return "不到 1 秒"
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"約 {hours} 小時 {minutes} 分"
+    if minutes:
+        return f"約 {minutes} 分 {secs} 秒"
+    return f"約 {secs} 秒"
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+圖片轉 PDF 的大小最佳化
+手機照片動輒 12~48 MP，img2pdf 會以原始解析度嵌入；這裡先把每張圖片縮小到
+「放進指定頁面時不超過目標 dpi」的像素數，再交給 img2pdf
+
+- JPEG: 需要縮小時解碼後縮小 (以 draft 模式直接解碼成較小的尺寸)，否則照原樣嵌入
+- 照片類的無損圖片 (PNG 等，顏色很多): 縮小並改以 JPEG 儲存
+- 其他無損圖片 (螢幕截圖、線條圖、1 位元掃描): 需要縮小時縮小並維持無損格式，否則照原樣嵌入
+- 重新編碼後沒有比原檔小 min_saving 時照原樣嵌入
+
+多張圖片同時處理，依原本順序取得結果。img2pdf 會把同一個 PDF 的所有圖片資料留在記憶體中直到寫出，
+記憶體用量與每個 PDF 的圖片數成正比，圖片很多時請分批輸出成多個 PDF。
+"""
+
+import collections
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .config import IMAGE_OPTIMIZE, PAPER_SIZES
+
+
+# EXIF 方向標籤，以及旋轉 90 度 (寬高互換) 的方向值
+_EXIF_ORIENTATION = 0x0112
+_SWAPPED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class ImageOptimizeReport:
+    """大小最佳化的結果"""
+
+    def __init__(self):
+        self.actions: Dict[str, int] = {}  # 處理方式 → 張數 (keep/downscale/jpeg)
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.seconds = 0.0
+
+    def record(self, action: str, before: int, after: int):
+        self.actions[action] = self.actions.get(action, 0) + 1
+        self.bytes_before += before
+        self.bytes_after += after
+
+    @property
+    def images(self) -> int:
+        return sum(self.actions.values())
+
+    def summary(self) -> str:
+        return (
+            f"大小最佳化: 縮小 {self.actions.get('downscale', 0)} 張、改為 JPEG {self.actions.get('jpeg', 0)} 張、"
+            f"照原樣 {self.actions.get('keep', 0)} 張，"
+            f"圖片 {self.bytes_before / 1048576:.2f} MB → {self.bytes_after / 1048576:.2f} MB，"
+            f"耗時 {self.seconds:.1f} 秒"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "actions": dict(self.actions),
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "seconds": self.seconds,
+        }
+
+
+def target_pixels(paper_size: str, dpi: int) -> Tuple[int, int]:
+    """頁面在目標 dpi 下的 (長邊, 短邊) 像素數"""
+    width, height = PAPER_SIZES.get(paper_size, PAPER_SIZES["A4"])
+    return round(max(width, height) / 72 * dpi), round(min(width, height) / 72 * dpi)
+
+
+def page_layout(paper_size: str):
+    """img2pdf 的版面：圖片等比例縮放到頁面內，依圖片方向自動轉為橫向頁面"""
+    import img2pdf
+
+    width, height = PAPER_SIZES.get(paper_size, PAPER_SIZES["A4"])
+    return img2pdf.get_layout_fun((width, height), fit=img2pdf.FitMode.into, auto_orient=True)
+
+
+def _is_photo(image, settings: Dict[str, Any]) -> bool:
+    """
+    縮圖後顏色數超過 photo_colors，或灰階值種類超過 photo_gray_levels 的圖片
+    (灰階照片最多只有 256 種顏色)；含透明度的圖片不改為 JPEG
+    """
+    if image.mode in ("1", "P", "LA", "RGBA", "PA") or "transparency" in image.info:
+        return False
+    sample = image.copy()
+    sample.thumbnail((256, 256))
+    if sample.getcolors(settings["photo_colors"]) is None:
+        return True
+    return len(sample.convert("L").getcolors(256)) > settings["photo_gray_levels"]
+
+
+def optimize_image(path: str, settings: Dict[str, Any] = IMAGE_OPTIMIZE) -> Tuple[Union[str, bytes], str, int]:
+    """
+    最佳化一張圖片
+
+    Returns:
+        (交給 img2pdf 的檔案路徑或圖片資料, 處理方式 keep/downscale/jpeg, 處理後大小)
+    """
+    from PIL import Image, ImageOps
+
+    before = os.path.getsize(path)
+    long_side, short_side = target_pixels(settings["paper_size"], settings["dpi"])
+    with Image.open(path) as image:
+        width, height = image.size
+        scale = min(1.0, long_side / max(width, height), short_side / min(width, height))
+        if image.mode == "1" or getattr(image, "n_frames", 1) > 1:
+            # 1 位元掃描 (含 G4 TIFF) 與多頁圖片照原樣
+            return path, "keep", before
+        is_jpeg = image.format == "JPEG"
+        photo = is_jpeg or _is_photo(image, settings)
+        if scale >= 1 and (is_jpeg or not photo):
+            return path, "keep", before
+
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if is_jpeg:
+            # 直接以 1/2、1/4、1/8 解碼，省下解碼完整照片的時間與記憶體
+            image.draft(image.mode, size)
+        if image.getexif().get(_EXIF_ORIENTATION, 1) in _SWAPPED_ORIENTATIONS:
+            size = (size[1], size[0])
+        image = ImageOps.exif_transpose(image)
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        dpi = (settings["dpi"], settings["dpi"])
+        if photo:
+            if image.mode not in ("RGB", "L", "CMYK"):
+                image = image.convert("RGB")
+            image.save(buffer, "JPEG", quality=settings["jpeg_quality"], optimize=True, dpi=dpi)
+            action = "jpeg" if not is_jpeg else "downscale"
+        else:
+            image.save(buffer, "PNG", optimize=True, dpi=dpi)
+            action = "downscale"
+
+    data = buffer.getvalue()
+    if len(data) > before * (1 - settings["min_saving"]):
+        return path, "keep", before
+    return data, action, len(data)
+
+
+def optimize_images(
+    paths: List[str],
+    settings: Dict[str, Any] = IMAGE_OPTIMIZE,
+    jobs: int = 1,
+    report: Optional[ImageOptimizeReport] = None
+) -> Iterator[Union[str, bytes]]:
+    """
+    同時最佳化多張圖片，依原本順序逐張產生交給 img2pdf 的檔案路徑或圖片資料
+
+    最多只有 jobs × 2 張在處理中或等待取用；取用後的結果由呼叫端保存 (交給 img2pdf 時需要放進 list)。
+
+    Args:
+        paths: 圖片檔案 (依順序)
+        settings: 設定 (見 config.IMAGE_OPTIMIZE)
+        jobs: 同時處理的圖片數
+        report: 記錄處理結果 (可選)
+    """
+    start = time.perf_counter()
+    jobs = max(1, jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = collections.deque()
+        for path in paths:
+            pending.append((path, pool.submit(optimize_image, path, settings)))
+            if len(pending) >= jobs * 2:
+                yield _take(pending, report)
+        while pending:
+            yield _take(pending, report)
+    if report is not None:
+        report.seconds += time.perf_counter() - start
+
+
+def _take(pending: collections.deque, report: Optional[ImageOptimizeReport]) -> Union[str, bytes]:
+    path, future = pending.popleft()
+    try:
+        source, action, size = future.result()
+    except (OSError, ValueError):
+        # 無法處理的圖片照原樣交給 img2pdf (由 img2pdf 回報格式錯誤)
+        source, action, size = path, "keep", os.path.getsize(path)
+    if report is not None:
+        report.record(action, os.path.getsize(path), size)
+    return source
+
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+增量轉圖片
+記錄每頁內容 (內容串流與參照的資源) 的指紋，下次轉換時只重新轉換指紋改變或圖片不存在的頁面
+
+指紋與物件編號無關：參照以被參照物件的指紋取代，因此改版後物件重新編號不影響未變更的頁面。
+指紋記錄檔存放在輸出資料夾，以輸出檔名模式區分。
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .dedup import stream_digest
+from .pdf_reader import PdfReader, Ref, Stream
+from .pdf_writer import serialize
+
+
+# 記錄檔格式版本 (指紋算法改變時遞增，舊記錄視為全部變更)
+MANIFEST_VERSION = 1
+# 不影響繪製、且會造成循環參照的鍵
+_SKIP_KEYS = {"Parent", "P", "Length", "StructParents", "StructParent"}
+# 可由頁面樹繼承的頁面屬性
+_INHERITABLE = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+
+class _Fingerprinter:
+    """計算物件的指紋 (同一物件只計算一次)"""
+
+    def __init__(self, reader: PdfReader):
+        self.reader = reader
+        self._digests: Dict[int, bytes] = {}
+        self._active: set = set()
+
+    def object_digest(self, num: int) -> bytes:
+        if num in self._digests:
+            return self._digests[num]
+        if num in self._active:
+            # 循環參照：以固定值代替 (同樣的結構得到同樣的指紋)
+            return b"cycle"
+        self._active.add(num)
+        try:
+            value = self.reader.get_object(num)
+            digest = hashlib.sha256()
+            self.feed(digest, value)
+            self._digests[num] = digest.digest()
+        finally:
+            self._active.discard(num)
+        return self._digests[num]
+
+    def feed(self, digest, value: Any):
+        if isinstance(value, Ref):
+            digest.update(b"R" + self.object_digest(value.num))
+        elif isinstance(value, Stream):
+            digest.update(b"S")
+            self.feed(digest, value.dict)
+            digest.update(stream_digest(self.reader, value))
+        elif isinstance(value, dict):
+            digest.update(b"<<")
+            for key in sorted(value):
+                if key not in _SKIP_KEYS:
+                    digest.update(serialize(key))
+                    self.feed(digest, value[key])
+            digest.update(b">>")
+        elif isinstance(value, list):
+            digest.update(b"[")
+            for item in value:
+                self.feed(digest, item)
+            digest.update(b"]")
+        else:
+            digest.update(serialize(value) + b" ")
+
+
+def _page_attributes(reader: PdfReader, page: Dict[str, Any]) -> Dict[str, Any]:
+    """頁面字典加上繼承的屬性"""
+    attributes = dict(page)
+    node, seen = page, set()
+    while isinstance(node, dict):
+        for key in _INHERITABLE:
+            if key not in attributes and key in node:
+                attributes[key] = node[key]
+        parent = node.get("Parent")
+        if not isinstance(parent, Ref) or parent.num in seen:
+            break
+        seen.add(parent.num)
+        node = reader.resolve(parent)
+    return attributes
+
+
+def page_fingerprints(input_file: str) -> List[str]:
+    """
+    每頁的指紋 (依頁面順序)
+
+    Raises:
+        PdfError: 無法解析的 PDF
+    """
+    with PdfReader(input_file) as reader:
+        fingerprinter = _Fingerprinter(reader)
+        fingerprints = []
+        for ref in reader.page_refs():
+            digest = hashlib.sha256()
+            page = reader.resolve(ref)
+            if isinstance(page, dict):
+                fingerprinter.feed(digest, _page_attributes(reader, page))
+            fingerprints.append(digest.hexdigest())
+        return fingerprints
+
+
+def manifest_path(output_pattern: str) -> str:
+    """輸出檔名模式對應的指紋記錄檔"""
+    directory, name = os.path.split(os.path.abspath(output_pattern))
+    return os.path.join(directory, f".{name.replace('%', '_')}.fingerprints.json")
+
+
+class IncrementalPlan:
+    """增量轉換的計畫：要重新轉換的頁面與轉換後要記錄的指紋"""
+
+    def __init__(self, output_pattern: str, options: Dict[str, Any], pages: List[int], fingerprints: List[str]):
+        self.output_pattern = output_pattern
+        self.options = options
+        self.pages = pages  # 要求轉換的頁碼
+        self.fingerprints = fingerprints  # 全部頁面的指紋
+        self.manifest_file = manifest_path(output_pattern)
+        self.previous: Dict[str, str] = {}
+        self.render: List[int] = []
+        self.reasons: Dict[str, int] = {"changed": 0, "missing": 0, "options": 0}
+        self._decide()
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return manifest
+
+    def _decide(self):
+        manifest = self._load()
+        options_changed = manifest is not None and manifest.get("options") != self.options
+        if manifest is not None and not options_changed:
+            self.previous = dict(manifest.get("pages") or {})
+        for page in self.pages:
+            if options_changed:
+                reason = "options"
+            elif self.previous.get(str(page)) != self.fingerprints[page - 1]:
+                reason = "changed"
+            elif not os.path.exists(self.output_pattern % page):
+                reason = "missing"
+            else:
+                continue
+            self.reasons[reason] += 1
+            self.render.append(page)
+
+    @property
+    def skipped(self) -> int:
+        return len(self.pages) - len(self.render)
+
+    def save(self, rendered: List[int]):
+        """記錄已轉換頁面的指紋 (轉換失敗的頁面維持舊記錄，下次重新轉換)"""
+        pages = dict(self.previous)
+        for page in rendered:
+            pages[str(page)] = self.fingerprints[page - 1]
+        # 超出目前頁數的舊記錄已無意義
+        pages = {k: v for k, v in pages.items() if int(k) <= len(self.fingerprints)}
+        manifest = {"version": MANIFEST_VERSION, "options": self.options, "pages": pages}
+        temp_file = self.manifest_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(temp_file, self.manifest_file)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": len(self.pages),
+            "rendered": len(self.render),
+            "skipped": self.skipped,
+            "reasons": dict(self.reasons),
+            "manifest": self.manifest_file,
+        }
+
+    def summary(self) -> str:
+        return f"增量轉換: 重新轉換 {len(self.render)} 頁，略過 {self.skipped}/{len(self.pages)} 頁未變更"
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+工作佇列
+以固定數量的背景執行緒執行 GhostscriptWrapper 操作，佇列滿時拒絕新工作；
+設定工作記錄時依預估耗時以最短工作優先的順序執行
+"""
+
+import collections
+import itertools
+import queue
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import QUEUE_AGING_FACTOR
+from .ghostscript import GhostscriptWrapper
+from .governor import ResourceGovernor, estimate_job
+from .history import JobHistory
+from .result import JobResult
+from . import metrics
+
+
+# 可透過佇列執行的操作
+OPERATIONS = ("resize_pdf", "pdf_to_image", "merge_pdfs", "split_pdf", "compress_pdf")
+
+
+class QueueFullError(Exception):
+    """佇列已滿"""
+
+
+class Job:
+    """單一工作的狀態"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        outputs: Optional[List[str]] = None,
+        context: Any = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.params = params
+        self.outputs = outputs or []
+        self.context = context
+        self.status = Job.QUEUED
+        self.progress = (0, 0, "")
+        self.success: Optional[bool] = None
+        self.output_text = ""
+        self.result: Optional[JobResult] = None
+        self.predicted_duration: Optional[float] = None  # 預估耗時 (秒)
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.DONE, Job.FAILED, Job.CANCELLED)
+
+    def _publish(self, **event):
+        """記錄事件並喚醒等待中的讀取者"""
+        with self._cond:
+            event["seq"] = len(self.events)
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def set_progress(self, current: int, total: int, status: str):
+        self.progress = (current, total, status)
+        self._publish(type="progress", current=current, total=total, status=status)
+
+    def set_status(self, status: str):
+        self.status = status
+        if status == Job.RUNNING:
+            self.started_at = time.time()
+        elif self.finished:
+            self.finished_at = time.time()
+        self._publish(type="status", status=status)
+
+    def wait_events(self, after: int, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        取得序號大於等於 after 的事件，沒有新事件時等待
+
+        Returns:
+            新事件列表 (逾時或工作結束時可能為空)
+        """
+        with self._cond:
+            if len(self.events) <= after and not self.finished:
+                self._cond.wait(timeout)
+            return self.events[after:]
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待工作結束，回傳是否已結束"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self.finished:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.finished
+
+    def to_dict(self) -> Dict[str, Any]:
+        current, total, status_text = self.progress
+        return {
+            "id": self.id,
+            "operation": self.operation,
+            "status": self.status,
+            "progress": {"current": current, "total": total, "status": status_text},
+            "success": self.success,
+            "output": self.output_text,
+            "outputs": self.outputs,
+            "predicted_duration": self.predicted_duration,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result.to_dict() if self.result else None,
+        }
+
+
+class JobQueue:
+    """有上限的工作佇列"""
+
+    # 計算無法預估工作的中位數時使用最近幾筆預估值
+    PREDICTION_SAMPLE_SIZE = 100
+
+    def __init__(
+        self,
+        wrapper: Optional[GhostscriptWrapper] = None,
+        workers: int = 2,
+        max_queue: int = 16,
+        on_finished: Optional[Callable[[Job], None]] = None,
+        track_progress: bool = True,
+        keep_finished: int = 1000,
+        governor: Optional[ResourceGovernor] = None,
+        name: str = "jobs",
+        history: Optional[JobHistory] = None
+    ):
+        """
+        Args:
+            wrapper: Ghostscript 包裝器 (None=自動建立)
+            workers: 同時執行的工作數
+            max_queue: 等待中工作的上限，超過時 submit 會拋出 QueueFullError
+            on_finished: 工作結束或被取消時的回調 (在工作執行緒或呼叫 cancel 的執行緒中呼叫)
+            track_progress: 是否追蹤頁面進度 (False=使用快速模式)
+            keep_finished: 保留已結束工作的數量，超過時移除最舊的
+            governor: 資源控管 (None=只依 workers 限制同時執行數)
+            name: 指標中的佇列名稱
+            history: 工作記錄 (None=依加入順序執行)。設定時記錄完成的工作，
+                並依預估耗時由短到長執行；無法預估的工作以最近預估值的中位數排序，
+                工作最多被較晚加入的工作超越 (預估耗時 × QUEUE_AGING_FACTOR) 秒
+        """
+        self.wrapper = wrapper or GhostscriptWrapper()
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_finished = on_finished
+        self.track_progress = track_progress
+        self.keep_finished = keep_finished
+        self.governor = governor
+        self.name = name
+        self.history = history
+        if history is not None and self.wrapper.history is None:
+            self.wrapper.history = history
+        self.jobs: Dict[str, Job] = {}
+        # (優先順序, 加入序號, 工作)，序號讓相同優先順序的工作維持加入順序
+        self._queue: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._waiting = 0  # 等待中 (預估中或在佇列中) 的工作數，上限為 max_queue
+        # 預估耗時會執行 Ghostscript 查詢頁數，不在呼叫 submit 的執行緒 (HTTP 請求、監看輪詢) 中進行
+        self._predictor: Optional[ThreadPoolExecutor] = None
+        self._predictions: "collections.deque[float]" = collections.deque(maxlen=self.PREDICTION_SAMPLE_SIZE)
+
+    def start(self):
+        """啟動工作執行緒"""
+        if self.governor:
+            self.governor.start()
+        metrics.QUEUE_DEPTH.set_function(self.queue_depth, queue=self.name)
+        metrics.JOBS_RUNNING.set_function(self.running_count, queue=self.name)
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """停止工作執行緒 (等待預估完成，佇列中與執行中的工作全部執行完畢後才返回)"""
+        with self._lock:
+            predictor, self._predictor = self._predictor, None
+        if predictor is not None:
+            predictor.shutdown(wait=True)
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._seq), None))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.governor:
+            self.governor.stop()
+
+    def submit(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        outputs: Optional[List[str]] = None,
+        context: Any = None
+    ) -> Job:
+        """
+        加入工作
+
+        Args:
+            operation: 操作名稱 (見 OPERATIONS)
+            params: 傳給操作的參數 (progress_callback 除外)
+            outputs: 工作完成後會產生的輸出檔案
+            context: 呼叫端自訂的資料，存放在 job.context
+
+        Raises:
+            ValueError: 不支援的操作
+            QueueFullError: 佇列已滿
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"不支援的操作: {operation}")
+
+        job = Job(operation, params, outputs, context)
+        with self._lock:
+            # 先保留佇列位置，佇列已滿時不必預估
+            if self._waiting >= self.max_queue:
+                raise QueueFullError(f"佇列已滿 (上限 {self.max_queue})")
+            self._waiting += 1
+            self._prune()
+            self.jobs[job.id] = job
+            if self.history is not None and self._predictor is None:
+                self._predictor = ThreadPoolExecutor(
+                    max_workers=max(2, self.workers), thread_name_prefix=f"{self.name}-predict"
+                )
+            predictor = self._predictor if self.history is not None else None
+
+        if predictor is None:
+            self._enqueue(job)
+        else:
+            predictor.submit(self._predict_and_enqueue, job)
+        return job
+
+    def _predict_and_enqueue(self, job: Job):
+        """預估耗時後放入佇列 (在預估執行緒中執行)"""
+        try:
+            job.predicted_duration = self.history.estimate(
+                job.operation, job.params, self.wrapper.get_pdf_page_count
+            )
+        except Exception:
+            job.predicted_duration = None
+        self._enqueue(job)
+
+    def _enqueue(self, job: Job):
+        """
+        依預估耗時放入佇列
+
+        優先順序為加入時間 + 預估耗時 × QUEUE_AGING_FACTOR：較短的工作先執行，
+        但長工作等待夠久後會排在新加入的短工作之前，不會一直被超越。
+        """
+        with self._lock:
+            duration = job.predicted_duration
+            if duration is not None:
+                self._predictions.append(duration)
+            elif self._predictions:
+                duration = statistics.median(self._predictions)
+        priority = job.created_at + (duration or 0.0) * QUEUE_AGING_FACTOR
+        self._queue.put((priority, next(self._seq), job))
+
+    def _prune(self):
+        """移除超過保留數量的已結束工作 (呼叫前需持有 _lock)"""
+        finished = [job for job in self.jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """取消尚未開始的工作 (在呼叫端的執行緒中呼叫 on_finished)"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with self._lock:
+            # 與 _execute 開始工作互斥，避免取消已開始的工作
+            if job.status != Job.QUEUED:
+                return False
+            job.set_status(Job.CANCELLED)
+        if self.on_finished:
+            self.on_finished(job)
+        return True
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._waiting
+
+    def running_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job.status == Job.RUNNING)
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            with self._lock:
+                self._waiting -= 1
+            try:
+                if job.status == Job.QUEUED:
+                    self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Job):
+        if self.governor is None:
+            self._execute(job)
+            return
+
+        # 等待資源足夠 (等待期間工作仍為 queued，可被取消)
+        estimate = estimate_job(job.operation, job.params, self._page_size(job))
+        admission = self.governor.admit(estimate, name=f"{job.operation} {job.id[:8]}")
+        try:
+            if job.status == Job.QUEUED:
+                self._execute(job)
+        finally:
+            self.governor.release(admission)
+
+    def _page_size(self, job: Job) -> Optional[Tuple[float, float]]:
+        """
+        輸入檔中面積最大的頁面 (points)，用來估計點陣緩衝區；不需要或無法讀取時為 None
+
+        只有點陣輸出 (pdf_to_image 或指定 dpi) 的記憶體與頁面大小有關；
+        resize_pdf 的輸出頁面是指定的紙張，由 estimate_job 處理。
+        """
+        params = job.params
+        if job.operation == "resize_pdf" or (job.operation != "pdf_to_image" and not params.get("dpi")):
+            return None
+        inputs = params.get("input_files") or [params.get("input_file")]
+        boxes = []
+        for path in inputs:
+            if isinstance(path, str):
+                # 頁面大小與頁數一併快取，工作執行時不必再查詢頁數
+                boxes.extend(self.wrapper.get_pdf_page_boxes(path))
+        if not boxes:
+            return None
+        return max(boxes, key=lambda box: box[0] * box[1])
+
+    def _execute(self, job: Job):
+        with self._lock:
+            if job.status != Job.QUEUED:
+                return
+            job.set_status(Job.RUNNING)
+        metrics.QUEUE_WAIT_SECONDS.observe(job.started_at - job.created_at, queue=self.name)
+        method = getattr(self.wrapper, job.operation)
+        callback = job.set_progress if self.track_progress else None
+        try:
+            result = method(progress_callback=callback, **job.params)
+        except Exception as e:
+            result = JobResult(job.operation)
+            result.message = str(e)
+
+        job.result = result
+        job.success, job.output_text = result
+        job.set_status(Job.DONE if job.success else Job.FAILED)
+
+        if self.on_finished:
+            self.on_finished(job)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+工作日誌 (續傳)
+長時間、輸出很多檔案的工作 (轉圖片、每頁一個 PDF) 每完成一個輸出就記錄在日誌，
+中斷 (記憶體不足、重新開機、網路磁碟斷線) 後重新執行時只處理還沒完成的頁面
+
+- 日誌是輸出資料夾中的 JSON Lines 檔案，第一行記錄輸入檔與參數，之後每行一個完成的輸出
+- 每行寫入後立即 fsync；中斷時寫到一半的最後一行在讀取時略過
+- 續傳時以大小與 SHA-256 驗證記錄的輸出，不符 (例如重新開機前沒寫入磁碟) 的重新處理
+- 輸入檔 (路徑、大小、修改時間) 或參數改變時舊記錄作廢
+- 輸出先寫到暫存名稱，寫完才改為正式檔名，不完整的檔案不會被當成已完成
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+
+# 日誌格式版本
+JOURNAL_VERSION = 1
+# 計算 SHA-256 時每次讀取的大小
+_CHUNK_SIZE = 1 << 20
+
+
+def journal_path(output_pattern: str) -> str:
+    """輸出檔名模式對應的日誌檔"""
+    directory, name = os.path.split(os.path.abspath(output_pattern))
+    return os.path.join(directory, f".{name.replace('%', '_')}.journal.jsonl")
+
+
+def partial_path(path: str) -> str:
+    """輸出寫入中的暫存檔名 (完成後改名為 path)"""
+    return path + ".part"
+
+
+def file_digest(path: str) -> str:
+    """檔案的 SHA-256 (十六進位)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobJournal:
+    """一個工作 (輸出檔名模式) 的日誌"""
+
+    def __init__(self, output_pattern: str, input_file: str, options: Dict[str, Any]):
+        """
+        Args:
+            output_pattern: 輸出檔名模式，日誌存放在同一個資料夾
+            input_file: 輸入檔案 (改變時舊記錄作廢)
+            options: 影響輸出內容的參數 (改變時舊記錄作廢)
+        """
+        self.path = journal_path(output_pattern)
+        self._directory = os.path.dirname(self.path)
+        stat = os.stat(input_file)
+        self.header = {
+            "version": JOURNAL_VERSION,
+            "input": os.path.abspath(input_file),
+            "input_size": stat.st_size,
+            "input_mtime": stat.st_mtime_ns,
+            "options": options,
+        }
+        self.entries: Dict[str, Dict[str, Any]] = {}  # 鍵 (頁碼) → 最後一筆記錄
+        self.requested = 0  # 這次要求處理的數量
+        self.resumed = 0  # 之前已完成、這次略過的數量
+        self.rejected = 0  # 有記錄但驗證不符、重新處理的數量
+        self.recorded = 0  # 這次完成並記錄的數量
+        self._fresh = True  # 日誌不存在或已作廢，第一次記錄時重寫
+        self._torn = False  # 最後一行沒有換行 (中斷時寫到一半)，附加前先換行
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return
+        entries = []
+        for line in text.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # 中斷時寫到一半的行
+                continue
+        if not entries or entries[0] != self.header:
+            return
+        self._fresh = False
+        self._torn = not text.endswith("\n")
+        for entry in entries[1:]:
+            if isinstance(entry, dict) and {"key", "path", "size", "sha256"} <= entry.keys():
+                self.entries[str(entry["key"])] = entry
+
+    def _verify(self, key: Any, path: str) -> bool:
+        entry = self.entries.get(str(key))
+        if entry is None:
+            return False
+        recorded = os.path.join(self._directory, entry["path"])
+        if os.path.normcase(recorded) != os.path.normcase(os.path.abspath(path)):
+            return False
+        try:
+            return os.path.getsize(path) == entry["size"] and file_digest(path) == entry["sha256"]
+        except OSError:
+            return False
+
+    def completed(self, outputs: Dict[Any, str]) -> List[Any]:
+        """
+        已完成的輸出
+
+        Args:
+            outputs: 這次要處理的 {鍵: 輸出檔案}
+
+        Returns:
+            有記錄且大小與 SHA-256 相符的鍵 (依 outputs 的順序)
+        """
+        done = []
+        for key, path in outputs.items():
+            if self._verify(key, path):
+                done.append(key)
+            elif str(key) in self.entries:
+                self.rejected += 1
+        self.requested = len(outputs)
+        self.resumed = len(done)
+        return done
+
+    def record(self, key: Any, path: str):
+        """記錄一個已完成的輸出 (path 必須已是正式檔名且寫入完成)"""
+        entry = {
+            "key": key,
+            "path": os.path.relpath(os.path.abspath(path), self._directory),
+            "size": os.path.getsize(path),
+            "sha256": file_digest(path),
+        }
+        with self._lock:
+            lines = [entry]
+            mode = "a"
+            if self._fresh:
+                lines.insert(0, self.header)
+                mode = "w"
+            with open(self.path, mode, encoding="utf-8") as f:
+                if self._torn:
+                    f.write("\n")
+                f.write("".join(json.dumps(line, sort_keys=True) + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self._fresh = self._torn = False
+            self.entries[str(key)] = entry
+            self.recorded += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "journal": self.path,
+            "requested": self.requested,
+            "resumed": self.resumed,
+            "rejected": self.rejected,
+            "recorded": self.recorded,
+        }
+
+    def summary(self) -> str:
+        text = f"續傳: 略過 {self.resumed}/{self.requested} 個已完成的輸出，這次完成 {self.recorded} 個"
+        if self.rejected:
+            text += f" (另有 {self.rejected} 個記錄與檔案不符，已重新處理)"
+        return text
+
+
+class PageCollector:
+    """
+    將一個 Ghostscript 在暫存資料夾依序編號的輸出，依原始頁碼改名為正式檔名
+
+    Ghostscript 開始下一頁時上一頁已寫完，立即改名 (並記錄在日誌)；
+    結束時成功才收集最後一頁，失敗時最後開始的頁面可能不完整，不採用。
+    """
+
+    def __init__(self, pattern: str, output_pattern: str, group: List[int], journal: Optional[JobJournal] = None):
+        self.pattern = pattern
+        self.output_pattern = output_pattern
+        self.group = group
+        self.journal = journal
+        self.started = 0  # Ghostscript 已開始的頁數
+        self.collected = 0  # 已處理 (改名或確認不存在) 的頁數
+
+    def page_started(self):
+        """Ghostscript 開始轉換下一頁"""
+        self.started += 1
+        self._collect(self.started - 1)
+
+    def finish(self, success: bool):
+        """Ghostscript 結束"""
+        self._collect(len(self.group) if success else self.started - 1, final=True)
+
+    def _collect(self, count: int, final: bool = False):
+        while self.collected < min(count, len(self.group)):
+            path = self.pattern % (self.collected + 1)
+            if os.path.exists(path):
+                output = self.output_pattern % self.group[self.collected]
+                os.replace(path, output)
+                if self.journal is not None:
+                    self.journal.record(self.group[self.collected], output)
+            elif not final:
+                # 還沒看到輸出檔，下一頁或結束時再收集
+                break
+            self.collected += 1
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+線性化 (快速網頁檢視) 檢查
+確認 PDF 的線性化參數字典與第一頁提示表 (page offset / shared object hint table)
+與檔案實際的結構一致，瀏覽器才能在下載完成前顯示第一頁
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from .pdf_reader import PdfError, PdfReader, Stream, parse_object_at
+
+
+# 線性化參數字典必須位於檔案開頭的範圍內 (bytes)
+LINEARIZATION_DICT_LIMIT = 1024
+
+_FIRST_OBJECT = re.compile(rb"\d+[\x00\t\n\x0c\r ]+\d+[\x00\t\n\x0c\r ]+obj")
+_WHITESPACE = re.compile(rb"[\x00\t\n\x0c\r ]*")
+_XREF_ENTRY = re.compile(rb"[\x00\t\n\x0c\r ]*\d{10} \d{5} [nf]")
+_ENDOBJ = re.compile(rb"[\x00\t\n\x0c\r ]*endstream[\x00\t\n\x0c\r ]*endobj")
+
+
+class LinearizationReport:
+    """線性化檢查結果"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.linearized = False  # 檔案開頭是否有線性化參數字典
+        self.errors: List[str] = []
+        self.params: Dict[str, Any] = {}  # 線性化參數 (L, H, O, E, N, T)
+
+    @property
+    def valid(self) -> bool:
+        return self.linearized and not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "linearized": self.linearized,
+            "valid": self.valid,
+            "errors": list(self.errors),
+            "first_page_end": self.params.get("E"),
+            "page_count": self.params.get("N"),
+        }
+
+    def summary(self) -> str:
+        """一行說明"""
+        if self.valid:
+            return "快速網頁檢視: 正常"
+        if not self.errors:
+            return "快速網頁檢視: 未線性化"
+        return "快速網頁檢視: " + "；".join(self.errors)
+
+
+class _BitReader:
+    """依位元讀取提示表 (高位元在前)"""
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.bit = offset * 8
+
+    def read(self, nbits: int) -> int:
+        if nbits == 0:
+            return 0
+        if nbits > 32:
+            raise PdfError(f"提示表欄位長度 {nbits} 位元不合理")
+        end = self.bit + nbits
+        if end > len(self.data) * 8:
+            raise PdfError("提示表資料不足")
+        first, last = self.bit // 8, (end + 7) // 8
+        value = int.from_bytes(self.data[first:last], "big")
+        value >>= last * 8 - end
+        self.bit = end
+        return value & ((1 << nbits) - 1)
+
+    def align(self):
+        """每個欄位的所有項目讀完後對齊到下一個位元組"""
+        self.bit = (self.bit + 7) // 8 * 8
+
+    @property
+    def offset(self) -> int:
+        return (self.bit + 7) // 8
+
+
+def _read_page_offset_table(data: bytes, page_count: int) -> Dict[str, Any]:
+    """
+    讀取 page offset hint table (PDF 規格附錄 F.4.1)
+
+    Returns:
+        {"first_page_offset", "page_lengths", "nobjects", "end"}
+    """
+    bits = _BitReader(data)
+    least_nobjects = bits.read(32)
+    first_page_offset = bits.read(32)
+    nbits_delta_nobjects = bits.read(16)
+    least_page_length = bits.read(32)
+    nbits_delta_page_length = bits.read(16)
+    bits.read(32)  # least_content_offset
+    nbits_delta_content_offset = bits.read(16)
+    bits.read(32)  # least_content_length
+    nbits_delta_content_length = bits.read(16)
+    nbits_nshared_objects = bits.read(16)
+    nbits_shared_identifier = bits.read(16)
+    nbits_shared_numerator = bits.read(16)
+    bits.read(16)  # shared_denominator
+
+    nobjects = [least_nobjects + bits.read(nbits_delta_nobjects) for _ in range(page_count)]
+    bits.align()
+    page_lengths = [least_page_length + bits.read(nbits_delta_page_length) for _ in range(page_count)]
+    bits.align()
+    nshared = [bits.read(nbits_nshared_objects) for _ in range(page_count)]
+    bits.align()
+    shared_ids = [bits.read(nbits_shared_identifier) for count in nshared for _ in range(count)]
+    bits.align()
+    for _ in range(sum(nshared)):
+        bits.read(nbits_shared_numerator)
+    bits.align()
+    for _ in range(page_count):
+        bits.read(nbits_delta_content_offset)
+    bits.align()
+    for _ in range(page_count):
+        bits.read(nbits_delta_content_length)
+    bits.align()
+
+    return {
+        "first_page_offset": first_page_offset,
+        "page_lengths": page_lengths,
+        "nobjects": nobjects,
+        "shared_ids": shared_ids,
+        "end": bits.offset,
+    }
+
+
+def _read_shared_object_table(data: bytes, offset: int) -> Dict[str, Any]:
+    """讀取 shared object hint table 的表頭 (PDF 規格附錄 F.4.2)"""
+    bits = _BitReader(data, offset)
+    return {
+        "first_object": bits.read(32),
+        "first_offset": bits.read(32),
+        "first_page_count": bits.read(32),
+        "total_count": bits.read(32),
+    }
+
+
+def _find_linearization_dict(reader: PdfReader) -> Optional[Dict[str, Any]]:
+    """檔案中第一個物件若是線性化參數字典則回傳之"""
+    match = _FIRST_OBJECT.search(reader.data, 0, LINEARIZATION_DICT_LIMIT)
+    if not match:
+        return None
+    _, _, value, end = parse_object_at(reader.data, match.start())
+    if isinstance(value, dict) and "Linearized" in value and end <= LINEARIZATION_DICT_LIMIT:
+        return value
+    return None
+
+
+def check_linearization(path: str) -> LinearizationReport:
+    """
+    檢查 PDF 的線性化結構
+
+    檢查項目：
+        - 線性化參數字典位於檔案開頭，/L 等於檔案大小 (線性化之後沒有增量更新)
+        - /N、/O 與頁面樹的頁數、第一頁物件一致，/E 與 /T 指向正確的位置
+        - 主要提示串流位於 /H 指定的位置與長度，且可以解壓縮
+        - page offset hint table 中每頁的位置與長度，與頁面物件實際的位置相符
+        - shared object hint table 位於 /S 指定的位置
+
+    Args:
+        path: PDF 檔案路徑
+
+    Returns:
+        LinearizationReport (檔案無法解析時 errors 會說明原因)
+    """
+    report = LinearizationReport(path)
+    try:
+        with PdfReader(path) as reader:
+            params = _find_linearization_dict(reader)
+            if params is None:
+                return report
+            report.linearized = True
+            report.params = params
+            _check_structure(reader, params, report.errors)
+    except PdfError as e:
+        report.errors.append(str(e))
+    except OSError as e:
+        report.errors.append(f"無法讀取檔案: {e}")
+    return report
+
+
+def _check_structure(reader: PdfReader, params: Dict[str, Any], errors: List[str]):
+    """比對線性化參數、提示表與檔案結構，錯誤加入 errors"""
+    for key in ("L", "O", "E", "N", "T"):
+        if not isinstance(params.get(key), int):
+            errors.append(f"線性化參數 /{key} 缺少或格式錯誤")
+    hint = params.get("H")
+    if not (isinstance(hint, list) and len(hint) in (2, 4) and all(isinstance(v, int) for v in hint)):
+        errors.append("線性化參數 /H 缺少或格式錯誤")
+    if errors:
+        return
+
+    if params["L"] != reader.size:
+        errors.append(f"/L ({params['L']}) 與檔案大小 ({reader.size}) 不符，檔案在線性化後被修改過")
+        return
+
+    pages = reader.page_refs()
+    if params["N"] != len(pages):
+        errors.append(f"/N ({params['N']}) 與實際頁數 ({len(pages)}) 不符")
+        return
+    if not pages or pages[0].num != params["O"]:
+        errors.append(f"/O ({params['O']}) 不是第一頁的頁面物件")
+        return
+    if not 0 < params["E"] <= reader.size:
+        errors.append(f"/E ({params['E']}) 超出檔案範圍")
+
+    # /T: 主要交互參照表第一個項目之前的空白 (交互參照串流則為物件之前的空白)
+    if not _points_to_main_xref(reader, params["T"]):
+        errors.append(f"/T ({params['T']}) 沒有指向主要交互參照表")
+
+    hint_offset, hint_length = hint[0], hint[1]
+    hint_data = _read_hint_stream(reader, hint_offset, hint_length, errors)
+    if hint_data is None:
+        return
+
+    def adjusted(offset: int) -> int:
+        """提示表中的位置不計入主要提示串流本身"""
+        return offset + hint_length if offset >= hint_offset else offset
+
+    try:
+        table = _read_page_offset_table(hint_data[0], len(pages))
+    except PdfError as e:
+        errors.append(f"page offset hint table: {e}")
+        return
+
+    shared_offset = hint_data[1]
+    if shared_offset < table["end"] or shared_offset >= len(hint_data[0]):
+        errors.append(f"shared object hint table 位置 /S ({shared_offset}) 不正確")
+    else:
+        try:
+            shared = _read_shared_object_table(hint_data[0], shared_offset)
+        except PdfError as e:
+            errors.append(f"shared object hint table: {e}")
+        else:
+            if shared["first_page_count"] > shared["total_count"]:
+                errors.append("shared object hint table 的第一頁共用物件數大於總數")
+            elif any(i >= shared["total_count"] for i in table["shared_ids"]):
+                errors.append("page offset hint table 參照了不存在的共用物件")
+
+    if min(table["nobjects"]) < 1:
+        errors.append("page offset hint table 中有頁面的物件數為 0")
+
+    # 每頁的區段依序相連，頁面物件位於該頁區段的開頭 (第一頁由 /O 指定)
+    start = table["first_page_offset"]
+    for index, (ref, length) in enumerate(zip(pages, table["page_lengths"])):
+        actual = reader.object_offset(ref.num)
+        if actual is not None and adjusted(start) != actual:
+            errors.append(
+                f"第 {index + 1} 頁: 提示表中的位置 ({adjusted(start)}) 與頁面物件位置 ({actual}) 不符"
+            )
+            return
+        if index == 0 and adjusted(start + length) != params["E"]:
+            errors.append(f"第一頁結束位置 ({adjusted(start + length)}) 與 /E ({params['E']}) 不符")
+            return
+        start += length
+    if adjusted(start) > reader.size:
+        errors.append("page offset hint table 中的頁面長度超出檔案大小")
+
+
+def _points_to_main_xref(reader: PdfReader, position: int) -> bool:
+    """/T 的位置是否為交互參照表項目或交互參照串流"""
+    if not 0 <= position < reader.size:
+        return False
+    if _XREF_ENTRY.match(reader.data, position):
+        return True
+    try:
+        _, _, value = reader.read_indirect(_WHITESPACE.match(reader.data, position).end())
+    except PdfError:
+        return False
+    return isinstance(value, Stream) and value.dict.get("Type") == "XRef"
+
+
+def _read_hint_stream(reader: PdfReader, offset: int, length: int, errors: List[str]):
+    """
+    讀取 /H 指定位置的主要提示串流
+
+    Returns:
+        (解壓縮後的資料, /S 位置)，失敗時回傳 None
+    """
+    if not 0 < offset < offset + length <= reader.size:
+        errors.append(f"提示串流位置 /H [{offset} {length}] 超出檔案範圍")
+        return None
+    try:
+        _, _, stream = reader.read_indirect(offset)
+    except PdfError as e:
+        errors.append(f"/H 沒有指向提示串流: {e}")
+        return None
+    if not isinstance(stream, Stream) or not isinstance(stream.dict.get("S"), int):
+        errors.append("/H 指向的物件不是提示串流 (缺少 /S)")
+        return None
+
+    end = _ENDOBJ.match(reader.data, stream.start + stream.length)
+    if not end:
+        errors.append("提示串流的長度與 endstream 位置不符")
+        return None
+    tail = reader.data[end.end():offset + length]
+    if end.end() > offset + length or tail.strip(b"\x00\t\n\x0c\r "):
+        errors.append(f"提示串流實際結束於 {end.end()}，與 /H 的長度 ({length}) 不符")
+        return None
+
+    try:
+        data = reader.stream_data(stream)
+    except PdfError as e:
+        errors.append(f"提示串流: {e}")
+        return None
+    return data, stream.dict["S"]
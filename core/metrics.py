@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+效能指標
+以 Prometheus 文字格式輸出工作數、頁數、耗時、位元組數、快取命中與佇列狀態，
+可寫入檔案 (node_exporter textfile collector) 或由本機 HTTP 端點提供
+"""
+
+import bisect
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# 預設的耗時分桶 (秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# 每秒頁數分桶
+RATE_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指標基礎類別"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 的標籤必須是 {self.labelnames}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """只會增加的計數器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """可增減的數值，也可在輸出時由函式取得"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """輸出時呼叫 func 取得數值"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = func
+
+    def remove(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+            self._functions.pop(key, None)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, func in functions.items():
+            try:
+                values[key] = func()
+            except Exception:
+                continue
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """分桶統計"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key → [各分桶次數, 總和, 次數]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指標集合"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指標名稱重複: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus 文字格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+    def write_textfile(self, path: str):
+        """寫入檔案 (先寫暫存檔再取代，避免收集器讀到一半的內容)"""
+        dirname = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".prom", dir=dirname)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+# 全域指標
+REGISTRY = MetricsRegistry()
+
+JOBS_TOTAL = REGISTRY.counter(
+    "gsgui_jobs_total", "已完成的 Ghostscript 操作數", ("operation", "result"))
+JOB_DURATION = REGISTRY.histogram(
+    "gsgui_job_duration_seconds", "操作耗時", ("operation",))
+JOB_CPU_SECONDS = REGISTRY.counter(
+    "gsgui_job_cpu_seconds_total", "Ghostscript 子程序使用的 CPU 秒數", ("operation",))
+PAGES_TOTAL = REGISTRY.counter(
+    "gsgui_pages_total", "處理的頁數", ("operation",))
+PAGES_PER_SECOND = REGISTRY.histogram(
+    "gsgui_pages_per_second", "每個操作的處理速度 (頁/秒)", ("operation",), RATE_BUCKETS)
+INPUT_BYTES = REGISTRY.counter(
+    "gsgui_input_bytes_total", "讀取的輸入位元組數", ("operation",))
+OUTPUT_BYTES = REGISTRY.counter(
+    "gsgui_output_bytes_total", "產生的輸出位元組數", ("operation",))
+GS_SPAWN_SECONDS = REGISTRY.histogram(
+    "gsgui_gs_spawn_seconds", "啟動 Ghostscript 程序所花的時間")
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "gsgui_queue_wait_seconds", "工作從送出到開始執行的等待時間", ("queue",))
+QUEUE_DEPTH = REGISTRY.gauge(
+    "gsgui_queue_depth", "等待中的工作數", ("queue",))
+JOBS_RUNNING = REGISTRY.gauge(
+    "gsgui_jobs_running", "執行中的工作數", ("queue",))
+CACHE_HITS = REGISTRY.counter(
+    "gsgui_cache_hits_total", "快取命中次數", ("cache",))
+CACHE_MISSES = REGISTRY.counter(
+    "gsgui_cache_misses_total", "快取未命中次數", ("cache",))
+OUTPUT_CHECKS = REGISTRY.counter(
+    "gsgui_output_checks_total", "輸出檔案的結構檢查次數", ("check", "result"))
+DEDUP_OBJECTS = REGISTRY.counter(
+    "gsgui_dedup_objects_removed_total", "去除重複資源時移除的物件數", ("kind",))
+DEDUP_BYTES_SAVED = REGISTRY.counter(
+    "gsgui_dedup_bytes_saved_total", "去除重複資源節省的位元組數")
+GUI_TASKS = REGISTRY.counter(
+    "gsgui_gui_tasks_total", "圖形介面執行的工作數", ("tab", "result"))
+GUI_TASK_DURATION = REGISTRY.histogram(
+    "gsgui_gui_task_duration_seconds", "圖形介面工作耗時", ("tab",))
+
+
+def record_job(result) -> None:
+    """記錄一個 JobResult"""
+    operation = result.operation or "unknown"
+    JOBS_TOTAL.inc(operation=operation, result="success" if result.success else "failure")
+    JOB_DURATION.observe(result.wall_time, operation=operation)
+    if result.cpu_time is not None:
+        JOB_CPU_SECONDS.inc(result.cpu_time, operation=operation)
+    if result.pages:
+        PAGES_TOTAL.inc(result.pages, operation=operation)
+        if result.wall_time > 0:
+            PAGES_PER_SECOND.observe(result.pages / result.wall_time, operation=operation)
+    INPUT_BYTES.inc(result.input_bytes, operation=operation)
+    OUTPUT_BYTES.inc(result.output_bytes, operation=operation)
+
+
+def record_check(check: str, passed: bool) -> None:
+    OUTPUT_CHECKS.inc(check=check, result="pass" if passed else "fail")
+
+
+def record_dedup(report) -> None:
+    """記錄一個 DedupReport"""
+    for kind, count in report.removed.items():
+        if count:
+            DEDUP_OBJECTS.inc(count, kind=kind)
+    if report.bytes_saved > 0:
+        DEDUP_BYTES_SAVED.inc(report.bytes_saved)
+
+
+def record_spawn(seconds: Optional[float]) -> None:
+    if seconds is not None:
+        GS_SPAWN_SECONDS.observe(seconds)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    if hit:
+        CACHE_HITS.inc(cache=cache)
+    else:
+        CACHE_MISSES.inc(cache=cache)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: MetricsRegistry = REGISTRY
+) -> ThreadingHTTPServer:
+    """在背景執行緒提供 /metrics"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TextfileWriter:
+    """定期將指標寫入檔案"""
+
+    def __init__(self, path: str, interval: float = 15.0, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self) -> "TextfileWriter":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止並寫入最後一次"""
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def write(self):
+        try:
+            self.registry.write_textfile(self.path)
+        except OSError:
+            pass
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.write()
+            self._stop.wait(self.interval)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+頁面色彩分類
+以低解析度、無反鋸齒的草稿繪製將頁面轉為 NumPy 陣列，判斷每頁為黑白、灰階或彩色，
+讓自動圖片格式以 pngmono/pnggray/png16m 輸出，而不是全部使用 24 位元 PNG
+
+- 彩色: 色版間差異超過 chroma 的像素比例超過 color_ratio
+- 黑白: 非彩色，且中間調像素 (灰階值在 midtones 範圍內) 比例不超過 midtone_ratio
+  (無反鋸齒時純文字與線條只有黑白兩種值，照片與灰階掃描才有中間調)
+- 其餘為灰階
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from .config import AUTO_IMAGE
+from .page_cost import balance_shards
+from .page_ranges import format_page_ranges, pages_to_ranges
+
+
+# 頁面類別 (由小到大)
+PAGE_CLASSES = ("bilevel", "gray", "color")
+_CLASS_NAMES = {"bilevel": "黑白", "gray": "灰階", "color": "彩色"}
+
+
+def classify_array(array, settings: Dict[str, Any] = AUTO_IMAGE) -> str:
+    """
+    判斷一頁的類別
+
+    Args:
+        array: (高, 寬, 3) 的 RGB uint8 陣列
+        settings: 門檻 (見 config.AUTO_IMAGE)
+
+    Returns:
+        "bilevel"、"gray" 或 "color"
+    """
+    if array.size == 0:
+        return "bilevel"
+    chroma = array.max(axis=2) - array.min(axis=2)
+    if (chroma > settings["chroma"]).mean() > settings["color_ratio"]:
+        return "color"
+    green = array[:, :, 1]
+    low, high = settings["midtones"]
+    if ((green > low) & (green < high)).mean() <= settings["midtone_ratio"]:
+        return "bilevel"
+    return "gray"
+
+
+class ColorReport:
+    """自動圖片格式的結果：各頁類別與輸出大小"""
+
+    def __init__(self, classes: Dict[int, str]):
+        self.classes = classes  # 頁碼 → 類別
+        self.output_bytes: Dict[str, int] = {}  # 類別 → 實際輸出大小
+        self.estimated_bytes: Dict[str, int] = {}  # 類別 → 全部以 PNG 輸出的估計大小
+        self.sampled_pages: List[int] = []  # 估計時另以 PNG 輸出比較的頁面
+
+    def pages_of(self, page_class: str) -> List[int]:
+        return sorted(page for page, value in self.classes.items() if value == page_class)
+
+    @property
+    def saved_bytes(self) -> int:
+        """比全部以 PNG 輸出估計節省的大小 (沒有估計時為 0)"""
+        return sum(self.estimated_bytes.get(c, n) - n for c, n in self.output_bytes.items())
+
+    def summary(self) -> str:
+        counts = "、".join(
+            f"{_CLASS_NAMES[c]} {len(self.pages_of(c))} 頁" for c in PAGE_CLASSES if self.pages_of(c)
+        )
+        text = f"自動格式: {counts or '0 頁'}"
+        if self.sampled_pages:
+            text += f"，比全部以 PNG 輸出約省 {self.saved_bytes / 1048576:.2f} MB (抽樣 {len(self.sampled_pages)} 頁估計)"
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": {c: format_page_ranges(pages_to_ranges(self.pages_of(c))) for c in PAGE_CLASSES},
+            "output_bytes": dict(self.output_bytes),
+            "estimated_png_bytes": dict(self.estimated_bytes),
+            "saved_bytes": self.saved_bytes,
+            "sampled_pages": list(self.sampled_pages),
+        }
+
+
+def classify_pages(
+    wrapper,
+    input_file: str,
+    pages: List[int],
+    dpi: int = AUTO_IMAGE["dpi"],
+    jobs: int = 1
+) -> ColorReport:
+    """
+    轉換指定頁面並判斷類別
+
+    頁面切成最多 jobs 個分段，各由一個 Ghostscript 同時轉換。
+
+    Args:
+        wrapper: GhostscriptWrapper
+        pages: 頁碼 (遞增)
+        jobs: 同時執行的 Ghostscript 數
+
+    Raises:
+        ImportError: 沒有安裝 numpy
+        RuntimeError: Ghostscript 轉換失敗
+    """
+    if not pages:
+        return ColorReport({})
+    shards = [pages[start:end + 1] for start, end in balance_shards([1.0] * len(pages), max(1, jobs))]
+
+    def run_shard(shard: List[int]) -> List[str]:
+        expression = format_page_ranges(pages_to_ranges(shard))
+        stream = wrapper.render_arrays(input_file, dpi=dpi, color="RGB", pages=expression, render_preset="draft")
+        classes = [classify_array(array) for array in stream]
+        if not stream.result.success or len(classes) != len(shard):
+            raise RuntimeError(f"第 {expression} 頁轉換失敗: {stream.result.output[-200:]}")
+        return classes
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        classes = [value for values in pool.map(run_shard, shards) for value in values]
+    return ColorReport(dict(zip(pages, classes)))
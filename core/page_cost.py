@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+頁面成本估計
+從內容串流長度、圖片像素數、字型數與繪圖運算子數估計每頁的處理成本，
+讓平行處理時每個分段的總成本接近，而不是只讓頁數相同
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import PAGE_COST_WEIGHTS
+from .pdf_reader import PdfError, PdfReader, Ref, Stream
+
+
+# 計入成本的內容運算子 (路徑建構與繪製、文字顯示、漸層、內嵌圖片)
+_DRAW_OPERATORS = {
+    b"m", b"l", b"c", b"v", b"y", b"re", b"h",
+    b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*", b"n", b"W", b"W*",
+    b"Tj", b"TJ", b"'", b'"', b"sh", b"BI",
+}
+# 表單物件 (Form XObject) 最多往下追幾層
+_MAX_FORM_DEPTH = 8
+
+
+class PageCost:
+    """一頁的內容統計與估計成本"""
+
+    def __init__(self, page: int):
+        self.page = page  # 頁碼 (從 1 開始)
+        self.content_bytes = 0  # 內容串流 (含使用的表單物件) 解壓縮後的長度
+        self.image_pixels = 0
+        self.images = 0
+        self.fonts = 0
+        self.operators = 0
+        self.cost = 0.0
+
+    def compute(self, weights: Dict[str, float] = PAGE_COST_WEIGHTS) -> float:
+        """依權重計算成本"""
+        self.cost = (
+            weights["page"]
+            + weights["content_kb"] * self.content_bytes / 1024
+            + weights["megapixels"] * self.image_pixels / 1e6
+            + weights["fonts"] * self.fonts
+            + weights["kilo_operators"] * self.operators / 1000
+        )
+        return self.cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page": self.page,
+            "content_bytes": self.content_bytes,
+            "images": self.images,
+            "image_pixels": self.image_pixels,
+            "fonts": self.fonts,
+            "operators": self.operators,
+            "cost": round(self.cost, 3),
+        }
+
+
+def _count_operators(data: bytes) -> int:
+    """計算內容串流中的繪圖運算子數 (以空白切割，字串中的單字也可能被算入，作為估計已足夠)"""
+    return sum(1 for token in data.split() if token in _DRAW_OPERATORS)
+
+
+def _page_resources(reader: PdfReader, page: Dict[str, Any]) -> Dict[str, Any]:
+    """頁面的資源字典 (沒有時往上找頁面樹的繼承值)"""
+    node, seen = page, set()
+    while isinstance(node, dict):
+        resources = reader.resolve(node.get("Resources"))
+        if isinstance(resources, dict):
+            return resources
+        parent = node.get("Parent")
+        if not isinstance(parent, Ref) or parent.num in seen:
+            break
+        seen.add(parent.num)
+        node = reader.resolve(parent)
+    return {}
+
+
+def _stream_bytes(reader: PdfReader, stream: Stream) -> bytes:
+    """串流解壓縮後的資料；不支援的濾鏡以原始資料代替"""
+    try:
+        return reader.stream_data(stream)
+    except PdfError:
+        return reader.raw_stream_data(stream)
+
+
+def _add_content(reader: PdfReader, cost: PageCost, contents: Any):
+    for item in contents if isinstance(contents, list) else [contents]:
+        stream = reader.resolve(item)
+        if isinstance(stream, Stream):
+            data = _stream_bytes(reader, stream)
+            cost.content_bytes += len(data)
+            cost.operators += _count_operators(data)
+
+
+def _add_resources(reader: PdfReader, cost: PageCost, resources: Dict[str, Any], seen: Set[int], depth: int = 0):
+    fonts = reader.resolve(resources.get("Font"))
+    if isinstance(fonts, dict):
+        cost.fonts += len(fonts)
+
+    xobjects = reader.resolve(resources.get("XObject"))
+    if not isinstance(xobjects, dict):
+        return
+    for ref in xobjects.values():
+        if isinstance(ref, Ref):
+            if ref.num in seen:
+                continue
+            seen.add(ref.num)
+        xobject = reader.resolve(ref)
+        if not isinstance(xobject, Stream):
+            continue
+        subtype = xobject.dict.get("Subtype")
+        if subtype == "Image":
+            width = reader.resolve(xobject.dict.get("Width"))
+            height = reader.resolve(xobject.dict.get("Height"))
+            if isinstance(width, int) and isinstance(height, int):
+                cost.images += 1
+                cost.image_pixels += width * height
+        elif subtype == "Form" and depth < _MAX_FORM_DEPTH:
+            _add_content(reader, cost, xobject)
+            form_resources = reader.resolve(xobject.dict.get("Resources"))
+            if isinstance(form_resources, dict):
+                _add_resources(reader, cost, form_resources, seen, depth + 1)
+
+
+def analyze_pages(input_file: str, weights: Dict[str, float] = PAGE_COST_WEIGHTS) -> List[PageCost]:
+    """
+    估計每一頁的處理成本
+
+    Args:
+        input_file: PDF 檔案
+        weights: 成本權重 (見 config.PAGE_COST_WEIGHTS)
+
+    Returns:
+        每頁一個 PageCost
+
+    Raises:
+        PdfError: 無法解析的 PDF
+    """
+    costs = []
+    with PdfReader(input_file) as reader:
+        for index, ref in enumerate(reader.page_refs()):
+            cost = PageCost(index + 1)
+            page = reader.resolve(ref)
+            if isinstance(page, dict):
+                _add_content(reader, cost, reader.resolve(page.get("Contents")))
+                _add_resources(reader, cost, _page_resources(reader, page), set())
+            cost.compute(weights)
+            costs.append(cost)
+    return costs
+
+
+def balance_shards(costs: List[float], shards: int) -> List[Tuple[int, int]]:
+    """
+    將頁面切成最多 shards 個連續分段，讓成本最高的分段盡量小
+
+    以二分搜尋找出最小可行的分段成本上限，再依上限由前往後切分；
+    若依累計成本平均切分的結果一樣好則採用後者 (各段較平均)。
+
+    Args:
+        costs: 每頁成本 (依頁面順序)
+        shards: 分段數上限
+
+    Returns:
+        [(起始索引, 結束索引)]，從 0 開始且包含結束索引
+    """
+    if not costs:
+        return []
+    shards = max(1, min(shards, len(costs)))
+
+    def split(limit: float) -> Optional[List[Tuple[int, int]]]:
+        ranges, start, total = [], 0, 0.0
+        for index, cost in enumerate(costs):
+            if total + cost > limit and index > start:
+                ranges.append((start, index - 1))
+                start, total = index, 0.0
+            total += cost
+        ranges.append((start, len(costs) - 1))
+        return ranges if len(ranges) <= shards else None
+
+    def even_split() -> List[Tuple[int, int]]:
+        # 在累計成本最接近總成本 k/shards 的位置切分 (成本相近時各段較平均)
+        total, target, ranges, start, running = sum(costs), 1, [], 0, 0.0
+        for index, cost in enumerate(costs):
+            running += cost
+            remaining = len(costs) - index - 1
+            if target < shards and remaining and running >= total * target / shards:
+                ranges.append((start, index))
+                start, target = index + 1, target + 1
+        ranges.append((start, len(costs) - 1))
+        return ranges
+
+    def worst(ranges: List[Tuple[int, int]]) -> float:
+        return max(sum(costs[a:b + 1]) for a, b in ranges)
+
+    low, high = max(costs), sum(costs)
+    for _ in range(50):
+        if high - low <= 1e-6 * high:
+            break
+        middle = (low + high) / 2
+        if split(middle) is None:
+            low = middle
+        else:
+            high = middle
+    best, even = split(high), even_split()
+    return even if worst(even) <= worst(best) * (1 + 1e-9) else best
+
+
+def format_report(costs: List[PageCost], shards: Optional[List[Tuple[int, int]]] = None) -> str:
+    """每頁成本報告 (文字)"""
+    lines = [f"{'頁':>5}{'成本':>9}{'內容 KB':>10}{'圖片':>6}{'百萬像素':>10}{'字型':>6}{'運算子':>9}"]
+    for cost in costs:
+        lines.append(
+            f"{cost.page:>5}{cost.cost:>9.2f}{cost.content_bytes / 1024:>10.1f}{cost.images:>6}"
+            f"{cost.image_pixels / 1e6:>10.2f}{cost.fonts:>6}{cost.operators:>9}"
+        )
+    total = sum(cost.cost for cost in costs)
+    lines.append(f"共 {len(costs)} 頁，總成本 {total:.2f}")
+    if shards:
+        lines.append(f"分為 {len(shards)} 段:")
+        for start, end in shards:
+            shard_cost = sum(cost.cost for cost in costs[start:end + 1])
+            lines.append(f"  第 {costs[start].page}-{costs[end].page} 頁  成本 {shard_cost:.2f}")
+    return "\n".join(lines)
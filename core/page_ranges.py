@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+頁碼範圍運算式
+解析如 "1-3,5,9-,even,every:10" 的運算式為 (起始頁, 結束頁) 列表，每個範圍對應一個輸出檔案
+"""
+
+from typing import List, Optional, Tuple
+
+
+PageRange = Tuple[int, int]
+
+
+class PageRangeError(ValueError):
+    """頁碼範圍運算式錯誤"""
+
+
+def _parse_page(text: str, term: str) -> int:
+    """解析單一頁碼"""
+    if not text.isdigit():
+        raise PageRangeError(f"「{term}」不是有效的頁碼")
+    page = int(text)
+    if page < 1:
+        raise PageRangeError(f"「{term}」: 頁碼必須大於 0")
+    return page
+
+
+def parse_page_ranges(expression: str, total_pages: Optional[int] = None) -> List[PageRange]:
+    """
+    解析頁碼範圍運算式
+
+    以逗號 (或空白) 分隔的項目依序展開：
+        5         第 5 頁
+        1-3       第 1 到 3 頁
+        9-        第 9 頁到最後一頁 (需要總頁數)
+        -4        第 1 到 4 頁
+        odd/even  每個奇數/偶數頁各一個範圍 (需要總頁數)
+        every:10  從第 1 頁起每 10 頁一個範圍 (需要總頁數)
+
+    Args:
+        expression: 運算式
+        total_pages: 總頁數 (None=未知，不檢查超出範圍)
+
+    Returns:
+        [(起始頁, 結束頁), ...]
+
+    Raises:
+        PageRangeError: 格式錯誤、頁碼超出範圍，或需要總頁數但未知
+    """
+    ranges: List[PageRange] = []
+    terms = expression.replace(",", " ").split()
+    if not terms:
+        raise PageRangeError("請輸入頁碼範圍")
+
+    def need_total(term: str) -> int:
+        if not total_pages:
+            raise PageRangeError(f"「{term}」需要總頁數，請先選擇檔案")
+        return total_pages
+
+    for term in terms:
+        lower = term.lower()
+        if lower in ("odd", "even"):
+            total = need_total(term)
+            start = 1 if lower == "odd" else 2
+            ranges.extend((page, page) for page in range(start, total + 1, 2))
+        elif lower.startswith("every:"):
+            step_text = lower[6:]
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise PageRangeError(f"「{term}」: 間隔必須是大於 0 的整數")
+            step = int(step_text)
+            total = need_total(term)
+            ranges.extend(
+                (first, min(first + step - 1, total)) for first in range(1, total + 1, step)
+            )
+        elif "-" in term:
+            first_text, _, last_text = term.partition("-")
+            first = _parse_page(first_text, term) if first_text else 1
+            last = _parse_page(last_text, term) if last_text else need_total(term)
+            if first > last:
+                raise PageRangeError(f"「{term}」: 起始頁碼不能大於結束頁碼")
+            ranges.append((first, last))
+        else:
+            page = _parse_page(term, term)
+            ranges.append((page, page))
+
+    if total_pages:
+        for first, last in ranges:
+            if last > total_pages:
+                raise PageRangeError(f"第 {last} 頁超出總頁數 {total_pages}")
+    return ranges
+
+
+def pages_to_ranges(pages: List[int]) -> List[PageRange]:
+    """將遞增的頁碼合併為連續範圍 (例如 [1, 2, 3, 5] → [(1, 3), (5, 5)])"""
+    ranges: List[PageRange] = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+def format_page_ranges(ranges: List[PageRange]) -> str:
+    """將範圍列表轉回運算式 (例如 [(1, 3), (5, 5)] → "1-3,5")"""
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 結構讀取器
+以 mmap 讀取 PDF 的交互參照表 (含交互參照串流) 與物件 (含物件串流)，
+不需要 Ghostscript 即可檢查輸出檔案的結構
+"""
+
+import mmap
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PdfError(ValueError):
+    """PDF 結構錯誤"""
+
+
+class Name(str):
+    """PDF 名稱物件 (不含開頭的 /)"""
+
+    def __repr__(self) -> str:
+        return "/" + self
+
+
+class Real(float):
+    """實數 (保留原始文字，改寫檔案時不改變精度與格式)"""
+
+    def __new__(cls, text: bytes):
+        value = super().__new__(cls, text)
+        value.text = text
+        return value
+
+
+class Ref:
+    """間接參照 (n g R)"""
+
+    __slots__ = ("num", "gen")
+
+    def __init__(self, num: int, gen: int = 0):
+        self.num = num
+        self.gen = gen
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Ref) and (self.num, self.gen) == (other.num, other.gen)
+
+    def __hash__(self) -> int:
+        return hash((self.num, self.gen))
+
+    def __repr__(self) -> str:
+        return f"Ref({self.num}, {self.gen})"
+
+
+class Stream:
+    """串流物件：字典與原始 (未解碼) 資料在檔案中的位置"""
+
+    def __init__(self, dictionary: Dict[str, Any], start: int, length: int):
+        self.dict = dictionary
+        self.start = start
+        self.length = length
+
+    def __repr__(self) -> str:
+        return f"Stream({self.dict!r}, start={self.start}, length={self.length})"
+
+
+_SKIP = re.compile(rb"(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF = re.compile(rb"(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?=[\x00\t\n\x0c\r ()<>\[\]{}/%]|$)")
+_NAME = re.compile(rb"/([^\x00\t\n\x0c\r ()<>\[\]{}/%]*)")
+_KEYWORD = re.compile(rb"[A-Za-z]+")
+_OBJ_HEADER = re.compile(rb"(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj(?=[\x00\t\n\x0c\r <\[(/%]|$)")
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+_STRING_ESCAPES = {
+    ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b",
+    ord("f"): b"\f", ord("("): b"(", ord(")"): b")", ord("\\"): b"\\",
+}
+_XREF_ENTRY = re.compile(rb"(\d{10})[ ](\d{5})[ ]([nf])")
+
+# 搜尋檔尾 startxref 的範圍 (bytes)
+STARTXREF_SEARCH = 2048
+
+
+class _Parser:
+    """從指定位置解析一個 PDF 物件"""
+
+    def __init__(self, data, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def skip(self):
+        self.pos = _SKIP.match(self.data, self.pos).end()
+
+    def peek(self, length: int = 1) -> bytes:
+        return bytes(self.data[self.pos:self.pos + length])
+
+    def parse(self) -> Any:
+        """解析一個物件 (字典、陣列、字串、名稱、數字、參照、布林值或 null)"""
+        self.skip()
+        data = self.data
+        if self.pos >= len(data):
+            raise PdfError("檔案意外結束")
+        head = self.peek(2)
+        if head == b"<<":
+            return self._parse_dict()
+        if head[:1] == b"<":
+            return self._parse_hex_string()
+        if head[:1] == b"[":
+            return self._parse_array()
+        if head[:1] == b"(":
+            return self._parse_literal_string()
+        if head[:1] == b"/":
+            match = _NAME.match(data, self.pos)
+            self.pos = match.end()
+            raw = _NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), match.group(1))
+            return Name(raw.decode("latin-1"))
+
+        match = _REF.match(data, self.pos)
+        if match:
+            self.pos = match.end()
+            return Ref(int(match.group(1)), int(match.group(2)))
+        match = _NUMBER.match(data, self.pos)
+        if match:
+            self.pos = match.end()
+            text = match.group(0)
+            return Real(text) if b"." in text else int(text)
+        match = _KEYWORD.match(data, self.pos)
+        if match:
+            keyword = match.group(0)
+            if keyword in (b"true", b"false", b"null"):
+                self.pos = match.end()
+                return {b"true": True, b"false": False, b"null": None}[keyword]
+        raise PdfError(f"無法解析位置 {self.pos} 的物件")
+
+    def _parse_dict(self) -> Dict[str, Any]:
+        self.pos += 2
+        result: Dict[str, Any] = {}
+        while True:
+            self.skip()
+            if self.peek(2) == b">>":
+                self.pos += 2
+                return result
+            key = self.parse()
+            if not isinstance(key, Name):
+                raise PdfError(f"位置 {self.pos} 的字典鍵不是名稱")
+            result[key] = self.parse()
+
+    def _parse_array(self) -> List[Any]:
+        self.pos += 1
+        result = []
+        while True:
+            self.skip()
+            if self.peek() == b"]":
+                self.pos += 1
+                return result
+            result.append(self.parse())
+
+    def _parse_hex_string(self) -> bytes:
+        end = self.data.find(b">", self.pos)
+        if end < 0:
+            raise PdfError("十六進位字串沒有結尾")
+        digits = re.sub(rb"[^0-9A-Fa-f]", b"", bytes(self.data[self.pos + 1:end]))
+        self.pos = end + 1
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode("ascii"))
+
+    def _parse_literal_string(self) -> bytes:
+        data = self.data
+        pos = self.pos + 1
+        depth = 1
+        out = bytearray()
+        while pos < len(data):
+            char = data[pos]
+            if char == 0x5C:  # 反斜線
+                pos += 1
+                escaped = data[pos]
+                if escaped in _STRING_ESCAPES:
+                    out += _STRING_ESCAPES[escaped]
+                elif 0x30 <= escaped <= 0x37:
+                    octal = re.match(rb"[0-7]{1,3}", data[pos:pos + 3])
+                    out.append(int(octal.group(0), 8) & 0xFF)
+                    pos += len(octal.group(0)) - 1
+                elif escaped == 0x0D:
+                    if data[pos + 1:pos + 2] == b"\n":
+                        pos += 1
+                elif escaped != 0x0A:
+                    out.append(escaped)
+            elif char == 0x28:
+                depth += 1
+                out.append(char)
+            elif char == 0x29:
+                depth -= 1
+                if depth == 0:
+                    self.pos = pos + 1
+                    return bytes(out)
+                out.append(char)
+            else:
+                out.append(char)
+            pos += 1
+        raise PdfError("字串沒有結尾")
+
+
+def parse_object_at(data, pos: int) -> Tuple[int, int, Any, int]:
+    """
+    解析位置 pos 的間接物件 (n g obj ... )
+
+    Returns:
+        (物件編號, 世代編號, 物件, 物件內容結束的位置)，
+        串流物件只解析字典，stream 關鍵字的位置由呼叫端處理
+    """
+    parser = _Parser(data, pos)
+    parser.skip()
+    match = _OBJ_HEADER.match(data, parser.pos)
+    if not match:
+        raise PdfError(f"位置 {pos} 不是物件開頭")
+    parser.pos = match.end()
+    value = parser.parse()
+    parser.skip()
+    return int(match.group(1)), int(match.group(2)), value, parser.pos
+
+
+def _apply_predictor(data: bytes, params: Dict[str, Any]) -> bytes:
+    """還原 PNG 預測器 (Predictor >= 10)"""
+    predictor = params.get("Predictor", 1)
+    if predictor == 1:
+        return data
+    if predictor < 10:
+        raise PdfError(f"不支援的預測器: {predictor}")
+    colors = params.get("Colors", 1)
+    bits = params.get("BitsPerComponent", 8)
+    columns = params.get("Columns", 1)
+    bpp = max(1, colors * bits // 8)
+    row_length = (colors * bits * columns + 7) // 8
+
+    out = bytearray()
+    previous = bytearray(row_length)
+    for start in range(0, len(data), row_length + 1):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + 1 + row_length])
+        row.extend(bytes(row_length - len(row)))
+        if kind == 1:
+            for i in range(bpp, row_length):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(row_length):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 3:
+            for i in range(row_length):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(row_length):
+                a = row[i - bpp] if i >= bpp else 0
+                b = previous[i]
+                c = previous[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                nearest = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                row[i] = (row[i] + nearest) & 0xFF
+        elif kind != 0:
+            raise PdfError(f"不正確的 PNG 預測器類型: {kind}")
+        out += row
+        previous = row
+    return bytes(out)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class PdfReader:
+    """
+    唯讀的 PDF 結構讀取器
+
+    用法:
+        with PdfReader("a.pdf") as reader:
+            root = reader.resolve(reader.trailer["Root"])
+            pages = reader.page_refs()
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PdfError("檔案是空的")
+        self.size = len(self.data)
+        # 物件編號 → ("n", 位置, 世代) 或 ("c", 物件串流編號, 串流中的索引)
+        self.xref: Dict[int, tuple] = {}
+        self.trailer: Dict[str, Any] = {}
+        self.startxref = 0
+        self._objects: Dict[int, Any] = {}
+        self._object_streams: Dict[int, Tuple[bytes, Dict[int, int]]] = {}
+        try:
+            self._read_xref()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if getattr(self, "data", None) is not None:
+            self.data.close()
+            self.data = None
+        self._file.close()
+
+    def __enter__(self) -> "PdfReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- 交互參照表 ----
+
+    def _read_xref(self):
+        """從檔尾的 startxref 開始，依 /Prev 讀取所有交互參照區段 (新的區段優先)"""
+        tail = self.data.rfind(b"startxref", max(0, self.size - STARTXREF_SEARCH))
+        if tail < 0:
+            raise PdfError("找不到 startxref")
+        match = re.compile(rb"startxref\s+(\d+)").match(self.data, tail)
+        if not match:
+            raise PdfError("startxref 格式錯誤")
+        self.startxref = offset = int(match.group(1))
+
+        visited = set()
+        pending = [offset]
+        while pending:
+            offset = pending.pop(0)
+            if offset in visited:
+                continue
+            if not 0 <= offset < self.size:
+                raise PdfError(f"交互參照位置 {offset} 超出檔案範圍")
+            visited.add(offset)
+            entries: Dict[int, tuple] = {}
+            trailer = self._read_xref_section(offset, entries)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            # 混合式檔案：同一區段的 XRefStm 補上交互參照表中標為 f 的物件 (通常位於物件串流)
+            stm = trailer.get("XRefStm")
+            if isinstance(stm, int) and stm not in visited:
+                if not 0 <= stm < self.size:
+                    raise PdfError(f"交互參照位置 {stm} 超出檔案範圍")
+                visited.add(stm)
+                hidden: Dict[int, tuple] = {}
+                self._read_xref_stream(stm, hidden)
+                for num, entry in hidden.items():
+                    if entries.get(num, ("f",))[0] == "f":
+                        entries[num] = entry
+            # 較新的區段優先
+            for num, entry in entries.items():
+                self.xref.setdefault(num, entry)
+            if isinstance(trailer.get("Prev"), int):
+                pending.append(trailer["Prev"])
+
+        if "Root" not in self.trailer:
+            raise PdfError("trailer 沒有 /Root")
+
+    def _read_xref_section(self, offset: int, entries: Dict[int, tuple]) -> Dict[str, Any]:
+        """讀取一個交互參照區段的項目到 entries，回傳其 trailer 字典"""
+        parser = _Parser(self.data, offset)
+        parser.skip()
+        if self.data[parser.pos:parser.pos + 4] == b"xref":
+            return self._read_xref_table(parser.pos + 4, entries)
+        return self._read_xref_stream(parser.pos, entries)
+
+    def _read_xref_table(self, pos: int, entries: Dict[int, tuple]) -> Dict[str, Any]:
+        parser = _Parser(self.data, pos)
+        subsection = re.compile(rb"(\d+)[ \t]+(\d+)")
+        while True:
+            parser.skip()
+            if self.data[parser.pos:parser.pos + 7] == b"trailer":
+                parser.pos += 7
+                trailer = parser.parse()
+                if not isinstance(trailer, dict):
+                    raise PdfError("trailer 不是字典")
+                return trailer
+            match = subsection.match(self.data, parser.pos)
+            if not match:
+                raise PdfError(f"位置 {parser.pos} 的交互參照表格式錯誤")
+            first, count = int(match.group(1)), int(match.group(2))
+            parser.pos = match.end()
+            for num in range(first, first + count):
+                parser.skip()
+                entry = _XREF_ENTRY.match(self.data, parser.pos)
+                if not entry:
+                    raise PdfError(f"位置 {parser.pos} 的交互參照項目格式錯誤")
+                parser.pos = entry.end()
+                if entry.group(3) == b"n":
+                    entries.setdefault(num, ("n", int(entry.group(1)), int(entry.group(2))))
+                else:
+                    entries.setdefault(num, ("f", 0, int(entry.group(2))))
+
+    def _read_xref_stream(self, pos: int, entries: Dict[int, tuple]) -> Dict[str, Any]:
+        _, _, stream = self.read_indirect(pos)
+        if not isinstance(stream, Stream) or stream.dict.get("Type") != "XRef":
+            raise PdfError(f"位置 {pos} 不是交互參照串流")
+        widths = stream.dict.get("W")
+        if not isinstance(widths, list) or len(widths) != 3:
+            raise PdfError("交互參照串流的 /W 格式錯誤")
+        index = stream.dict.get("Index", [0, stream.dict.get("Size", 0)])
+        data = self.stream_data(stream)
+        row_length = sum(widths)
+
+        def field(row: int, start: int, width: int) -> int:
+            return int.from_bytes(data[row + start:row + start + width], "big")
+
+        row = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for num in range(first, first + count):
+                if row + row_length > len(data):
+                    raise PdfError("交互參照串流資料不足")
+                kind = field(row, 0, widths[0]) if widths[0] else 1
+                second = field(row, widths[0], widths[1])
+                third = field(row, widths[0] + widths[1], widths[2])
+                row += row_length
+                if num in entries:
+                    continue
+                if kind == 1:
+                    entries[num] = ("n", second, third)
+                elif kind == 2:
+                    entries[num] = ("c", second, third)
+                elif kind == 0:
+                    entries[num] = ("f", 0, third)
+        return stream.dict
+
+    # ---- 物件 ----
+
+    def read_indirect(self, pos: int) -> Tuple[int, int, Any]:
+        """解析位置 pos 的間接物件；串流物件回傳 Stream"""
+        num, gen, value, end = parse_object_at(self.data, pos)
+        if isinstance(value, dict) and self.data[end:end + 6] == b"stream":
+            start = end + 6
+            if self.data[start:start + 2] == b"\r\n":
+                start += 2
+            elif self.data[start:start + 1] in (b"\n", b"\r"):
+                start += 1
+            length = self.resolve(value.get("Length"))
+            if not isinstance(length, int) or length < 0 or start + length > self.size:
+                raise PdfError(f"物件 {num} 的串流長度不正確")
+            return num, gen, Stream(value, start, length)
+        return num, gen, value
+
+    def object_offset(self, num: int) -> Optional[int]:
+        """物件在檔案中的位置 (壓縮在物件串流中或不存在時為 None)"""
+        entry = self.xref.get(num)
+        return entry[1] if entry and entry[0] == "n" else None
+
+    def get_object(self, num: int) -> Any:
+        """依物件編號取得物件 (不存在的物件視為 null)"""
+        if num in self._objects:
+            return self._objects[num]
+        entry = self.xref.get(num)
+        if entry is None or entry[0] == "f":
+            value = None
+        elif entry[0] == "n":
+            found, _, value = self.read_indirect(entry[1])
+            if found != num:
+                raise PdfError(f"交互參照表中物件 {num} 的位置指向物件 {found}")
+        else:
+            value = self._object_from_stream(entry[1], entry[2])
+        self._objects[num] = value
+        return value
+
+    def _object_from_stream(self, stream_num: int, index: int) -> Any:
+        """從物件串流 (/Type /ObjStm) 取出第 index 個物件"""
+        if stream_num not in self._object_streams:
+            stream = self.get_object(stream_num)
+            if not isinstance(stream, Stream) or stream.dict.get("Type") != "ObjStm":
+                raise PdfError(f"物件 {stream_num} 不是物件串流")
+            data = self.stream_data(stream)
+            count = stream.dict.get("N", 0)
+            first = stream.dict.get("First", 0)
+            parser = _Parser(data)
+            offsets = {}
+            for i in range(count):
+                num = parser.parse()
+                offset = parser.parse()
+                offsets[i] = first + offset
+            self._object_streams[stream_num] = (data, offsets)
+        data, offsets = self._object_streams[stream_num]
+        if index not in offsets:
+            raise PdfError(f"物件串流 {stream_num} 沒有第 {index} 個物件")
+        return _Parser(data, offsets[index]).parse()
+
+    def resolve(self, value: Any) -> Any:
+        """將間接參照解析為實際物件"""
+        seen = set()
+        while isinstance(value, Ref):
+            if value.num in seen:
+                raise PdfError(f"物件 {value.num} 循環參照")
+            seen.add(value.num)
+            value = self.get_object(value.num)
+        return value
+
+    def raw_stream_data(self, stream: Stream) -> bytes:
+        """串流的原始 (未解碼) 資料"""
+        return bytes(self.data[stream.start:stream.start + stream.length])
+
+    def stream_data(self, stream: Stream) -> bytes:
+        """
+        解碼串流資料 (支援 FlateDecode 與 PNG 預測器)
+
+        Raises:
+            PdfError: 使用其他濾鏡或資料損毀
+        """
+        data = self.raw_stream_data(stream)
+        filters = [self.resolve(f) for f in _as_list(self.resolve(stream.dict.get("Filter")))]
+        params = [self.resolve(p) or {} for p in _as_list(self.resolve(stream.dict.get("DecodeParms")))]
+        for i, name in enumerate(filters):
+            if name not in ("FlateDecode", "Fl"):
+                raise PdfError(f"不支援的串流濾鏡: /{name}")
+            try:
+                data = zlib.decompressobj().decompress(data)
+            except zlib.error as e:
+                raise PdfError(f"串流解壓縮失敗: {e}")
+            if i < len(params) and isinstance(params[i], dict):
+                data = _apply_predictor(data, params[i])
+        return data
+
+    # ---- 頁面 ----
+
+    def page_refs(self) -> List[Ref]:
+        """依順序列出所有頁面物件的參照"""
+        root = self.resolve(self.trailer["Root"])
+        if not isinstance(root, dict) or not isinstance(root.get("Pages"), Ref):
+            raise PdfError("文件目錄沒有 /Pages")
+        pages: List[Ref] = []
+        visited = set()
+        stack = [root["Pages"]]
+        while stack:
+            ref = stack.pop()
+            if not isinstance(ref, Ref) or ref.num in visited:
+                continue
+            visited.add(ref.num)
+            node = self.resolve(ref)
+            if not isinstance(node, dict):
+                continue
+            kids = self.resolve(node.get("Kids"))
+            if node.get("Type") == "Pages" or (node.get("Type") is None and isinstance(kids, list)):
+                stack.extend(reversed(kids or []))
+            else:
+                pages.append(ref)
+        return pages
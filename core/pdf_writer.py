@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 結構改寫
+將 PdfReader 讀到的物件重新編號後寫成新的 PDF (完整改寫，不是增量更新)，
+串流資料直接從 mmap 分段複製，不會整個載入記憶體
+"""
+
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .pdf_reader import Name, PdfError, PdfReader, Real, Ref, Stream
+
+
+# 複製串流資料的區塊大小 (bytes)
+COPY_CHUNK_SIZE = 1024 * 1024
+# 每個物件串流最多容納的物件數
+OBJECTS_PER_STREAM = 100
+
+_NAME_SPECIAL = set(b"()<>[]{}/%#")
+
+
+def _serialize_name(name: str) -> bytes:
+    out = bytearray(b"/")
+    for byte in name.encode("latin-1"):
+        if 0x21 <= byte <= 0x7E and byte not in _NAME_SPECIAL:
+            out.append(byte)
+        else:
+            out += b"#%02X" % byte
+    return bytes(out)
+
+
+def _serialize_string(value: bytes) -> bytes:
+    escaped = value.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"\\r")
+    return b"(" + escaped + b")"
+
+
+def serialize(value: Any, renumber: Optional[Callable[[int], int]] = None) -> bytes:
+    """
+    將物件轉為 PDF 語法
+
+    Args:
+        value: PdfReader 解析出的物件 (串流物件請只傳入字典)
+        renumber: 參照的物件編號對應 (None=不變)；改寫後的物件世代編號一律為 0，
+            對應結果為 None (物件不存在) 時寫出 null
+    """
+    if value is None:
+        return b"null"
+    if value is True:
+        return b"true"
+    if value is False:
+        return b"false"
+    if isinstance(value, Name):
+        return _serialize_name(value)
+    if isinstance(value, Real):
+        return value.text
+    if isinstance(value, int):
+        return b"%d" % value
+    if isinstance(value, float):
+        return (b"%.6f" % value).rstrip(b"0").rstrip(b".") or b"0"
+    if isinstance(value, bytes):
+        return _serialize_string(value)
+    if isinstance(value, Ref):
+        if renumber is None:
+            return b"%d %d R" % (value.num, value.gen)
+        num = renumber(value.num)
+        return b"%d 0 R" % num if num is not None else b"null"
+    if isinstance(value, list):
+        return b"[" + b" ".join(serialize(item, renumber) for item in value) + b"]"
+    if isinstance(value, dict):
+        return b"<<" + b"".join(
+            _serialize_name(key) + b" " + serialize(item, renumber) for key, item in value.items()
+        ) + b">>"
+    raise PdfError(f"無法寫出的物件類型: {type(value).__name__}")
+
+
+def iter_refs(value: Any) -> Iterable[Ref]:
+    """列出物件中直接包含的所有參照 (串流只看字典，不含 /Length)"""
+    if isinstance(value, Stream):
+        value = {k: v for k, v in value.dict.items() if k != "Length"}
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Ref):
+            yield item
+        elif isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+
+
+def reachable_objects(reader: PdfReader, resolve_num: Callable[[int], int] = lambda n: n) -> List[int]:
+    """
+    從 trailer 的 /Root 與 /Info 可以到達的物件編號 (由小到大)
+
+    Args:
+        resolve_num: 物件編號對應 (例如去除重複時把重複物件對應到保留的那一個)
+    """
+    seen = set()
+    stack = [reader.trailer[key] for key in ("Root", "Info") if isinstance(reader.trailer.get(key), Ref)]
+    while stack:
+        num = resolve_num(stack.pop().num)
+        if num in seen:
+            continue
+        seen.add(num)
+        stack.extend(iter_refs(reader.get_object(num)))
+    return sorted(n for n in seen if reader.xref.get(n, ("f",))[0] != "f")
+
+
+def _uses_xref_streams(reader: PdfReader) -> bool:
+    """原始檔案是否使用交互參照串流 (改寫時沿用，保持相同的壓縮程度)"""
+    return reader.trailer.get("Type") == "XRef"
+
+
+def rewrite_pdf(
+    reader: PdfReader,
+    output_path: str,
+    resolve_num: Callable[[int], int] = lambda n: n,
+    replacements: Optional[Dict[int, Tuple[Dict[str, Any], bytes]]] = None
+) -> int:
+    """
+    將 reader 的內容改寫為新的 PDF
+
+    只寫出從 /Root、/Info 可到達的物件並重新編號；原始檔案使用交互參照串流時，
+    一般物件會放入物件串流 (Flate 壓縮)，否則寫出傳統交互參照表。
+
+    Args:
+        reader: 來源
+        output_path: 輸出檔案
+        resolve_num: 物件編號對應，被對應掉的物件不會寫出，參照改為指向對應的物件
+        replacements: 以新內容取代的串流 {物件編號: (串流字典, 已編碼的資料)}，
+            其他串流的資料照原樣複製
+
+    Returns:
+        輸出檔案大小 (bytes)
+
+    Raises:
+        PdfError: 加密的檔案或結構錯誤
+    """
+    if "Encrypt" in reader.trailer:
+        raise PdfError("不支援加密的 PDF")
+
+    objects = reachable_objects(reader, resolve_num)
+    new_numbers = {num: index + 1 for index, num in enumerate(objects)}
+
+    def renumber(num: int) -> Optional[int]:
+        return new_numbers.get(resolve_num(num))
+
+    use_object_streams = _uses_xref_streams(reader)
+    version = re.match(rb"%PDF-(\d\.\d)", reader.data[:16])
+    header = b"%PDF-" + (version.group(1) if version else b"1.7")
+    if use_object_streams and header < b"%PDF-1.5":
+        header = b"%PDF-1.5"
+
+    # 物件編號 → ("n", 位置) 或 ("c", 物件串流編號, 索引)
+    entries: Dict[int, tuple] = {}
+    next_number = len(objects) + 1
+    pending: List[tuple] = []  # 等待放入物件串流的 (新編號, 內容)
+
+    with open(output_path, "wb") as out:
+        out.write(header + b"\n%\xe2\xe3\xcf\xd3\n")
+
+        def write_object_stream():
+            nonlocal next_number
+            number = next_number
+            next_number += 1
+            offsets, body = [], bytearray()
+            for index, (num, data) in enumerate(pending):
+                offsets.append(b"%d %d" % (num, len(body)))
+                body += data + b"\n"
+                entries[num] = ("c", number, index)
+            head = b" ".join(offsets) + b"\n"
+            data = zlib.compress(head + bytes(body))
+            entries[number] = ("n", out.tell())
+            out.write(
+                b"%d 0 obj\n<</Type/ObjStm/N %d/First %d/Filter/FlateDecode/Length %d>>\nstream\n"
+                % (number, len(pending), len(head), len(data))
+            )
+            out.write(data + b"\nendstream\nendobj\n")
+            pending.clear()
+
+        for num in objects:
+            value = reader.get_object(num)
+            new_num = new_numbers[num]
+            if replacements and num in replacements:
+                stream_dict, data = replacements[num]
+                stream_dict = dict(stream_dict, Length=len(data))
+                entries[new_num] = ("n", out.tell())
+                out.write(b"%d 0 obj\n" % new_num + serialize(stream_dict, renumber) + b"\nstream\n")
+                out.write(data + b"\nendstream\nendobj\n")
+            elif isinstance(value, Stream):
+                stream_dict = dict(value.dict)
+                stream_dict["Length"] = value.length
+                entries[new_num] = ("n", out.tell())
+                out.write(b"%d 0 obj\n" % new_num + serialize(stream_dict, renumber) + b"\nstream\n")
+                with memoryview(reader.data) as view:
+                    for start in range(value.start, value.start + value.length, COPY_CHUNK_SIZE):
+                        out.write(view[start:min(start + COPY_CHUNK_SIZE, value.start + value.length)])
+                out.write(b"\nendstream\nendobj\n")
+            elif use_object_streams:
+                pending.append((new_num, serialize(value, renumber)))
+                if len(pending) >= OBJECTS_PER_STREAM:
+                    write_object_stream()
+            else:
+                entries[new_num] = ("n", out.tell())
+                out.write(b"%d 0 obj\n" % new_num + serialize(value, renumber) + b"\nendobj\n")
+        if pending:
+            write_object_stream()
+
+        trailer = {Name("Root"): reader.trailer["Root"]}
+        if isinstance(reader.trailer.get("Info"), Ref):
+            trailer[Name("Info")] = reader.trailer["Info"]
+        if isinstance(reader.trailer.get("ID"), list):
+            trailer[Name("ID")] = reader.trailer["ID"]
+
+        if use_object_streams:
+            _write_xref_stream(out, entries, next_number, trailer, renumber)
+        else:
+            _write_xref_table(out, entries, next_number, trailer, renumber)
+        return out.tell()
+
+
+def _write_xref_table(out, entries: Dict[int, tuple], size: int, trailer: Dict[str, Any], renumber):
+    position = out.tell()
+    lines = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+    lines.extend(b"%010d 00000 n \n" % entries[num][1] for num in range(1, size))
+    out.write(b"".join(lines))
+    trailer = dict(trailer, Size=size)
+    out.write(b"trailer\n" + serialize(trailer, renumber) + b"\nstartxref\n%d\n%%%%EOF\n" % position)
+
+
+def _write_xref_stream(out, entries: Dict[int, tuple], number: int, trailer: Dict[str, Any], renumber):
+    position = out.tell()
+    entries[number] = ("n", position)
+    size = number + 1
+    width = max(1, (max(position, size).bit_length() + 7) // 8)
+    rows = [b"\x00" + bytes(width) + b"\xff\xff"]
+    for num in range(1, size):
+        entry = entries[num]
+        if entry[0] == "n":
+            rows.append(b"\x01" + entry[1].to_bytes(width, "big") + b"\x00\x00")
+        else:
+            rows.append(b"\x02" + entry[1].to_bytes(width, "big") + entry[2].to_bytes(2, "big"))
+    data = zlib.compress(b"".join(rows))
+    stream_dict = dict(
+        trailer, Type=Name("XRef"), Size=size, W=[1, width, 2],
+        Filter=Name("FlateDecode"), Length=len(data)
+    )
+    out.write(b"%d 0 obj\n" % number + serialize(stream_dict, renumber) + b"\nstream\n")
+    out.write(data + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % position)
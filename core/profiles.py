@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+壓縮設定檔
+以 JSON 描述 pdfwrite 的相容性等級、物件串流、各類圖片的降採樣與 JPEG 品質、字型嵌入方式，
+取代只能選擇四種 PDFSETTINGS 的壓縮方式
+
+設定檔格式 (所有欄位皆可省略，省略時使用 Ghostscript 或 base 預設值)：
+    {
+        "description": "說明",
+        "base": "ebook",                   # 先套用的 PDFSETTINGS
+        "compatibility_level": "1.5",      # 1.5 以上才能使用物件串流
+        "object_streams": true,            # 物件串流與交互參照串流
+        "color_images": {                  # 彩色圖片 (gray_images 相同，mono_images 沒有 jpeg_quality)
+            "downsample": true,
+            "resolution": 150,             # 降採樣目標 dpi
+            "threshold": 1.5,              # 超過目標 dpi 多少倍才降採樣
+            "method": "bicubic",           # bicubic / average / subsample
+            "jpeg_quality": 75             # 1-100，以 JPEG 重新壓縮 (含原本就是 JPEG 的圖片)
+        },
+        "fonts": {"subset": true, "embed_all": true, "compress": true}
+    }
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .config import COMPRESSION_PROFILES, PDF_SETTINGS, PROFILES_DIR
+
+
+class ProfileError(ValueError):
+    """設定檔格式錯誤或不存在"""
+
+
+# 設定檔圖片欄位 → pdfwrite 參數前綴
+IMAGE_CLASSES = {"color_images": "Color", "gray_images": "Gray", "mono_images": "Mono"}
+DOWNSAMPLE_METHODS = {"bicubic": "/Bicubic", "average": "/Average", "subsample": "/Subsample"}
+COMPATIBILITY_LEVELS = ("1.3", "1.4", "1.5", "1.6", "1.7", "2.0")
+
+_TOP_KEYS = {"description", "base", "compatibility_level", "object_streams", "fonts"} | set(IMAGE_CLASSES)
+_IMAGE_KEYS = {"downsample", "resolution", "threshold", "method", "jpeg_quality"}
+_FONT_KEYS = {"subset", "embed_all", "compress"}
+
+
+def jpeg_qfactor(quality: int) -> float:
+    """
+    將 JPEG 品質 (1-100，與 libjpeg 相同的刻度) 換算為 DCTEncode 的 QFactor
+
+    QFactor 是標準量化表的縮放比例，品質 50 對應 1.0、75 對應 0.5、90 對應 0.2。
+    """
+    scale = 5000 / quality if quality < 50 else 200 - 2 * quality
+    return max(scale, 1) / 100
+
+
+def _check_keys(section: Dict[str, Any], allowed: set, where: str):
+    unknown = set(section) - allowed
+    if unknown:
+        raise ProfileError(f"{where}: 不支援的欄位 {', '.join(sorted(unknown))}")
+
+
+def _check_type(value: Any, types, where: str):
+    # bool 是 int 的子類別，數值欄位不接受 true/false
+    if isinstance(value, bool) and bool not in types:
+        raise ProfileError(f"{where} 格式錯誤")
+    if not isinstance(value, types):
+        raise ProfileError(f"{where} 格式錯誤")
+
+
+class CompressionProfile:
+    """一個壓縮設定檔"""
+
+    def __init__(self, name: str, settings: Dict[str, Any], source: Optional[str] = None):
+        """
+        Args:
+            name: 設定檔名稱
+            settings: 設定內容 (格式見模組說明)
+            source: 設定檔路徑 (內建設定檔為 None)
+
+        Raises:
+            ProfileError: 格式錯誤
+        """
+        self.name = name
+        self.settings = settings
+        self.source = source
+        self._validate()
+
+    @property
+    def description(self) -> str:
+        return self.settings.get("description", "")
+
+    def _validate(self):
+        settings = self.settings
+        if not isinstance(settings, dict):
+            raise ProfileError(f"設定檔 {self.name} 必須是 JSON 物件")
+        _check_keys(settings, _TOP_KEYS, self.name)
+
+        if "description" in settings:
+            _check_type(settings["description"], (str,), f"{self.name}.description")
+        base = settings.get("base")
+        if base is not None and base not in PDF_SETTINGS:
+            raise ProfileError(f"{self.name}.base 必須是 {', '.join(PDF_SETTINGS)} 之一")
+        level = settings.get("compatibility_level")
+        if level is not None and str(level) not in COMPATIBILITY_LEVELS:
+            raise ProfileError(f"{self.name}.compatibility_level 必須是 {', '.join(COMPATIBILITY_LEVELS)} 之一")
+        if "object_streams" in settings:
+            _check_type(settings["object_streams"], (bool,), f"{self.name}.object_streams")
+            if settings["object_streams"] and level is not None and float(level) < 1.5:
+                raise ProfileError(f"{self.name}: 物件串流需要 compatibility_level 1.5 以上")
+
+        for key in IMAGE_CLASSES:
+            section = settings.get(key)
+            if section is None:
+                continue
+            where = f"{self.name}.{key}"
+            _check_type(section, (dict,), where)
+            allowed = _IMAGE_KEYS - {"jpeg_quality"} if key == "mono_images" else _IMAGE_KEYS
+            _check_keys(section, allowed, where)
+            if "downsample" in section:
+                _check_type(section["downsample"], (bool,), f"{where}.downsample")
+            if "resolution" in section:
+                _check_type(section["resolution"], (int,), f"{where}.resolution")
+                if not 1 <= section["resolution"] <= 2400:
+                    raise ProfileError(f"{where}.resolution 必須介於 1 到 2400")
+            if "threshold" in section:
+                _check_type(section["threshold"], (int, float), f"{where}.threshold")
+                if section["threshold"] < 1:
+                    raise ProfileError(f"{where}.threshold 不能小於 1")
+            if "method" in section and section["method"] not in DOWNSAMPLE_METHODS:
+                raise ProfileError(f"{where}.method 必須是 {', '.join(DOWNSAMPLE_METHODS)} 之一")
+            if "jpeg_quality" in section:
+                _check_type(section["jpeg_quality"], (int,), f"{where}.jpeg_quality")
+                if not 1 <= section["jpeg_quality"] <= 100:
+                    raise ProfileError(f"{where}.jpeg_quality 必須介於 1 到 100")
+
+        fonts = settings.get("fonts")
+        if fonts is not None:
+            _check_type(fonts, (dict,), f"{self.name}.fonts")
+            _check_keys(fonts, _FONT_KEYS, f"{self.name}.fonts")
+            for key, value in fonts.items():
+                _check_type(value, (bool,), f"{self.name}.fonts.{key}")
+
+    def to_args(self) -> List[str]:
+        """pdfwrite 的命令參數 (不含輸入輸出檔案)"""
+        settings = self.settings
+        args = []
+        # PDFSETTINGS 必須在其他參數之前，後面的參數才會覆蓋它的預設值
+        if settings.get("base"):
+            args.append(f"-dPDFSETTINGS=/{settings['base']}")
+        if settings.get("compatibility_level") is not None:
+            args.append(f"-dCompatibilityLevel={settings['compatibility_level']}")
+        if "object_streams" in settings:
+            value = "true" if settings["object_streams"] else "false"
+            args.extend([f"-dWriteObjStms={value}", f"-dWriteXRefStm={value}"])
+
+        for key, prefix in IMAGE_CLASSES.items():
+            section = settings.get(key) or {}
+            if "downsample" in section:
+                args.append(f"-dDownsample{prefix}Images={'true' if section['downsample'] else 'false'}")
+            if "resolution" in section:
+                args.append(f"-d{prefix}ImageResolution={section['resolution']}")
+            if "threshold" in section:
+                args.append(f"-d{prefix}ImageDownsampleThreshold={section['threshold']}")
+            if "method" in section:
+                args.append(f"-d{prefix}ImageDownsampleType={DOWNSAMPLE_METHODS[section['method']]}")
+            if "jpeg_quality" in section:
+                args.extend([
+                    f"-dAutoFilter{prefix}Images=false",
+                    f"-d{prefix}ImageFilter=/DCTEncode",
+                ])
+        if any("jpeg_quality" in (settings.get(key) or {}) for key in IMAGE_CLASSES):
+            # 原本就是 JPEG 的圖片也以指定品質重新壓縮
+            args.append("-dPassThroughJPEGImages=false")
+
+        fonts = settings.get("fonts") or {}
+        for key, option in (("subset", "SubsetFonts"), ("embed_all", "EmbedAllFonts"), ("compress", "CompressFonts")):
+            if key in fonts:
+                args.append(f"-d{option}={'true' if fonts[key] else 'false'}")
+        return args
+
+    def distiller_params(self) -> Optional[str]:
+        """
+        命令列無法設定的參數 (JPEG 量化比例)，以 PostScript setdistillerparams 設定
+
+        Returns:
+            PostScript 程式碼，不需要時為 None
+        """
+        dicts = []
+        for key, prefix in IMAGE_CLASSES.items():
+            quality = (self.settings.get(key) or {}).get("jpeg_quality")
+            if quality is None:
+                continue
+            samples = "[2 1 1 2]" if prefix == "Color" else "[1 1 1 1]"
+            dicts.append(
+                f"/{prefix}ImageDict << /QFactor {jpeg_qfactor(quality):.2f} /Blend 1 "
+                f"/HSamples {samples} /VSamples {samples} >>"
+            )
+        if not dicts:
+            return None
+        return f"<< {' '.join(dicts)} >> setdistillerparams"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "source": self.source,
+            "settings": self.settings,
+        }
+
+
+def load_profiles(profiles_dir: str = PROFILES_DIR, errors: Optional[List[str]] = None) -> Dict[str, CompressionProfile]:
+    """
+    載入內建與使用者自訂的設定檔
+
+    Args:
+        profiles_dir: 自訂設定檔資料夾 (不存在時只有內建設定檔)
+        errors: 若提供，格式錯誤的設定檔會略過並將原因加入此列表
+
+    Returns:
+        {名稱: CompressionProfile}，內建在前，自訂設定檔依檔名排序
+
+    Raises:
+        ProfileError: 設定檔格式錯誤 (未提供 errors 時)
+    """
+    profiles = {name: CompressionProfile(name, settings) for name, settings in COMPRESSION_PROFILES.items()}
+    try:
+        filenames = sorted(f for f in os.listdir(profiles_dir) if f.lower().endswith(".json"))
+    except OSError:
+        return profiles
+
+    for filename in filenames:
+        path = os.path.join(profiles_dir, filename)
+        name = os.path.splitext(filename)[0]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                settings = json.load(f)
+            profiles[name] = CompressionProfile(name, settings, source=path)
+        except (OSError, ValueError) as e:
+            message = f"{filename}: {e}"
+            if errors is None:
+                raise ProfileError(message)
+            errors.append(message)
+    return profiles
+
+
+def get_profile(name: str, profiles_dir: str = PROFILES_DIR) -> CompressionProfile:
+    """
+    依名稱取得設定檔 (每次重新讀取，設定檔修改後立即生效)
+
+    Raises:
+        ProfileError: 設定檔不存在或格式錯誤
+    """
+    errors: List[str] = []
+    profiles = load_profiles(profiles_dir, errors)
+    if name not in profiles:
+        detail = [e for e in errors if e.startswith(f"{name}.json:")]
+        raise ProfileError(detail[0] if detail else f"找不到壓縮設定檔: {name}")
+    return profiles[name]
+
+
+def write_example_profile(profiles_dir: str = PROFILES_DIR) -> str:
+    """
+    建立設定檔資料夾，資料夾中沒有設定檔時寫入範例 (以內建 office 為範本)
+
+    Returns:
+        設定檔資料夾
+    """
+    os.makedirs(profiles_dir, exist_ok=True)
+    if not any(f.lower().endswith(".json") for f in os.listdir(profiles_dir)):
+        example = dict(COMPRESSION_PROFILES["office"])
+        example["description"] = "範例設定檔，可複製後修改；檔名即設定檔名稱"
+        with open(os.path.join(profiles_dir, "example.json"), "w", encoding="utf-8") as f:
+            json.dump(example, f, ensure_ascii=False, indent=4)
+    return profiles_dir
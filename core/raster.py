@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+轉為 NumPy 陣列
+Ghostscript 以 ppmraw/pgmraw 裝置將頁面寫到標準輸出，逐頁讀成 (高, 寬, 色版) 的 uint8 陣列，
+不經過圖片編碼與暫存檔
+"""
+
+import queue
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+from .result import JobResult
+from . import metrics
+
+
+# PNM 格式 → 色版數
+_PNM_CHANNELS = {b"P6": 3, b"P5": 1}
+_WHITESPACE = b" \t\r\n\x0b\x0c"
+# 佇列結束標記
+_DONE = object()
+
+
+class RasterError(ValueError):
+    """光柵資料格式錯誤"""
+
+
+def _read_token(stream) -> Optional[bytes]:
+    """讀取 PNM 標頭的一個欄位 (略過空白與註解，並讀掉欄位後的一個空白字元)；資料結束時為 None"""
+    char = stream.read(1)
+    while char:
+        if char == b"#":
+            while char not in (b"\n", b"\r", b""):
+                char = stream.read(1)
+        elif char not in _WHITESPACE:
+            break
+        char = stream.read(1)
+    if not char:
+        return None
+    token = bytearray(char)
+    char = stream.read(1)
+    while char and char not in _WHITESPACE:
+        token += char
+        char = stream.read(1)
+    return bytes(token)
+
+
+def read_pnm_frame(stream, numpy) -> Optional[Any]:
+    """
+    從串流讀取一頁 PNM (P6/P5，8 位元)
+
+    Args:
+        stream: 二進位串流 (需支援 read 與 readinto)
+        numpy: numpy 模組
+
+    Returns:
+        (高, 寬, 色版) 的 uint8 陣列；串流已結束時為 None
+
+    Raises:
+        RasterError: 格式錯誤或資料不完整
+    """
+    magic = _read_token(stream)
+    if magic is None:
+        return None
+    channels = _PNM_CHANNELS.get(magic)
+    if channels is None:
+        raise RasterError(f"不支援的光柵格式: {magic[:8]!r}")
+    fields = [_read_token(stream) for _ in range(3)]
+    if None in fields or not all(f.isdigit() for f in fields):
+        raise RasterError("光柵標頭不完整")
+    width, height, maxval = (int(f) for f in fields)
+    if maxval > 255:
+        raise RasterError("只支援 8 位元光柵資料")
+
+    array = numpy.empty((height, width, channels), dtype=numpy.uint8)
+    view = memoryview(array).cast("B")
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            raise RasterError(f"光柵資料不完整 ({filled}/{len(view)} bytes)")
+        filled += count
+    return array
+
+
+class RasterStream:
+    """
+    以 iterator 逐頁取得 NumPy 陣列
+
+    用法:
+        stream = wrapper.render_arrays("in.pdf", dpi=150)
+        for array in stream:      # array.shape == (高, 寬, 3)
+            ...
+        result = stream.result    # JobResult
+
+    只能迭代一次。
+    背景執行緒讀取 Ghostscript 的標準輸出，最多預先讀取 prefetch 頁；佇列滿時停止讀取管線，
+    Ghostscript 寫入時會等待，因此記憶體用量不隨頁數增加。
+    中途離開迭代 (break、例外) 或呼叫 close() 會終止 Ghostscript。
+    """
+
+    def __init__(
+        self,
+        commands: List[List[str]],
+        prefetch: int,
+        on_finish: Optional[Callable[[JobResult], Any]] = None
+    ):
+        """
+        Args:
+            commands: 依序執行的 Ghostscript 命令 (每個命令的輸出頁面接在前一個之後)
+            prefetch: 預先讀取的頁數上限
+            on_finish: 結束時以 JobResult 呼叫 (寫入效能指標與工作記錄)
+        """
+        self._commands = commands
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+        self._stop = threading.Event()
+        self._process: Optional[subprocess.Popen] = None
+        self._on_finish = on_finish
+        self._iterated = False
+        self.result: Optional[JobResult] = None
+
+    def __iter__(self) -> Iterator[Any]:
+        # 不保留 iterator 的參照：for 迴圈中途離開時 iterator 隨即結束並終止 Ghostscript
+        if self._iterated:
+            raise RuntimeError("RasterStream 只能迭代一次")
+        self._iterated = True
+        return self._frames()
+
+    def __enter__(self) -> "RasterStream":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """停止讀取並終止 Ghostscript"""
+        self._stop.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def _put(self, item: Any) -> bool:
+        """放入佇列 (佇列滿時等待)；已停止時為 False"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _frames(self) -> Iterator[Any]:
+        import numpy
+
+        result = JobResult(success=True)
+        start = time.perf_counter()
+        reader = threading.Thread(target=self._read_all, args=(numpy, result), daemon=True)
+        reader.start()
+        pages = 0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                pages += 1
+                yield item
+        except GeneratorExit:
+            result.success = False
+            result.message = "迭代中止，已終止 Ghostscript"
+            raise
+        finally:
+            self.close()
+            reader.join()
+            result.pages = pages
+            result.wall_time = time.perf_counter() - start
+            self.result = result
+            if self._on_finish:
+                self._on_finish(result)
+
+    def _read_all(self, numpy, result: JobResult):
+        """背景執行緒：依序執行命令並把每頁放入佇列"""
+        try:
+            for cmd in self._commands:
+                if self._stop.is_set():
+                    break
+                self._run(cmd, numpy, result)
+                if not result.success:
+                    break
+        except Exception as e:
+            if self._stop.is_set():
+                # 中途停止時 Ghostscript 被終止，最後一頁不完整是預期的
+                return
+            result.success = False
+            result.message = str(e)
+            self._put(e)
+        finally:
+            self._put(_DONE)
+
+    def _run(self, cmd: List[str], numpy, result: JobResult):
+        spawn_start = time.perf_counter()
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._process = process
+        result.spawn_time = (result.spawn_time or 0.0) + time.perf_counter() - spawn_start
+        metrics.record_spawn(time.perf_counter() - spawn_start)
+
+        # 訊息在另一個執行緒讀取，避免 stderr 管線寫滿時 Ghostscript 卡住
+        def drain():
+            for line in process.stderr:
+                result.append_log(line.decode("utf-8", "replace"))
+
+        drainer = threading.Thread(target=drain, daemon=True)
+        drainer.start()
+        try:
+            while not self._stop.is_set():
+                frame = read_pnm_frame(process.stdout, numpy)
+                if frame is None or not self._put(frame):
+                    break
+        finally:
+            if self._stop.is_set() and process.poll() is None:
+                process.terminate()
+            process.stdout.close()
+            result.exit_code = process.wait()
+            drainer.join()
+            if result.exit_code != 0 and not self._stop.is_set():
+                result.success = False
+                result.message = result.message or f"Ghostscript 結束碼 {result.exit_code}"
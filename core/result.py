@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+工作結果
+記錄 Ghostscript 操作的結果、耗時、頁數與輸入輸出位元組數
+"""
+
+import collections
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# 保留的 Ghostscript 輸出行數
+LOG_TAIL_LINES = 200
+
+
+class JobResult:
+    """
+    Ghostscript 操作的結果
+
+    相容舊的 (success, output_text) tuple 形式：
+        success, output = wrapper.compress_pdf(...)
+    """
+
+    def __init__(self, operation: str = "", success: bool = False):
+        self.operation = operation
+        self.success = success
+        self.exit_code: Optional[int] = None
+        self.wall_time = 0.0  # 秒
+        self.cpu_time: Optional[float] = None  # 子程序 user + system 秒數 (無法取得時為 None)
+        self.peak_rss: Optional[int] = None  # 子程序最大記憶體 (bytes)
+        self.spawn_time: Optional[float] = None  # 啟動 Ghostscript 程序所花的秒數
+        self.pages: Optional[int] = None  # 處理的頁數 (無法得知時為 None)
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.output_files: List[str] = []
+        self.log_tail = collections.deque(maxlen=LOG_TAIL_LINES)
+        self.message = ""  # 不是 Ghostscript 輸出的訊息 (例如錯誤說明)
+        self.checks: Dict[str, Dict[str, Any]] = {}  # 輸出檔案的檢查結果 {檢查名稱: {輸出檔案: 結果}}
+        self.warnings: List[str] = []  # 操作成功但需要注意的事項 (例如檢查未通過)
+        self.details: Dict[str, Any] = {}  # 額外處理步驟的結果 (例如 {"dedup": 去除重複資源的報告})
+
+    def append_log(self, line: str):
+        self.log_tail.append(line)
+
+    @property
+    def output(self) -> str:
+        """Ghostscript 輸出的最後幾行 (舊 tuple 形式的 output_text)"""
+        parts = ["".join(self.log_tail), self.message] + self.warnings
+        return "\n".join(part for part in parts if part)
+
+    def add(self, other: "JobResult"):
+        """
+        合併另一次執行的結果 (多次呼叫 Ghostscript 的操作)
+
+        彙總用的結果應以 success=True 建立，任何一次失敗即為失敗。
+        """
+        self.success = self.success and other.success
+        # 保留第一個非 0 的結束碼；沒有執行 Ghostscript 的步驟 (None) 不覆蓋
+        if other.exit_code is not None and not self.exit_code:
+            self.exit_code = other.exit_code
+        self.wall_time += other.wall_time
+        if other.cpu_time is not None:
+            self.cpu_time = (self.cpu_time or 0.0) + other.cpu_time
+        if other.peak_rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, other.peak_rss)
+        if other.pages is not None:
+            self.pages = (self.pages or 0) + other.pages
+        self.output_bytes += other.output_bytes
+        self.output_files.extend(other.output_files)
+        self.log_tail.extend(other.log_tail)
+        if other.message:
+            self.message = other.message
+        for name, files in other.checks.items():
+            self.checks.setdefault(name, {}).update(files)
+        self.warnings.extend(other.warnings)
+        self.details.update(other.details)
+
+    # 相容 tuple[bool, str]
+    def to_tuple(self) -> tuple[bool, str]:
+        return self.success, self.output
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.to_tuple())
+
+    def __getitem__(self, index):
+        return self.to_tuple()[index]
+
+    def __len__(self) -> int:
+        return 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "success": self.success,
+            "exit_code": self.exit_code,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "peak_rss": self.peak_rss,
+            "spawn_time": self.spawn_time,
+            "pages": self.pages,
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "output_files": list(self.output_files),
+            "checks": {name: dict(files) for name, files in self.checks.items()},
+            "warnings": list(self.warnings),
+            "details": dict(self.details),
+            "log_tail": self.output,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"JobResult(operation={self.operation!r}, success={self.success}, "
+            f"exit_code={self.exit_code}, wall_time={self.wall_time:.3f}, "
+            f"pages={self.pages}, input_bytes={self.input_bytes}, output_bytes={self.output_bytes})"
+        )
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+選擇性壓縮
+只重新壓縮解析度或大小超過門檻的圖片 (降採樣並以 JPEG 重新編碼)，
+文字、向量與其他圖片的串流資料照原樣複製，不經過 pdfwrite
+
+有效解析度以「圖片最多畫滿整頁」估計：像素長邊 ÷ 頁面長邊 (英吋)，
+實際顯示的解析度只會更高，因此降採樣後不會低於目標解析度。
+"""
+
+import io
+import os
+import time
+from typing import Any, Dict, Optional, Set
+
+from .config import SELECTIVE_COMPRESS
+from .journal import partial_path
+from .pdf_reader import Name, PdfError, PdfReader, Ref, Stream
+from .pdf_writer import rewrite_pdf
+
+
+# 重新編碼後至少要小這個比例才採用 (避免線條圖被換成較大的 JPEG)
+MIN_SAVING_RATIO = 0.1
+# 支援的色彩空間 → Pillow 模式
+_COLOR_MODES = {"DeviceRGB": "RGB", "DeviceGray": "L"}
+_ICC_MODES = {3: "RGB", 1: "L"}
+# 表單物件 (Form XObject) 最多往下追幾層
+_MAX_FORM_DEPTH = 8
+
+
+class SelectiveReport:
+    """選擇性壓縮的結果"""
+
+    def __init__(self):
+        self.images_total = 0
+        self.images_selected = 0  # 超過門檻的圖片
+        self.images_recompressed = 0  # 實際取代的圖片 (重新編碼後較小)
+        self.pages_total = 0
+        self.pages_touched: Set[int] = set()
+        self.image_bytes_before = 0
+        self.image_bytes_after = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.seconds = 0.0
+        self.skipped: Dict[str, int] = {}  # 超過門檻但無法處理的原因 → 數量
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def summary(self) -> str:
+        return (
+            f"選擇性壓縮: 重新壓縮 {self.images_recompressed}/{self.images_total} 張圖片，"
+            f"影響 {len(self.pages_touched)}/{self.pages_total} 頁，"
+            f"{self.bytes_before / 1048576:.2f} MB → {self.bytes_after / 1048576:.2f} MB，"
+            f"耗時 {self.seconds:.1f} 秒"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "images_total": self.images_total,
+            "images_selected": self.images_selected,
+            "images_recompressed": self.images_recompressed,
+            "pages_total": self.pages_total,
+            "pages_touched": sorted(self.pages_touched),
+            "image_bytes_before": self.image_bytes_before,
+            "image_bytes_after": self.image_bytes_after,
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "seconds": self.seconds,
+            "skipped": dict(self.skipped),
+        }
+
+
+def _inherited(reader: PdfReader, page: Dict[str, Any], key: str) -> Any:
+    """頁面的屬性 (沒有時往上找頁面樹的繼承值)"""
+    node, seen = page, set()
+    while isinstance(node, dict):
+        if key in node:
+            return reader.resolve(node[key])
+        parent = node.get("Parent")
+        if not isinstance(parent, Ref) or parent.num in seen:
+            return None
+        seen.add(parent.num)
+        node = reader.resolve(parent)
+    return None
+
+
+def _page_long_side(reader: PdfReader, page: Dict[str, Any]) -> float:
+    """頁面長邊 (英吋)；無法取得時以 A4 計"""
+    box = _inherited(reader, page, "MediaBox")
+    try:
+        values = [float(reader.resolve(v)) for v in box]
+        side = max(abs(values[2] - values[0]), abs(values[3] - values[1]))
+    except (TypeError, ValueError, IndexError):
+        side = 842.0
+    return (side or 842.0) / 72
+
+
+def find_page_images(reader: PdfReader) -> Dict[int, Dict[str, Any]]:
+    """
+    找出每頁使用的圖片
+
+    Returns:
+        {圖片物件編號: {"pages": [頁碼], "page_inches": 使用該圖片的頁面中最長的頁面長邊}}
+    """
+    images: Dict[int, Dict[str, Any]] = {}
+
+    def walk(resources: Any, page_number: int, inches: float, depth: int, seen: Set[int]):
+        resources = reader.resolve(resources)
+        xobjects = reader.resolve(resources.get("XObject")) if isinstance(resources, dict) else None
+        if not isinstance(xobjects, dict):
+            return
+        for ref in xobjects.values():
+            if not isinstance(ref, Ref) or ref.num in seen:
+                continue
+            seen.add(ref.num)
+            xobject = reader.resolve(ref)
+            if not isinstance(xobject, Stream):
+                continue
+            subtype = xobject.dict.get("Subtype")
+            if subtype == "Image":
+                info = images.setdefault(ref.num, {"pages": [], "page_inches": 0.0})
+                info["pages"].append(page_number)
+                info["page_inches"] = max(info["page_inches"], inches)
+            elif subtype == "Form" and depth < _MAX_FORM_DEPTH:
+                walk(xobject.dict.get("Resources"), page_number, inches, depth + 1, seen)
+
+    for index, ref in enumerate(reader.page_refs()):
+        page = reader.resolve(ref)
+        if isinstance(page, dict):
+            walk(_inherited(reader, page, "Resources"), index + 1, _page_long_side(reader, page), 0, set())
+    return images
+
+
+def _image_mode(reader: PdfReader, stream: Stream) -> Optional[str]:
+    """圖片的 Pillow 模式；不支援的色彩空間為 None"""
+    color_space = reader.resolve(stream.dict.get("ColorSpace"))
+    if isinstance(color_space, Name):
+        return _COLOR_MODES.get(color_space)
+    if isinstance(color_space, list) and len(color_space) == 2 and color_space[0] == "ICCBased":
+        profile = reader.resolve(color_space[1])
+        if isinstance(profile, Stream):
+            return _ICC_MODES.get(reader.resolve(profile.dict.get("N")))
+    return None
+
+
+def _decode_image(reader: PdfReader, stream: Stream, mode: str):
+    """將圖片串流解碼為 Pillow Image (只支援 8 位元 Flate、無壓縮與 JPEG)"""
+    from PIL import Image
+
+    filters = reader.resolve(stream.dict.get("Filter"))
+    filters = filters if isinstance(filters, list) else ([filters] if filters else [])
+    width, height = stream.dict.get("Width"), stream.dict.get("Height")
+    if filters == ["DCTDecode"]:
+        image = Image.open(io.BytesIO(reader.raw_stream_data(stream)))
+        image.load()
+        if image.mode != mode:
+            raise PdfError(f"JPEG 色彩模式 {image.mode} 與色彩空間不符")
+        return image
+    if filters not in ([], ["FlateDecode"]):
+        raise PdfError(f"不支援的圖片濾鏡: {filters}")
+    data = reader.stream_data(stream)
+    channels = 3 if mode == "RGB" else 1
+    if len(data) < width * height * channels:
+        raise PdfError("圖片資料長度不足")
+    return Image.frombytes(mode, (width, height), data[:width * height * channels])
+
+
+def _eligible(reader: PdfReader, stream: Stream) -> Optional[str]:
+    """不能重新壓縮的原因；可以時為 None"""
+    d = stream.dict
+    if d.get("ImageMask") or "Mask" in d or "Decode" in d or "SMaskInData" in d:
+        return "遮罩或解碼陣列"
+    if reader.resolve(d.get("BitsPerComponent")) != 8:
+        return "非 8 位元"
+    if not isinstance(d.get("Width"), int) or not isinstance(d.get("Height"), int):
+        return "尺寸格式錯誤"
+    if _image_mode(reader, stream) is None:
+        return "不支援的色彩空間"
+    return None
+
+
+def selective_compress(
+    input_file: str,
+    output_file: str,
+    resolution: int = SELECTIVE_COMPRESS["resolution"],
+    threshold: float = SELECTIVE_COMPRESS["threshold"],
+    jpeg_quality: int = SELECTIVE_COMPRESS["jpeg_quality"],
+    min_bytes: int = SELECTIVE_COMPRESS["min_bytes"],
+    expected_pages: Optional[int] = None
+) -> SelectiveReport:
+    """
+    只重新壓縮超過門檻的圖片
+
+    有效解析度超過 resolution × threshold 的圖片降採樣到 resolution 並以 JPEG 重新編碼；
+    解析度未超過但串流大於 min_bytes 的圖片只以 JPEG 重新編碼。
+    重新編碼後沒有變小至少 MIN_SAVING_RATIO 的圖片保留原樣。
+    輸出先寫到暫存檔，重新讀取確認頁數正確後才改為 output_file，失敗時不會留下輸出檔。
+
+    Args:
+        input_file: 輸入 PDF
+        output_file: 輸出 PDF (不可與輸入相同)
+        resolution: 降採樣目標 dpi
+        threshold: 降採樣門檻倍數
+        jpeg_quality: JPEG 品質 (1-100)
+        min_bytes: 只重新編碼的串流大小門檻 (bytes)
+        expected_pages: 輸出應有的頁數 (None=與讀取輸入檔得到的頁數相同)
+
+    Returns:
+        SelectiveReport
+
+    Raises:
+        PdfError: 無法解析或加密的 PDF，或輸出的頁數不符
+        ImportError: 沒有安裝 Pillow
+    """
+    from PIL import Image
+
+    started = time.perf_counter()
+    report = SelectiveReport()
+    report.bytes_before = os.path.getsize(input_file)
+    replacements = {}
+
+    with PdfReader(input_file) as reader:
+        report.pages_total = len(reader.page_refs())
+        images = find_page_images(reader)
+        report.images_total = len(images)
+
+        for num, info in sorted(images.items()):
+            stream = reader.get_object(num)
+            width, height = stream.dict.get("Width"), stream.dict.get("Height")
+            if not isinstance(width, int) or not isinstance(height, int):
+                continue
+            ppi = max(width, height) / info["page_inches"]
+            oversized = ppi > resolution * threshold
+            if not oversized and stream.length < min_bytes:
+                continue
+            report.images_selected += 1
+
+            reason = _eligible(reader, stream)
+            if reason:
+                report.skip(reason)
+                continue
+            try:
+                image = _decode_image(reader, stream, _image_mode(reader, stream))
+            except (PdfError, OSError, ValueError) as e:
+                report.skip(str(e) if isinstance(e, PdfError) else "無法解碼")
+                continue
+
+            if oversized:
+                scale = resolution / ppi
+                size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                image = image.resize(size, Image.BICUBIC)
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=jpeg_quality, optimize=True)
+            data = buffer.getvalue()
+            if len(data) > stream.length * (1 - MIN_SAVING_RATIO):
+                report.skip("重新編碼後沒有變小")
+                continue
+
+            stream_dict = {
+                k: v for k, v in stream.dict.items()
+                if k not in ("Filter", "DecodeParms", "Length")
+            }
+            stream_dict.update(
+                Width=image.width, Height=image.height, BitsPerComponent=8, Filter=Name("DCTDecode")
+            )
+            replacements[num] = (stream_dict, data)
+            report.images_recompressed += 1
+            report.image_bytes_before += stream.length
+            report.image_bytes_after += len(data)
+            report.pages_touched.update(info["pages"])
+
+        part_file = partial_path(output_file)
+        try:
+            report.bytes_after = rewrite_pdf(reader, part_file, replacements=replacements)
+        except BaseException:
+            _remove(part_file)
+            raise
+    _commit_output(part_file, output_file, expected_pages or report.pages_total)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _commit_output(part_file: str, output_file: str, page_count: int):
+    """重新讀取暫存檔，頁數正確才改為正式檔名，否則刪除暫存檔"""
+    try:
+        with PdfReader(part_file) as written:
+            found = len(written.page_refs())
+        if found != page_count:
+            raise PdfError(f"輸出的頁數 ({found}) 與輸入 ({page_count}) 不符")
+    except BaseException:
+        _remove(part_file)
+        raise
+    os.replace(part_file, output_file)
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+本機 HTTP 工作服務
+只使用標準函式庫，透過 HTTP 提供 GhostscriptWrapper 的各項操作
+
+端點:
+    GET    /operations              可用的操作
+    GET    /jobs                    所有工作
+    POST   /jobs                    新增工作 (JSON 或 multipart/form-data 上傳)
+    GET    /jobs/<id>               工作狀態
+    DELETE /jobs/<id>               取消尚未開始的工作
+    GET    /jobs/<id>/events        以 NDJSON 串流進度事件，直到工作結束
+    GET    /jobs/<id>/files         輸出檔案列表
+    GET    /jobs/<id>/files/<n>     下載第 n 個輸出檔案
+    GET    /jobs/<id>/result        下載第一個輸出檔案
+    GET    /governor                資源控管的限制、實測值與保留值
+    GET    /metrics                 Prometheus 格式的效能指標
+
+JSON 工作格式 (Content-Type: application/json):
+    {"operation": "compress_pdf", "params": {"input_file": "/path/in.pdf", "pdf_settings": "ebook"}}
+
+multipart/form-data 工作格式:
+    operation=<操作名稱>, params=<JSON>，檔案欄位名稱為 input_file 或 input_files (可重複)
+
+每個請求都需要啟動時的存取權杖 (Authorization: Bearer <token> 或 X-Gsgui-Token 標頭)；
+帶有其他來源 Origin 標頭的請求 (瀏覽器中的網頁) 一律拒絕。
+JSON 工作的本機輸入檔必須位於 input_dirs 中；輸出一律寫入該工作的暫存資料夾
+(output_file、output_pattern 只能指定檔名)，可透過 /files 下載。
+佇列已滿時回應 429。
+"""
+
+import hmac
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import (
+    SERVER_HOST, SERVER_PORT, SERVER_WORKERS,
+    SERVER_MAX_QUEUE, SERVER_MAX_UPLOAD_BYTES, SERVER_INPUT_DIRS
+)
+from .ghostscript import GhostscriptWrapper, image_extension
+from .governor import ResourceGovernor
+from .history import JobHistory
+from . import metrics
+from .job_queue import Job, JobQueue, OPERATIONS, QueueFullError
+
+
+class RequestError(Exception):
+    """請求格式錯誤"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class JobServer(ThreadingHTTPServer):
+    """HTTP 工作服務"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        workers: int = SERVER_WORKERS,
+        max_queue: int = SERVER_MAX_QUEUE,
+        work_dir: Optional[str] = None,
+        max_upload_bytes: int = SERVER_MAX_UPLOAD_BYTES,
+        wrapper: Optional[GhostscriptWrapper] = None,
+        governor: Optional[ResourceGovernor] = None,
+        history: Optional[JobHistory] = None,
+        token: Optional[str] = None,
+        input_dirs: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            host: 監聽位址
+            port: 監聽埠號 (0=自動選擇)
+            workers: 同時執行的工作數
+            max_queue: 等待中工作的上限
+            work_dir: 上傳檔案與輸出的資料夾 (None=暫存資料夾)
+            max_upload_bytes: 單一請求的大小上限
+            wrapper: Ghostscript 包裝器 (None=自動建立)
+            governor: 資源控管 (None=只依 workers 限制同時執行數)
+            history: 工作記錄 (None=依加入順序執行，設定時最短工作優先)
+            token: 存取權杖 (None=隨機產生，由 server.token 取得)
+            input_dirs: JSON 工作可使用的本機輸入資料夾 (None=config.SERVER_INPUT_DIRS)
+        """
+        super().__init__((host, port), JobRequestHandler)
+        self.token = token or secrets.token_urlsafe(24)
+        self.input_dirs = [
+            os.path.realpath(d) for d in (SERVER_INPUT_DIRS if input_dirs is None else input_dirs)
+        ]
+        self._own_work_dir = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="gsgui-server-")
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.max_upload_bytes = max_upload_bytes
+        self.job_queue = JobQueue(
+            wrapper=wrapper,
+            workers=workers,
+            max_queue=max_queue,
+            on_finished=self._collect_outputs,
+            governor=governor,
+            name="server",
+            history=history
+        )
+        self.job_queue.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def allowed_origin(self, origin: str) -> bool:
+        """Origin 標頭是否為服務本身 (瀏覽器從其他網頁送出的請求不允許)"""
+        return origin in (self.url, f"http://localhost:{self.server_address[1]}")
+
+    def _allowed_input(self, path: str) -> bool:
+        """本機輸入檔是否位於 input_dirs 中"""
+        real = os.path.realpath(path)
+        return any(os.path.commonpath([real, d]) == d for d in self.input_dirs)
+
+    @staticmethod
+    def _output_name(value: Any, name: str) -> str:
+        """用戶端指定的輸出檔名 (只能是檔名，不能包含資料夾)"""
+        if not isinstance(value, str) or os.path.basename(value) != value or value in ("", ".", ".."):
+            raise RequestError(400, f"{name} 只能指定檔名")
+        return value
+
+    def server_close(self):
+        super().server_close()
+        self.job_queue.stop()
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def create_job(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        uploads: List[Tuple[str, str, bytes]]
+    ) -> Job:
+        """
+        建立工作：儲存上傳檔案、補上輸出路徑後加入佇列
+
+        Args:
+            operation: 操作名稱
+            params: 操作參數
+            uploads: 上傳的檔案 [(欄位名稱, 檔名, 內容), ...]
+        """
+        if operation not in OPERATIONS:
+            raise RequestError(400, f"不支援的操作: {operation}")
+        if not isinstance(params, dict):
+            raise RequestError(400, "params 必須是 JSON 物件")
+        params = dict(params)
+        params.pop("progress_callback", None)
+
+        job_dir = tempfile.mkdtemp(prefix=f"{operation}-", dir=self.work_dir)
+        try:
+            outputs = self._prepare_job(operation, params, uploads, job_dir)
+            try:
+                return self.job_queue.submit(operation, params, outputs, context=job_dir)
+            except QueueFullError as e:
+                raise RequestError(429, str(e))
+        except Exception:
+            # 沒有加入佇列的工作不保留上傳檔案
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+    def _prepare_job(
+        self,
+        operation: str,
+        params: Dict[str, Any],
+        uploads: List[Tuple[str, str, bytes]],
+        job_dir: str
+    ) -> List[str]:
+        """儲存上傳檔案、檢查輸入並補上輸出路徑 (直接修改 params)，回傳輸出檔案"""
+        # 上傳檔案
+        saved = []
+        if uploads:
+            input_dir = os.path.join(job_dir, "inputs")
+            os.makedirs(input_dir)
+            for index, (field, _, data) in enumerate(uploads):
+                # 不使用用戶端提供的檔名 (檔名會傳給 Ghostscript)
+                path = os.path.join(input_dir, f"{index + 1:03d}.pdf")
+                with open(path, "wb") as f:
+                    f.write(data)
+                saved.append((field, path))
+
+            if operation == "merge_pdfs":
+                params["input_files"] = list(params.get("input_files", [])) + [p for _, p in saved]
+            else:
+                params["input_file"] = saved[0][1]
+
+        # 輸入檔案檢查 (上傳的檔案以外只能使用 input_dirs 中的檔案)
+        uploaded = {path for _, path in saved}
+        inputs = params.get("input_files") if operation == "merge_pdfs" else [params.get("input_file")]
+        if not isinstance(inputs, list) or not inputs or not all(isinstance(p, str) and p for p in inputs):
+            raise RequestError(400, "缺少輸入檔案")
+        for path in inputs:
+            if path not in uploaded and not self._allowed_input(path):
+                raise RequestError(403, f"不允許的輸入檔案: {path}")
+            if not os.path.isfile(path):
+                raise RequestError(400, f"檔案不存在: {path}")
+
+        # 輸出路徑 (一律在工作資料夾中)
+        outputs = []
+        if operation == "pdf_to_image":
+            ext = image_extension(params.get("device", "PNG"))
+            name = params.get("output_pattern") or f"page_%03d{ext}"
+            params["output_pattern"] = os.path.join(job_dir, self._output_name(name, "output_pattern"))
+        else:
+            name = params.get("output_file") or "output.pdf"
+            params["output_file"] = os.path.join(job_dir, self._output_name(name, "output_file"))
+            outputs.append(params["output_file"])
+        return outputs
+
+    @staticmethod
+    def _collect_outputs(job: Job):
+        """工作結束後整理實際產生的輸出檔案；取消的工作刪除工作資料夾 (上傳的檔案)"""
+        if job.status == Job.CANCELLED:
+            shutil.rmtree(job.context, ignore_errors=True)
+            job.outputs = []
+        elif job.result is not None and job.result.output_files:
+            job.outputs = list(job.result.output_files)
+        else:
+            job.outputs = [p for p in job.outputs if os.path.exists(p)]
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 請求處理"""
+
+    server: JobServer
+    server_version = "gsgui"
+
+    def log_message(self, format, *args):
+        # 不輸出每個請求的記錄
+        pass
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error_json(self, status: int, message: str):
+        headers = {"Retry-After": "1"} if status == 429 else None
+        self._send_json(status, {"error": message}, headers)
+
+    def _check_access(self):
+        """拒絕其他來源的網頁送出的請求，並檢查存取權杖"""
+        origin = self.headers.get("Origin")
+        if origin is not None and not self.server.allowed_origin(origin):
+            raise RequestError(403, "不允許跨來源的請求")
+        token = self.headers.get("X-Gsgui-Token", "")
+        authorization = self.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            token = authorization[len("Bearer "):].strip()
+        if not hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+            raise RequestError(401, "需要存取權杖")
+
+    def _route(self) -> Tuple[List[str], Optional[Job]]:
+        """拆解路徑並檢查存取權限，/jobs/<id>/... 時一併取得工作"""
+        self._check_access()
+        parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+        job = None
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = self.server.job_queue.get(parts[1])
+            if job is None:
+                raise RequestError(404, "找不到工作")
+        return parts, job
+
+    def do_GET(self):
+        try:
+            parts, job = self._route()
+            if parts in ([], ["operations"]):
+                self._send_json(200, {"operations": list(OPERATIONS)})
+            elif parts == ["jobs"]:
+                jobs = list(self.server.job_queue.jobs.values())
+                self._send_json(200, {
+                    "queue_depth": self.server.job_queue.queue_depth(),
+                    "jobs": [j.to_dict() for j in jobs],
+                })
+            elif parts == ["metrics"]:
+                body = metrics.REGISTRY.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif parts == ["governor"]:
+                governor = self.server.job_queue.governor
+                if governor is None:
+                    raise RequestError(404, "未啟用資源控管")
+                self._send_json(200, governor.snapshot())
+            elif job is not None and len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif job is not None and parts[2:] == ["events"]:
+                self._stream_events(job)
+            elif job is not None and parts[2:] == ["files"]:
+                files = [
+                    {"index": i, "name": os.path.basename(p), "size": os.path.getsize(p)}
+                    for i, p in enumerate(job.outputs) if os.path.exists(p)
+                ]
+                self._send_json(200, {"files": files})
+            elif job is not None and len(parts) == 4 and parts[2] == "files":
+                self._send_output(job, parts[3])
+            elif job is not None and parts[2:] == ["result"]:
+                self._send_output(job, "0")
+            else:
+                raise RequestError(404, "找不到路徑")
+        except RequestError as e:
+            self._send_error_json(e.status, str(e))
+
+    def do_POST(self):
+        try:
+            parts, _ = self._route()
+            if parts != ["jobs"]:
+                raise RequestError(404, "找不到路徑")
+            operation, params, uploads = self._read_job_request()
+            job = self.server.create_job(operation, params, uploads)
+            self._send_json(202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+        except RequestError as e:
+            self._send_error_json(e.status, str(e))
+
+    def do_DELETE(self):
+        try:
+            parts, job = self._route()
+            if job is None or len(parts) != 2:
+                raise RequestError(404, "找不到路徑")
+            if not self.server.job_queue.cancel(job.id):
+                raise RequestError(409, "工作已開始，無法取消")
+            self._send_json(200, job.to_dict())
+        except RequestError as e:
+            self._send_error_json(e.status, str(e))
+
+    def _read_job_request(self) -> Tuple[str, Dict[str, Any], List[Tuple[str, str, bytes]]]:
+        """讀取並解析新增工作的請求內容"""
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise RequestError(400, "Content-Length 無效")
+        if length > self.server.max_upload_bytes:
+            raise RequestError(413, "請求內容過大")
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "")
+
+        if content_type.startswith("multipart/form-data"):
+            return self._parse_multipart(content_type, body)
+        if content_type.split(";", 1)[0].strip().lower() != "application/json":
+            raise RequestError(415, "Content-Type 必須是 application/json 或 multipart/form-data")
+
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "JSON 格式錯誤")
+        if not isinstance(data, dict):
+            raise RequestError(400, "JSON 格式錯誤")
+        return data.get("operation", ""), data.get("params", {}), []
+
+    @staticmethod
+    def _parse_multipart(content_type: str, body: bytes) -> Tuple[str, Dict[str, Any], List[Tuple[str, str, bytes]]]:
+        """解析 multipart/form-data"""
+        message = BytesParser(policy=HTTP).parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+        )
+        if not message.is_multipart():
+            raise RequestError(400, "multipart 格式錯誤")
+
+        operation = ""
+        params: Dict[str, Any] = {}
+        uploads = []
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            data = part.get_payload(decode=True) or b""
+            filename = part.get_filename()
+            if filename is not None:
+                uploads.append((name, filename, data))
+            elif name == "operation":
+                operation = data.decode("utf-8").strip()
+            elif name == "params":
+                try:
+                    params = json.loads(data or b"{}")
+                except ValueError:
+                    raise RequestError(400, "params JSON 格式錯誤")
+        return operation, params, uploads
+
+    def _stream_events(self, job: Job):
+        """以 NDJSON 串流工作事件"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        sent = 0
+        try:
+            while True:
+                events = job.wait_events(sent, timeout=15)
+                for event in events:
+                    self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                sent += len(events)
+                self.wfile.flush()
+                if job.finished and sent >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def _send_output(self, job: Job, index_text: str):
+        """下載輸出檔案"""
+        if not job.finished:
+            raise RequestError(409, "工作尚未完成")
+        try:
+            path = job.outputs[int(index_text)]
+        except (ValueError, IndexError):
+            raise RequestError(404, "找不到輸出檔案")
+        if not os.path.exists(path):
+            raise RequestError(404, "找不到輸出檔案")
+
+        self.send_response(200)
+        ext = os.path.splitext(path)[1].lower()
+        content_type = {
+            ".pdf": "application/pdf",
+            ".png": "image/png",
+            ".jpg": "image/jpeg",
+            ".tiff": "image/tiff",
+        }.get(ext, "application/octet-stream")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+def start_server(**kwargs) -> Tuple[JobServer, threading.Thread]:
+    """在背景執行緒啟動服務 (參數同 JobServer)，回傳 (server, thread)"""
+    server = JobServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def serve(**kwargs):
+    """啟動服務並持續執行直到中斷 (參數同 JobServer)"""
+    server = JobServer(**kwargs)
+    print(f"gsgui 工作服務已啟動: {server.url}")
+    print(f"存取權杖: {server.token}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
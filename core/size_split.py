@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+依檔案大小分割
+從交互參照表估計每個物件的大小，找出每頁參照的物件 (內容串流、字型、圖片等)，
+把連續頁面依序放進同一份，直到估計大小超過上限
+
+同一份內多頁共用的物件只計算一次，因此共用字型的文件不會被高估。
+估計不必執行 Ghostscript；實際大小在輸出後驗證 (見 GhostscriptWrapper.split_pdf_by_size)。
+"""
+
+import bisect
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .config import SIZE_SPLIT
+from .pdf_reader import PdfReader, Ref, Stream
+from .pdf_writer import serialize
+
+
+# 不屬於頁面內容、且會連到其他頁面或整份文件的鍵
+_SKIP_KEYS = {"Parent", "P", "Dest", "StructParents", "StructParent", "B", "Thumb"}
+# 可由頁面樹繼承的頁面屬性
+_INHERITABLE = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+
+def _object_sizes(reader: PdfReader) -> Dict[int, int]:
+    """
+    每個物件在檔案中佔用的大小
+
+    未壓縮的物件以交互參照表中相鄰兩個位置的差計算；
+    物件串流中的物件以序列化後的長度，按該物件串流的壓縮比例折算。
+    """
+    offsets = sorted(entry[1] for entry in reader.xref.values() if entry[0] == "n")
+    end = reader.startxref if offsets and reader.startxref > offsets[-1] else reader.size
+    sizes: Dict[int, int] = {}
+    packed: Dict[int, Dict[int, int]] = {}  # 物件串流編號 → {物件編號: 序列化長度}
+    for num, entry in reader.xref.items():
+        if entry[0] == "n":
+            index = bisect.bisect_right(offsets, entry[1])
+            sizes[num] = (offsets[index] if index < len(offsets) else end) - entry[1]
+        elif entry[0] == "c":
+            packed.setdefault(entry[1], {})[num] = len(serialize(reader.get_object(num))) + 1
+    for stream_num, members in packed.items():
+        total = sum(members.values())
+        ratio = min(1.0, sizes.get(stream_num, total) / total) if total else 1.0
+        for num, length in members.items():
+            sizes[num] = int(length * ratio) + SIZE_SPLIT["object_overhead"]
+    return sizes
+
+
+def _direct_refs(value: Any) -> List[Ref]:
+    """物件中直接包含的參照 (略過 _SKIP_KEYS)"""
+    if isinstance(value, Stream):
+        value = value.dict
+    refs, stack = [], [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Ref):
+            refs.append(item)
+        elif isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(v for k, v in item.items() if k not in _SKIP_KEYS and k != "Length")
+    return refs
+
+
+class SizeIndex:
+    """
+    每頁參照的物件與物件大小，用來估計任意連續頁面輸出後的大小
+
+    用法:
+        index = SizeIndex("in.pdf")
+        parts = index.plan(10 * 1024 * 1024)   # [(1, 37, 估計大小), (38, 80, 估計大小), ...]
+    """
+
+    def __init__(self, input_file: str):
+        """
+        Raises:
+            PdfError: 無法解析的 PDF
+        """
+        with PdfReader(input_file) as reader:
+            self.object_sizes = _object_sizes(reader)
+            page_refs = reader.page_refs()
+            # 頁面與頁面樹節點：其他頁面參照到它們時不計入
+            structural = {ref.num for ref in page_refs}
+            for ref in page_refs:
+                structural.update(self._ancestors(reader, reader.resolve(ref)))
+            self.page_objects: List[FrozenSet[int]] = []
+            for ref in page_refs:
+                self.page_objects.append(frozenset(self._page_closure(reader, ref, structural)))
+
+    @staticmethod
+    def _ancestors(reader: PdfReader, page: Any) -> List[int]:
+        """頁面樹中頁面的上層節點編號 (由近到遠)"""
+        nums, node = [], page
+        while isinstance(node, dict):
+            parent = node.get("Parent")
+            if not isinstance(parent, Ref) or parent.num in nums:
+                break
+            nums.append(parent.num)
+            node = reader.resolve(parent)
+        return nums
+
+    def _page_closure(self, reader: PdfReader, page_ref: Ref, structural: set) -> set:
+        """一頁參照到的所有物件編號 (含頁面本身與繼承的屬性)"""
+        page = reader.resolve(page_ref)
+        stack = _direct_refs(page)
+        for num in self._ancestors(reader, page):
+            node = reader.get_object(num)
+            if isinstance(node, dict):
+                for key in _INHERITABLE:
+                    if key not in page and key in node:
+                        stack.extend(_direct_refs(node[key]))
+
+        objects = {page_ref.num}
+        while stack:
+            num = stack.pop().num
+            if num in objects or num in structural or num not in reader.xref:
+                continue
+            objects.add(num)
+            stack.extend(_direct_refs(reader.get_object(num)))
+        return objects
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_objects)
+
+    def _bytes_of(self, objects) -> int:
+        return sum(self.object_sizes.get(num, 0) for num in objects)
+
+    def part_bytes(self, first: int, last: int) -> int:
+        """第 first~last 頁輸出成一個檔案的估計大小"""
+        objects = set()
+        for page in range(first, last + 1):
+            objects |= self.page_objects[page - 1]
+        return SIZE_SPLIT["part_overhead"] + self._bytes_of(objects)
+
+    def plan(self, max_bytes: int, first: int = 1, last: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """
+        把第 first~last 頁依序分成估計大小不超過 max_bytes 的連續範圍
+
+        單頁估計就超過 max_bytes 時，該頁自成一份。
+
+        Returns:
+            [(起始頁, 結束頁, 估計大小), ...]
+        """
+        last = self.page_count if last is None else last
+        parts = []
+        start, objects, size = first, set(), SIZE_SPLIT["part_overhead"]
+        for page in range(first, last + 1):
+            new = self.page_objects[page - 1] - objects
+            added = self._bytes_of(new)
+            if page > start and size + added > max_bytes:
+                parts.append((start, page - 1, size))
+                start, objects = page, set(self.page_objects[page - 1])
+                size = SIZE_SPLIT["part_overhead"] + self._bytes_of(objects)
+            else:
+                objects |= new
+                size += added
+        if first <= last:
+            parts.append((start, last, size))
+        return parts
@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+"""
+熱資料夾監看
+定期輪詢輸入資料夾，檔案停止變動後依資料夾設定執行操作，
+已處理的檔案記錄在索引檔中，重新啟動後不會重複處理
+
+設定檔格式 (JSON):
+    {
+        "workers": 2,
+        "interval": 2.0,
+        "stable_seconds": 5.0,
+        "index_file": "watch-index.jsonl",
+        "status_file": "watch-status.json",
+        "max_memory_mb": 2048,
+        "max_cpu": 4,
+        "folders": [
+            {
+                "input": "/srv/scans/in",
+                "output": "/srv/scans/out",
+                "operation": "compress_pdf",
+                "params": {"pdf_settings": "ebook"},
+                "patterns": ["*.pdf"],
+                "recursive": false
+            }
+        ]
+    }
+
+相對路徑以設定檔所在資料夾為準。
+"""
+
+import collections
+import fnmatch
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import (
+    WATCH_INTERVAL, WATCH_STABLE_SECONDS, WATCH_WORKERS,
+    WATCH_INDEX_FILE, WATCH_INDEX_COMPACT_SLACK, WATCH_STATUS_FILE, GOVERNOR_MAX_MEMORY_MB, GOVERNOR_MAX_CPU
+)
+from .ghostscript import GhostscriptWrapper, image_extension
+from .governor import ResourceGovernor
+from .history import JobHistory
+from .job_queue import Job, JobQueue, QueueFullError
+
+
+# 監看模式支援的操作 (每個輸入檔案產生獨立輸出)
+WATCH_OPERATIONS = ("compress_pdf", "resize_pdf", "split_pdf", "pdf_to_image")
+
+# 計算吞吐量的時間窗 (秒)
+THROUGHPUT_WINDOW = 300
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """計算檔案的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path: str, data: Any):
+    """先寫入暫存檔再取代，避免讀取者看到寫到一半的檔案"""
+    write_text_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def write_text_atomic(path: str, text: str):
+    """先寫入暫存檔再取代，避免讀取者看到寫到一半的檔案"""
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=dirname)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class FolderRule:
+    """單一監看資料夾的設定"""
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        operation: str,
+        params: Optional[Dict[str, Any]] = None,
+        patterns: Optional[List[str]] = None,
+        recursive: bool = False
+    ):
+        if operation not in WATCH_OPERATIONS:
+            raise ValueError(f"監看模式不支援的操作: {operation}")
+        if os.path.abspath(input_dir) == os.path.abspath(output_dir):
+            raise ValueError(f"輸出資料夾不能與輸入資料夾相同: {input_dir}")
+
+        self.input_dir = os.path.abspath(input_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.operation = operation
+        self.params = dict(params or {})
+        self.patterns = patterns or ["*.pdf"]
+        self.recursive = recursive
+        self.processed = 0
+        self.failed = 0
+
+    def matches(self, filename: str) -> bool:
+        # 略過隱藏檔與常見的暫存檔
+        if filename.startswith((".", "~")) or filename.endswith((".part", ".tmp")):
+            return False
+        return any(fnmatch.fnmatch(filename.lower(), p.lower()) for p in self.patterns)
+
+    def scan(self) -> List[str]:
+        """列出符合的檔案"""
+        found = []
+        if self.recursive:
+            for root, dirs, files in os.walk(self.input_dir):
+                # 輸出資料夾位於輸入資料夾內時不要掃描
+                dirs[:] = [
+                    d for d in dirs
+                    if not d.startswith(".") and os.path.join(root, d) != self.output_dir
+                ]
+                found.extend(os.path.join(root, f) for f in files if self.matches(f))
+        else:
+            try:
+                with os.scandir(self.input_dir) as entries:
+                    found = [e.path for e in entries if e.is_file() and self.matches(e.name)]
+            except FileNotFoundError:
+                pass
+        return found
+
+    def build_params(self, path: str) -> Dict[str, Any]:
+        """依輸入檔案產生操作參數"""
+        rel = os.path.relpath(path, self.input_dir)
+        stem = os.path.splitext(rel)[0]
+        params = dict(self.params)
+        os.makedirs(os.path.dirname(os.path.join(self.output_dir, rel)), exist_ok=True)
+
+        params["input_file"] = path
+        if self.operation == "pdf_to_image":
+            ext = image_extension(params.get("device", "PNG"))
+            params["output_pattern"] = os.path.join(self.output_dir, f"{stem}_%03d{ext}")
+        else:
+            params["output_file"] = os.path.join(self.output_dir, f"{stem}.pdf")
+        return params
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input": self.input_dir,
+            "output": self.output_dir,
+            "operation": self.operation,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+class ProcessedIndex:
+    """
+    已處理檔案的索引 (path → size, mtime, sha256)
+
+    索引檔為 JSON Lines，每處理一個檔案附加一行，同一路徑以最後一行為準；
+    附加的行數超過上次重寫時的記錄數 (至少 compact_slack 行) 時重寫索引，並移除已不存在的檔案。
+    """
+
+    def __init__(self, path: str, compact_slack: int = WATCH_INDEX_COMPACT_SLACK):
+        """
+        Args:
+            path: 索引檔路徑
+            compact_slack: 重寫索引前至少附加的行數
+        """
+        self.path = path
+        self.compact_slack = compact_slack
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lines = 0  # 索引檔目前的行數
+        self._load(path)
+        self._compacted = len(self.entries)  # 上次重寫 (或讀取) 時的記錄數
+        if self._needs_compact():
+            self.compact()
+
+    def _load(self, path: str):
+        """讀取索引檔 (同一路徑以最後一行為準)"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 中斷時寫到一半的行
+                continue
+            if isinstance(entry, dict) and {"path", "size", "mtime", "sha256"} <= entry.keys():
+                self.entries[entry.pop("path")] = entry
+            self._lines += 1
+
+    def _needs_compact(self) -> bool:
+        return self._lines > 2 * self._compacted + self.compact_slack
+
+    def is_processed(self, path: str, size: int, mtime: float) -> bool:
+        """
+        檢查檔案是否已處理過
+
+        大小與修改時間相同即視為已處理；只有修改時間不同時比對內容雜湊，
+        內容相同 (例如被複製或 touch) 時更新記錄並視為已處理。
+        """
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry is None or entry["size"] != size:
+            return False
+        if entry["mtime"] == mtime:
+            return True
+        try:
+            digest = file_sha256(path)
+        except OSError:
+            return False
+        if digest != entry["sha256"]:
+            return False
+        self.record(path, size, mtime, digest)
+        return True
+
+    def record(self, path: str, size: int, mtime: float, digest: str):
+        entry = {
+            "size": size,
+            "mtime": mtime,
+            "sha256": digest,
+            "processed_at": time.time(),
+        }
+        with self._lock:
+            self.entries[path] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(entry, path=path), ensure_ascii=False) + "\n")
+            self._lines += 1
+            compact = self._needs_compact()
+        if compact:
+            self.compact()
+
+    def compact(self):
+        """移除已不存在的檔案並重寫索引 (每個路徑一行)"""
+        with self._lock:
+            self.entries = {
+                path: entry for path, entry in self.entries.items() if os.path.exists(path)
+            }
+            lines = [
+                json.dumps(dict(entry, path=path), ensure_ascii=False) + "\n"
+                for path, entry in self.entries.items()
+            ]
+            write_text_atomic(self.path, "".join(lines))
+            self._lines = self._compacted = len(lines)
+
+
+class FolderWatcher:
+    """熱資料夾監看器"""
+
+    def __init__(
+        self,
+        rules: List[FolderRule],
+        index_file: str,
+        status_file: Optional[str] = None,
+        workers: int = WATCH_WORKERS,
+        interval: float = WATCH_INTERVAL,
+        stable_seconds: float = WATCH_STABLE_SECONDS,
+        wrapper: Optional[GhostscriptWrapper] = None,
+        governor: Optional[ResourceGovernor] = None,
+        history: Optional[JobHistory] = None
+    ):
+        """
+        Args:
+            rules: 監看資料夾設定
+            index_file: 已處理檔案索引的路徑
+            status_file: 狀態檔路徑 (None=不輸出)
+            workers: 同時執行的工作數
+            interval: 輪詢間隔 (秒)
+            stable_seconds: 檔案大小與修改時間維持不變多久後才處理 (秒)
+            wrapper: Ghostscript 包裝器 (None=自動建立)
+            governor: 資源控管 (None=只依 workers 限制同時執行數)
+            history: 工作記錄 (None=依發現順序處理，設定時最短工作優先)
+        """
+        self.rules = rules
+        self.index = ProcessedIndex(index_file)
+        self.status_file = status_file
+        self.interval = interval
+        self.stable_seconds = stable_seconds
+        self.job_queue = JobQueue(
+            wrapper=wrapper,
+            workers=workers,
+            max_queue=workers * 4,
+            on_finished=self._on_job_finished,
+            track_progress=False,
+            governor=governor,
+            name="watch",
+            history=history
+        )
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # path → (size, mtime, 開始維持不變的時間)
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        # path → (rule, size, mtime)
+        self._inflight: Dict[str, Tuple[FolderRule, int, float]] = {}
+        # 失敗的檔案在內容改變前不再重試: path → (size, mtime)
+        self._failed: Dict[str, Tuple[int, float]] = {}
+        # 最近完成的工作: (完成時間, 位元組數)
+        self._completed = collections.deque()
+        self.started_at = time.time()
+        self.processed_total = 0
+        self.failed_total = 0
+        self.bytes_total = 0
+
+    def run_forever(self):
+        """持續輪詢直到 stop() 被呼叫"""
+        self.job_queue.start()
+        try:
+            while not self._stop.is_set():
+                self.poll_once()
+                self._stop.wait(self.interval)
+        finally:
+            self.job_queue.stop()
+            self.write_status()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll_once(self):
+        """掃描一次所有資料夾並送出已穩定的檔案"""
+        now = time.time()
+        seen = set()
+
+        for rule in self.rules:
+            for path in rule.scan():
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                size, mtime = stat.st_size, stat.st_mtime
+
+                with self._lock:
+                    if path in self._inflight:
+                        continue
+                    if self._failed.get(path) == (size, mtime):
+                        continue
+
+                previous = self._pending.get(path)
+                if previous is None or previous[:2] != (size, mtime):
+                    # 新檔案或仍在變動
+                    if not self.index.is_processed(path, size, mtime):
+                        self._pending[path] = (size, mtime, now)
+                    else:
+                        self._pending.pop(path, None)
+                    continue
+
+                if now - previous[2] < self.stable_seconds:
+                    continue
+
+                if self._submit(rule, path, size, mtime):
+                    del self._pending[path]
+
+        # 已被移走的檔案
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+
+        self.write_status()
+
+    def _submit(self, rule: FolderRule, path: str, size: int, mtime: float) -> bool:
+        """送出工作，佇列已滿時回傳 False (下次輪詢再試)"""
+        try:
+            params = rule.build_params(path)
+        except OSError:
+            return False
+        with self._lock:
+            self._inflight[path] = (rule, size, mtime)
+        try:
+            self.job_queue.submit(rule.operation, params, context=path)
+        except QueueFullError:
+            with self._lock:
+                del self._inflight[path]
+            return False
+        return True
+
+    def _on_job_finished(self, job: Job):
+        path = job.context
+        with self._lock:
+            rule, size, mtime = self._inflight.pop(path)
+
+        if job.success:
+            try:
+                digest = file_sha256(path)
+                self.index.record(path, size, mtime, digest)
+            except OSError:
+                pass
+            with self._lock:
+                rule.processed += 1
+                self.processed_total += 1
+                self.bytes_total += size
+                self._completed.append((time.time(), size))
+        else:
+            with self._lock:
+                rule.failed += 1
+                self.failed_total += 1
+                self._failed[path] = (size, mtime)
+
+    def status(self) -> Dict[str, Any]:
+        """目前狀態 (寫入狀態檔的內容)"""
+        now = time.time()
+        with self._lock:
+            while self._completed and now - self._completed[0][0] > THROUGHPUT_WINDOW:
+                self._completed.popleft()
+            window = min(THROUGHPUT_WINDOW, max(now - self.started_at, 1e-6))
+            recent_files = len(self._completed)
+            recent_bytes = sum(size for _, size in self._completed)
+            inflight = len(self._inflight)
+            return {
+                "updated_at": now,
+                "started_at": self.started_at,
+                "waiting_stable": len(self._pending),
+                "queue_depth": self.job_queue.queue_depth(),
+                "running": self.job_queue.running_count(),
+                "in_flight": inflight,
+                "processed": self.processed_total,
+                "failed": self.failed_total,
+                "bytes_processed": self.bytes_total,
+                "throughput": {
+                    "window_seconds": THROUGHPUT_WINDOW,
+                    "files_per_minute": recent_files * 60 / window,
+                    "bytes_per_second": recent_bytes / window,
+                },
+                "folders": [rule.to_dict() for rule in self.rules],
+                "governor": self.job_queue.governor.snapshot() if self.job_queue.governor else None,
+            }
+
+    def write_status(self):
+        if self.status_file:
+            try:
+                write_json_atomic(self.status_file, self.status())
+            except OSError:
+                pass
+
+
+def load_watcher(
+    config_file: str,
+    wrapper: Optional[GhostscriptWrapper] = None,
+    history: Optional[JobHistory] = None
+) -> FolderWatcher:
+    """由設定檔建立監看器"""
+    with open(config_file, encoding="utf-8") as f:
+        config = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(config_file))
+
+    def resolve(path: str) -> str:
+        return os.path.join(base_dir, os.path.expanduser(path))
+
+    rules = [
+        FolderRule(
+            input_dir=resolve(folder["input"]),
+            output_dir=resolve(folder["output"]),
+            operation=folder.get("operation", "compress_pdf"),
+            params=folder.get("params"),
+            patterns=folder.get("patterns"),
+            recursive=folder.get("recursive", False)
+        )
+        for folder in config.get("folders", [])
+    ]
+    if not rules:
+        raise ValueError("設定檔沒有任何監看資料夾")
+
+    governor = None
+    if config.get("max_memory_mb") or config.get("max_cpu"):
+        governor = ResourceGovernor(
+            max_memory_mb=config.get("max_memory_mb", GOVERNOR_MAX_MEMORY_MB),
+            max_cpu=config.get("max_cpu", GOVERNOR_MAX_CPU)
+        )
+
+    status_file = config.get("status_file", WATCH_STATUS_FILE)
+    return FolderWatcher(
+        rules=rules,
+        index_file=resolve(config.get("index_file", WATCH_INDEX_FILE)),
+        status_file=resolve(status_file) if status_file else None,
+        workers=config.get("workers", WATCH_WORKERS),
+        interval=config.get("interval", WATCH_INTERVAL),
+        stable_seconds=config.get("stable_seconds", WATCH_STABLE_SECONDS),
+        wrapper=wrapper,
+        governor=governor,
+        history=history
+    )
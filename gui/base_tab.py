@@ -6,24 +6,88 @@
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+from concurrent.futures import Future, ThreadPoolExecutor
 import threading
+import time
 import os
 
+from core import metrics
+from core.config import GUI_PROBE_WORKERS, PAPER_SIZES
+from core.history import format_duration
+
+
+# 所有分頁共用的背景讀取執行緒池
+_probe_executor = None
+_probe_executor_lock = threading.Lock()
+
+
+def _get_probe_executor() -> ThreadPoolExecutor:
+    global _probe_executor
+    with _probe_executor_lock:
+        if _probe_executor is None:
+            _probe_executor = ThreadPoolExecutor(
+                max_workers=GUI_PROBE_WORKERS, thread_name_prefix="probe"
+            )
+        return _probe_executor
+
+
+def format_size(size: float) -> str:
+    """格式化檔案大小"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_page_size(width: float, height: float) -> str:
+    """格式化頁面大小，符合常見紙張時附上名稱 (例如「595 × 842 pt (A4)」)"""
+    text = f"{width:.0f} × {height:.0f} pt"
+    for name, (paper_w, paper_h) in PAPER_SIZES.items():
+        for w, h in ((paper_w, paper_h), (paper_h, paper_w)):
+            if abs(width - w) <= 2 and abs(height - h) <= 2:
+                orientation = "" if w == paper_w else " 橫向"
+                return f"{text} ({name}{orientation})"
+    return text
+
+
+def format_blank_removed(result) -> str:
+    """移除空白頁的摘要 (沒有移除時為空字串)"""
+    removed = sum(len(d["removed"]) for d in result.details.get("blank_pages", {}).values())
+    return f"\n移除空白頁: {removed} 頁" if removed else ""
+
+
+def format_warnings(warnings: list) -> str:
+    """將操作的警告附加在完成訊息後面 (沒有警告時為空字串)"""
+    if not warnings:
+        return ""
+    return "\n\n注意:\n" + "\n".join(f"- {w}" for w in warnings)
+
 
 class BaseTab:
     """分頁基礎類別"""
 
-    def __init__(self, parent):
+    def __init__(self, parent, history=None):
+        """
+        Args:
+            parent: 父元件
+            history: 工作記錄 (core.history.JobHistory)，用來記錄耗時並顯示預估時間
+        """
         self.parent = parent
         self.frame = ttk.Frame(parent, padding=10)
+        self.history = history
         self.gs_wrapper = None
+        # 背景讀取: 名稱 → 最新一次的編號，較舊的結果會被丟棄
+        self._probe_generations = {}
+        self._pending_probes = set()
+        self._task_running = False
         self._init_gs_wrapper()
 
     def _init_gs_wrapper(self):
         """初始化 Ghostscript 包裝器"""
         try:
             from core import GhostscriptWrapper
-            self.gs_wrapper = GhostscriptWrapper()
+            self.gs_wrapper = GhostscriptWrapper(history=self.history)
         except FileNotFoundError as e:
             messagebox.showerror("錯誤", str(e))
 
@@ -70,6 +134,24 @@ class BaseTab:
 
         return frame
 
+    def create_linearize_option(self, parent):
+        """建立「快速網頁檢視」選項 (self.linearize_var)"""
+        self.linearize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            parent,
+            text="快速網頁檢視 (線性化，瀏覽器下載完第一頁即可顯示)",
+            variable=self.linearize_var
+        ).pack(anchor=tk.W, padx=5, pady=(0, 5))
+
+    def create_remove_blank_option(self, parent):
+        """建立「移除空白頁」選項 (self.remove_blank_var)"""
+        self.remove_blank_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            parent,
+            text="移除空白頁 (以低解析度偵測墨水覆蓋率，適合雙面掃描的空白背面)",
+            variable=self.remove_blank_var
+        ).pack(anchor=tk.W, padx=5, pady=(0, 5))
+
     def create_progress_bar(self, parent):
         """建立進度條和狀態顯示"""
         # 選項列
@@ -92,6 +174,10 @@ class BaseTab:
         self.progress_text_label = ttk.Label(option_frame, textvariable=self.progress_text_var)
         self.progress_text_label.pack(side=tk.RIGHT)
 
+        # 預估耗時
+        self.eta_var = tk.StringVar(value="")
+        ttk.Label(option_frame, textvariable=self.eta_var, foreground="gray").pack(side=tk.RIGHT, padx=(0, 10))
+
         # 進度條
         progress_frame = ttk.Frame(parent)
         progress_frame.pack(fill=tk.X, pady=(2, 10))
@@ -143,6 +229,7 @@ class BaseTab:
         if filename:
             var.set(filename)
             self._on_file_selected(filename)
+            self.refresh_eta()
 
     def _browse_save_file(self, var: tk.StringVar, default_ext: str):
         """儲存檔案對話框"""
@@ -162,16 +249,116 @@ class BaseTab:
         """執行按鈕回調 (子類別需覆寫)"""
         raise NotImplementedError("子類別需實作 _on_execute 方法")
 
+    def probe(self, key: str, func, on_result, on_error=None, block_execute: bool = True):
+        """
+        在背景讀取檔案資訊 (頁數、大小、頁面框等)，完成後在主執行緒呼叫 on_result(結果)
+
+        同一個 key 再次讀取時 (例如使用者改選了另一個檔案)，較舊的結果會被丟棄。
+
+        Args:
+            key: 讀取的名稱
+            func: 在背景執行的函式 (不可操作 tk 元件)
+            on_result: 成功時的回調
+            on_error: 失敗時的回調 on_error(例外)
+            block_execute: 讀取完成前是否停用執行按鈕
+        """
+        generation = self._probe_generations.get(key, 0) + 1
+        self._probe_generations[key] = generation
+        if block_execute:
+            self._pending_probes.add(key)
+        else:
+            self._pending_probes.discard(key)
+        self._update_execute_state()
+
+        def done(future: Future):
+            self.frame.after(0, lambda: self._on_probe_done(key, generation, future, on_result, on_error))
+
+        _get_probe_executor().submit(func).add_done_callback(done)
+
+    def cancel_probe(self, key: str):
+        """丟棄尚未完成的讀取結果"""
+        self._probe_generations[key] = self._probe_generations.get(key, 0) + 1
+        self._pending_probes.discard(key)
+        self._update_execute_state()
+
+    def _on_probe_done(self, key: str, generation: int, future: Future, on_result, on_error):
+        """讀取完成 (主執行緒)"""
+        if self._probe_generations.get(key) != generation:
+            return
+        self._pending_probes.discard(key)
+        self._update_execute_state()
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            return
+        on_result(result)
+
+    def _update_execute_state(self):
+        """執行中或讀取檔案資訊時停用執行按鈕"""
+        if not hasattr(self, "execute_btn"):
+            return
+        busy = self._task_running or bool(self._pending_probes)
+        self.execute_btn.config(state=tk.DISABLED if busy else tk.NORMAL)
+
+    def get_eta_requests(self) -> list:
+        """
+        預估耗時用的工作列表 (子類別可覆寫)
+
+        Returns:
+            [(操作名稱, 參數), ...]，會呼叫多次 Ghostscript 的操作回傳多個；
+            輸入不完整時回傳空列表
+        """
+        return []
+
+    def refresh_eta(self, *args):
+        """在背景預估目前設定的耗時並更新顯示 (可作為 tk 變數的 trace 回調)"""
+        if not hasattr(self, "eta_var"):
+            return
+
+        requests = self.get_eta_requests() if self.history and self.gs_wrapper else []
+        if not requests:
+            self.cancel_probe("eta")
+            self.eta_var.set("")
+            return
+
+        def estimate():
+            total = 0.0
+            for operation, params in requests:
+                seconds = self.history.estimate(operation, params, self.gs_wrapper.get_pdf_page_count)
+                if seconds is None:
+                    return None
+                total += seconds
+            return total
+
+        def show(total):
+            self.eta_var.set(f"預估耗時: {format_duration(total)}" if total is not None else "")
+
+        self.probe("eta", estimate, show, lambda e: self.eta_var.set(""), block_execute=False)
+
     def run_in_thread(self, func, callback=None):
         """在背景執行緒執行任務"""
+        submitted = time.perf_counter()
+        tab_name = type(self).__name__
+
+        self._task_running = True
+        self._update_execute_state()
+
         def wrapper():
+            started = time.perf_counter()
+            metrics.QUEUE_WAIT_SECONDS.observe(started - submitted, queue="gui")
             try:
-                self.frame.after(0, lambda: self.execute_btn.config(state=tk.DISABLED))
                 self.frame.after(0, lambda: self.set_status("處理中..."))
                 result = func()
+                metrics.GUI_TASKS.inc(tab=tab_name, result="success" if result[0] else "failure")
                 self.frame.after(0, lambda: self._on_task_complete(result, callback))
             except Exception as e:
-                self.frame.after(0, lambda: self._on_task_error(str(e)))
+                metrics.GUI_TASKS.inc(tab=tab_name, result="error")
+                error_msg = str(e)
+                self.frame.after(0, lambda: self._on_task_error(error_msg))
+            finally:
+                metrics.GUI_TASK_DURATION.observe(time.perf_counter() - started, tab=tab_name)
 
         thread = threading.Thread(target=wrapper, daemon=True)
         thread.start()
@@ -187,7 +374,8 @@ class BaseTab:
     def _on_task_complete(self, result, callback=None):
         """任務完成回調"""
         self.progress_var.set(100)
-        self.execute_btn.config(state=tk.NORMAL)
+        self._task_running = False
+        self._update_execute_state()
 
         success, message = result
         if success:
@@ -199,6 +387,8 @@ class BaseTab:
 
         # 延遲重置進度
         self.frame.after(2000, self.reset_progress)
+        # 工作記錄已更新，重新預估
+        self.refresh_eta()
 
         if callback:
             callback(result)
@@ -207,7 +397,8 @@ class BaseTab:
         """任務錯誤回調"""
         self.reset_progress()
         self.set_status("錯誤")
-        self.execute_btn.config(state=tk.NORMAL)
+        self._task_running = False
+        self._update_execute_state()
         messagebox.showerror("錯誤", f"發生錯誤：\n{error_msg}")
 
     def validate_input_file(self, filepath: str) -> bool:
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+檔案列表
+以資料模型保存檔案順序與資訊，Treeview 只負責顯示；
+支援匯入整個資料夾 (自然排序) 與背景平行讀取每個檔案的資訊
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import os
+import queue
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.config import GUI_METADATA_WORKERS
+
+
+_NATURAL_SPLIT = re.compile(r"(\d+)")
+
+
+def natural_sort_key(path: str) -> Tuple:
+    """自然排序鍵 (page2 排在 page10 之前)，不分大小寫"""
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part.casefold())
+        for part in _NATURAL_SPLIT.split(path)
+        if part
+    )
+
+
+def scan_folder(folder: str, extensions: Sequence[str], recursive: bool = True) -> List[str]:
+    """
+    列出資料夾中符合副檔名的檔案 (自然排序)
+
+    Args:
+        folder: 資料夾
+        extensions: 副檔名 (小寫，含點，例如 ".pdf")
+        recursive: 是否包含子資料夾
+    """
+    extensions = tuple(extensions)
+    files = []
+    for root, dirs, names in os.walk(folder):
+        if not recursive:
+            dirs.clear()
+        dirs.sort(key=natural_sort_key)
+        for name in names:
+            if name.lower().endswith(extensions) and not name.startswith("."):
+                files.append(os.path.join(root, name))
+    files.sort(key=lambda f: natural_sort_key(os.path.relpath(f, folder)))
+    return files
+
+
+class FileEntry:
+    """列表中的一個檔案"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, path: str):
+        self.id = str(next(FileEntry._ids))  # Treeview 的 iid
+        self.path = path
+        self.info: Optional[Dict[str, Any]] = None  # 背景讀取的資訊 (None=尚未讀取)
+        self.error: Optional[str] = None
+
+
+class FileListModel:
+    """有順序的檔案列表"""
+
+    def __init__(self):
+        self.entries: List[FileEntry] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def paths(self) -> List[str]:
+        return [entry.path for entry in self.entries]
+
+    def add(self, paths: Iterable[str]) -> List[FileEntry]:
+        """加入檔案到列表最後，回傳新增的項目"""
+        added = [FileEntry(path) for path in paths]
+        self.entries.extend(added)
+        return added
+
+    def remove(self, indices: Iterable[int]) -> List[FileEntry]:
+        """移除指定位置的項目，回傳被移除的項目"""
+        remove = set(indices)
+        removed = [e for i, e in enumerate(self.entries) if i in remove]
+        self.entries = [e for i, e in enumerate(self.entries) if i not in remove]
+        return removed
+
+    def clear(self):
+        self.entries = []
+
+    def move(self, indices: Iterable[int], delta: int) -> List[int]:
+        """
+        將指定位置的項目上移 (delta=-1) 或下移 (delta=1) 一格
+
+        已到頂端 (或底端) 的項目不動，緊接在後面的選取項目也跟著不動。
+
+        Returns:
+            依處理順序排列的新位置 (顯示端以相同順序移動即可同步)
+        """
+        n = len(self.entries)
+        occupied = set()
+        moved = []
+        for i in sorted(set(indices), reverse=delta > 0):
+            j = i + delta
+            if 0 <= j < n and j not in occupied:
+                self.entries[i], self.entries[j] = self.entries[j], self.entries[i]
+                i = j
+            occupied.add(i)
+            moved.append(i)
+        return moved
+
+    def sort(self):
+        """依路徑自然排序"""
+        self.entries.sort(key=lambda e: natural_sort_key(e.path))
+
+
+class FileListView:
+    """
+    以 Treeview 顯示 FileListModel，並在背景平行讀取每個檔案的資訊
+
+    讀取結果先放入佇列，由主執行緒定期批次更新畫面，
+    大量檔案時不會對每個檔案各排一次 after()。
+    """
+
+    # 批次更新畫面的間隔 (毫秒)
+    POLL_INTERVAL = 100
+
+    def __init__(
+        self,
+        parent,
+        columns: Sequence[Tuple[str, str, int]],
+        probe: Callable[[str], Dict[str, Any]],
+        format_info: Callable[[Dict[str, Any]], Sequence[str]],
+        on_change: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            parent: 父元件
+            columns: 資訊欄位 [(名稱, 標題, 寬度), ...] (檔名欄位會自動加在最前面)
+            probe: 在背景執行緒讀取檔案資訊的函式 probe(路徑) → dict
+            format_info: 將資訊轉為各欄位文字的函式
+            on_change: 列表內容或順序改變時的回調
+        """
+        self.model = FileListModel()
+        self.probe = probe
+        self.format_info = format_info
+        self.on_change = on_change
+        self._columns = [name for name, _, _ in columns]
+        self._by_id: Dict[str, FileEntry] = {}
+        self._results: "queue.Queue[tuple]" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._polling = False
+
+        self.frame = ttk.Frame(parent)
+        scrollbar = ttk.Scrollbar(self.frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(
+            self.frame,
+            columns=["name"] + self._columns,
+            show="headings",
+            selectmode="extended",
+            yscrollcommand=scrollbar.set
+        )
+        self.tree.heading("name", text="檔案")
+        self.tree.column("name", width=260, anchor=tk.W)
+        for name, text, width in columns:
+            self.tree.heading(name, text=text)
+            self.tree.column(name, width=width, anchor=tk.E, stretch=False)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.tree.yview)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self.model)
+
+    def paths(self) -> List[str]:
+        return self.model.paths()
+
+    def selected_indices(self) -> List[int]:
+        """選取項目在模型中的位置 (以模型查表，避免對每個項目呼叫 Treeview.index)"""
+        selection = self.tree.selection()
+        if not selection:
+            return []
+        positions = {entry.id: i for i, entry in enumerate(self.model.entries)}
+        return sorted(positions[iid] for iid in selection if iid in positions)
+
+    def _values(self, entry: FileEntry) -> List[str]:
+        name = os.path.basename(entry.path)
+        if entry.error:
+            return [name, "無法讀取"] + [""] * (len(self._columns) - 1)
+        if entry.info is None:
+            return [name, "讀取中..."] + [""] * (len(self._columns) - 1)
+        return [name] + list(self.format_info(entry.info))
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def add(self, paths: Iterable[str]):
+        """加入檔案並在背景讀取資訊"""
+        added = self.model.add(paths)
+        for entry in added:
+            self._by_id[entry.id] = entry
+            self.tree.insert("", tk.END, iid=entry.id, values=self._values(entry))
+        self._probe(added)
+        self._changed()
+
+    def remove_selected(self):
+        removed = self.model.remove(self.selected_indices())
+        if removed:
+            for entry in removed:
+                self._by_id.pop(entry.id, None)
+            self.tree.delete(*(entry.id for entry in removed))
+            self._changed()
+
+    def clear(self):
+        self.model.clear()
+        self._by_id.clear()
+        self.tree.delete(*self.tree.get_children())
+        self._changed()
+
+    def move_selected(self, delta: int):
+        """上移 (delta=-1) 或下移 (delta=1) 選取的項目，只移動受影響的列"""
+        for index in self.model.move(self.selected_indices(), delta):
+            self.tree.move(self.model.entries[index].id, "", index)
+        selection = self.tree.selection()
+        if selection:
+            self.tree.see(selection[0] if delta < 0 else selection[-1])
+        self._changed()
+
+    def sort(self):
+        """依檔名自然排序"""
+        self.model.sort()
+        for index, entry in enumerate(self.model.entries):
+            self.tree.move(entry.id, "", index)
+        self._changed()
+
+    def _probe(self, entries: List[FileEntry]):
+        """在背景平行讀取檔案資訊"""
+        if not entries:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=GUI_METADATA_WORKERS, thread_name_prefix="file-info"
+            )
+        for entry in entries:
+            self._executor.submit(self._probe_one, entry.id, entry.path)
+        if not self._polling:
+            self._polling = True
+            self.frame.after(self.POLL_INTERVAL, self._poll)
+
+    def _probe_one(self, entry_id: str, path: str):
+        try:
+            self._results.put((entry_id, self.probe(path), None))
+        except Exception as e:
+            self._results.put((entry_id, None, str(e)))
+
+    def _poll(self):
+        """批次套用讀取結果 (主執行緒)"""
+        updated = False
+        while True:
+            try:
+                entry_id, info, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            entry = self._by_id.get(entry_id)
+            if entry is None:
+                continue  # 讀取期間已從列表移除
+            entry.info, entry.error = info, error
+            self.tree.item(entry_id, values=self._values(entry))
+            updated = True
+
+        pending = any(entry.info is None and entry.error is None for entry in self._by_id.values())
+        if pending:
+            self.frame.after(self.POLL_INTERVAL, self._poll)
+        else:
+            self._polling = False
+        if updated:
+            self._changed()
+
+    def pending_count(self) -> int:
+        """尚未讀取完成的檔案數"""
+        return sum(1 for entry in self.model.entries if entry.info is None and entry.error is None)
+
+    def total(self, key: str) -> int:
+        """已讀取資訊中某個數值欄位的合計"""
+        return sum(entry.info.get(key) or 0 for entry in self.model.entries if entry.info)
@@ -18,7 +18,12 @@ from .tab_images_to_pdf import ImagesToPdfTab
 class MainWindow:
     """主視窗類別"""
 
-    def __init__(self):
+    def __init__(self, history=None):
+        """
+        Args:
+            history: 工作記錄 (core.history.JobHistory)，None=不記錄也不預估耗時
+        """
+        self.history = history
         self.root = tk.Tk()
         self.root.title("Ghostscript GUI")
         self.root.geometry("600x700")
@@ -66,22 +71,22 @@ class MainWindow:
         self.notebook.pack(fill=tk.BOTH, expand=True)
 
         # 建立各功能分頁
-        self.resize_tab = ResizeTab(self.notebook)
+        self.resize_tab = ResizeTab(self.notebook, self.history)
         self.notebook.add(self.resize_tab.frame, text="頁面調整")
 
-        self.to_image_tab = ToImageTab(self.notebook)
+        self.to_image_tab = ToImageTab(self.notebook, self.history)
         self.notebook.add(self.to_image_tab.frame, text="轉換圖片")
 
-        self.merge_tab = MergeTab(self.notebook)
+        self.merge_tab = MergeTab(self.notebook, self.history)
         self.notebook.add(self.merge_tab.frame, text="合併 PDF")
 
-        self.split_tab = SplitTab(self.notebook)
+        self.split_tab = SplitTab(self.notebook, self.history)
         self.notebook.add(self.split_tab.frame, text="分割 PDF")
 
-        self.compress_tab = CompressTab(self.notebook)
+        self.compress_tab = CompressTab(self.notebook, self.history)
         self.notebook.add(self.compress_tab.frame, text="壓縮 PDF")
 
-        self.images_to_pdf_tab = ImagesToPdfTab(self.notebook)
+        self.images_to_pdf_tab = ImagesToPdfTab(self.notebook, self.history)
         self.notebook.add(self.images_to_pdf_tab.frame, text="圖片轉 PDF")
 
     def run(self):
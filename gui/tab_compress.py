@@ -5,19 +5,28 @@
 """
 
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import os
+import subprocess
+import sys
 
-from .base_tab import BaseTab
-from core.config import PDF_SETTINGS
+from .base_tab import BaseTab, format_blank_removed, format_size, format_warnings
+from core.config import PDF_SETTINGS, PROFILES_DIR
+from core.profiles import load_profiles, write_example_profile
+
+
+# 壓縮等級選擇「自訂設定檔」時 quality_var 的值
+PROFILE_CHOICE = "profile"
 
 
 class CompressTab(BaseTab):
     """壓縮 PDF 分頁"""
 
-    def __init__(self, parent):
-        super().__init__(parent)
+    def __init__(self, parent, history=None):
+        super().__init__(parent, history)
+        self.profiles = {}  # {名稱: CompressionProfile}
         self._create_widgets()
+        self._reload_profiles()
 
     def _create_widgets(self):
         """建立元件"""
@@ -55,34 +64,135 @@ class CompressTab(BaseTab):
                 value=value
             ).pack(anchor=tk.W, padx=20, pady=2)
 
+        # 自訂設定檔 (內建與 PROFILES_DIR 中的 JSON 檔案)
+        profile_row = ttk.Frame(settings_frame)
+        profile_row.pack(fill=tk.X, padx=20, pady=2)
+        ttk.Radiobutton(
+            profile_row,
+            text="設定檔:",
+            variable=self.quality_var,
+            value=PROFILE_CHOICE
+        ).pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar()
+        self.profile_combo = ttk.Combobox(profile_row, textvariable=self.profile_var, state="readonly", width=16)
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        self.profile_combo.bind("<<ComboboxSelected>>", self._on_profile_selected)
+        ttk.Button(profile_row, text="重新載入", command=self._reload_profiles).pack(side=tk.LEFT, padx=2)
+        ttk.Button(profile_row, text="開啟設定檔資料夾", command=self._open_profiles_dir).pack(side=tk.LEFT, padx=2)
+
+        self.profile_info_label = ttk.Label(settings_frame, text="", foreground="gray")
+        self.profile_info_label.pack(anchor=tk.W, padx=40, pady=(0, 5))
+
+        # 選擇性壓縮
+        selective_row = ttk.Frame(settings_frame)
+        selective_row.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.selective_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            selective_row,
+            text="只重新壓縮過大的圖片 (其他頁面與內容照原樣保留)",
+            variable=self.selective_var
+        ).pack(side=tk.LEFT)
+        self.compare_full_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            selective_row,
+            text="與完整壓縮比較",
+            variable=self.compare_full_var
+        ).pack(side=tk.LEFT, padx=10)
+
+        self.quality_var.trace_add("write", self.refresh_eta)
+        self.profile_var.trace_add("write", self.refresh_eta)
+
         # 輸出檔案
         self.output_var = tk.StringVar()
-        self.create_file_output(self.frame, "輸出檔案", self.output_var)
+        output_frame = self.create_file_output(self.frame, "輸出檔案", self.output_var)
+        self.create_linearize_option(output_frame)
+        self.create_remove_blank_option(output_frame)
 
         # 進度條和執行按鈕
         self.create_progress_bar(self.frame)
 
-    def _on_file_selected(self, filename: str):
-        """選擇檔案後顯示檔案大小並自動產生輸出檔名"""
-        # 顯示檔案大小
+    def _reload_profiles(self):
+        """在背景重新讀取設定檔"""
+        errors = []
+
+        def on_result(profiles):
+            self.profiles = profiles
+            names = list(profiles)
+            self.profile_combo.config(values=names)
+            if self.profile_var.get() not in profiles:
+                self.profile_var.set(names[0] if names else "")
+            self._on_profile_selected()
+            if errors:
+                self.profile_info_label.config(text="無法載入: " + "；".join(errors), foreground="red")
+
+        self.probe(
+            "profiles", lambda: load_profiles(PROFILES_DIR, errors), on_result,
+            lambda e: self.profile_info_label.config(text=f"無法載入設定檔: {e}", foreground="red"),
+            block_execute=False
+        )
+
+    def _on_profile_selected(self, event=None):
+        """選擇設定檔時顯示說明，並切換為使用設定檔"""
+        profile = self.profiles.get(self.profile_var.get())
+        if profile is None:
+            self.profile_info_label.config(text="", foreground="gray")
+            return
+        source = os.path.basename(profile.source) if profile.source else "內建"
+        self.profile_info_label.config(text=f"{profile.description} ({source})", foreground="gray")
+        if event is not None:
+            self.quality_var.set(PROFILE_CHOICE)
+
+    def _open_profiles_dir(self):
+        """開啟自訂設定檔資料夾 (沒有設定檔時先寫入範例)"""
         try:
-            size = os.path.getsize(filename)
-            size_str = self._format_size(size)
-            self.file_info_label.config(text=f"檔案大小: {size_str}")
-        except Exception:
-            self.file_info_label.config(text="檔案大小: 無法讀取")
+            path = write_example_profile(PROFILES_DIR)
+            if sys.platform == "win32":
+                os.startfile(path)
+            elif sys.platform == "darwin":
+                subprocess.Popen(["open", path])
+            else:
+                subprocess.Popen(["xdg-open", path])
+        except OSError as e:
+            messagebox.showerror("錯誤", f"無法開啟設定檔資料夾：\n{PROFILES_DIR}\n{e}")
+
+    def _selected_compression(self) -> dict:
+        """目前選擇的壓縮參數 (pdf_settings 或 profile)"""
+        if self.quality_var.get() == PROFILE_CHOICE:
+            return {"profile": self.profile_var.get()}
+        return {"pdf_settings": self.quality_var.get()}
 
+    def _on_file_selected(self, filename: str):
+        """選擇檔案後在背景讀取檔案大小與頁數，並自動產生輸出檔名"""
         # 自動產生輸出檔名
         output = self.auto_output_filename(filename, "compressed")
         self.output_var.set(output)
 
-    def _format_size(self, size: int) -> str:
-        """格式化檔案大小"""
-        for unit in ["B", "KB", "MB", "GB"]:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} TB"
+        # 顯示檔案大小
+        self.file_info_label.config(text="檔案大小: 讀取中...")
+
+        def probe():
+            size = os.path.getsize(filename)
+            pages = self.gs_wrapper.get_pdf_page_count(filename) if self.gs_wrapper else 0
+            return size, pages
+
+        def on_result(info):
+            size, pages = info
+            text = f"檔案大小: {format_size(size)}"
+            if pages:
+                text += f"    總頁數: {pages}"
+            self.file_info_label.config(text=text)
+
+        self.probe(
+            "file", probe, on_result,
+            lambda e: self.file_info_label.config(text="檔案大小: 無法讀取")
+        )
+
+    def get_eta_requests(self) -> list:
+        """預估耗時用的工作"""
+        input_file = self.input_var.get()
+        if not os.path.isfile(input_file):
+            return []
+        return [("compress_pdf", dict(self._selected_compression(), input_file=input_file))]
 
     def _on_execute(self):
         """執行壓縮"""
@@ -94,21 +204,40 @@ class CompressTab(BaseTab):
         if not self.validate_output_file(output_file):
             return
 
-        original_size = os.path.getsize(input_file)
+        compression = self._selected_compression()
+        if compression.get("profile") == "":
+            messagebox.showwarning("警告", "請選擇壓縮設定檔")
+            return
+        linearize = self.linearize_var.get()
+        selective = self.selective_var.get()
+        compare_full = selective and self.compare_full_var.get()
+        remove_blank = self.remove_blank_var.get()
 
         def task():
-            success, msg = self.gs_wrapper.compress_pdf(
+            result = self.gs_wrapper.compress_pdf(
                 input_file=input_file,
                 output_file=output_file,
-                pdf_settings=self.quality_var.get(),
+                linearize=linearize,
+                **compression,
+                selective=selective,
+                compare_full=compare_full,
+                remove_blank=remove_blank,
                 progress_callback=self.get_progress_callback()
             )
 
-            if success and os.path.exists(output_file):
-                new_size = os.path.getsize(output_file)
-                ratio = (1 - new_size / original_size) * 100
-                return True, f"壓縮完成！\n原始大小: {self._format_size(original_size)}\n壓縮後: {self._format_size(new_size)}\n節省: {ratio:.1f}%"
-
-            return success, msg
+            if result.success and result.output_files:
+                original_size = result.input_bytes
+                new_size = result.output_bytes
+                ratio = (1 - new_size / original_size) * 100 if original_size else 0
+                message = f"壓縮完成！\n原始大小: {format_size(original_size)}\n壓縮後: {format_size(new_size)}\n節省: {ratio:.1f}%\n耗時: {result.wall_time:.1f} 秒"
+                report = result.details.get("selective")
+                if report:
+                    message += f"\n重新壓縮的圖片: {report['images_recompressed']} 張 (影響 {len(report['pages_touched'])}/{report['pages_total']} 頁)"
+                    full = report.get("full")
+                    if full and full["success"]:
+                        message += f"\n\n完整壓縮: {format_size(full['output_bytes'])}，耗時 {full['seconds']:.1f} 秒"
+                return True, message + format_blank_removed(result) + format_warnings(result.warnings)
+
+            return result
 
         self.run_in_thread(task)
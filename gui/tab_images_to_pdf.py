@@ -7,16 +7,26 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import shutil
+import tempfile
 import img2pdf
 
-from .base_tab import BaseTab
+from .base_tab import BaseTab, format_size
+from core.bilevel import prepare_bilevel
+from core.config import DPI_OPTIONS, IMAGE_OPTIMIZE, PAPER_SIZES, PARALLEL_MAX_JOBS
+from core.image_optimize import ImageOptimizeReport, optimize_images, page_layout
+from .file_list import FileListView, scan_folder
+
+
+# 可加入的圖片副檔名
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff", ".tif")
 
 
 class ImagesToPdfTab(BaseTab):
     """圖片轉 PDF 分頁"""
 
-    def __init__(self, parent):
-        super().__init__(parent)
+    def __init__(self, parent, history=None):
+        super().__init__(parent, history)
         self._create_widgets()
 
     def _create_widgets(self):
@@ -25,30 +35,30 @@ class ImagesToPdfTab(BaseTab):
         list_frame = ttk.LabelFrame(self.frame, text="圖片檔案列表 (依順序合併)")
         list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
-        # 列表和捲軸
-        list_inner = ttk.Frame(list_frame)
-        list_inner.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        scrollbar = ttk.Scrollbar(list_inner)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.file_listbox = tk.Listbox(
-            list_inner,
-            selectmode=tk.EXTENDED,
-            yscrollcommand=scrollbar.set
+        # 檔案列表 (背景讀取圖片尺寸與大小)
+        self.file_list = FileListView(
+            list_frame,
+            columns=[("dimensions", "尺寸", 110), ("size", "大小", 90)],
+            probe=self._probe_file,
+            format_info=lambda info: [f"{info['width']} × {info['height']}", format_size(info["size"])],
+            on_change=self._on_list_changed
         )
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.file_listbox.yview)
+        self.file_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.list_info_label = ttk.Label(list_frame, text="共 0 個圖片")
+        self.list_info_label.pack(anchor=tk.W, padx=5)
 
         # 按鈕列
         btn_frame = ttk.Frame(list_frame)
         btn_frame.pack(fill=tk.X, padx=5, pady=5)
 
         ttk.Button(btn_frame, text="新增圖片", command=self._add_files).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="移除選取", command=self._remove_selected).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="清空列表", command=self._clear_list).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="上移", command=self._move_up).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="下移", command=self._move_down).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="匯入資料夾", command=self._add_folder).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="移除選取", command=self.file_list.remove_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="清空列表", command=self.file_list.clear).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="上移", command=lambda: self.file_list.move_selected(-1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="下移", command=lambda: self.file_list.move_selected(1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="依檔名排序", command=self.file_list.sort).pack(side=tk.LEFT, padx=2)
 
         # 分批設定
         batch_frame = ttk.Frame(self.frame)
@@ -59,6 +69,67 @@ class ImagesToPdfTab(BaseTab):
         batch_entry = ttk.Entry(batch_frame, textvariable=self.batch_size_var, width=10)
         batch_entry.pack(side=tk.LEFT, padx=5)
 
+        # 黑白圖片壓縮
+        g4_frame = ttk.Frame(self.frame)
+        g4_frame.pack(fill=tk.X, pady=5)
+
+        self.g4_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            g4_frame,
+            text="黑白圖片以 CCITT G4 壓縮",
+            variable=self.g4_var,
+            command=self._toggle_g4
+        ).pack(side=tk.LEFT)
+
+        self.g4_threshold_var = tk.BooleanVar(value=False)
+        self.g4_threshold_check = ttk.Checkbutton(
+            g4_frame,
+            text="接近黑白的掃描也二值化 (失去灰階細節)",
+            variable=self.g4_threshold_var,
+            state=tk.DISABLED
+        )
+        self.g4_threshold_check.pack(side=tk.LEFT, padx=10)
+
+        # 大小最佳化
+        optimize_frame = ttk.Frame(self.frame)
+        optimize_frame.pack(fill=tk.X, pady=5)
+
+        self.optimize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            optimize_frame,
+            text="縮小圖片到目標解析度",
+            variable=self.optimize_var,
+            command=self._toggle_optimize
+        ).pack(side=tk.LEFT)
+
+        ttk.Label(optimize_frame, text="紙張:").pack(side=tk.LEFT, padx=(10, 0))
+        self.paper_var = tk.StringVar(value=IMAGE_OPTIMIZE["paper_size"])
+        self.paper_combo = ttk.Combobox(
+            optimize_frame,
+            textvariable=self.paper_var,
+            values=list(PAPER_SIZES.keys()),
+            state=tk.DISABLED,
+            width=8
+        )
+        self.paper_combo.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(optimize_frame, text="解析度:").pack(side=tk.LEFT, padx=(10, 0))
+        self.dpi_var = tk.StringVar(value=str(IMAGE_OPTIMIZE["dpi"]))
+        self.dpi_combo = ttk.Combobox(
+            optimize_frame,
+            textvariable=self.dpi_var,
+            values=[str(d) for d in DPI_OPTIONS],
+            state=tk.DISABLED,
+            width=6
+        )
+        self.dpi_combo.pack(side=tk.LEFT, padx=5)
+        ttk.Label(optimize_frame, text="dpi").pack(side=tk.LEFT)
+
+        ttk.Label(optimize_frame, text="JPEG 品質:").pack(side=tk.LEFT, padx=(10, 0))
+        self.quality_var = tk.StringVar(value=str(IMAGE_OPTIMIZE["jpeg_quality"]))
+        self.quality_entry = ttk.Entry(optimize_frame, textvariable=self.quality_var, width=5, state=tk.DISABLED)
+        self.quality_entry.pack(side=tk.LEFT, padx=5)
+
         # 輸出檔案
         self.output_var = tk.StringVar()
         self.create_file_output(self.frame, "輸出 PDF", self.output_var)
@@ -66,70 +137,76 @@ class ImagesToPdfTab(BaseTab):
         # 進度條和執行按鈕
         self.create_progress_bar(self.frame)
 
+    def _toggle_g4(self):
+        """切換 G4 壓縮選項"""
+        self.g4_threshold_check.config(state=tk.NORMAL if self.g4_var.get() else tk.DISABLED)
+
+    def _toggle_optimize(self):
+        """切換大小最佳化選項"""
+        enabled = self.optimize_var.get()
+        self.paper_combo.config(state="readonly" if enabled else tk.DISABLED)
+        self.dpi_combo.config(state="readonly" if enabled else tk.DISABLED)
+        self.quality_entry.config(state=tk.NORMAL if enabled else tk.DISABLED)
+
+    @staticmethod
+    def _probe_file(path: str) -> dict:
+        """讀取圖片尺寸與大小 (背景執行緒，只讀取檔頭)"""
+        from PIL import Image
+        size = os.path.getsize(path)
+        with Image.open(path) as image:
+            width, height = image.size
+        return {"width": width, "height": height, "size": size}
+
     def _add_files(self):
         """新增圖片檔案"""
-        # 記錄新增前列表是否為空
-        was_empty = self.file_listbox.size() == 0
-
         filenames = filedialog.askopenfilenames(
             filetypes=[
-                ("圖片檔案", "*.png *.jpg *.jpeg *.bmp *.gif *.tiff *.tif"),
+                ("圖片檔案", " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)),
                 ("PNG 檔案", "*.png"),
                 ("JPEG 檔案", "*.jpg *.jpeg"),
                 ("所有檔案", "*.*")
             ]
         )
-        for f in filenames:
-            self.file_listbox.insert(tk.END, f)
+        self._add_paths(filenames)
 
-        # 若之前列表為空，自動產生輸出檔名
-        if was_empty and self.file_listbox.size() > 0:
-            first_file = self.file_listbox.get(0)
-            dirname = os.path.dirname(first_file)
-            basename = os.path.splitext(os.path.basename(first_file))[0]
-            self.output_var.set(os.path.join(dirname, f"{basename}_merged.pdf"))
-
-    def _remove_selected(self):
-        """移除選取的檔案"""
-        selected = list(self.file_listbox.curselection())
-        selected.reverse()  # 從後面開始刪除，避免索引錯誤
-        for i in selected:
-            self.file_listbox.delete(i)
-
-    def _clear_list(self):
-        """清空列表"""
-        self.file_listbox.delete(0, tk.END)
-
-    def _move_up(self):
-        """上移選取的檔案"""
-        selected = self.file_listbox.curselection()
-        if not selected or selected[0] == 0:
+    def _add_folder(self):
+        """匯入資料夾 (含子資料夾) 中的所有圖片，依檔名自然排序"""
+        dirname = filedialog.askdirectory()
+        if not dirname:
             return
+        self.list_info_label.config(text="掃描資料夾中...")
+        self.probe(
+            "folder",
+            lambda: scan_folder(dirname, IMAGE_EXTENSIONS),
+            self._add_paths,
+            lambda e: messagebox.showerror("錯誤", f"無法讀取資料夾：\n{e}")
+        )
 
-        for i in selected:
-            if i > 0:
-                item = self.file_listbox.get(i)
-                self.file_listbox.delete(i)
-                self.file_listbox.insert(i - 1, item)
-                self.file_listbox.selection_set(i - 1)
-
-    def _move_down(self):
-        """下移選取的檔案"""
-        selected = list(self.file_listbox.curselection())
-        if not selected or selected[-1] == self.file_listbox.size() - 1:
+    def _add_paths(self, paths):
+        """加入檔案；若之前列表為空，自動產生輸出檔名"""
+        was_empty = len(self.file_list) == 0
+        if not paths:
+            self._on_list_changed()
             return
+        self.file_list.add(paths)
 
-        selected.reverse()
-        for i in selected:
-            if i < self.file_listbox.size() - 1:
-                item = self.file_listbox.get(i)
-                self.file_listbox.delete(i)
-                self.file_listbox.insert(i + 1, item)
-                self.file_listbox.selection_set(i + 1)
+        if was_empty:
+            first_file = self.file_list.paths()[0]
+            dirname = os.path.dirname(first_file)
+            basename = os.path.splitext(os.path.basename(first_file))[0]
+            self.output_var.set(os.path.join(dirname, f"{basename}_merged.pdf"))
+
+    def _on_list_changed(self):
+        """列表內容、順序或檔案資訊改變"""
+        pending = self.file_list.pending_count()
+        text = f"共 {len(self.file_list)} 個圖片，{format_size(self.file_list.total('size'))}"
+        if pending:
+            text += f" (讀取中 {pending})"
+        self.list_info_label.config(text=text)
 
     def _on_execute(self):
         """執行圖片轉 PDF"""
-        files = list(self.file_listbox.get(0, tk.END))
+        files = self.file_list.paths()
         output_file = self.output_var.get()
 
         if len(files) < 1:
@@ -152,28 +229,84 @@ class ImagesToPdfTab(BaseTab):
         except ValueError:
             batch_size = 0
 
+        use_g4 = self.g4_var.get()
+        threshold = self.g4_threshold_var.get()
+
+        # 大小最佳化設定
+        optimize = None
+        if self.optimize_var.get():
+            try:
+                quality = int(self.quality_var.get())
+                if not 1 <= quality <= 95:
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("警告", "JPEG 品質必須是 1~95 的整數")
+                return
+            optimize = dict(
+                IMAGE_OPTIMIZE, paper_size=self.paper_var.get(), dpi=int(self.dpi_var.get()), jpeg_quality=quality
+            )
+
         def task():
+            work_dir = None
             try:
+                # 黑白圖片先轉為 G4 TIFF，其他圖片照原樣交給 img2pdf
+                sources, report = files, None
+                if use_g4:
+                    self._set_status_safe("分析黑白圖片...")
+                    output_dir = os.path.dirname(os.path.abspath(output_file))
+                    work_dir = tempfile.mkdtemp(prefix="gsgui-g4-", dir=output_dir)
+                    report = prepare_bilevel(files, work_dir, threshold, jobs=PARALLEL_MAX_JOBS)
+                    sources = report.sources
+
                 if batch_size == 0 or batch_size >= len(files):
                     # 全部合併為一個 PDF
-                    with open(output_file, "wb") as f:
-                        f.write(img2pdf.convert(files))
-                    return True, f"成功將 {len(files)} 個圖片合併為 PDF"
+                    batches = [(output_file, 0, len(files))]
                 else:
                     # 分批轉換
                     base_name = os.path.splitext(output_file)[0]
                     ext = os.path.splitext(output_file)[1] or ".pdf"
-
-                    pdf_count = 0
-                    for i in range(0, len(files), batch_size):
-                        batch_files = files[i:i + batch_size]
-                        pdf_count += 1
-                        batch_output = f"{base_name}_{pdf_count:03d}{ext}"
+                    batches = [
+                        (f"{base_name}_{index + 1:03d}{ext}", start, start + batch_size)
+                        for index, start in enumerate(range(0, len(files), batch_size))
+                    ]
+
+                written = plain = 0
+                opt_report = ImageOptimizeReport() if optimize else None
+                if optimize:
+                    self._set_status_safe("最佳化圖片並轉換...")
+                for batch_output, start, end in batches:
+                    if optimize:
+                        # 同時最佳化多張圖片，整批 (一個 PDF) 處理完才交給 img2pdf；頁面使用所選紙張
+                        images = list(optimize_images(sources[start:end], optimize, PARALLEL_MAX_JOBS, opt_report))
                         with open(batch_output, "wb") as f:
-                            f.write(img2pdf.convert(batch_files))
-
-                    return True, f"成功將 {len(files)} 個圖片分成 {pdf_count} 個 PDF"
+                            img2pdf.convert(images, outputstream=f, layout_fun=page_layout(optimize["paper_size"]))
+                        written += os.path.getsize(batch_output)
+                        continue
+                    data = img2pdf.convert(sources[start:end])
+                    with open(batch_output, "wb") as f:
+                        f.write(data)
+                    written += len(data)
+                    # 與直接以 img2pdf 轉換比較 (沒有圖片被轉換時大小相同)
+                    if report and any(start <= index < end for index in report.converted):
+                        plain += len(img2pdf.convert(files[start:end]))
+                    else:
+                        plain += len(data)
+
+                if len(batches) == 1:
+                    message = f"成功將 {len(files)} 個圖片合併為 PDF"
+                else:
+                    message = f"成功將 {len(files)} 個圖片分成 {len(batches)} 個 PDF"
+                if report:
+                    # 最佳化時不另外以 img2pdf 轉換比較
+                    report.pdf_bytes, report.plain_pdf_bytes = written, None if optimize else plain
+                    message += "\n" + report.summary()
+                if opt_report:
+                    message += "\n" + opt_report.summary() + f"\nPDF: {written / 1048576:.2f} MB"
+                return True, message
             except Exception as e:
                 return False, f"轉換失敗: {str(e)}"
+            finally:
+                if work_dir:
+                    shutil.rmtree(work_dir, ignore_errors=True)
 
         self.run_in_thread(task)
@@ -8,14 +8,15 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 
-from .base_tab import BaseTab
+from .base_tab import BaseTab, format_blank_removed, format_size, format_warnings
+from .file_list import FileListView, scan_folder
 
 
 class MergeTab(BaseTab):
     """合併 PDF 分頁"""
 
-    def __init__(self, parent):
-        super().__init__(parent)
+    def __init__(self, parent, history=None):
+        super().__init__(parent, history)
         self._create_widgets()
 
     def _create_widgets(self):
@@ -24,93 +25,104 @@ class MergeTab(BaseTab):
         list_frame = ttk.LabelFrame(self.frame, text="PDF 檔案列表 (依順序合併)")
         list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
-        # 列表和捲軸
-        list_inner = ttk.Frame(list_frame)
-        list_inner.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        scrollbar = ttk.Scrollbar(list_inner)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.file_listbox = tk.Listbox(
-            list_inner,
-            selectmode=tk.EXTENDED,
-            yscrollcommand=scrollbar.set
+        # 檔案列表 (背景讀取頁數與大小)
+        self.file_list = FileListView(
+            list_frame,
+            columns=[("pages", "頁數", 60), ("size", "大小", 90)],
+            probe=self._probe_file,
+            format_info=lambda info: [str(info["pages"] or "?"), format_size(info["size"])],
+            on_change=self._on_list_changed
         )
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.file_listbox.yview)
+        self.file_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.list_info_label = ttk.Label(list_frame, text="共 0 個檔案")
+        self.list_info_label.pack(anchor=tk.W, padx=5)
 
         # 按鈕列
         btn_frame = ttk.Frame(list_frame)
         btn_frame.pack(fill=tk.X, padx=5, pady=5)
 
         ttk.Button(btn_frame, text="新增檔案", command=self._add_files).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="移除選取", command=self._remove_selected).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="清空列表", command=self._clear_list).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="上移", command=self._move_up).pack(side=tk.LEFT, padx=2)
-        ttk.Button(btn_frame, text="下移", command=self._move_down).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="匯入資料夾", command=self._add_folder).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="移除選取", command=self.file_list.remove_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="清空列表", command=self.file_list.clear).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="上移", command=lambda: self.file_list.move_selected(-1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="下移", command=lambda: self.file_list.move_selected(1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="依檔名排序", command=self.file_list.sort).pack(side=tk.LEFT, padx=2)
 
         # 輸出檔案
         self.output_var = tk.StringVar()
-        self.create_file_output(self.frame, "輸出檔案", self.output_var)
+        output_frame = self.create_file_output(self.frame, "輸出檔案", self.output_var)
+        self.create_linearize_option(output_frame)
+        self.create_remove_blank_option(output_frame)
+        self.dedupe_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            output_frame,
+            text="去除重複的圖片與字型 (各檔案共用相同的圖檔、字型時可縮小檔案)",
+            variable=self.dedupe_var
+        ).pack(anchor=tk.W, padx=5, pady=(0, 5))
 
         # 進度條和執行按鈕
         self.create_progress_bar(self.frame)
 
+    def _probe_file(self, path: str) -> dict:
+        """讀取 PDF 頁數與大小 (背景執行緒)"""
+        size = os.path.getsize(path)
+        pages = self.gs_wrapper.get_pdf_page_count(path) if self.gs_wrapper else 0
+        return {"pages": pages, "size": size}
+
     def _add_files(self):
         """新增檔案"""
         filenames = filedialog.askopenfilenames(
             filetypes=[("PDF 檔案", "*.pdf"), ("所有檔案", "*.*")]
         )
-        for f in filenames:
-            self.file_listbox.insert(tk.END, f)
-
-        # 自動產生輸出檔名
-        if self.file_listbox.size() > 0 and not self.output_var.get():
-            first_file = self.file_listbox.get(0)
-            dirname = os.path.dirname(first_file)
-            self.output_var.set(os.path.join(dirname, "merged.pdf"))
+        self._add_paths(filenames)
 
-    def _remove_selected(self):
-        """移除選取的檔案"""
-        selected = list(self.file_listbox.curselection())
-        selected.reverse()  # 從後面開始刪除，避免索引錯誤
-        for i in selected:
-            self.file_listbox.delete(i)
-
-    def _clear_list(self):
-        """清空列表"""
-        self.file_listbox.delete(0, tk.END)
-
-    def _move_up(self):
-        """上移選取的檔案"""
-        selected = self.file_listbox.curselection()
-        if not selected or selected[0] == 0:
+    def _add_folder(self):
+        """匯入資料夾 (含子資料夾) 中的所有 PDF，依檔名自然排序"""
+        dirname = filedialog.askdirectory()
+        if not dirname:
             return
+        self.list_info_label.config(text="掃描資料夾中...")
+        self.probe(
+            "folder",
+            lambda: scan_folder(dirname, (".pdf",)),
+            self._add_paths,
+            lambda e: messagebox.showerror("錯誤", f"無法讀取資料夾：\n{e}")
+        )
 
-        for i in selected:
-            if i > 0:
-                item = self.file_listbox.get(i)
-                self.file_listbox.delete(i)
-                self.file_listbox.insert(i - 1, item)
-                self.file_listbox.selection_set(i - 1)
-
-    def _move_down(self):
-        """下移選取的檔案"""
-        selected = list(self.file_listbox.curselection())
-        if not selected or selected[-1] == self.file_listbox.size() - 1:
+    def _add_paths(self, paths):
+        """加入檔案並自動產生輸出檔名"""
+        if not paths:
+            self._on_list_changed()
             return
+        self.file_list.add(paths)
+        if not self.output_var.get():
+            dirname = os.path.dirname(self.file_list.paths()[0])
+            self.output_var.set(os.path.join(dirname, "merged.pdf"))
 
-        selected.reverse()
-        for i in selected:
-            if i < self.file_listbox.size() - 1:
-                item = self.file_listbox.get(i)
-                self.file_listbox.delete(i)
-                self.file_listbox.insert(i + 1, item)
-                self.file_listbox.selection_set(i + 1)
+    def _on_list_changed(self):
+        """列表內容、順序或檔案資訊改變"""
+        count = len(self.file_list)
+        pending = self.file_list.pending_count()
+        text = f"共 {count} 個檔案，{self.file_list.total('pages')} 頁，{format_size(self.file_list.total('size'))}"
+        if pending:
+            text += f" (讀取中 {pending})"
+        self.list_info_label.config(text=text)
+        # 全部讀取完成後才預估耗時，避免讀取期間反覆預估
+        if not pending:
+            self.refresh_eta()
+
+    def get_eta_requests(self) -> list:
+        """預估耗時用的工作"""
+        files = [f for f in self.file_list.paths() if os.path.isfile(f)]
+        if len(files) < 2:
+            return []
+        return [("merge_pdfs", {"input_files": files})]
 
     def _on_execute(self):
         """執行合併"""
-        files = list(self.file_listbox.get(0, tk.END))
+        files = self.file_list.paths()
         output_file = self.output_var.get()
 
         if len(files) < 2:
@@ -125,11 +137,32 @@ class MergeTab(BaseTab):
         if not self.validate_output_file(output_file):
             return
 
+        linearize = self.linearize_var.get()
+        dedupe = self.dedupe_var.get()
+        remove_blank = self.remove_blank_var.get()
+
         def task():
-            return self.gs_wrapper.merge_pdfs(
+            result = self.gs_wrapper.merge_pdfs(
                 input_files=files,
                 output_file=output_file,
+                linearize=linearize,
+                dedupe=dedupe,
+                remove_blank=remove_blank,
                 progress_callback=self.get_progress_callback()
             )
 
+            report = result.details.get("dedup")
+            if result.success and report:
+                return True, (
+                    f"合併完成！\n輸出大小: {format_size(result.output_bytes)}\n"
+                    f"去除重複物件: {report['objects_removed']} 個，"
+                    f"節省 {format_size(max(report['bytes_saved'], 0))}"
+                ) + format_blank_removed(result) + format_warnings(result.warnings)
+            if result.success and remove_blank:
+                return True, (
+                    f"合併完成！\n輸出大小: {format_size(result.output_bytes)}"
+                ) + format_blank_removed(result) + format_warnings(result.warnings)
+
+            return result
+
         self.run_in_thread(task)
@@ -6,6 +6,7 @@
 
 import tkinter as tk
 from tkinter import ttk
+import os
 
 from .base_tab import BaseTab
 from core.config import PAPER_SIZES, PDF_SETTINGS, DPI_OPTIONS
@@ -14,8 +15,8 @@ from core.config import PAPER_SIZES, PDF_SETTINGS, DPI_OPTIONS
 class ResizeTab(BaseTab):
     """頁面調整分頁"""
 
-    def __init__(self, parent):
-        super().__init__(parent)
+    def __init__(self, parent, history=None):
+        super().__init__(parent, history)
         self._create_widgets()
 
     def _create_widgets(self):
@@ -119,11 +120,15 @@ class ResizeTab(BaseTab):
 
         # 輸出檔案
         self.output_var = tk.StringVar()
-        self.create_file_output(self.frame, "輸出檔案", self.output_var)
+        output_frame = self.create_file_output(self.frame, "輸出檔案", self.output_var)
+        self.create_linearize_option(output_frame)
 
         # 進度條和執行按鈕
         self.create_progress_bar(self.frame)
 
+        self.use_advanced_var.trace_add("write", self.refresh_eta)
+        self.dpi_var.trace_add("write", self.refresh_eta)
+
     def _toggle_advanced(self):
         """切換進階選項"""
         if self.use_advanced_var.get():
@@ -146,6 +151,14 @@ class ResizeTab(BaseTab):
         output = self.auto_output_filename(filename, "resized")
         self.output_var.set(output)
 
+    def get_eta_requests(self) -> list:
+        """預估耗時用的工作"""
+        input_file = self.input_var.get()
+        if not os.path.isfile(input_file):
+            return []
+        dpi = int(self.dpi_var.get()) if self.use_advanced_var.get() else None
+        return [("resize_pdf", {"input_file": input_file, "dpi": dpi})]
+
     def _on_execute(self):
         """執行頁面調整"""
         input_file = self.input_var.get()
@@ -169,6 +182,7 @@ class ResizeTab(BaseTab):
         # 只有勾選「重新壓縮」時才使用 DPI 和品質設定
         dpi = int(self.dpi_var.get()) if self.use_advanced_var.get() else None
         pdf_settings = self.quality_var.get() if self.use_advanced_var.get() else None
+        linearize = self.linearize_var.get()
 
         def task():
             return self.gs_wrapper.resize_pdf(
@@ -180,6 +194,7 @@ class ResizeTab(BaseTab):
                 fit_page=self.fit_page_var.get(),
                 dpi=dpi,
                 pdf_settings=pdf_settings,
+                linearize=linearize,
                 progress_callback=self.get_progress_callback()
             )
 
@@ -8,16 +8,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 
-from .base_tab import BaseTab
+from .base_tab import BaseTab, format_page_size, format_size, format_warnings
+from core.journal import JobJournal
+from core.page_ranges import PageRangeError, parse_page_ranges, format_page_ranges
 
 
 class SplitTab(BaseTab):
     """分割 PDF 分頁"""
 
-    def __init__(self, parent):
-        super().__init__(parent)
-        self.page_ranges = []  # 儲存頁碼範圍的列表 [(first_var, last_var, frame), ...]
+    def __init__(self, parent, history=None):
+        super().__init__(parent, history)
+        self.page_ranges = []  # 頁碼範圍 [(first, last), ...]，由運算式解析而來
+        self._rendered_ranges = []  # 範圍列表目前顯示的內容
         self.total_pages = 0
+        self.probed_file = ""  # total_pages 所屬的檔案
         self._create_widgets()
 
     def _create_widgets(self):
@@ -51,43 +55,44 @@ class SplitTab(BaseTab):
             command=self._toggle_mode
         ).pack(anchor=tk.W)
 
-        # 頁碼範圍列表容器（含捲軸）
-        scroll_frame = ttk.Frame(mode1_frame)
-        scroll_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
+        # 頁碼範圍運算式
+        self.range_expr_var = tk.StringVar(value="1-")
+        self.range_expr_entry = ttk.Entry(mode1_frame, textvariable=self.range_expr_var)
+        self.range_expr_entry.pack(fill=tk.X, padx=20, pady=(5, 0))
+        self.range_expr_var.trace_add("write", self._on_range_expr_changed)
 
-        # Canvas 和 Scrollbar
-        self.ranges_canvas = tk.Canvas(scroll_frame, height=150, highlightthickness=0)
-        scrollbar = ttk.Scrollbar(scroll_frame, orient=tk.VERTICAL, command=self.ranges_canvas.yview)
-        self.ranges_container = ttk.Frame(self.ranges_canvas)
-
-        self.ranges_canvas.configure(yscrollcommand=scrollbar.set)
+        self.range_status_label = ttk.Label(
+            mode1_frame, text="例: 1-3,5,9-,even,every:10 (每個範圍輸出一個檔案)", foreground="gray"
+        )
+        self.range_status_label.pack(anchor=tk.W, padx=20)
+
+        # 範圍列表 (依 self.page_ranges 顯示，只更新有變動的列)
+        list_frame = ttk.Frame(mode1_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
+
+        self.range_tree = ttk.Treeview(
+            list_frame,
+            columns=("index", "first", "last", "pages"),
+            show="headings",
+            height=6,
+            selectmode="extended"
+        )
+        for column, text in (("index", "#"), ("first", "從"), ("last", "到"), ("pages", "頁數")):
+            self.range_tree.heading(column, text=text)
+            self.range_tree.column(column, width=70, anchor=tk.CENTER)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.range_tree.yview)
+        self.range_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.ranges_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        # 將容器放入 Canvas
-        self.canvas_window = self.ranges_canvas.create_window((0, 0), window=self.ranges_container, anchor=tk.NW)
-
-        # 綁定事件以更新捲動區域
-        self.ranges_container.bind("<Configure>", self._on_ranges_configure)
-        self.ranges_canvas.bind("<Configure>", self._on_canvas_configure)
+        self.range_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.range_tree.bind("<Double-1>", self._on_range_double_click)
 
-        # 滑鼠滾輪支援（跨平台）
-        import sys
-        if sys.platform == "win32":
-            self.ranges_canvas.bind_all("<MouseWheel>", self._on_mousewheel)
-        else:
-            # Linux/macOS
-            self.ranges_canvas.bind_all("<Button-4>", self._on_mousewheel_linux)
-            self.ranges_canvas.bind_all("<Button-5>", self._on_mousewheel_linux)
-
-        # 新增範圍按鈕
+        # 新增、移除範圍按鈕
         add_btn_frame = ttk.Frame(mode1_frame)
         add_btn_frame.pack(fill=tk.X, padx=20)
-        ttk.Button(
-            add_btn_frame,
-            text="+ 新增範圍",
-            command=self._add_range
-        ).pack(side=tk.LEFT)
+        self.add_range_btn = ttk.Button(add_btn_frame, text="+ 新增範圍", command=self._add_range)
+        self.add_range_btn.pack(side=tk.LEFT)
+        self.remove_range_btn = ttk.Button(add_btn_frame, text="移除選取", command=self._remove_selected_ranges)
+        self.remove_range_btn.pack(side=tk.LEFT, padx=5)
 
         # 模式 2: 每 N 頁分割
         mode2_frame = ttk.Frame(settings_frame)
@@ -102,6 +107,7 @@ class SplitTab(BaseTab):
         ).pack(side=tk.LEFT)
 
         self.every_n_var = tk.StringVar(value="1")
+        self.every_n_var.trace_add("write", self.refresh_eta)
         self.every_n_entry = ttk.Entry(mode2_frame, textvariable=self.every_n_var, width=5, state=tk.DISABLED)
         self.every_n_entry.pack(side=tk.LEFT, padx=5)
 
@@ -119,8 +125,32 @@ class SplitTab(BaseTab):
             command=self._toggle_mode
         ).pack(side=tk.LEFT)
 
-        # 新增第一個範圍（必須在所有模式元件建立後才呼叫）
-        self._add_range()
+        self.resume_var = tk.BooleanVar(value=False)
+        self.resume_check = ttk.Checkbutton(
+            mode3_frame,
+            text="可續傳 (記錄完成的頁面，中斷後重新執行時略過)",
+            variable=self.resume_var,
+            state=tk.DISABLED
+        )
+        self.resume_check.pack(side=tk.LEFT, padx=10)
+
+        # 模式 4: 依檔案大小分割
+        mode4_frame = ttk.Frame(settings_frame)
+        mode4_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Radiobutton(
+            mode4_frame,
+            text="每個檔案不超過",
+            variable=self.split_mode_var,
+            value="size",
+            command=self._toggle_mode
+        ).pack(side=tk.LEFT)
+
+        self.max_mb_var = tk.StringVar(value="10")
+        self.max_mb_entry = ttk.Entry(mode4_frame, textvariable=self.max_mb_var, width=6, state=tk.DISABLED)
+        self.max_mb_entry.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(mode4_frame, text="MB (連續頁面，依實際大小檢查)").pack(side=tk.LEFT)
 
         # 輸出設定
         output_frame = ttk.LabelFrame(self.frame, text="輸出設定")
@@ -140,119 +170,93 @@ class SplitTab(BaseTab):
         ).pack(side=tk.RIGHT)
 
         ttk.Label(output_frame, text="提示: 多檔案輸出時，檔名會自動加上編號 (例: output_001.pdf)").pack(padx=5, pady=5, anchor=tk.W)
+        self.create_linearize_option(output_frame)
+        self.create_remove_blank_option(output_frame)
 
         # 進度條和執行按鈕
         self.create_progress_bar(self.frame)
 
+    def _on_range_expr_changed(self, *args):
+        """運算式改變時重新解析並更新範圍列表"""
+        try:
+            ranges = parse_page_ranges(self.range_expr_var.get(), self.total_pages or None)
+        except PageRangeError as e:
+            self.range_status_label.config(text=str(e), foreground="red")
+            return
+        pages = sum(last - first + 1 for first, last in ranges)
+        self.range_status_label.config(text=f"{len(ranges)} 個範圍，共 {pages} 頁", foreground="gray")
+        self.page_ranges = ranges
+        self._refresh_range_list()
+        self.refresh_eta()
+
+    def _set_ranges(self, ranges: list):
+        """以範圍列表更新運算式 (會重新解析與驗證)"""
+        self.range_expr_var.set(format_page_ranges(ranges))
+
+    def _refresh_range_list(self):
+        """更新範圍列表，只重繪有變動的列"""
+        tree = self.range_tree
+        rendered = self._rendered_ranges
+        for idx, (first, last) in enumerate(self.page_ranges):
+            values = (idx + 1, first, last, last - first + 1)
+            if idx >= len(rendered):
+                tree.insert("", tk.END, iid=str(idx), values=values)
+            elif rendered[idx] != (first, last):
+                tree.item(str(idx), values=values)
+        if len(rendered) > len(self.page_ranges):
+            tree.delete(*(str(i) for i in range(len(self.page_ranges), len(rendered))))
+        self._rendered_ranges = list(self.page_ranges)
+
     def _add_range(self):
-        """新增一個頁碼範圍"""
-        # 計算預設值
-        if self.page_ranges:
-            # 從上一個範圍的結束頁碼 +1 開始
-            last_range = self.page_ranges[-1]
+        """新增一個頁碼範圍 (接在最後一個範圍之後)"""
+        start = self.page_ranges[-1][1] + 1 if self.page_ranges else 1
+        # 如果超過總頁數，限制在總頁數
+        if self.total_pages > 0 and start > self.total_pages:
+            start = self.total_pages
+        self._set_ranges(self.page_ranges + [(start, start)])
+        self.range_tree.see(str(len(self.page_ranges) - 1))
+
+    def _remove_selected_ranges(self):
+        """移除選取的範圍"""
+        selected = {int(iid) for iid in self.range_tree.selection()}
+        if selected:
+            self.range_tree.selection_remove(*self.range_tree.selection())
+            self._set_ranges([r for i, r in enumerate(self.page_ranges) if i not in selected])
+
+    def _on_range_double_click(self, event):
+        """雙擊「從」或「到」欄位直接編輯"""
+        if self.split_mode_var.get() != "range":
+            return
+        iid = self.range_tree.identify_row(event.y)
+        column = self.range_tree.identify_column(event.x)
+        if not iid or column not in ("#2", "#3"):
+            return
+
+        idx = int(iid)
+        pos = 0 if column == "#2" else 1
+        x, y, width, height = self.range_tree.bbox(iid, column)
+        var = tk.StringVar(value=str(self.page_ranges[idx][pos]))
+        entry = ttk.Entry(self.range_tree, textvariable=var, justify=tk.CENTER)
+        entry.place(x=x, y=y, width=width, height=height)
+        entry.focus_set()
+        entry.select_range(0, tk.END)
+
+        def commit(event=None):
+            if not entry.winfo_exists():
+                return
+            entry.destroy()
             try:
-                start = int(last_range[1].get()) + 1
+                page = int(var.get())
             except ValueError:
-                start = 1
-
-            # 如果超過總頁數，限制在總頁數
-            if self.total_pages > 0 and start > self.total_pages:
-                start = self.total_pages
-
-            end = start  # 新範圍預設 end = start
-        else:
-            start = 1
-            end = self.total_pages if self.total_pages > 0 else 1
-
-        # 建立範圍框架
-        range_frame = ttk.Frame(self.ranges_container)
-        range_frame.pack(fill=tk.X, pady=2)
-
-        # 範圍編號
-        range_num = len(self.page_ranges) + 1
-        ttk.Label(range_frame, text=f"#{range_num}", width=3).pack(side=tk.LEFT)
-
-        ttk.Label(range_frame, text="從").pack(side=tk.LEFT, padx=2)
-        first_var = tk.StringVar(value=str(start))
-        first_entry = ttk.Entry(range_frame, textvariable=first_var, width=5)
-        first_entry.pack(side=tk.LEFT)
-
-        ttk.Label(range_frame, text="到").pack(side=tk.LEFT, padx=2)
-        last_var = tk.StringVar(value=str(end))
-        last_entry = ttk.Entry(range_frame, textvariable=last_var, width=5)
-        last_entry.pack(side=tk.LEFT)
-
-        ttk.Label(range_frame, text="頁").pack(side=tk.LEFT, padx=2)
-
-        # 刪除按鈕（只有多於一個範圍時才顯示）
-        delete_btn = ttk.Button(
-            range_frame,
-            text="-",
-            width=2,
-            command=lambda f=range_frame: self._remove_range(f)
-        )
-        delete_btn.pack(side=tk.LEFT, padx=5)
-
-        # 儲存參考
-        self.page_ranges.append((first_var, last_var, range_frame, first_entry, last_entry))
-
-        # 更新刪除按鈕顯示狀態
-        self._update_delete_buttons()
-        self._toggle_mode()
-
-    def _on_ranges_configure(self, event):
-        """更新捲動區域"""
-        self.ranges_canvas.configure(scrollregion=self.ranges_canvas.bbox("all"))
-
-    def _on_canvas_configure(self, event):
-        """調整內部框架寬度"""
-        self.ranges_canvas.itemconfig(self.canvas_window, width=event.width)
-
-    def _on_mousewheel(self, event):
-        """滑鼠滾輪捲動 (Windows)"""
-        self.ranges_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-    def _on_mousewheel_linux(self, event):
-        """滑鼠滾輪捲動 (Linux/macOS)"""
-        if event.num == 4:
-            self.ranges_canvas.yview_scroll(-1, "units")
-        elif event.num == 5:
-            self.ranges_canvas.yview_scroll(1, "units")
-
-    def _remove_range(self, frame):
-        """移除一個頁碼範圍"""
-        for i, (first_var, last_var, range_frame, first_entry, last_entry) in enumerate(self.page_ranges):
-            if range_frame == frame:
-                range_frame.destroy()
-                self.page_ranges.pop(i)
-                break
-
-        # 更新編號
-        self._update_range_numbers()
-        self._update_delete_buttons()
-
-    def _update_range_numbers(self):
-        """更新範圍編號"""
-        for i, (first_var, last_var, range_frame, first_entry, last_entry) in enumerate(self.page_ranges):
-            # 找到編號標籤並更新
-            for child in range_frame.winfo_children():
-                if isinstance(child, ttk.Label):
-                    text = child.cget("text")
-                    if text.startswith("#"):
-                        child.config(text=f"#{i + 1}")
-                        break
-
-    def _update_delete_buttons(self):
-        """更新刪除按鈕顯示狀態"""
-        # 只有一個範圍時隱藏刪除按鈕
-        show_delete = len(self.page_ranges) > 1
-        for first_var, last_var, range_frame, first_entry, last_entry in self.page_ranges:
-            for child in range_frame.winfo_children():
-                if isinstance(child, ttk.Button) and child.cget("text") == "-":
-                    if show_delete:
-                        child.pack(side=tk.LEFT, padx=5)
-                    else:
-                        child.pack_forget()
+                return
+            ranges = list(self.page_ranges)
+            first, last = ranges[idx]
+            ranges[idx] = (page, last) if pos == 0 else (first, page)
+            self._set_ranges(ranges)
+
+        entry.bind("<Return>", commit)
+        entry.bind("<FocusOut>", commit)
+        entry.bind("<Escape>", lambda e: entry.destroy())
 
     def _toggle_mode(self):
         """切換分割模式"""
@@ -260,31 +264,94 @@ class SplitTab(BaseTab):
 
         # 頁碼範圍
         range_state = tk.NORMAL if mode == "range" else tk.DISABLED
-        for first_var, last_var, range_frame, first_entry, last_entry in self.page_ranges:
-            first_entry.config(state=range_state)
-            last_entry.config(state=range_state)
+        for widget in (self.range_expr_entry, self.add_range_btn, self.remove_range_btn):
+            widget.config(state=range_state)
 
         # 每 N 頁
         every_state = tk.NORMAL if mode == "every" else tk.DISABLED
         self.every_n_entry.config(state=every_state)
 
+        # 每頁單獨檔案
+        self.resume_check.config(state=tk.NORMAL if mode == "single" else tk.DISABLED)
+
+        # 依檔案大小
+        self.max_mb_entry.config(state=tk.NORMAL if mode == "size" else tk.DISABLED)
+
+        self.refresh_eta()
+
     def _on_file_selected(self, filename: str):
-        """選擇檔案後取得頁數並自動產生輸出檔名"""
+        """選擇檔案後在背景取得頁數與頁面大小，並自動產生輸出檔名"""
         # 自動產生輸出檔名
         output = self.auto_output_filename(filename, "split")
         self.output_var.set(output)
 
-        # 取得頁數
-        if self.gs_wrapper:
-            try:
-                self.total_pages = self.gs_wrapper.get_pdf_page_count(filename)
-                self.page_info_label.config(text=f"總頁數: {self.total_pages}")
-                # 更新第一個範圍的結束頁碼
-                if self.page_ranges:
-                    self.page_ranges[0][1].set(str(self.total_pages))
-            except Exception:
-                self.page_info_label.config(text="總頁數: 無法讀取")
-                self.total_pages = 0
+        self.total_pages = 0
+        self.probed_file = ""
+        if not self.gs_wrapper:
+            return
+        self.page_info_label.config(text="總頁數: 讀取中...")
+
+        def probe():
+            size = os.path.getsize(filename)
+            boxes = self.gs_wrapper.get_pdf_page_boxes(filename)
+            pages = len(boxes) or self.gs_wrapper.get_pdf_page_count(filename)
+            return pages, size, boxes
+
+        def on_result(info):
+            pages, size, boxes = info
+            if pages <= 0:
+                on_error(None)
+                return
+            self.total_pages = pages
+            self.probed_file = filename
+            text = f"總頁數: {pages}    檔案大小: {format_size(size)}"
+            if boxes:
+                text += f"    頁面大小: {format_page_size(*boxes[0])}"
+                kinds = len({(round(w), round(h)) for w, h in boxes})
+                if kinds > 1:
+                    text += f" 等 {kinds} 種"
+            self.page_info_label.config(text=text)
+            # 依新的總頁數重新驗證範圍運算式 (例如 "9-" 會延伸到最後一頁)
+            self._on_range_expr_changed()
+
+        def on_error(error):
+            self.page_info_label.config(text="總頁數: 無法讀取")
+
+        self.probe("file", probe, on_result, on_error)
+
+    def _planned_ranges(self) -> list:
+        """目前設定會擷取的頁碼範圍 [(first, last), ...] (設定不完整時為空)"""
+        mode = self.split_mode_var.get()
+        try:
+            if mode == "range":
+                return list(self.page_ranges)
+            if mode == "every":
+                every_n = int(self.every_n_var.get())
+                if every_n < 1:
+                    return []
+                return [
+                    (i + 1, min(i + every_n, self.total_pages))
+                    for i in range(0, self.total_pages, every_n)
+                ]
+            if mode == "single":
+                return [(i, i) for i in range(1, self.total_pages + 1)]
+            if mode == "size" and self.total_pages:
+                # 份數要執行後才知道，以全部頁面估計
+                return [(1, self.total_pages)]
+        except ValueError:
+            pass
+        return []
+
+    def get_eta_requests(self) -> list:
+        """預估耗時用的工作 (每個範圍呼叫一次 Ghostscript)"""
+        input_file = self.input_var.get()
+        if not os.path.isfile(input_file):
+            return []
+        return [
+            ("split_pdf", {"input_file": input_file, "first_page": first, "last_page": last})
+            for first, last in self._planned_ranges()
+            if 1 <= first <= last
+        ]
 
     def _on_execute(self):
         """執行分割"""
@@ -297,43 +364,33 @@ class SplitTab(BaseTab):
         if not self.validate_output_file(output_file):
             return
 
+        linearize = self.linearize_var.get()
+        remove_blank = self.remove_blank_var.get()
         if mode == "range":
-            self._split_ranges(input_file, output_file)
+            self._split_ranges(input_file, output_file, linearize, remove_blank)
         elif mode == "every":
-            self._split_every_n(input_file, output_file)
+            self._split_every_n(input_file, output_file, linearize, remove_blank)
         elif mode == "single":
-            self._split_single(input_file, output_file)
+            self._split_single(input_file, output_file, linearize, remove_blank, self.resume_var.get())
+        elif mode == "size":
+            self._split_by_size(input_file, output_file, linearize, remove_blank)
 
-    def _split_ranges(self, input_file: str, output_file: str):
+    def _split_ranges(
+        self, input_file: str, output_file: str, linearize: bool = False, remove_blank: bool = False
+    ):
         """擷取多個頁碼範圍"""
-        # 收集所有範圍
-        ranges = []
-        for i, (first_var, last_var, _, _, _) in enumerate(self.page_ranges):
-            try:
-                first_page = int(first_var.get())
-                last_page = int(last_var.get())
-            except ValueError:
-                messagebox.showwarning("警告", f"範圍 #{i + 1}: 請輸入有效的頁碼")
-                return
-
-            if first_page > last_page:
-                messagebox.showwarning("警告", f"範圍 #{i + 1}: 起始頁碼不能大於結束頁碼")
-                return
-
-            if first_page < 1:
-                messagebox.showwarning("警告", f"範圍 #{i + 1}: 頁碼必須大於 0")
-                return
-
-            ranges.append((first_page, last_page))
-
-        if not ranges:
-            messagebox.showwarning("警告", "請至少指定一個頁碼範圍")
-            return
-
-        num_ranges = len(ranges)
+        expression = self.range_expr_var.get()
         base, ext = os.path.splitext(output_file)
 
         def task():
+            # 解析範圍運算式並以總頁數驗證 (直接輸入或貼上路徑時還沒有讀取頁數，在這裡讀取)
+            try:
+                ranges = parse_page_ranges(expression, self._total_pages_for(input_file) or None)
+            except PageRangeError as e:
+                return False, str(e)
+            num_ranges = len(ranges)
+
+            warnings = []
             for idx, (first_page, last_page) in enumerate(ranges):
                 # 產生輸出檔名
                 if num_ranges == 1:
@@ -347,24 +404,35 @@ class SplitTab(BaseTab):
                     f"分割範圍 #{idx + 1} (第 {first_page}-{last_page} 頁)..."
                 )
 
-                success, msg = self.gs_wrapper.split_pdf(
+                result = self.gs_wrapper.split_pdf(
                     input_file=input_file,
                     output_file=out_file,
                     first_page=first_page,
-                    last_page=last_page
+                    last_page=last_page,
+                    linearize=linearize,
+                    remove_blank=remove_blank
                 )
 
-                if not success:
-                    return False, msg
+                if not result.success:
+                    return False, result.output
+                warnings.extend(result.warnings)
 
             if num_ranges == 1:
-                return True, f"已擷取第 {ranges[0][0]}-{ranges[0][1]} 頁"
+                return True, f"已擷取第 {ranges[0][0]}-{ranges[0][1]} 頁" + format_warnings(warnings)
             else:
-                return True, f"已分割為 {num_ranges} 個檔案"
+                return True, f"已分割為 {num_ranges} 個檔案" + format_warnings(warnings)
 
         self.run_in_thread(task)
 
-    def _split_every_n(self, input_file: str, output_file: str):
+    def _total_pages_for(self, input_file: str) -> int:
+        """取得總頁數 (在背景執行緒呼叫)"""
+        if input_file == self.probed_file and self.total_pages > 0:
+            return self.total_pages
+        return self.gs_wrapper.get_pdf_page_count(input_file)
+
+    def _split_every_n(
+        self, input_file: str, output_file: str, linearize: bool = False, remove_blank: bool = False
+    ):
         """每 N 頁分割"""
         try:
             every_n = int(self.every_n_var.get())
@@ -376,17 +444,16 @@ class SplitTab(BaseTab):
             messagebox.showwarning("警告", "頁數必須大於 0")
             return
 
-        # 取得總頁數
-        total_pages = self.gs_wrapper.get_pdf_page_count(input_file)
-        if total_pages == 0:
-            messagebox.showwarning("警告", "無法讀取 PDF 頁數")
-            return
-
-        num_files = (total_pages + every_n - 1) // every_n
-
         def task():
+            # 總頁數在背景取得 (已讀取過的檔案會使用快取)
+            total_pages = self._total_pages_for(input_file)
+            if total_pages == 0:
+                return False, "無法讀取 PDF 頁數"
+            num_files = (total_pages + every_n - 1) // every_n
+
             base, ext = os.path.splitext(output_file)
             results = []
+            warnings = []
 
             for idx, i in enumerate(range(0, total_pages, every_n)):
                 first_page = i + 1
@@ -396,47 +463,118 @@ class SplitTab(BaseTab):
                 # 更新進度
                 self._update_progress_safe(idx + 1, num_files, f"分割檔案 {idx + 1}/{num_files}...")
 
-                success, msg = self.gs_wrapper.split_pdf(
+                result = self.gs_wrapper.split_pdf(
                     input_file=input_file,
                     output_file=out_file,
                     first_page=first_page,
-                    last_page=last_page
+                    last_page=last_page,
+                    linearize=linearize,
+                    remove_blank=remove_blank
                 )
-                results.append((success, msg))
+                results.append(result)
 
-                if not success:
-                    return False, msg
+                if not result.success:
+                    return False, result.output
+                warnings.extend(result.warnings)
 
-            return True, f"已分割為 {len(results)} 個檔案"
+            return True, f"已分割為 {len(results)} 個檔案" + format_warnings(warnings)
 
         self.run_in_thread(task)
 
-    def _split_single(self, input_file: str, output_file: str):
-        """每頁單獨檔案"""
-        total_pages = self.gs_wrapper.get_pdf_page_count(input_file)
-        if total_pages == 0:
-            messagebox.showwarning("警告", "無法讀取 PDF 頁數")
-            return
-
+    def _split_single(
+        self,
+        input_file: str,
+        output_file: str,
+        linearize: bool = False,
+        remove_blank: bool = False,
+        resume: bool = False
+    ):
+        """每頁單獨檔案 (resume: 每完成一頁記錄在工作日誌，重新執行時略過已完成的頁面)"""
         def task():
+            total_pages = self._total_pages_for(input_file)
+            if total_pages == 0:
+                return False, "無法讀取 PDF 頁數"
+
             base, ext = os.path.splitext(output_file)
+            warnings = []
+
+            # 續傳：略過日誌中大小與 SHA-256 都相符的頁面
+            journal, finished = None, set()
+            if resume:
+                pattern = f"{base}_%03d{ext}"
+                journal = JobJournal(pattern, input_file, {"operation": "split_pdf", "linearize": linearize})
+                outputs = {i: pattern % i for i in range(1, total_pages + 1)}
+                finished = set(journal.completed(outputs))
+
+            # 移除空白頁時空白頁不輸出檔案 (檔名仍以原始頁碼編號)
+            blank_pages = set()
+            if remove_blank:
+                self._set_status_safe("偵測空白頁...")
+                try:
+                    blank_pages = set(self.gs_wrapper.detect_blank_pages(input_file).blank_pages)
+                except (ImportError, RuntimeError, OSError) as e:
+                    warnings.append(f"無法偵測空白頁: {e}")
 
             for i in range(1, total_pages + 1):
+                if i in blank_pages or i in finished:
+                    continue
                 out_file = f"{base}_{i:03d}{ext}"
 
                 # 更新進度
                 self._update_progress_safe(i, total_pages, f"分割第 {i}/{total_pages} 頁...")
 
-                success, msg = self.gs_wrapper.split_pdf(
+                result = self.gs_wrapper.split_pdf(
                     input_file=input_file,
                     output_file=out_file,
                     first_page=i,
-                    last_page=i
+                    last_page=i,
+                    linearize=linearize
                 )
 
-                if not success:
-                    return False, msg
+                if not result.success:
+                    return False, result.output
+                warnings.extend(result.warnings)
+                if journal is not None:
+                    journal.record(i, out_file)
 
-            return True, f"已分割為 {total_pages} 個檔案"
+            skipped = f"\n略過空白頁: {len(blank_pages)} 頁" if blank_pages else ""
+            if journal is not None:
+                skipped += "\n" + journal.summary()
+            return True, f"已分割為 {total_pages - len(blank_pages)} 個檔案" + skipped + format_warnings(warnings)
+
+        self.run_in_thread(task)
+
+    def _split_by_size(
+        self, input_file: str, output_file: str, linearize: bool = False, remove_blank: bool = False
+    ):
+        """依檔案大小分割"""
+        try:
+            max_mb = float(self.max_mb_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "請輸入有效的檔案大小")
+            return
+
+        if max_mb <= 0:
+            messagebox.showwarning("警告", "檔案大小必須大於 0")
+            return
+
+        def task():
+            result = self.gs_wrapper.split_pdf_by_size(
+                input_file=input_file,
+                output_file=output_file,
+                max_bytes=int(max_mb * 1024 * 1024),
+                linearize=linearize,
+                progress_callback=self._update_progress_safe
+            )
+            if not result.success:
+                return False, result.output
+            parts = result.details["size_split"]["parts"]
+            largest = max(part["bytes"] for part in parts)
+            warnings = list(result.warnings)
+            if remove_blank:
+                warnings.append("依檔案大小分割不會移除空白頁")
+            return True, (
+                f"已分割為 {len(parts)} 個檔案，最大 {format_size(largest)}" + format_warnings(warnings)
+            )
 
         self.run_in_thread(task)
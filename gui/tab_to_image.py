@@ -8,15 +8,15 @@ import tkinter as tk
 from tkinter import ttk, filedialog
 import os
 
-from .base_tab import BaseTab
-from core.config import IMAGE_DEVICES, DPI_OPTIONS
+from .base_tab import BaseTab, format_size, format_warnings
+from core.config import IMAGE_DEVICES, DPI_OPTIONS, PARALLEL_MAX_JOBS, RENDER_PRESETS
 
 
 class ToImageTab(BaseTab):
     """PDF 轉圖片分頁"""
 
-    def __init__(self, parent):
-        super().__init__(parent)
+    def __init__(self, parent, history=None):
+        super().__init__(parent, history)
         self._create_widgets()
 
     def _create_widgets(self):
@@ -57,6 +57,22 @@ class ToImageTab(BaseTab):
         dpi_combo.pack(side=tk.LEFT, padx=5)
         ttk.Label(row1, text="DPI").pack(side=tk.LEFT)
 
+        ttk.Label(row1, text="繪製品質:").pack(side=tk.LEFT, padx=(20, 0))
+        self.render_preset_var = tk.StringVar(value="standard")
+        preset_combo = ttk.Combobox(
+            row1,
+            textvariable=self.render_preset_var,
+            values=list(RENDER_PRESETS.keys()),
+            state="readonly",
+            width=9
+        )
+        preset_combo.pack(side=tk.LEFT, padx=5)
+        preset_combo.bind("<<ComboboxSelected>>", self._on_render_preset_changed)
+        self.render_preset_label = ttk.Label(
+            settings_frame, text=RENDER_PRESETS["standard"]["description"], foreground="gray"
+        )
+        self.render_preset_label.pack(anchor=tk.W, padx=10)
+
         # 頁面範圍
         row2 = ttk.Frame(settings_frame)
         row2.pack(fill=tk.X, padx=5, pady=5)
@@ -78,15 +94,42 @@ class ToImageTab(BaseTab):
             command=self._toggle_page_range
         ).pack(side=tk.LEFT, padx=(20, 5))
 
-        ttk.Label(row2, text="從").pack(side=tk.LEFT)
-        self.first_page_var = tk.StringVar(value="1")
-        self.first_page_entry = ttk.Entry(row2, textvariable=self.first_page_var, width=5, state=tk.DISABLED)
-        self.first_page_entry.pack(side=tk.LEFT, padx=2)
-
-        ttk.Label(row2, text="到").pack(side=tk.LEFT)
-        self.last_page_var = tk.StringVar(value="1")
-        self.last_page_entry = ttk.Entry(row2, textvariable=self.last_page_var, width=5, state=tk.DISABLED)
-        self.last_page_entry.pack(side=tk.LEFT, padx=2)
+        self.pages_var = tk.StringVar(value="1")
+        self.pages_entry = ttk.Entry(row2, textvariable=self.pages_var, width=24, state=tk.DISABLED)
+        self.pages_entry.pack(side=tk.LEFT, padx=2)
+        ttk.Label(row2, text="(例如 1,5,9-12,40；檔名以原始頁碼編號)").pack(side=tk.LEFT)
+
+        # 平行轉換
+        row3 = ttk.Frame(settings_frame)
+        row3.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Label(row3, text="同時轉換:").pack(side=tk.LEFT)
+        self.jobs_var = tk.StringVar(value="1")
+        ttk.Spinbox(
+            row3,
+            textvariable=self.jobs_var,
+            from_=1,
+            to=PARALLEL_MAX_JOBS,
+            state="readonly",
+            width=4
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Label(row3, text="個 Ghostscript (依各頁內容估計的成本分配頁面)").pack(side=tk.LEFT)
+
+        # 增量轉換
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame,
+            text="只轉換有變更的頁面 (比對上次轉換記錄的內容指紋，檔名以原始頁碼編號)",
+            variable=self.incremental_var
+        ).pack(anchor=tk.W, padx=5, pady=(0, 5))
+
+        # 續傳
+        self.resume_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame,
+            text="可續傳 (記錄完成的頁面，中斷後重新執行時從未完成的頁面繼續，檔名以原始頁碼編號)",
+            variable=self.resume_var
+        ).pack(anchor=tk.W, padx=5, pady=(0, 5))
 
         # 輸出資料夾
         output_frame = ttk.LabelFrame(self.frame, text="輸出資料夾")
@@ -114,16 +157,23 @@ class ToImageTab(BaseTab):
         # 進度條和執行按鈕
         self.create_progress_bar(self.frame)
 
+        for var in (self.dpi_var, self.all_pages_var, self.pages_var):
+            var.trace_add("write", self.refresh_eta)
+
     def _toggle_page_range(self):
         """切換頁碼範圍輸入框狀態"""
         state = tk.NORMAL if not self.all_pages_var.get() else tk.DISABLED
-        self.first_page_entry.config(state=state)
-        self.last_page_entry.config(state=state)
+        self.pages_entry.config(state=state)
 
     def _on_format_changed(self, event=None):
         """格式改變時更新副檔名"""
         pass
 
+    def _on_render_preset_changed(self, event=None):
+        """顯示繪製預設值的說明"""
+        preset = RENDER_PRESETS.get(self.render_preset_var.get())
+        self.render_preset_label.config(text=preset["description"] if preset else "")
+
     def _browse_output_dir(self):
         """選擇輸出資料夾"""
         dirname = filedialog.askdirectory()
@@ -149,6 +199,16 @@ class ToImageTab(BaseTab):
             return ".tiff"
         return ".png"
 
+    def get_eta_requests(self) -> list:
+        """預估耗時用的工作"""
+        input_file = self.input_var.get()
+        if not os.path.isfile(input_file):
+            return []
+        params = {"input_file": input_file, "dpi": int(self.dpi_var.get())}
+        if not self.all_pages_var.get():
+            params["pages"] = self.pages_var.get()
+        return [("pdf_to_image", params)]
+
     def _on_execute(self):
         """執行轉換"""
         input_file = self.input_var.get()
@@ -166,27 +226,62 @@ class ToImageTab(BaseTab):
         prefix = self.prefix_var.get() or "page"
         output_pattern = os.path.join(output_dir, f"{prefix}_%03d{ext}")
 
-        # 頁面範圍
-        first_page = None
-        last_page = None
+        # 頁碼 (運算式於轉換時依總頁數驗證)
+        pages = None
         if not self.all_pages_var.get():
-            try:
-                first_page = int(self.first_page_var.get())
-                last_page = int(self.last_page_var.get())
-            except ValueError:
+            pages = self.pages_var.get().strip()
+            if not pages:
                 from tkinter import messagebox
-                messagebox.showwarning("警告", "請輸入有效的頁碼")
+                messagebox.showwarning("警告", "請輸入頁碼")
                 return
 
+        jobs = int(self.jobs_var.get())
+        render_preset = self.render_preset_var.get()
+        incremental = self.incremental_var.get()
+        resume = self.resume_var.get()
+        if incremental and resume:
+            from tkinter import messagebox
+            messagebox.showwarning("警告", "「只轉換有變更的頁面」與「可續傳」不能同時使用")
+            return
+
         def task():
-            return self.gs_wrapper.pdf_to_image(
+            result = self.gs_wrapper.pdf_to_image(
                 input_file=input_file,
                 output_pattern=output_pattern,
                 device=self.format_var.get(),
                 dpi=int(self.dpi_var.get()),
-                first_page=first_page,
-                last_page=last_page,
+                pages=pages,
+                jobs=jobs,
+                render_preset=render_preset,
+                incremental=incremental,
+                resume=resume,
                 progress_callback=self.get_progress_callback()
             )
 
+            report = result.details.get("incremental")
+            auto = result.details.get("auto_device")
+            journal = result.details.get("resume")
+            if result.success and (report or auto or journal):
+                message = "轉換完成！"
+                if report:
+                    message += (
+                        f"\n重新轉換: {report['rendered']} 頁\n"
+                        f"略過未變更: {report['skipped']}/{report['pages']} 頁"
+                    )
+                if journal:
+                    message += (
+                        f"\n這次轉換: {journal['recorded']} 頁\n"
+                        f"略過已完成: {journal['resumed']}/{journal['requested']} 頁"
+                    )
+                if auto:
+                    names = {"bilevel": "黑白", "gray": "灰階", "color": "彩色"}
+                    for page_class, pages_text in auto["pages"].items():
+                        if pages_text:
+                            message += f"\n{names[page_class]}: 第 {pages_text} 頁"
+                    if auto["sampled_pages"]:
+                        message += f"\n比全部以 PNG 輸出約省: {format_size(auto['saved_bytes'])}"
+                message += f"\n耗時: {result.wall_time:.1f} 秒"
+                return True, message + format_warnings(result.warnings)
+            return result
+
         self.run_in_thread(task)
@@ -10,10 +10,31 @@ Ghostscript GUI
 - PDF 合併
 - PDF 分割
 - PDF 壓縮
+
+用法:
+    python main.py                 啟動圖形介面
+    python main.py serve [選項]    啟動本機 HTTP 工作服務
+    python main.py watch 設定檔    監看熱資料夾並自動處理
+    python main.py check-linearized 檔案...
+                                   檢查 PDF 的線性化 (快速網頁檢視) 提示表
+    python main.py benchmark 資料夾 [選項]
+                                   比較壓縮設定檔與 PDFSETTINGS 預設值的輸出大小與耗時
+    python main.py benchmark 資料夾 --render [--dpi N]
+                                   比較轉圖片各繪製預設值的每秒頁數
+    python main.py analyze 檔案 [--shards N] [--json]
+                                   估計每頁的處理成本與平行處理的分段
+    python main.py blank-pages 檔案 [--threshold T] [--json]
+                                   偵測空白頁 (各頁墨水覆蓋率)
+
+共用選項 (放在子命令之前):
+    --metrics-file 檔案            定期寫入 Prometheus 格式的效能指標
+    --metrics-port 埠號            在本機提供 /metrics
+    --no-history                   不記錄工作耗時 (預設記錄於 ~/.gsgui/history.db，用來預估耗時)
 """
 
 import sys
 import os
+import argparse
 
 # 處理 PyInstaller 打包後的路徑
 if getattr(sys, 'frozen', False):
@@ -25,14 +46,235 @@ else:
 
 sys.path.insert(0, base_path)
 
-from gui import MainWindow
+
+def build_parser() -> argparse.ArgumentParser:
+    """建立命令列參數解析器"""
+    from core.config import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_MAX_QUEUE
+
+    parser = argparse.ArgumentParser(description="Ghostscript GUI")
+    parser.add_argument("--metrics-file", default=None,
+                        help="定期將 Prometheus 格式的效能指標寫入此檔案")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="在本機此埠號提供 /metrics")
+    parser.add_argument("--no-history", action="store_true",
+                        help="不記錄工作耗時，也不依預估耗時排序工作")
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="啟動本機 HTTP 工作服務")
+    serve_parser.add_argument("--host", default=SERVER_HOST, help="監聽位址")
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT, help="監聽埠號")
+    serve_parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="同時執行的工作數")
+    serve_parser.add_argument("--queue", type=int, default=SERVER_MAX_QUEUE, help="等待中工作上限")
+    serve_parser.add_argument("--work-dir", default=None, help="上傳與輸出檔案的資料夾")
+    serve_parser.add_argument("--token", default=None, help="存取權杖 (預設每次啟動隨機產生)")
+    serve_parser.add_argument("--input-dir", action="append", default=None,
+                              help="JSON 工作可使用的本機輸入資料夾 (可重複，預設只能上傳檔案)")
+    serve_parser.add_argument("--max-memory-mb", type=float, default=None,
+                              help="Ghostscript 子程序合計記憶體上限 (MB，啟用資源控管)")
+    serve_parser.add_argument("--max-cpu", type=float, default=None,
+                              help="Ghostscript 子程序合計 CPU 上限 (核心數，啟用資源控管)")
+
+    watch_parser = subparsers.add_parser("watch", help="監看熱資料夾並自動處理")
+    watch_parser.add_argument("config", help="監看設定檔 (JSON)")
+
+    check_parser = subparsers.add_parser(
+        "check-linearized", help="檢查 PDF 的線性化 (快速網頁檢視) 提示表")
+    check_parser.add_argument("files", nargs="+", help="PDF 檔案")
+
+    bench_parser = subparsers.add_parser(
+        "benchmark", help="比較壓縮設定檔與 PDFSETTINGS 預設值的輸出大小與耗時")
+    bench_parser.add_argument("corpus", help="基準語料 (PDF 資料夾或單一檔案)")
+    bench_parser.add_argument("--presets", default=None,
+                              help="要比較的 PDFSETTINGS，以逗號分隔 (預設全部)")
+    bench_parser.add_argument("--profiles", default=None,
+                              help="要比較的壓縮設定檔，以逗號分隔 (預設全部)")
+    bench_parser.add_argument("--selective", action="store_true",
+                              help="每個設定檔也比較選擇性壓縮 (只重新壓縮過大的圖片)")
+    bench_parser.add_argument("--baseline", default="preset:ebook",
+                              help="比較基準 (preset:名稱、profile:名稱 或 selective:名稱)")
+    bench_parser.add_argument("--render", action="store_true",
+                              help="改為比較轉圖片的繪製預設值 (每秒頁數)")
+    bench_parser.add_argument("--render-presets", default=None,
+                              help="要比較的繪製預設值，以逗號分隔 (預設全部，搭配 --render)")
+    bench_parser.add_argument("--dpi", type=int, default=150, help="轉圖片的解析度 (搭配 --render)")
+    bench_parser.add_argument("--repeat", type=int, default=1, help="每個組合執行次數 (耗時取中位數)")
+    bench_parser.add_argument("--json", default=None, help="將完整結果寫入此 JSON 檔案")
+
+    analyze_parser = subparsers.add_parser("analyze", help="估計每頁的處理成本與平行處理的分段")
+    analyze_parser.add_argument("file", help="PDF 檔案")
+    analyze_parser.add_argument("--shards", type=int, default=0, help="顯示切成幾段時的分配 (0=不顯示)")
+    analyze_parser.add_argument("--json", action="store_true", help="以 JSON 輸出")
+
+    blank_parser = subparsers.add_parser("blank-pages", help="偵測空白頁 (各頁墨水覆蓋率)")
+    blank_parser.add_argument("file", help="PDF 檔案")
+    blank_parser.add_argument("--threshold", type=float, default=None,
+                              help="墨水覆蓋率低於此值的頁面為空白 (預設 0.002；覆蓋率有記錄時不重新轉換)")
+    blank_parser.add_argument("--json", action="store_true", help="以 JSON 輸出")
+
+    return parser
 
 
 def main():
     """程式進入點"""
-    app = MainWindow()
+    args = build_parser().parse_args()
+
+    # 效能指標輸出
+    from core import metrics
+    from core.config import METRICS_TEXTFILE_INTERVAL
+    textfile_writer = None
+    if args.metrics_file:
+        textfile_writer = metrics.TextfileWriter(args.metrics_file, METRICS_TEXTFILE_INTERVAL).start()
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    try:
+        run_command(args)
+    finally:
+        if textfile_writer:
+            textfile_writer.stop()
+
+
+def run_command(args):
+    """依子命令執行"""
+    if args.command == "check-linearized":
+        from core.linearization import check_linearization
+        valid = True
+        for path in args.files:
+            report = check_linearization(path)
+            valid = valid and report.valid
+            print(f"{path}: {report.summary()}")
+        sys.exit(0 if valid else 1)
+
+    if args.command == "benchmark":
+        run_benchmark_command(args)
+        return
+
+    if args.command == "analyze":
+        run_analyze_command(args)
+        return
+
+    if args.command == "blank-pages":
+        run_blank_pages_command(args)
+        return
+
+    history = None
+    if not args.no_history:
+        from core.history import get_default_history
+        history = get_default_history()
+
+    if args.command == "serve":
+        from core.server import serve
+        from core.governor import ResourceGovernor
+        from core.config import GOVERNOR_MAX_MEMORY_MB
+
+        governor = None
+        if args.max_memory_mb or args.max_cpu:
+            governor = ResourceGovernor(
+                max_memory_mb=args.max_memory_mb or GOVERNOR_MAX_MEMORY_MB,
+                max_cpu=args.max_cpu
+            )
+        serve(
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            max_queue=args.queue,
+            work_dir=args.work_dir,
+            governor=governor,
+            history=history,
+            token=args.token,
+            input_dirs=args.input_dir
+        )
+        return
+
+    if args.command == "watch":
+        from core.watcher import load_watcher
+        watcher = load_watcher(args.config, history=history)
+        print(f"開始監看 {len(watcher.rules)} 個資料夾 (Ctrl+C 結束)")
+        try:
+            watcher.run_forever()
+        except KeyboardInterrupt:
+            watcher.stop()
+        return
+
+    from gui import MainWindow
+    app = MainWindow(history=history)
     app.run()
 
 
+def run_benchmark_command(args):
+    """執行壓縮基準測試並輸出彙總表格"""
+    from core import benchmark
+
+    def split(value):
+        return [v.strip() for v in value.split(",") if v.strip()] if value is not None else None
+
+    files = benchmark.find_corpus(args.corpus)
+    if not files:
+        print(f"找不到 PDF: {args.corpus}")
+        sys.exit(1)
+
+    def progress(current, total, status):
+        print(f"[{current}/{total}] {status}", flush=True)
+
+    if args.render:
+        rows = benchmark.run_render_benchmark(
+            files, split(args.render_presets), dpi=args.dpi, repeat=args.repeat, progress=progress)
+        summary = benchmark.summarize_render(rows)
+        print(benchmark.format_render_summary(summary))
+        if args.json:
+            benchmark.save_results(args.json, rows, summary, None)
+        return
+
+    variants = benchmark.benchmark_variants(split(args.presets), split(args.profiles), args.selective)
+    if args.baseline not in variants:
+        variants.insert(0, args.baseline)
+
+    rows = benchmark.run_benchmark(files, variants, repeat=args.repeat, progress=progress)
+    summary = benchmark.summarize(rows, args.baseline)
+    print(benchmark.format_summary(summary, args.baseline))
+    if args.json:
+        benchmark.save_results(args.json, rows, summary, args.baseline)
+
+
+def run_analyze_command(args):
+    """輸出每頁的估計成本 (與分段)"""
+    import json
+    from core.page_cost import analyze_pages, balance_shards, format_report
+    from core.pdf_reader import PdfError
+
+    try:
+        costs = analyze_pages(args.file)
+    except (PdfError, OSError) as e:
+        print(f"{args.file}: 無法分析: {e}")
+        sys.exit(1)
+    shards = balance_shards([c.cost for c in costs], args.shards) if args.shards > 0 else None
+    if args.json:
+        data = {"pages": [c.to_dict() for c in costs]}
+        if shards:
+            data["shards"] = [{"first_page": a + 1, "last_page": b + 1} for a, b in shards]
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(costs, shards))
+
+
+def run_blank_pages_command(args):
+    """輸出各頁的墨水覆蓋率與空白頁"""
+    import json
+    from core.ghostscript import GhostscriptWrapper
+
+    try:
+        report = GhostscriptWrapper().detect_blank_pages(args.file, args.threshold)
+    except (ImportError, RuntimeError, OSError) as e:
+        print(f"{args.file}: 無法偵測空白頁: {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+        return
+    blank = set(report.blank_pages)
+    for page, score in enumerate(report.scores, 1):
+        print(f"{page:>6}  {score:>8.2%}{'  空白' if page in blank else ''}")
+    print(report.summary())
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+測試共用設定
+以假的 gs 執行檔 (Python 腳本) 取代 Ghostscript，記錄每次執行的參數與同時執行的數量
+"""
+
+import json
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# 假的 gs：
+#   -c 查詢頁數或頁面大小，其他指令依 -sOutputFile= 寫出輸出檔並印出 "Page N"
+# 環境變數：
+#   FAKE_GS_LOG      每次執行附加一行 {"args": [...], "running": 同時執行數}
+#   FAKE_GS_RUNNING  記錄執行中程序的資料夾
+#   FAKE_GS_PAGES    頁數 (預設 3)
+#   FAKE_GS_BOX      各頁的 "寬 高" (points，預設 A4)
+#   FAKE_GS_DELAY    每次執行 (或每頁) 的秒數 (預設 0)
+FAKE_GS = textwrap.dedent('''\
+    import json, os, sys, time
+    args = sys.argv[1:]
+    pages = int(os.environ.get("FAKE_GS_PAGES", "3"))
+    delay = float(os.environ.get("FAKE_GS_DELAY", "0"))
+    running_dir = os.environ.get("FAKE_GS_RUNNING")
+    marker = None
+    running = 1
+    if running_dir:
+        marker = os.path.join(running_dir, str(os.getpid()))
+        open(marker, "w").close()
+        running = len(os.listdir(running_dir))
+    log = os.environ.get("FAKE_GS_LOG")
+    if log:
+        with open(log, "a") as f:
+            f.write(json.dumps({"args": args, "running": running}) + "\\n")
+    try:
+        if "--version" in args:
+            print("10.02.1")
+        elif "-c" in args:
+            time.sleep(delay)
+            if "pdfgetpage" in args[args.index("-c") + 1]:
+                for _ in range(pages):
+                    print(f"PAGE {os.environ.get('FAKE_GS_BOX', '595 842')} 0")
+            else:
+                print(pages)
+        else:
+            outputs = [a.split("=", 1)[1] for a in args if a.startswith("-sOutputFile=")]
+            for page in range(1, pages + 1):
+                if "-q" not in args:
+                    print(f"Page {page}", flush=True)
+                time.sleep(delay)
+                if outputs and "%" in outputs[0]:
+                    with open(outputs[0] % page, "wb") as f:
+                        f.write(b"page %d" % page)
+            if outputs and "%" not in outputs[0] and outputs[0] != "-":
+                with open(outputs[0], "wb") as f:
+                    f.write(b"%PDF-1.4\\n%%EOF\\n")
+    finally:
+        if marker:
+            os.remove(marker)
+''')
+
+
+@pytest.fixture
+def fake_gs(tmp_path, monkeypatch):
+    """
+    在 PATH 最前面放入假的 gs
+
+    Returns:
+        calls() 回傳目前為止每次執行的記錄 [{"args": [...], "running": n}, ...]
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    gs = bin_dir / "gs"
+    gs.write_text(f"#!{sys.executable}\n" + FAKE_GS, encoding="utf-8")
+    gs.chmod(gs.stat().st_mode | stat.S_IEXEC)
+    running_dir = tmp_path / "running"
+    running_dir.mkdir()
+    log = tmp_path / "gs-calls.jsonl"
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("FAKE_GS_LOG", str(log))
+    monkeypatch.setenv("FAKE_GS_RUNNING", str(running_dir))
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+
+    def calls():
+        if not log.exists():
+            return []
+        with open(log, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    return calls
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+測試用的 PDF 產生器
+以最少的物件手動組出各種交互參照格式 (傳統表、交互參照串流、混合式、增量更新) 的檔案
+"""
+
+import zlib
+from typing import Dict, Iterable, Optional
+
+
+def page_tree(page_count: int, first: int = 3) -> Dict[int, bytes]:
+    """
+    文件目錄 (1)、頁面樹 (2) 與 page_count 個空白頁 (從 first 開始編號)
+
+    Returns:
+        {物件編號: 物件內容}
+    """
+    pages = list(range(first, first + page_count))
+    objects = {
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[%s]/Count %d>>" % (b" ".join(b"%d 0 R" % n for n in pages), page_count),
+    }
+    for num in pages:
+        objects[num] = b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>"
+    return objects
+
+
+def _predict_up(rows: Iterable[bytes]) -> bytes:
+    """以 PNG Up 預測器編碼每一列"""
+    out = bytearray()
+    previous = None
+    for row in rows:
+        previous = previous or bytes(len(row))
+        out += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    return bytes(out)
+
+
+def build_pdf(
+    objects: Dict[int, bytes],
+    xref: str = "table",
+    compressed: Iterable[int] = (),
+    predictor: bool = False,
+    base: bytes = b"%PDF-1.5\n",
+    prev: Optional[int] = None,
+    streams: Optional[Dict[int, bytes]] = None,
+) -> bytes:
+    """
+    組出 PDF (或接在 base 之後的增量更新)
+
+    Args:
+        objects: {物件編號: 物件內容}
+        xref: "table" (傳統表)、"stream" (交互參照串流) 或 "hybrid" (傳統表 + /XRefStm)
+        compressed: 放入物件串流的物件編號 (xref 不能是 "table")
+        predictor: 交互參照串流使用 PNG 預測器
+        base: 增量更新時為原始檔案內容
+        prev: 增量更新時上一個交互參照區段的位置
+        streams: {物件編號: 串流資料}，物件內容為串流字典 (不含 /Length)
+
+    Returns:
+        檔案內容
+    """
+    compressed = [num for num in sorted(objects) if num in set(compressed)]
+    out = bytearray(base)
+    entries = {}  # 物件編號 → (類型, 欄位 2, 欄位 3)，同交互參照串流的項目
+    for num in sorted(objects):
+        if num in compressed:
+            continue
+        entries[num] = (1, len(out), 0)
+        if streams and num in streams:
+            data = streams[num]
+            out += b"%d 0 obj\n%s\nstream\n" % (num, objects[num][:-2] + b"/Length %d>>" % len(data))
+            out += data + b"\nendstream\nendobj\n"
+        else:
+            out += b"%d 0 obj\n%s\nendobj\n" % (num, objects[num])
+
+    next_number = max(objects) + 1
+    if compressed:
+        offsets, body = [], bytearray()
+        for num in compressed:
+            offsets.append(b"%d %d" % (num, len(body)))
+            body += objects[num] + b"\n"
+        head = b" ".join(offsets) + b"\n"
+        data = zlib.compress(head + bytes(body))
+        entries[next_number] = (1, len(out), 0)
+        out += b"%d 0 obj\n<</Type/ObjStm/N %d/First %d/Filter/FlateDecode/Length %d>>\nstream\n" % (
+            next_number, len(compressed), len(head), len(data)
+        )
+        out += data + b"\nendstream\nendobj\n"
+        for index, num in enumerate(compressed):
+            entries[num] = (2, next_number, index)
+        next_number += 1
+
+    trailer = b"/Root 1 0 R" + (b"/Prev %d" % prev if prev is not None else b"")
+
+    def write_stream(stream_entries, extra):
+        number = next_number
+        stream_entries = dict(stream_entries)
+        stream_entries[number] = (1, len(out), 0)
+        if prev is None:
+            stream_entries[0] = (0, 0, 65535)
+        nums = sorted(stream_entries)
+        rows = [
+            bytes([kind]) + second.to_bytes(4, "big") + third.to_bytes(2, "big")
+            for kind, second, third in (stream_entries[n] for n in nums)
+        ]
+        parms = b""
+        if predictor:
+            data = zlib.compress(_predict_up(rows))
+            parms = b"/DecodeParms<</Predictor 12/Columns 7>>"
+        else:
+            data = zlib.compress(b"".join(rows))
+        index = b" ".join(b"%d 1" % n for n in nums)
+        position = len(out)
+        out.extend(
+            b"%d 0 obj\n<</Type/XRef/Size %d/W[1 4 2]/Index[%s]/Filter/FlateDecode%s/Length %d%s>>\nstream\n"
+            % (number, number + 1, index, parms, len(data), extra)
+        )
+        out.extend(data + b"\nendstream\nendobj\n")
+        return position
+
+    if xref == "stream":
+        position = write_stream(entries, trailer)
+    else:
+        hidden = b""
+        if xref == "hybrid":
+            # 混合式：物件串流中的物件在傳統表中標為 f，實際位置只記錄在 /XRefStm
+            stm = write_stream({num: entries[num] for num in compressed}, b"")
+            hidden = b"/XRefStm %d" % stm
+            next_number += 1
+        position = len(out)
+        lines = [b"xref\n"]
+        if prev is None:
+            lines.append(b"0 1\n0000000000 65535 f \n")
+        for num in sorted(entries):
+            kind, second, third = entries[num]
+            line = b"%010d %05d n \n" % (second, third) if kind == 1 else b"0000000000 00000 f \n"
+            lines.append(b"%d 1\n" % num + line)
+        out += b"".join(lines)
+        out += b"trailer\n<<%s/Size %d%s>>\n" % (trailer, next_number, hidden)
+    out += b"startxref\n%d\n%%%%EOF\n" % position
+    return bytes(out)
+
+
+def startxref(data: bytes) -> int:
+    """檔案最後一個 startxref 指向的位置"""
+    tail = data[data.rindex(b"startxref"):]
+    return int(tail.split()[1])
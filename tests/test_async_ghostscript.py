@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""非同步包裝器測試"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from core.async_ghostscript import AsyncGhostscriptWrapper
+from core.journal import PageCollector
+from pdf_samples import build_pdf, page_tree
+
+
+def _make_pdfs(directory, count):
+    paths = []
+    for i in range(count):
+        path = directory / f"{i:03d}.pdf"
+        path.write_bytes(b"%PDF-1.4\n")
+        paths.append(str(path))
+    return paths
+
+
+def _running_pids(tmp_path):
+    return [int(name) for name in os.listdir(tmp_path / "running")]
+
+
+def _assert_gone(pid):
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+
+def test_page_count_respects_max_concurrency(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_DELAY", "0.01")
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    paths = _make_pdfs(inputs, 300)
+
+    async def main():
+        wrapper = AsyncGhostscriptWrapper(max_concurrency=4)
+        return await asyncio.gather(*(wrapper.get_pdf_page_count(path) for path in paths))
+
+    assert asyncio.run(main()) == [3] * len(paths)
+    calls = fake_gs()
+    assert len(calls) == len(paths)
+    peak = max(call["running"] for call in calls)
+    assert 1 < peak <= 4
+
+
+def test_timeout_kills_process(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_DELAY", "30")
+    path = _make_pdfs(tmp_path, 1)[0]
+
+    async def main():
+        wrapper = AsyncGhostscriptWrapper(timeout=0.5)
+        return await wrapper.compress_pdf(path, str(tmp_path / "out.pdf"))
+
+    started = time.monotonic()
+    result = asyncio.run(main())
+
+    assert time.monotonic() - started < 10
+    assert not result.success
+    assert "逾時" in result.message
+    pids = _running_pids(tmp_path)
+    assert len(pids) == 1
+    _assert_gone(pids[0])
+
+
+def test_cancel_kills_process(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_DELAY", "30")
+    path = _make_pdfs(tmp_path, 1)[0]
+
+    async def main():
+        wrapper = AsyncGhostscriptWrapper()
+        task = asyncio.ensure_future(wrapper.get_pdf_page_count(path))
+        while not fake_gs():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    pids = _running_pids(tmp_path)
+    assert len(pids) == 1
+    _assert_gone(pids[0])
+
+
+def test_results_are_finished_off_the_event_loop(fake_gs, tmp_path):
+    path = _make_pdfs(tmp_path, 1)[0]
+    threads = []
+
+    async def main():
+        wrapper = AsyncGhostscriptWrapper()
+        finish_result = wrapper._sync._finish_result
+
+        def record_thread(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return finish_result(*args, **kwargs)
+
+        wrapper._sync._finish_result = record_thread
+        return await wrapper.split_pdf(path, str(tmp_path / "part.pdf"), 1, 2)
+
+    result = asyncio.run(main())
+
+    assert result.success
+    assert result.output_files == [str(tmp_path / "part.pdf")]
+    assert not os.path.exists(str(tmp_path / "part.pdf.part"))
+    assert threads and threading.get_ident() not in threads
+
+
+def test_size_split_checks_parts_off_the_event_loop(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_PAGES", "2")
+    path = tmp_path / "in.pdf"
+    path.write_bytes(build_pdf(page_tree(2)))
+    threads = []
+
+    async def main():
+        wrapper = AsyncGhostscriptWrapper()
+        check_size_part = wrapper._sync._check_size_part
+
+        def record_thread(*args):
+            threads.append(threading.get_ident())
+            return check_size_part(*args)
+
+        wrapper._sync._check_size_part = record_thread
+        return await wrapper.split_pdf_by_size(str(path), str(tmp_path / "out.pdf"), 1000)
+
+    result = asyncio.run(main())
+
+    assert result.success
+    assert len(result.output_files) == 2
+    assert len(threads) == 2 and threading.get_ident() not in threads
+
+
+def test_resumed_pages_are_collected_off_the_event_loop(fake_gs, tmp_path, monkeypatch):
+    path = _make_pdfs(tmp_path, 1)[0]
+    pattern = str(tmp_path / "page_%d.png")
+    threads = []
+
+    def recording(method):
+        def record_thread(*args):
+            threads.append(threading.get_ident())
+            return method(*args)
+        return record_thread
+
+    monkeypatch.setattr(PageCollector, "page_started", recording(PageCollector.page_started))
+    monkeypatch.setattr(PageCollector, "finish", recording(PageCollector.finish))
+
+    async def main():
+        wrapper = AsyncGhostscriptWrapper()
+        wrapper._sync._finish_resume = recording(wrapper._sync._finish_resume)
+        return await wrapper.pdf_to_image(path, pattern, pages="1-3", jobs=2, resume=True)
+
+    result = asyncio.run(main())
+
+    assert result.success
+    assert result.details["resume"]["recorded"] == 3
+    assert all(os.path.exists(pattern % page) for page in (1, 2, 3))
+    assert len(threads) > 3 and threading.get_ident() not in threads
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""黑白圖片 G4 壓縮測試"""
+
+import pytest
+from PIL import Image
+
+from core.bilevel import _otsu_threshold, analyze_image, encode_g4, prepare_bilevel
+
+
+def _histogram(levels):
+    histogram = [0] * 256
+    for level, count in levels.items():
+        histogram[level] = count
+    return histogram
+
+
+def _text_page(mode="L", size=(200, 100), ink=0, paper=255):
+    """白底上有幾條黑色橫線的「文件」"""
+    image = Image.new(mode, size, paper)
+    for y in range(10, size[1], 20):
+        image.paste(ink, (10, y, size[0] - 10, y + 3))
+    return image
+
+
+def test_otsu_threshold_splits_the_two_peaks():
+    histogram = _histogram({18: 40, 20: 100, 24: 30, 225: 300, 230: 900, 236: 200})
+    assert 24 < _otsu_threshold(histogram) <= 225
+    assert _otsu_threshold(_histogram({128: 10})) == 128
+
+
+@pytest.mark.parametrize("make, kind", [
+    (lambda: _text_page().convert("1"), "bilevel"),
+    (lambda: _text_page(ink=30, paper=220), "bilevel"),
+    (lambda: _text_page("RGB", ink=(0, 0, 0), paper=(255, 255, 255)), "bilevel"),
+    (lambda: Image.linear_gradient("L").resize((200, 100)), "gray"),
+    (lambda: _text_page("RGB", ink=(200, 0, 0), paper=(255, 255, 255)), "color"),
+    (lambda: _text_page("LA", ink=(0, 255), paper=(255, 0)), "color"),
+    (lambda: _text_page("RGBA", ink=(0, 0, 0, 255), paper=(255, 255, 255, 0)), "color"),
+])
+def test_analyze_image(tmp_path, make, kind):
+    path = str(tmp_path / "image.png")
+    make().save(path)
+
+    info = analyze_image(path)
+
+    assert info["kind"] == kind
+    if kind == "bilevel":
+        assert 0 < info["threshold"] <= 255
+
+
+def test_near_bilevel_scan(tmp_path):
+    image = _text_page()
+    image.paste(128, (0, 0, 10, 10))  # 少量中間調 (掃描雜訊)
+    path = str(tmp_path / "scan.png")
+    image.save(path)
+
+    info = analyze_image(path)
+
+    assert info == {"kind": "near", "threshold": info["threshold"]}
+    assert 0 < info["threshold"] <= 255
+
+
+def test_transparent_palette_image_is_not_bilevel(tmp_path):
+    image = _text_page().convert("P")
+    path = str(tmp_path / "logo.png")
+    image.save(path, transparency=255)
+
+    assert analyze_image(path)["kind"] == "color"
+
+
+def test_encode_g4_applies_exif_orientation(tmp_path):
+    image = Image.new("L", (200, 100), 255)
+    image.paste(0, (0, 0, 100, 100))  # 左半邊黑
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 順時針轉 90 度顯示
+    source = str(tmp_path / "photo.jpg")
+    image.save(source, exif=exif, dpi=(300, 150))
+    output = str(tmp_path / "out.tif")
+
+    encode_g4(source, output, 128)
+
+    with Image.open(output) as encoded:
+        assert encoded.mode == "1"
+        assert encoded.size == (100, 200)
+        assert tuple(round(v) for v in encoded.info["dpi"]) == (150, 300)
+        # 轉正後黑色在上半部
+        assert encoded.getpixel((50, 50)) == 0 and encoded.getpixel((50, 150)) == 255
+
+
+def test_prepare_bilevel_converts_only_bilevel_images(tmp_path):
+    scan = str(tmp_path / "scan.png")
+    _text_page(size=(1200, 800)).save(scan)
+    photo = str(tmp_path / "photo.png")
+    _text_page("RGB", size=(200, 100), ink=(200, 0, 0), paper=(255, 255, 255)).save(photo)
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+
+    report = prepare_bilevel([scan, photo], str(work_dir), jobs=2)
+
+    assert report.kinds == ["bilevel", "color"]
+    assert report.converted == [0]
+    assert report.sources[0].endswith(".tif") and report.sources[1] == photo
+    assert report.bytes_after < report.bytes_before
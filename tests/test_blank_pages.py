@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""空白頁偵測測試"""
+
+import json
+import os
+import threading
+
+import numpy
+import pytest
+
+from core import blank_pages
+from core.blank_pages import detect_blank_pages, ink_coverage
+from core.result import JobResult
+
+
+def _page(ink_rows=0, size=100):
+    """白色頁面，從第 20 列起畫上 ink_rows 列黑色橫條"""
+    array = numpy.full((size, size, 1), 255, dtype=numpy.uint8)
+    array[20:20 + ink_rows, :, 0] = 0
+    return array
+
+
+class FakeStream(list):
+    def __init__(self, arrays, success=True):
+        super().__init__(arrays)
+        self.result = JobResult(success=success)
+
+
+class FakeWrapper:
+    """依頁碼回傳預先準備的陣列，記錄每次轉換的頁碼範圍"""
+
+    def __init__(self, pages, fail=False):
+        self.pages = pages
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_pdf_page_count(self, input_file):
+        return len(self.pages)
+
+    def render_arrays(self, input_file, dpi, color, first_page, last_page, render_preset):
+        with self._lock:
+            self.calls.append((first_page, last_page))
+        return FakeStream(self.pages[first_page - 1:last_page], success=not self.fail)
+
+
+@pytest.fixture
+def scores_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache" / "blank_scores.json")
+    monkeypatch.setattr(blank_pages, "BLANK_SCORES_FILE", path)
+    return path
+
+
+@pytest.fixture
+def input_pdf(tmp_path):
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(b"%PDF-1.4\n")
+    return str(path)
+
+
+def test_ink_coverage_ignores_the_margin():
+    assert ink_coverage(_page()) == 0.0
+    assert ink_coverage(_page(10)) == pytest.approx(10 * 90 / (90 * 90))
+    edge = _page()
+    edge[:4, :, 0] = 0  # 掃描器邊緣的陰影
+    assert ink_coverage(edge, margin=0.05) == 0.0
+    assert ink_coverage(edge, margin=0.0) == pytest.approx(0.04)
+
+
+def test_detects_blank_pages_with_parallel_shards(scores_file, input_pdf):
+    wrapper = FakeWrapper([_page(), _page(30), _page(1), _page(), _page(50)])
+
+    report = detect_blank_pages(wrapper, input_pdf, threshold=0.005, ink_level=128, margin=0.05, jobs=2)
+
+    assert report.blank_pages == [1, 4]
+    assert not report.cached
+    assert sorted(wrapper.calls) == [(1, 3), (4, 5)]
+    assert report.to_dict()["pages"] == 5
+
+
+def test_scores_are_reused_for_another_threshold(scores_file, input_pdf):
+    wrapper = FakeWrapper([_page(), _page(1), _page(30)])
+    detect_blank_pages(wrapper, input_pdf, threshold=0.005)
+
+    report = detect_blank_pages(wrapper, input_pdf, threshold=0.05)
+
+    assert report.cached
+    assert report.blank_pages == [1, 2]
+    assert len(wrapper.calls) == 1
+    assert "先前記錄" in report.summary()
+
+    # 其他轉換參數或修改過的檔案重新計算
+    detect_blank_pages(wrapper, input_pdf, dpi=50)
+    with open(input_pdf, "ab") as f:
+        f.write(b"%changed\n")
+    assert not detect_blank_pages(wrapper, input_pdf).cached
+    assert len(wrapper.calls) == 3
+
+
+def test_cache_keeps_the_most_recent_files(scores_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(blank_pages, "BLANK_SCORES_CACHE_SIZE", 2)
+    wrapper = FakeWrapper([_page()])
+    paths = []
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF-1.4\n")
+        paths.append(str(path))
+        detect_blank_pages(wrapper, str(path))
+
+    with open(scores_file, encoding="utf-8") as f:
+        keys = list(json.load(f))
+    assert [key.split("|")[0] for key in keys] == [os.path.abspath(p) for p in paths[1:]]
+
+
+def test_failed_render_is_not_cached(scores_file, input_pdf):
+    with pytest.raises(RuntimeError):
+        detect_blank_pages(FakeWrapper([_page(), _page()], fail=True), input_pdf)
+    assert not os.path.exists(scores_file)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""去除重複資源測試"""
+
+from core.dedup import dedupe_pdf, find_duplicates
+from core.pdf_reader import PdfReader
+from pdf_samples import build_pdf
+
+IMAGE = b"<</Type/XObject/Subtype/Image/Width 10/Height 10/ColorSpace/DeviceGray/BitsPerComponent 8>>"
+PAGE = b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]/Resources<</XObject<<%s>>/Font<</F0 %d 0 R>>>>>>"
+
+
+def _merged_pdf():
+    """
+    兩頁各自帶著同一張圖片與同一個字型 (模擬合併後的檔案)，第二頁另有一張不同的圖片
+
+    字型檔 (12, 13) 相同，字型描述 (10, 11) 與字型字典 (8, 9) 要等字型檔合併後才會相同
+    """
+    objects = {
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[3 0 R 4 0 R]/Count 2>>",
+        3: PAGE % (b"/Im0 5 0 R", 8),
+        4: PAGE % (b"/Im0 6 0 R/Im1 7 0 R", 9),
+        5: IMAGE,
+        6: IMAGE,
+        7: IMAGE,
+        8: b"<</Type/Font/Subtype/Type1/BaseFont/Foo/FontDescriptor 10 0 R>>",
+        9: b"<</Type/Font/Subtype/Type1/BaseFont/Foo/FontDescriptor 11 0 R>>",
+        10: b"<</Type/FontDescriptor/FontName/Foo/FontFile 12 0 R>>",
+        11: b"<</Type/FontDescriptor/FontName/Foo/FontFile 13 0 R>>",
+        12: b"<</Length1 300>>",
+        13: b"<</Length1 300>>",
+    }
+    streams = {5: b"\x80" * 100, 6: b"\x80" * 100, 7: b"\x40" * 100, 12: b"font" * 75, 13: b"font" * 75}
+    return build_pdf(objects, streams=streams)
+
+
+def test_find_duplicates_merges_resources_but_not_pages(tmp_path):
+    path = tmp_path / "merged.pdf"
+    path.write_bytes(_merged_pdf())
+
+    with PdfReader(str(path)) as reader:
+        assert find_duplicates(reader) == {6: 5, 9: 8, 11: 10, 13: 12}
+
+
+def test_dedupe_pdf_rewrites_references(tmp_path):
+    path = tmp_path / "merged.pdf"
+    path.write_bytes(_merged_pdf())
+    output = tmp_path / "deduped.pdf"
+
+    report = dedupe_pdf(str(path), str(output))
+
+    assert report.removed == {"image": 1, "font": 3, "icc": 0, "form": 0, "other": 0}
+    assert report.stream_bytes_removed == 400
+    assert report.bytes_after == output.stat().st_size < report.bytes_before
+    assert "移除 4 個物件" in report.summary()
+    with PdfReader(str(output)) as reader:
+        first, second = (reader.resolve(ref)["Resources"] for ref in reader.page_refs())
+        assert first["XObject"]["Im0"] == second["XObject"]["Im0"] != second["XObject"]["Im1"]
+        assert first["Font"]["F0"] == second["Font"]["F0"]
+        assert len(reader.xref) == 10  # 0 號 + 9 個物件
+
+
+def test_nothing_to_remove(tmp_path):
+    path = tmp_path / "merged.pdf"
+    path.write_bytes(build_pdf({
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[3 0 R]/Count 1>>",
+        3: PAGE % (b"/Im0 4 0 R", 5),
+        4: IMAGE,
+        5: b"<</Type/Font/Subtype/Type1/BaseFont/Foo>>",
+    }, streams={4: b"\x80" * 100}))
+
+    report = dedupe_pdf(str(path), str(tmp_path / "out.pdf"))
+
+    assert report.objects_removed == 0
+    assert report.summary() == "去除重複資源: 沒有重複的物件"
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Ghostscript 包裝器測試"""
+
+import os
+
+import pytest
+
+from core.ghostscript import GhostscriptWrapper
+
+
+# 使用者取的檔名會原樣傳給 Ghostscript，不能被當成 PostScript 程式碼執行
+HOSTILE_NAMES = [
+    "a) (w) file closefile (b.pdf",
+    "%pipe%touch pwned.pdf",
+    "x\\) quit (.pdf",
+]
+
+
+@pytest.mark.parametrize("name", HOSTILE_NAMES)
+def test_page_probes_keep_path_out_of_postscript(fake_gs, tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"%PDF-1.4\n")
+    wrapper = GhostscriptWrapper()
+
+    assert wrapper.get_pdf_page_count(str(path)) == 3
+    path.write_bytes(b"%PDF-1.4\n%changed\n")
+    assert len(wrapper.get_pdf_page_boxes(str(path))) == 3
+
+    probes = [call["args"] for call in fake_gs() if "-c" in call["args"]]
+    assert len(probes) == 2
+    for args in probes:
+        assert os.path.basename(str(path)) not in args[args.index("-c") + 1]
+        assert f"-sGSGUIInputFile={path}" in args
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""圖片轉 PDF 大小最佳化測試"""
+
+import io
+import os
+import random
+
+import pytest
+from PIL import Image
+
+from core.config import IMAGE_OPTIMIZE
+from core.image_optimize import ImageOptimizeReport, optimize_image, optimize_images, target_pixels
+
+# A4、30 dpi: 長邊 351、短邊 248 像素 (測試圖片較小，執行較快)
+SETTINGS = dict(IMAGE_OPTIMIZE, paper_size="A4", dpi=30)
+
+
+def _photo(size):
+    """顏色很多的「照片」(平滑漸層加上雜訊)"""
+    width, height = size
+    generator = random.Random(3)
+    small = Image.new("RGB", (width // 8, height // 8))
+    small.putdata([
+        (x * 255 // small.width, y * 255 // small.height, generator.randrange(256))
+        for y in range(small.height) for x in range(small.width)
+    ])
+    return small.resize(size, Image.BICUBIC)
+
+
+def _screenshot(size):
+    """只有幾種顏色的「螢幕截圖」"""
+    image = Image.new("RGB", size, (255, 255, 255))
+    for y in range(0, size[1], 40):
+        image.paste((30, 60, 200), (20, y, size[0] - 20, y + 8))
+    return image
+
+
+def _open(source):
+    return Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def test_target_pixels():
+    assert target_pixels("A4", 150) == (1754, 1240)
+    assert target_pixels("unknown", 150) == (1754, 1240)
+
+
+def test_large_lossless_photo_becomes_a_smaller_jpeg(tmp_path):
+    path = str(tmp_path / "photo.png")
+    _photo((900, 600)).save(path)
+
+    source, action, size = optimize_image(path, SETTINGS)
+
+    assert action == "jpeg"
+    assert size == len(source) < os.path.getsize(path)
+    with _open(source) as image:
+        assert image.format == "JPEG"
+        assert max(image.size) <= 351 and min(image.size) <= 248
+
+
+def test_large_jpeg_is_downscaled_upright(tmp_path):
+    path = str(tmp_path / "phone.jpg")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 橫向拍攝、顯示時轉 90 度
+    _photo((1200, 900)).save(path, quality=95, exif=exif)
+
+    source, action, _ = optimize_image(path, SETTINGS)
+
+    assert action == "downscale"
+    with _open(source) as image:
+        assert image.height > image.width
+        assert image.size == (248, 331)
+
+
+@pytest.mark.parametrize("make, name", [
+    (lambda: _photo((160, 120)), "small.jpg"),
+    (lambda: _screenshot((160, 120)), "small.png"),
+    (lambda: _screenshot((900, 600)).convert("1"), "scan.png"),
+])
+def test_images_that_are_kept(tmp_path, make, name):
+    path = str(tmp_path / name)
+    make().save(path)
+
+    assert optimize_image(path, SETTINGS) == (path, "keep", os.path.getsize(path))
+
+
+def test_large_screenshot_stays_lossless(tmp_path):
+    path = str(tmp_path / "screen.png")
+    _screenshot((900, 600)).save(path)
+
+    source, action, _ = optimize_image(path, SETTINGS)
+
+    assert action == "downscale"
+    with _open(source) as image:
+        assert image.format == "PNG"
+
+
+def test_transparent_photo_is_not_turned_into_jpeg(tmp_path):
+    path = str(tmp_path / "cutout.png")
+    image = _photo((900, 600)).convert("RGBA")
+    image.putalpha(128)
+    image.save(path)
+
+    source, action, _ = optimize_image(path, SETTINGS)
+
+    assert action == "downscale"
+    with _open(source) as result:
+        assert result.format == "PNG" and result.mode == "RGBA"
+
+
+def test_optimize_images_keeps_order_and_reports(tmp_path):
+    paths = []
+    for i in range(5):
+        path = str(tmp_path / f"{i}.png")
+        (_photo((900, 600)) if i % 2 else _screenshot((160, 120))).save(path)
+        paths.append(path)
+    broken = str(tmp_path / "broken.png")
+    with open(broken, "wb") as f:
+        f.write(b"not an image")
+    paths.append(broken)
+    report = ImageOptimizeReport()
+
+    sources = list(optimize_images(paths, SETTINGS, jobs=2, report=report))
+
+    assert [isinstance(s, bytes) for s in sources] == [False, True, False, True, False, False]
+    assert sources[0] == paths[0] and sources[-1] == broken
+    assert report.actions == {"keep": 4, "jpeg": 2}
+    assert report.images == 6
+    assert report.bytes_after < report.bytes_before
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""增量轉圖片測試"""
+
+import pytest
+
+from core.ghostscript import GhostscriptWrapper
+from core.incremental import IncrementalPlan, page_fingerprints
+from core.pdf_reader import PdfError
+from pdf_samples import build_pdf, page_tree
+
+OPTIONS = {"device": "PNG", "dpi": 150, "render_preset": None}
+
+
+def _outputs(tmp_path, pages):
+    pattern = str(tmp_path / "page_%03d.png")
+    for page in pages:
+        with open(pattern % page, "wb") as f:
+            f.write(b"png")
+    return pattern
+
+
+def test_plan_skips_unchanged_pages(tmp_path):
+    pattern = _outputs(tmp_path, [1, 2, 3])
+
+    first = IncrementalPlan(pattern, OPTIONS, [1, 2, 3], ["a", "b", "c"])
+    assert first.render == [1, 2, 3]
+    assert first.reasons["changed"] == 3
+    first.save([1, 2, 3])
+
+    (tmp_path / "page_003.png").unlink()
+    plan = IncrementalPlan(pattern, OPTIONS, [1, 2, 3], ["a", "B", "c"])
+    assert plan.render == [2, 3]
+    assert plan.reasons == {"changed": 1, "missing": 1, "options": 0}
+    assert plan.skipped == 1
+    assert plan.summary() == "增量轉換: 重新轉換 2 頁，略過 1/3 頁未變更"
+
+
+def test_plan_renders_everything_when_options_change(tmp_path):
+    pattern = _outputs(tmp_path, [1, 2])
+    IncrementalPlan(pattern, OPTIONS, [1, 2], ["a", "b"]).save([1, 2])
+
+    plan = IncrementalPlan(pattern, dict(OPTIONS, dpi=300), [1, 2], ["a", "b"])
+
+    assert plan.render == [1, 2]
+    assert plan.reasons["options"] == 2
+
+
+def test_save_keeps_failed_pages_stale_and_drops_removed_pages(tmp_path):
+    pattern = _outputs(tmp_path, [1, 2, 3])
+    IncrementalPlan(pattern, OPTIONS, [1, 2, 3], ["a", "b", "c"]).save([1, 2, 3])
+
+    # 文件少了一頁，第 1 頁改變但轉換失敗
+    plan = IncrementalPlan(pattern, OPTIONS, [1, 2], ["A", "b"])
+    plan.save([])
+
+    again = IncrementalPlan(pattern, OPTIONS, [1, 2], ["A", "b"])
+    assert again.previous == {"1": "a", "2": "b"}
+    assert again.render == [1]
+
+
+def test_fingerprints_ignore_object_numbers(tmp_path):
+    original = page_tree(2)
+    renumbered = {
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[9 0 R 8 0 R]/Count 2>>",
+        8: original[4],
+        9: original[3].replace(b"612 792", b"595 842"),
+    }
+    (tmp_path / "a.pdf").write_bytes(build_pdf(original))
+    (tmp_path / "b.pdf").write_bytes(build_pdf(renumbered, xref="stream", compressed=(8, 9)))
+
+    first = page_fingerprints(str(tmp_path / "a.pdf"))
+    second = page_fingerprints(str(tmp_path / "b.pdf"))
+
+    assert first[0] == first[1] == second[1] != second[0]
+
+
+def test_incremental_conversion_renders_only_changed_pages(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_PAGES", "2")
+    path = tmp_path / "in.pdf"
+    path.write_bytes(build_pdf(page_tree(2)))
+    pattern = str(tmp_path / "page_%d.png")
+    wrapper = GhostscriptWrapper()
+
+    first = wrapper.pdf_to_image(str(path), pattern, incremental=True)
+    second = wrapper.pdf_to_image(str(path), pattern, incremental=True)
+
+    assert first.success and second.success
+    assert first.details["incremental"]["rendered"] == 2
+    assert second.details["incremental"]["rendered"] == 0
+    renders = [c for c in fake_gs() if any(a.startswith("-sOutputFile=") for a in c["args"])]
+    assert len(renders) == 1
+
+
+def test_incremental_conversion_rejects_a_page_count_mismatch(fake_gs, tmp_path):
+    path = tmp_path / "in.pdf"
+    path.write_bytes(build_pdf(page_tree(2)))  # Ghostscript (假的) 讀到 3 頁
+
+    with pytest.raises(PdfError, match="頁數"):
+        GhostscriptWrapper().pdf_to_image(str(path), str(tmp_path / "page_%d.png"), incremental=True)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""工作佇列測試"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from core.governor import estimate_job
+from core.job_queue import JobQueue, QueueFullError
+
+
+class RecordingGovernor:
+    """記錄每個工作的資源估計，一律允許執行"""
+
+    def __init__(self):
+        self.estimates = []
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def admit(self, estimate, name=""):
+        self.estimates.append(estimate)
+        return estimate
+
+    def release(self, admission):
+        pass
+
+
+def _run_jobs(job_queue, jobs):
+    job_queue.start()
+    try:
+        submitted = [job_queue.submit(operation, params) for operation, params in jobs]
+        for job in submitted:
+            assert job.wait(timeout=30)
+    finally:
+        job_queue.stop()
+    return submitted
+
+
+def test_estimate_uses_largest_input_page(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_BOX", "2384 3370")  # A0
+    path = tmp_path / "poster.pdf"
+    path.write_bytes(b"%PDF-1.4\n")
+    params = {
+        "input_file": str(path),
+        "output_pattern": str(tmp_path / "page_%03d.png"),
+        "device": "PNG",
+        "dpi": 300,
+    }
+    governor = RecordingGovernor()
+
+    jobs = _run_jobs(JobQueue(workers=1, governor=governor), [("pdf_to_image", params)])
+
+    assert jobs[0].success
+    assert governor.estimates == [estimate_job("pdf_to_image", params, (2384.0, 3370.0))]
+    assert governor.estimates[0]["memory"] > estimate_job("pdf_to_image", params)["memory"] * 4
+    # 頁面大小的查詢結果一併快取頁數，轉換時不再查詢
+    probes = [call["args"] for call in fake_gs() if "-c" in call["args"]]
+    assert len(probes) == 1
+
+
+class FakeHistory:
+    """依輸入檔名回傳預估耗時，記錄呼叫的執行緒"""
+
+    def __init__(self, durations):
+        self.durations = durations
+        self.threads = []
+
+    def estimate(self, operation, params, page_count):
+        self.threads.append(threading.get_ident())
+        return self.durations[os.path.basename(params["input_file"])]
+
+    def record(self, *args, **kwargs):
+        pass
+
+
+def _compress_params(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"%PDF-1.4\n")
+    return {"input_file": str(path), "output_file": str(tmp_path / f"out-{name}")}
+
+
+def _execution_order(job_queue, submit):
+    """送出工作並等待預估完成後才啟動工作執行緒，回傳執行順序 (輸入檔名)"""
+    order = []
+    job_queue.on_finished = lambda job: order.append(os.path.basename(job.params["input_file"]))
+    submit()
+    job_queue.stop()  # 等待預估完成，工作都已放入佇列
+    _run_jobs(job_queue, [])
+    return order
+
+
+def test_prediction_runs_off_the_submitting_thread(fake_gs, tmp_path):
+    history = FakeHistory({"a.pdf": 1.0})
+    job_queue = JobQueue(workers=1, history=history)
+
+    job = _run_jobs(job_queue, [("compress_pdf", _compress_params(tmp_path, "a.pdf"))])[0]
+
+    assert job.success
+    assert job.predicted_duration == 1.0
+    assert history.threads and threading.get_ident() not in history.threads
+
+
+def test_full_queue_is_rejected_before_prediction(fake_gs, tmp_path):
+    history = FakeHistory({"a.pdf": 1.0, "b.pdf": 1.0})
+    job_queue = JobQueue(workers=1, max_queue=1, history=history)
+
+    job_queue.submit("compress_pdf", _compress_params(tmp_path, "a.pdf"))
+    with pytest.raises(QueueFullError):
+        job_queue.submit("compress_pdf", _compress_params(tmp_path, "b.pdf"))
+    job_queue.stop()
+
+    assert len(history.threads) == 1
+    assert job_queue.queue_depth() == 1
+
+
+def test_unknown_jobs_use_median_prediction(fake_gs, tmp_path):
+    history = FakeHistory({"long.pdf": 100.0, "short.pdf": 1.0, "medium.pdf": 2.0, "unknown.pdf": None})
+    job_queue = JobQueue(workers=1, history=history)
+
+    def submit():
+        for name in ("long.pdf", "short.pdf", "medium.pdf"):
+            job_queue.submit("compress_pdf", _compress_params(tmp_path, name))
+        job_queue.stop()
+        job_queue.submit("compress_pdf", _compress_params(tmp_path, "unknown.pdf"))
+
+    assert _execution_order(job_queue, submit) == ["short.pdf", "medium.pdf", "unknown.pdf", "long.pdf"]
+
+
+def test_long_jobs_age_ahead_of_later_short_jobs(fake_gs, tmp_path):
+    history = FakeHistory({"long.pdf": 0.2, "short.pdf": 0.01})
+    job_queue = JobQueue(workers=1, history=history)
+
+    def submit():
+        job_queue.submit("compress_pdf", _compress_params(tmp_path, "long.pdf"))
+        time.sleep(0.5)
+        job_queue.submit("compress_pdf", _compress_params(tmp_path, "short.pdf"))
+
+    assert _execution_order(job_queue, submit) == ["long.pdf", "short.pdf"]
+
+
+def test_cancel_reports_the_job_as_finished(fake_gs, tmp_path):
+    finished = []
+    job_queue = JobQueue(workers=1, on_finished=finished.append)
+
+    job = job_queue.submit("compress_pdf", _compress_params(tmp_path, "a.pdf"))
+    assert job_queue.cancel(job.id)
+    assert not job_queue.cancel(job.id)
+    _run_jobs(job_queue, [])
+
+    assert finished == [job]
+    assert job.status == "cancelled"
+    assert not fake_gs()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""工作日誌 (續傳) 測試"""
+
+import json
+import os
+
+import pytest
+
+from core.ghostscript import GhostscriptWrapper
+from core.journal import JobJournal, PageCollector, journal_path
+
+OPTIONS = {"device": "PNG", "dpi": 150}
+
+
+@pytest.fixture
+def input_pdf(tmp_path):
+    path = tmp_path / "in.pdf"
+    path.write_bytes(b"%PDF-1.4\n")
+    return str(path)
+
+
+def _output(tmp_path, page, data=None):
+    path = str(tmp_path / f"page_{page}.png")
+    with open(path, "wb") as f:
+        f.write(data if data is not None else b"page %d" % page)
+    return path
+
+
+def _lines(journal):
+    with open(journal.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_after_a_torn_last_line(tmp_path, input_pdf):
+    pattern = str(tmp_path / "page_%d.png")
+    journal = JobJournal(pattern, input_pdf, OPTIONS)
+    outputs = {page: _output(tmp_path, page) for page in (1, 2, 3)}
+    journal.record(1, outputs[1])
+    journal.record(2, outputs[2])
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"key": 3, "path": "page_')  # 中斷時寫到一半
+
+    resumed = JobJournal(pattern, input_pdf, OPTIONS)
+
+    assert resumed.completed(outputs) == [1, 2]
+    assert resumed.rejected == 0
+    resumed.record(3, outputs[3])
+    assert JobJournal(pattern, input_pdf, OPTIONS).completed(outputs) == [1, 2, 3]
+
+
+def test_outputs_that_differ_from_the_record_are_rejected(tmp_path, input_pdf):
+    pattern = str(tmp_path / "page_%d.png")
+    journal = JobJournal(pattern, input_pdf, OPTIONS)
+    outputs = {page: _output(tmp_path, page) for page in (1, 2, 3)}
+    for page, path in outputs.items():
+        journal.record(page, path)
+    _output(tmp_path, 1, b"page 9")  # 大小相同、內容不同
+    os.remove(outputs[3])
+
+    resumed = JobJournal(pattern, input_pdf, OPTIONS)
+
+    assert resumed.completed(outputs) == [2]
+    assert resumed.rejected == 2
+    assert resumed.to_dict()["resumed"] == 1
+    assert "2 個記錄與檔案不符" in resumed.summary()
+
+
+@pytest.mark.parametrize("change", ["options", "input"])
+def test_changed_header_resets_the_journal(tmp_path, input_pdf, change):
+    pattern = str(tmp_path / "page_%d.png")
+    outputs = {page: _output(tmp_path, page) for page in (1, 2)}
+    journal = JobJournal(pattern, input_pdf, OPTIONS)
+    for page, path in outputs.items():
+        journal.record(page, path)
+    options = OPTIONS
+    if change == "options":
+        options = dict(OPTIONS, dpi=300)
+    else:
+        with open(input_pdf, "ab") as f:
+            f.write(b"%changed\n")
+
+    resumed = JobJournal(pattern, input_pdf, options)
+
+    assert resumed.completed(outputs) == []
+    assert resumed.rejected == 0
+    resumed.record(2, outputs[2])
+    lines = _lines(resumed)
+    assert lines[0] == resumed.header
+    assert [line["key"] for line in lines[1:]] == [2]
+
+
+def test_journal_lives_next_to_the_outputs(tmp_path):
+    assert journal_path(str(tmp_path / "page_%03d.png")) == str(tmp_path / ".page__03d.png.journal.jsonl")
+
+
+def test_collector_never_takes_a_partial_file(tmp_path, input_pdf):
+    work = tmp_path / "work"
+    work.mkdir()
+    output_pattern = str(tmp_path / "page_%d.png")
+    journal = JobJournal(output_pattern, input_pdf, OPTIONS)
+    collector = PageCollector(str(work / "%d.png"), output_pattern, [4, 5, 6], journal)
+    (work / "1.png").write_bytes(b"page 4")
+    (work / "2.png.part").write_bytes(b"page")
+
+    collector.page_started()
+    collector.page_started()  # 第 1 頁寫完
+    collector.page_started()  # 第 2 頁只有暫存檔，等待
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(journal.path), "in.pdf", "page_4.png", "work"]
+
+    (work / "3.png").write_bytes(b"page 6")
+    collector.finish(False)  # 失敗：最後開始的第 3 頁可能不完整
+
+    assert sorted(os.listdir(work)) == ["2.png.part", "3.png"]
+    assert not os.path.exists(output_pattern % 5) and not os.path.exists(output_pattern % 6)
+    assert [line.get("key") for line in _lines(journal)[1:]] == [4]
+
+
+def test_resumed_render_only_converts_missing_pages(fake_gs, tmp_path, input_pdf):
+    pattern = str(tmp_path / "page_%d.png")
+    wrapper = GhostscriptWrapper()
+    assert wrapper.pdf_to_image(input_pdf, pattern, resume=True).success
+    os.remove(pattern % 2)
+
+    result = wrapper.pdf_to_image(input_pdf, pattern, resume=True)
+
+    assert result.success
+    assert result.details["resume"]["resumed"] == 2
+    assert result.details["resume"]["rejected"] == 1
+    assert result.details["resume"]["recorded"] == 1
+    assert os.path.exists(pattern % 2)
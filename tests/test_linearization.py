@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""線性化檢查測試"""
+
+import struct
+
+from core.linearization import check_linearization
+from pdf_samples import build_pdf, page_tree
+
+
+def _linearized_pdf(page_count=2, first_page_end=None, hint_shift=0):
+    """
+    組出線性化的 PDF：線性化參數字典 (1)、提示串流 (2)、第一頁 (3)、其他頁、頁面樹與目錄，
+    主要交互參照表在檔尾
+
+    Args:
+        first_page_end: 取代 /E 的值 (None=正確的位置)
+        hint_shift: 提示表中第一頁位置的偏移 (0=正確)
+    """
+    pages = list(range(3, 3 + page_count))
+    pages_num, catalog_num = pages[-1] + 1, pages[-1] + 2
+    bodies = {
+        num: b"<</Type/Page/Parent %d 0 R/MediaBox[0 0 612 792]>>" % pages_num for num in pages
+    }
+    bodies[pages_num] = b"<</Type/Pages/Kids[%s]/Count %d>>" % (
+        b" ".join(b"%d 0 R" % n for n in pages), page_count
+    )
+    bodies[catalog_num] = b"<</Type/Catalog/Pages %d 0 R>>" % pages_num
+
+    def render(params, hint):
+        out = bytearray(b"%PDF-1.5\n")
+        offsets = {1: len(out)}
+        out += b"1 0 obj\n<</Linearized 1/L %010d/H[%010d %010d]/O 3/E %010d/N %d/T %010d>>\nendobj\n" % (
+            params["L"], params["H"][0], params["H"][1], params["E"], page_count, params["T"]
+        )
+        offsets[2] = len(out)
+        out += b"2 0 obj\n<</S %d/Length %d>>\nstream\n" % (hint[1], len(hint[0])) + hint[0]
+        out += b"\nendstream\nendobj\n"
+        hint_end = len(out)
+        page_ends = []
+        for num in sorted(bodies):
+            offsets[num] = len(out)
+            out += b"%d 0 obj\n%s\nendobj\n" % (num, bodies[num])
+            page_ends.append(len(out))
+        xref = len(out)
+        out += b"xref\n0 %d" % (catalog_num + 1)
+        first_entry = len(out)
+        out += b"\n0000000000 65535 f \n"
+        out += b"".join(b"%010d 00000 n \n" % offsets[num] for num in range(1, catalog_num + 1))
+        out += b"trailer\n<</Size %d/Root %d 0 R>>\n" % (catalog_num + 1, catalog_num)
+        out += b"startxref\n%d\n%%%%EOF\n" % xref
+        return bytes(out), offsets, page_ends[:page_count], hint_end, first_entry
+
+    def hint_tables(offsets, page_ends, hint_length):
+        lengths = [end - offsets[num] for num, end in zip(pages, page_ends)]
+        least = min(lengths)
+        bits = max(1, max(length - least for length in lengths).bit_length())
+        header = struct.pack(
+            ">IIHIHIHIHHHHH", 1, offsets[3] - hint_length + hint_shift, 0, least, bits, 0, 0, 0, 0, 0, 0, 0, 1
+        )
+        packed, value = 0, 0
+        for length in lengths:
+            value = (value << bits) | (length - least)
+            packed += bits
+        delta = (value << (-packed % 8)).to_bytes((packed + 7) // 8, "big")
+        data = header + delta
+        return data + struct.pack(">IIII", 0, 0, 0, 0), len(data)
+
+    params = {"L": 0, "H": [0, 0], "E": 0, "T": 0}
+    hint = (bytes(64), 0)
+    # 物件長度固定 (數值補零)，先以暫定的內容算出位置再填入
+    for _ in range(3):
+        data, offsets, page_ends, hint_end, first_entry = render(params, hint)
+        hint_length = hint_end - offsets[2]
+        hint = hint_tables(offsets, page_ends, hint_length)
+        params = {
+            "L": len(data), "H": [offsets[2], hint_length], "T": first_entry,
+            "E": page_ends[0] if first_page_end is None else first_page_end,
+        }
+    data, _, _, _, _ = render(params, hint)
+    assert len(data) == params["L"]
+    return data
+
+
+def test_valid_linearized_file(tmp_path):
+    path = tmp_path / "web.pdf"
+    path.write_bytes(_linearized_pdf())
+
+    report = check_linearization(str(path))
+
+    assert report.errors == []
+    assert report.valid
+    assert report.to_dict()["page_count"] == 2
+    assert report.summary() == "快速網頁檢視: 正常"
+
+
+def test_plain_file_is_not_linearized(tmp_path):
+    path = tmp_path / "plain.pdf"
+    path.write_bytes(build_pdf(page_tree(2)))
+
+    report = check_linearization(str(path))
+
+    assert not report.linearized
+    assert not report.valid
+    assert report.errors == []
+    assert report.summary() == "快速網頁檢視: 未線性化"
+
+
+def test_incremental_update_after_linearization(tmp_path):
+    data = _linearized_pdf()
+    path = tmp_path / "updated.pdf"
+    path.write_bytes(data + b"% appended\n")
+
+    report = check_linearization(str(path))
+
+    assert report.linearized
+    assert not report.valid
+    assert "/L" in report.errors[0]
+
+
+def test_wrong_first_page_end(tmp_path):
+    path = tmp_path / "web.pdf"
+    path.write_bytes(_linearized_pdf(first_page_end=100))
+
+    report = check_linearization(str(path))
+
+    assert not report.valid
+    assert any("/E" in error for error in report.errors)
+
+
+def test_hint_table_page_offsets_must_match(tmp_path):
+    path = tmp_path / "web.pdf"
+    path.write_bytes(_linearized_pdf(hint_shift=7))
+
+    report = check_linearization(str(path))
+
+    assert not report.valid
+    assert any("提示表中的位置" in error for error in report.errors)
+
+
+def test_unreadable_file_is_reported(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"%PDF-1.5\n1 0 obj\n<</Linearized 1>>\nendobj\n")
+
+    report = check_linearization(str(path))
+
+    assert not report.valid
+    assert report.errors
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""頁面成本估計與分段測試"""
+
+import itertools
+import random
+import zlib
+
+import pytest
+
+from core.page_cost import analyze_pages, balance_shards
+from pdf_samples import build_pdf
+
+
+def _worst(costs, ranges):
+    return max(sum(costs[a:b + 1]) for a, b in ranges)
+
+
+def _best_possible(costs, shards):
+    """窮舉所有切點，最小的最大分段成本"""
+    best = sum(costs)
+    for count in range(1, shards):
+        for cuts in itertools.combinations(range(1, len(costs)), count):
+            bounds = [0, *cuts, len(costs)]
+            best = min(best, max(sum(costs[a:b]) for a, b in zip(bounds, bounds[1:])))
+    return best
+
+
+def _assert_covers(ranges, length, shards):
+    assert len(ranges) <= shards
+    assert ranges[0][0] == 0 and ranges[-1][1] == length - 1
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert start == end + 1
+
+
+@pytest.mark.parametrize("costs, shards, expected", [
+    ([], 4, []),
+    ([1.0], 4, [(0, 0)]),
+    ([1.0] * 6, 3, [(0, 1), (2, 3), (4, 5)]),
+    ([1.0] * 3, 8, [(0, 0), (1, 1), (2, 2)]),
+    ([1.0, 1.0, 10.0, 1.0, 1.0], 3, [(0, 1), (2, 2), (3, 4)]),
+    ([5.0, 1.0, 1.0, 1.0], 0, [(0, 3)]),
+])
+def test_balance_shards_examples(costs, shards, expected):
+    assert balance_shards(costs, shards) == expected
+
+
+def test_balance_shards_minimizes_the_largest_shard():
+    generator = random.Random(7)
+    for _ in range(200):
+        costs = [generator.choice([0.5, 1.0, 2.0, 8.0]) * generator.random() + 0.1
+                 for _ in range(generator.randint(1, 9))]
+        shards = generator.randint(1, 4)
+        ranges = balance_shards(costs, shards)
+        _assert_covers(ranges, len(costs), shards)
+        assert _worst(costs, ranges) == pytest.approx(_best_possible(costs, shards), rel=1e-5)
+
+
+def test_analyze_pages_counts_content_images_and_fonts(tmp_path):
+    content = zlib.compress(b"0 0 m 10 10 l S BT /F0 12 Tf (x) Tj ET q /Im0 Do Q")
+    path = tmp_path / "in.pdf"
+    path.write_bytes(build_pdf({
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[3 0 R 4 0 R]/Count 2/Resources<</Font<</F0 7 0 R>>>>>>",
+        3: b"<</Type/Page/Parent 2 0 R/Contents 5 0 R"
+           b"/Resources<</XObject<</Im0 6 0 R>>/Font<</F0 7 0 R/F1 7 0 R>>>>>>",
+        4: b"<</Type/Page/Parent 2 0 R>>",
+        5: b"<</Filter/FlateDecode>>",
+        6: b"<</Type/XObject/Subtype/Image/Width 200/Height 100/BitsPerComponent 8/ColorSpace/DeviceGray>>",
+        7: b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>",
+    }, streams={5: content, 6: bytes(20000)}))
+
+    first, second = analyze_pages(str(path))
+
+    assert (first.page, first.images, first.image_pixels, first.fonts, first.operators) == (1, 1, 20000, 2, 4)
+    assert first.content_bytes == len(zlib.decompress(content))
+    # 第二頁沒有內容，資源字典繼承自頁面樹
+    assert (second.content_bytes, second.images, second.fonts) == (0, 0, 1)
+    assert first.cost > second.cost > 0
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""頁碼範圍運算式測試"""
+
+import pytest
+
+from core.page_ranges import PageRangeError, format_page_ranges, pages_to_ranges, parse_page_ranges
+
+
+@pytest.mark.parametrize("expression, total, expected", [
+    ("5", None, [(5, 5)]),
+    ("1-3,5", None, [(1, 3), (5, 5)]),
+    ("1-3 5", None, [(1, 3), (5, 5)]),
+    ("-4", None, [(1, 4)]),
+    ("9-", 12, [(9, 12)]),
+    ("1-", 3, [(1, 3)]),
+    ("odd", 5, [(1, 1), (3, 3), (5, 5)]),
+    ("EVEN", 5, [(2, 2), (4, 4)]),
+    ("every:4", 10, [(1, 4), (5, 8), (9, 10)]),
+    ("3,1", 3, [(3, 3), (1, 1)]),
+])
+def test_parse(expression, total, expected):
+    assert parse_page_ranges(expression, total) == expected
+
+
+@pytest.mark.parametrize("expression, total, message", [
+    ("", None, "請輸入"),
+    ("1-", None, "需要總頁數"),
+    ("odd", None, "需要總頁數"),
+    ("every:0", 10, "間隔"),
+    ("every:x", 10, "間隔"),
+    ("a-3", 10, "不是有效的頁碼"),
+    ("0", 10, "大於 0"),
+    ("5-3", 10, "起始頁碼"),
+    ("11", 10, "超出總頁數"),
+    ("8-11", 10, "超出總頁數"),
+])
+def test_parse_errors(expression, total, message):
+    with pytest.raises(PageRangeError, match=message):
+        parse_page_ranges(expression, total)
+
+
+def test_unknown_total_does_not_check_bounds():
+    assert parse_page_ranges("100-200") == [(100, 200)]
+
+
+def test_pages_to_ranges_round_trip():
+    ranges = pages_to_ranges([1, 2, 3, 5, 7, 8])
+    assert ranges == [(1, 3), (5, 5), (7, 8)]
+    assert format_page_ranges(ranges) == "1-3,5,7-8"
+    assert parse_page_ranges(format_page_ranges(ranges)) == ranges
+    assert pages_to_ranges([]) == []
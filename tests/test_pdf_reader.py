@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""PDF 結構讀取與改寫測試"""
+
+import pytest
+
+from core.pdf_reader import PdfError, PdfReader, Ref
+from core.pdf_writer import rewrite_pdf
+from pdf_samples import build_pdf, page_tree, startxref
+
+
+LAYOUTS = {
+    "table": {"xref": "table"},
+    "stream": {"xref": "stream", "compressed": (2, 3, 4)},
+    "predictor": {"xref": "stream", "compressed": (2, 3, 4), "predictor": True},
+    "hybrid": {"xref": "hybrid", "compressed": (2, 3, 4)},
+    "hybrid-predictor": {"xref": "hybrid", "compressed": (2, 3, 4), "predictor": True},
+}
+
+
+def _write(tmp_path, data, name="in.pdf"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def _page_boxes(path):
+    with PdfReader(path) as reader:
+        return [reader.resolve(ref)["MediaBox"] for ref in reader.page_refs()]
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_reads_and_rewrites_each_xref_layout(tmp_path, layout):
+    path = _write(tmp_path, build_pdf(page_tree(2), **LAYOUTS[layout]))
+
+    with PdfReader(path) as reader:
+        assert reader.page_refs() == [Ref(3), Ref(4)]
+        compressed = [num for num in (2, 3, 4) if reader.xref[num][0] == "c"]
+        assert compressed == list(LAYOUTS[layout].get("compressed", ()))
+        output = str(tmp_path / "out.pdf")
+        size = rewrite_pdf(reader, output)
+
+    assert size == (tmp_path / "out.pdf").stat().st_size
+    assert _page_boxes(output) == [[0, 0, 612, 792]] * 2
+    with PdfReader(output) as rewritten:
+        # 交互參照串流的檔案改寫後仍使用物件串流
+        assert (rewritten.trailer.get("Type") == "XRef") == (LAYOUTS[layout]["xref"] == "stream")
+
+
+def test_hybrid_stream_overrides_free_table_entries_of_its_own_section(tmp_path):
+    data = build_pdf(page_tree(2), xref="hybrid", compressed=(2, 3, 4))
+    path = _write(tmp_path, data)
+
+    with PdfReader(path) as reader:
+        assert reader.xref[3] == ("c", 5, 1)
+        assert reader.get_object(3)["Type"] == "Page"
+        assert "XRefStm" in reader.trailer
+
+
+def test_prev_chain_prefers_newer_sections(tmp_path):
+    base = build_pdf(page_tree(2))
+    # 增量更新：新增一頁，並把頁面樹放入物件串流
+    update = {
+        2: b"<</Type/Pages/Kids[3 0 R 4 0 R 6 0 R]/Count 3>>",
+        6: b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 100 100]>>",
+    }
+    data = build_pdf(update, xref="stream", compressed=(2, 6), base=base, prev=startxref(base))
+    # 再以傳統表更新一次，刪除第一頁
+    data = build_pdf(
+        {2: b"<</Type/Pages/Kids[4 0 R 6 0 R]/Count 2>>"}, base=data, prev=startxref(data)
+    )
+    path = _write(tmp_path, data)
+
+    with PdfReader(path) as reader:
+        assert reader.page_refs() == [Ref(4), Ref(6)]
+        assert reader.xref[2][0] == "n"
+        assert reader.xref[6][0] == "c"
+    assert _page_boxes(path) == [[0, 0, 612, 792], [0, 0, 100, 100]]
+
+
+def test_hybrid_update_keeps_objects_from_older_sections(tmp_path):
+    base = build_pdf(page_tree(2), xref="hybrid", compressed=(3, 4))
+    data = build_pdf(
+        {2: b"<</Type/Pages/Kids[4 0 R 3 0 R]/Count 2>>"}, base=base, prev=startxref(base)
+    )
+    path = _write(tmp_path, data)
+
+    with PdfReader(path) as reader:
+        assert reader.page_refs() == [Ref(4), Ref(3)]
+        assert reader.xref[3][0] == "c"
+
+
+def test_rejects_broken_files(tmp_path):
+    with pytest.raises(PdfError):
+        PdfReader(_write(tmp_path, b"", "empty.pdf"))
+    with pytest.raises(PdfError):
+        PdfReader(_write(tmp_path, b"%PDF-1.4\n1 0 obj\n<<>>\nendobj\n", "no-xref.pdf"))
+    data = build_pdf(page_tree(1))
+    with pytest.raises(PdfError):
+        PdfReader(_write(tmp_path, data.replace(b"startxref\n", b"startxref\n9"), "offset.pdf"))
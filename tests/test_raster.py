@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""NumPy 光柵讀取測試"""
+
+import io
+import os
+import sys
+import textwrap
+import time
+
+import numpy
+import pytest
+
+from core.raster import RasterError, RasterStream, read_pnm_frame
+
+
+# 代替 Ghostscript：寫出 pid 後輸出 FRAMES 頁 2x3 的 P6 (FRAMES=0 表示無限多頁)，最後以 EXIT 結束
+PRODUCER = textwrap.dedent('''\
+    import itertools, os, sys
+    with open(sys.argv[1], "w") as f:
+        f.write(str(os.getpid()))
+    frames = int(sys.argv[2])
+    for index in itertools.count() if frames == 0 else range(frames):
+        sys.stdout.buffer.write(b"P6\\n3 2\\n255\\n" + bytes([index % 256]) * 18)
+        sys.stdout.buffer.flush()
+    sys.exit(int(sys.argv[3]))
+''')
+
+
+def _producer(tmp_path, frames, exit_code=0):
+    return [sys.executable, "-c", PRODUCER, str(tmp_path / "pid"), str(frames), str(exit_code)]
+
+
+def test_read_pnm_frames():
+    data = io.BytesIO(
+        b"P6\n# comment\n2 1\n255\n" + bytes(range(6))
+        + b"P5 3 2 255\n" + b"\x07" * 6
+    )
+
+    color = read_pnm_frame(data, numpy)
+    gray = read_pnm_frame(data, numpy)
+
+    assert color.shape == (1, 2, 3) and color.dtype == numpy.uint8
+    assert color.tolist() == [[[0, 1, 2], [3, 4, 5]]]
+    assert gray.shape == (2, 3, 1) and int(gray.sum()) == 42
+    assert read_pnm_frame(data, numpy) is None
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"P4\n1 1\n", "不支援"),
+    (b"P6\n2 2\n", "標頭不完整"),
+    (b"P6\n1 1\n65535\n" + bytes(6), "8 位元"),
+    (b"P6\n2 2\n255\n" + bytes(5), "不完整"),
+])
+def test_read_pnm_frame_rejects_bad_data(data, message):
+    with pytest.raises(RasterError, match=message):
+        read_pnm_frame(io.BytesIO(data), numpy)
+
+
+def test_stream_yields_every_page(tmp_path):
+    finished = []
+    stream = RasterStream([_producer(tmp_path, 3), _producer(tmp_path, 2)], 2, on_finish=finished.append)
+
+    frames = [int(frame[0, 0, 0]) for frame in stream]
+
+    assert frames == [0, 1, 2, 0, 1]
+    assert stream.result.success and stream.result.pages == 5
+    assert finished == [stream.result]
+    with pytest.raises(RuntimeError):
+        iter(stream)
+
+
+def test_breaking_out_terminates_the_producer(tmp_path):
+    stream = RasterStream([_producer(tmp_path, 0)], 2)
+
+    for index, _ in enumerate(stream):
+        if index == 3:
+            break
+
+    assert not stream.result.success
+    assert stream.result.pages == 4
+    assert "中止" in stream.result.message
+    pid = int((tmp_path / "pid").read_text())
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("producer is still running")
+
+
+def test_nonzero_exit_fails_the_stream(tmp_path):
+    stream = RasterStream([_producer(tmp_path, 1, exit_code=1), _producer(tmp_path, 1)], 2)
+
+    assert len(list(stream)) == 1
+    assert not stream.result.success
+    assert stream.result.exit_code == 1
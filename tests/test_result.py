@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""工作結果測試"""
+
+import json
+
+from core.ghostscript import GhostscriptWrapper
+from core.result import LOG_TAIL_LINES, JobResult
+
+
+def _result(success=True, **attrs):
+    result = JobResult("compress_pdf", success)
+    for name, value in attrs.items():
+        setattr(result, name, value)
+    return result
+
+
+def test_unpacks_like_the_old_tuple():
+    result = _result(success=False, message="找不到檔案")
+    result.append_log("GPL Ghostscript\n")
+
+    success, output = result
+    assert success is False
+    assert output == "GPL Ghostscript\n\n找不到檔案"
+    assert result[0] is False and result[1] == output
+    assert len(result) == 2
+    assert tuple(result) == result.to_tuple()
+
+
+def test_output_includes_warnings():
+    result = _result()
+    result.warnings.append("線性化檢查未通過")
+    assert result.output == "線性化檢查未通過"
+
+
+def test_log_tail_is_bounded():
+    result = _result()
+    for i in range(LOG_TAIL_LINES + 50):
+        result.append_log(f"Page {i}\n")
+    assert len(result.log_tail) == LOG_TAIL_LINES
+    assert result.output.startswith("Page 50\n")
+
+
+def test_add_aggregates_runs():
+    total = JobResult("split_pdf", success=True)
+    first = _result(exit_code=0, wall_time=1.5, cpu_time=1.0, peak_rss=100, pages=2,
+                    output_bytes=10, output_files=["a.pdf"])
+    first.checks["linearization"] = {"a.pdf": {"valid": True}}
+    second = _result(success=False, exit_code=1, wall_time=0.5, peak_rss=300, pages=None,
+                     output_bytes=5, output_files=["b.pdf"], message="失敗")
+    second.checks["linearization"] = {"b.pdf": {"valid": False}}
+    second.warnings.append("警告")
+    second.details["dedup"] = {"removed": 1}
+
+    total.add(first)
+    total.add(second)
+
+    assert total.success is False
+    assert total.exit_code == 1
+    assert total.wall_time == 2.0
+    assert total.cpu_time == 1.0
+    assert total.peak_rss == 300
+    assert total.pages == 2
+    assert total.output_bytes == 15
+    assert total.output_files == ["a.pdf", "b.pdf"]
+    assert total.message == "失敗"
+    assert set(total.checks["linearization"]) == {"a.pdf", "b.pdf"}
+    assert total.warnings == ["警告"]
+    assert total.details == {"dedup": {"removed": 1}}
+
+
+def test_add_keeps_unknown_measurements_unknown():
+    total = JobResult("merge_pdfs", success=True)
+    total.add(_result())
+    assert total.success is True
+    assert total.cpu_time is None
+    assert total.peak_rss is None
+    assert total.pages is None
+
+
+def test_wrapper_fills_in_sizes(fake_gs, tmp_path):
+    source = tmp_path / "in.pdf"
+    source.write_bytes(b"%PDF-1.4\n" + b"x" * 100)
+    output = tmp_path / "out.pdf"
+
+    result = GhostscriptWrapper().compress_pdf(str(source), str(output))
+
+    assert result.success
+    assert result.operation == "compress_pdf"
+    assert result.exit_code == 0
+    assert result.input_bytes == source.stat().st_size
+    assert result.output_files == [str(output)]
+    assert result.output_bytes == output.stat().st_size
+    assert json.loads(json.dumps(result.to_dict()))["success"] is True
+
+
+def test_add_keeps_exit_code_of_steps_without_ghostscript():
+    result = _result(exit_code=0)
+    result.add(JobResult(success=True))
+    assert result.exit_code == 0
+    result.add(_result(exit_code=2))
+    result.add(_result(exit_code=3))
+    assert result.exit_code == 2
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""選擇性壓縮測試"""
+
+import os
+import random
+import zlib
+
+import pytest
+
+from core.ghostscript import GhostscriptWrapper
+from core.pdf_reader import PdfError, PdfReader
+from core.selective import selective_compress
+from pdf_samples import build_pdf
+
+PAGE = b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 144 144]/Resources<</XObject<</Im0 %d 0 R>>>>>>"
+IMAGE = b"<</Type/XObject/Subtype/Image/Width %d/Height %d/ColorSpace/DeviceGray/BitsPerComponent 8%s>>"
+
+
+def _scan_pdf(path, size=1200):
+    """兩頁 2 英吋見方的頁面：第一頁是 600 dpi 的灰階雜訊圖，第二頁是 8x8 的小圖"""
+    noise = random.Random(1).randbytes(size * size)
+    path.write_bytes(build_pdf({
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[3 0 R 4 0 R]/Count 2>>",
+        3: PAGE % 5,
+        4: PAGE % 6,
+        5: IMAGE % (size, size, b"/Filter/FlateDecode"),
+        6: IMAGE % (8, 8, b""),
+    }, streams={5: zlib.compress(noise, 1), 6: bytes(64)}))
+    return str(path)
+
+
+def test_recompresses_only_oversized_images(tmp_path):
+    path = _scan_pdf(tmp_path / "scan.pdf")
+    output = tmp_path / "out.pdf"
+
+    report = selective_compress(path, str(output))
+
+    assert (report.images_total, report.images_selected, report.images_recompressed) == (2, 1, 1)
+    assert report.pages_touched == {1}
+    assert report.bytes_after == output.stat().st_size < report.bytes_before
+    assert not os.path.exists(str(output) + ".part")
+    with PdfReader(str(output)) as reader:
+        first, second = (reader.resolve(ref)["Resources"]["XObject"]["Im0"] for ref in reader.page_refs())
+        image, small = reader.resolve(first), reader.resolve(second)
+        assert (image.dict["Filter"], image.dict["Width"], image.dict["Height"]) == ("DCTDecode", 300, 300)
+        assert reader.raw_stream_data(small) == bytes(64)
+
+
+def test_page_count_mismatch_leaves_no_output(tmp_path):
+    path = _scan_pdf(tmp_path / "scan.pdf")
+    output = tmp_path / "out.pdf"
+
+    with pytest.raises(PdfError, match="頁數"):
+        selective_compress(path, str(output), expected_pages=3)
+
+    assert os.listdir(tmp_path) == ["scan.pdf"]
+
+
+@pytest.mark.parametrize("gs_pages, success", [("2", True), ("3", False)])
+def test_wrapper_checks_output_against_ghostscript_page_count(fake_gs, tmp_path, monkeypatch, gs_pages, success):
+    monkeypatch.setenv("FAKE_GS_PAGES", gs_pages)
+    path = _scan_pdf(tmp_path / "scan.pdf")
+    output = str(tmp_path / "out.pdf")
+
+    result = GhostscriptWrapper().compress_pdf(path, output, selective=True)
+
+    assert result.success == success
+    assert os.path.exists(output) == success
+    assert not os.path.exists(output + ".part")
+    if not success:
+        assert "頁數" in result.message
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""本機 HTTP 工作服務測試"""
+
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import pytest
+
+from core.server import start_server
+
+
+@pytest.fixture
+def make_server(fake_gs, tmp_path):
+    """啟動服務 (port 0)，測試結束時關閉"""
+    servers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("input_dirs", [str(tmp_path / "inputs")])
+        kwargs.setdefault("work_dir", str(tmp_path / "work"))
+        server, _ = start_server(host="127.0.0.1", port=0, **kwargs)
+        servers.append(server)
+        return server
+
+    (tmp_path / "inputs").mkdir()
+    yield make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _request(server, method, path, body=None, headers=None, token=True):
+    headers = dict(headers or {})
+    if token:
+        headers["Authorization"] = f"Bearer {server.token}"
+    request = urllib.request.Request(server.url + path, data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def _submit_json(server, operation, params, **kwargs):
+    body = json.dumps({"operation": operation, "params": params}).encode("utf-8")
+    status, _, data = _request(
+        server, "POST", "/jobs", body, {"Content-Type": "application/json"}, **kwargs
+    )
+    return status, json.loads(data)
+
+
+def _submit_multipart(server, operation, files, params=None):
+    boundary = uuid.uuid4().hex
+    parts = [("operation", None, operation.encode("utf-8"))]
+    if params is not None:
+        parts.append(("params", None, json.dumps(params).encode("utf-8")))
+    parts.extend(("input_files", name, data) for name, data in files)
+
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (
+            f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode("utf-8")
+            + data + b"\r\n"
+        )
+    body += f"--{boundary}--\r\n".encode("utf-8")
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    status, _, data = _request(server, "POST", "/jobs", body, headers)
+    return status, json.loads(data)
+
+
+def _events(server, job_id):
+    status, headers, data = _request(server, "GET", f"/jobs/{job_id}/events")
+    assert status == 200
+    assert headers["Content-Type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def _input_pdf(tmp_path, name="in.pdf"):
+    path = tmp_path / "inputs" / name
+    path.write_bytes(b"%PDF-1.4\n")
+    return str(path)
+
+
+def test_json_job_streams_events_and_downloads(make_server, tmp_path):
+    server = make_server()
+    status, job = _submit_json(server, "compress_pdf", {"input_file": _input_pdf(tmp_path)})
+    assert status == 202
+
+    events = _events(server, job["id"])
+    statuses = [e["status"] for e in events if e["type"] == "status"]
+    assert statuses[0] == "running"
+    assert statuses[-1] == "done"
+    assert [e["seq"] for e in events] == list(range(len(events)))
+
+    status, _, data = _request(server, "GET", f"/jobs/{job['id']}/files")
+    assert status == 200
+    assert [f["name"] for f in json.loads(data)["files"]] == ["output.pdf"]
+    status, headers, data = _request(server, "GET", f"/jobs/{job['id']}/result")
+    assert status == 200
+    assert headers["Content-Type"] == "application/pdf"
+    assert data.startswith(b"%PDF")
+
+
+def test_multipart_upload(make_server, fake_gs):
+    server = make_server()
+    files = [("a) (w) file (x.pdf", b"%PDF-1.4\na\n"), ("b.pdf", b"%PDF-1.4\nb\n")]
+    status, job = _submit_multipart(server, "merge_pdfs", files, {"output_file": "merged.pdf"})
+    assert status == 202
+
+    events = _events(server, job["id"])
+    assert events[-1] == {"type": "status", "status": "done", "seq": len(events) - 1}
+    status, _, data = _request(server, "GET", f"/jobs/{job['id']}/files/0")
+    assert status == 200
+    assert data.startswith(b"%PDF")
+
+    # 上傳的檔案以編號命名，用戶端的檔名不會傳給 Ghostscript
+    merge = [c["args"] for c in fake_gs() if any(a.startswith("-sOutputFile=") for a in c["args"])]
+    inputs = [a for a in merge[-1] if os.path.basename(a) in ("001.pdf", "002.pdf")]
+    assert len(inputs) == 2
+    assert not any("(w) file" in a for c in fake_gs() for a in c["args"])
+
+
+def test_queue_full_returns_429(make_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_DELAY", "0.5")
+    server = make_server(workers=1, max_queue=2)
+    path = _input_pdf(tmp_path)
+
+    status, first = _submit_json(server, "compress_pdf", {"input_file": path})
+    assert status == 202
+    deadline = time.time() + 10
+    while server.job_queue.get(first["id"]).status == "queued" and time.time() < deadline:
+        time.sleep(0.02)
+
+    results = [_submit_json(server, "compress_pdf", {"input_file": path}) for _ in range(5)]
+    assert [status for status, _ in results] == [202, 202, 429, 429, 429]
+    assert "error" in results[-1][1]
+    # 被拒絕的請求不留下工作資料夾
+    assert len(os.listdir(server.work_dir)) == 3
+
+
+def test_rejects_requests_without_access(make_server, tmp_path):
+    server = make_server()
+    path = _input_pdf(tmp_path)
+
+    assert _submit_json(server, "compress_pdf", {"input_file": path}, token=False)[0] == 401
+    status, _, _ = _request(
+        server, "POST", "/jobs", json.dumps({"operation": "compress_pdf"}).encode("utf-8"),
+        {"Content-Type": "application/json", "Origin": "http://evil.example"}
+    )
+    assert status == 403
+    status, _, _ = _request(
+        server, "POST", "/jobs", json.dumps({"operation": "compress_pdf"}).encode("utf-8"),
+        {"Content-Type": "text/plain"}
+    )
+    assert status == 415
+    outside = tmp_path / "outside.pdf"
+    outside.write_bytes(b"%PDF-1.4\n")
+    assert _submit_json(server, "compress_pdf", {"input_file": str(outside)})[0] == 403
+    params = {"input_file": path, "output_file": "../escape.pdf"}
+    assert _submit_json(server, "compress_pdf", params)[0] == 400
+    assert os.listdir(server.work_dir) == []
+
+
+def test_cancelled_job_removes_its_uploads(make_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_DELAY", "0.5")
+    server = make_server(workers=1)
+
+    status, first = _submit_json(server, "compress_pdf", {"input_file": _input_pdf(tmp_path)})
+    assert status == 202
+    status, queued = _submit_multipart(server, "compress_pdf", [("a.pdf", b"%PDF-1.4\n")])
+    assert status == 202
+    job_dir = os.path.dirname(os.path.dirname(server.job_queue.get(queued["id"]).params["input_file"]))
+    assert os.path.isdir(job_dir)
+
+    status, _, data = _request(server, "DELETE", f"/jobs/{queued['id']}")
+    assert status == 200
+    assert json.loads(data)["status"] == "cancelled"
+    assert not os.path.exists(job_dir)
+    assert _events(server, first["id"])[-1]["status"] == "done"
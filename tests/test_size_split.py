@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""依檔案大小分割測試"""
+
+import os
+
+import pytest
+
+from core.ghostscript import GhostscriptWrapper
+from core.size_split import SizeIndex
+from pdf_samples import build_pdf, page_tree
+
+PAGE = b"<</Type/Page/Parent 2 0 R/Resources<</XObject<</Im0 %d 0 R>>/Font<</F0 3 0 R>>>>>>"
+IMAGE = b"<</Type/XObject/Subtype/Image/Width 100/Height 100/ColorSpace/DeviceGray/BitsPerComponent 8>>"
+
+
+def _sample_pdf(path, pages=4):
+    """每頁一張 10000 bytes 的圖片，所有頁面共用一個 20000 bytes 的字型檔"""
+    objects = {
+        1: b"<</Type/Catalog/Pages 2 0 R>>",
+        2: b"<</Type/Pages/Kids[%s]/Count %d>>" % (
+            b" ".join(b"%d 0 R" % (10 + i) for i in range(pages)), pages
+        ),
+        3: b"<</Type/Font/Subtype/Type1/BaseFont/Foo/FontDescriptor 4 0 R>>",
+        4: b"<</Type/FontDescriptor/FontName/Foo/FontFile 5 0 R>>",
+        5: b"<</Length1 20000>>",
+    }
+    streams = {5: bytes(20000)}
+    for i in range(pages):
+        objects[10 + i] = PAGE % (100 + i)
+        objects[100 + i] = IMAGE
+        streams[100 + i] = bytes(10000)
+    path.write_bytes(build_pdf(objects, streams=streams))
+    return str(path)
+
+
+def test_shared_objects_are_counted_once_per_part(tmp_path):
+    index = SizeIndex(_sample_pdf(tmp_path / "in.pdf"))
+
+    assert index.page_count == 4
+    one, two = index.part_bytes(1, 1), index.part_bytes(1, 2)
+    assert 30000 < one < 32000 + 4096 + 1000
+    assert 10000 < two - one < 11000  # 第二頁只多了頁面與圖片，字型不重複計算
+
+
+def test_plan_fills_parts_up_to_the_limit(tmp_path):
+    index = SizeIndex(_sample_pdf(tmp_path / "in.pdf"))
+
+    parts = index.plan(index.part_bytes(1, 2))
+
+    assert [(first, last) for first, last, _ in parts] == [(1, 2), (3, 4)]
+    assert [size for _, _, size in parts] == [index.part_bytes(1, 2), index.part_bytes(3, 4)]
+    assert index.plan(10 ** 9) == [(1, 4, index.part_bytes(1, 4))]
+    assert [(f, l) for f, l, _ in index.plan(index.part_bytes(1, 3), 2, 4)] == [(2, 4)]
+
+
+def test_plan_gives_oversized_pages_their_own_part(tmp_path):
+    index = SizeIndex(_sample_pdf(tmp_path / "in.pdf"))
+
+    parts = index.plan(1000)
+
+    assert [(first, last) for first, last, _ in parts] == [(1, 1), (2, 2), (3, 3), (4, 4)]
+    assert all(size > 1000 for _, _, size in parts)
+    assert index.plan(1000, 3, 2) == []
+
+
+def test_split_by_size_writes_the_planned_parts(fake_gs, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GS_PAGES", "4")
+    path = _sample_pdf(tmp_path / "in.pdf")
+    max_bytes = int(SizeIndex(path).part_bytes(1, 2) / 0.9) + 1
+
+    result = GhostscriptWrapper().split_pdf_by_size(path, str(tmp_path / "out.pdf"), max_bytes)
+
+    assert result.success
+    assert result.output_files == [str(tmp_path / "out_001.pdf"), str(tmp_path / "out_002.pdf")]
+    assert all(os.path.exists(output) for output in result.output_files)
+    assert result.pages == 4
+
+
+@pytest.mark.parametrize("pdf_pages, gs_pages, message", [(2, "3", "不符"), (0, "0", "頁面")])
+def test_split_by_size_fails_when_pages_are_missing(fake_gs, tmp_path, monkeypatch, pdf_pages, gs_pages, message):
+    monkeypatch.setenv("FAKE_GS_PAGES", gs_pages)
+    path = tmp_path / "in.pdf"
+    path.write_bytes(build_pdf(page_tree(pdf_pages)))
+
+    result = GhostscriptWrapper().split_pdf_by_size(str(path), str(tmp_path / "out.pdf"), 10 ** 6)
+
+    assert not result.success
+    assert message in result.message
+    assert result.output_files == []
+    assert sorted(os.listdir(tmp_path)) == ["bin", "gs-calls.jsonl", "in.pdf", "running"]
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""熱資料夾監看測試"""
+
+import json
+import time
+
+from core.governor import ResourceGovernor
+from core.history import JobHistory
+from core.watcher import FolderRule, FolderWatcher, ProcessedIndex
+
+
+# 掃描器或使用者取的檔名，不能被當成 PostScript 程式碼執行
+HOSTILE_NAME = "a) (w) file closefile (b.pdf"
+
+
+def _run_watcher(watcher, timeout=10.0):
+    watcher.job_queue.start()
+    try:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            watcher.poll_once()
+            if watcher.processed_total + watcher.failed_total >= 1:
+                break
+            time.sleep(0.05)
+    finally:
+        watcher.job_queue.stop()
+
+
+def test_watcher_hot_folder_with_hostile_name(fake_gs, tmp_path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    path = in_dir / HOSTILE_NAME
+    path.write_bytes(b"%PDF-1.4\n")
+    rule = FolderRule(str(in_dir), str(tmp_path / "out"), "compress_pdf")
+    watcher = FolderWatcher(
+        [rule],
+        index_file=str(tmp_path / "index.jsonl"),
+        stable_seconds=0,
+        governor=ResourceGovernor(max_memory_mb=4096, max_cpu=2),
+        history=JobHistory(str(tmp_path / "history.db")),
+    )
+
+    _run_watcher(watcher)
+
+    assert watcher.processed_total == 1
+    assert not (tmp_path / "pwned.pdf").exists()
+    probes = [call["args"] for call in fake_gs() if "-c" in call["args"]]
+    assert probes
+    for args in probes:
+        assert HOSTILE_NAME not in args[args.index("-c") + 1]
+        assert f"-sGSGUIInputFile={path}" in args
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_processed_index_appends_and_reloads(tmp_path):
+    index_file = tmp_path / "index.jsonl"
+    files = []
+    for i in range(3):
+        path = tmp_path / f"{i}.pdf"
+        path.write_bytes(b"x")
+        files.append(str(path))
+
+    index = ProcessedIndex(str(index_file))
+    for path in files:
+        index.record(path, 1, 1.0, "digest")
+    assert [line["path"] for line in _lines(index_file)] == files
+
+    index.record(files[0], 1, 2.0, "digest")
+    assert len(_lines(index_file)) == 4
+
+    reloaded = ProcessedIndex(str(index_file))
+    assert reloaded.is_processed(files[0], 1, 2.0)
+    assert reloaded.is_processed(files[1], 1, 1.0)
+    assert not reloaded.is_processed(files[2], 2, 1.0)
+
+
+def test_processed_index_compacts_and_prunes(tmp_path):
+    index_file = tmp_path / "index.jsonl"
+    kept = tmp_path / "kept.pdf"
+    kept.write_bytes(b"x")
+    index = ProcessedIndex(str(index_file), compact_slack=10)
+
+    for i in range(20):
+        index.record(str(tmp_path / f"gone-{i}.pdf"), 1, float(i), "digest")
+        index.record(str(kept), 1, float(i), "digest")
+
+    lines = _lines(index_file)
+    assert len(lines) < 40
+    assert str(kept) in index.entries
+    assert len(index.entries) < 21
+    assert {line["path"] for line in lines} == set(index.entries)